@@ -3,6 +3,10 @@ ASGI config for assurement project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Required for the notification stream (``/notifications/stream/``), e.g.:
+
+    gunicorn assurement.asgi:application -k uvicorn.workers.UvicornWorker
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
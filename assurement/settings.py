@@ -31,11 +31,14 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'insurance_web.middleware.MetricsMiddleware',
+    'insurance_web.middleware.QueryInspectorMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'insurance_web.middleware.ProfileAuthenticationMiddleware',
+    'insurance_web.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django.contrib.admindocs.middleware.XViewMiddleware',
@@ -54,17 +57,20 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'insurance_web.context_processors.notifications',
+                'insurance_web.context_processors.roles',
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'assurement.wsgi.application'
+ASGI_APPLICATION = 'assurement.asgi.application'
 
 import sys
 is_testing = 'test' in sys.argv or 'pytest' in sys.modules or os.getenv('DJANGO_TESTING') == '1'
 
-if is_testing:
+# Tests sur SQLite en mémoire, sauf TEST_POSTGRESQL=1 (tests marqués postgresql)
+if is_testing and os.getenv('TEST_POSTGRESQL', 'False').lower() not in ('true', '1', 'yes'):
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
@@ -83,6 +89,168 @@ else:
         }
     }
 
+# Diffusion temps réel des notifications (SSE)
+NOTIFICATION_BROKER = os.getenv(
+    'NOTIFICATION_BROKER',
+    'insurance_web.realtime.brokers.InMemoryBroker' if is_testing else 'insurance_web.realtime.brokers.PostgresBroker',
+)
+NOTIFICATION_STREAM_HEARTBEAT = int(os.getenv('NOTIFICATION_STREAM_HEARTBEAT', '15'))
+NOTIFICATION_STREAM_MAX_AGE = int(os.getenv('NOTIFICATION_STREAM_MAX_AGE', '300'))
+
+# Rétention des notifications (jours) — purge via `manage.py prune_notifications`
+NOTIFICATION_RETENTION_DAYS = {
+    'default': 180,
+    'appointment_reminder': 30,
+    'appointment_request': 90,
+}
+NOTIFICATION_READ_RETENTION_DAYS = 30
+
+# Tâches de fond (django.tasks) : file en base consommée par `manage.py run_tasks`.
+# TASKS_BACKEND=insurance_web.tasks.backends.InProcessBackend exécute les tâches
+# dans un pool de threads du processus web (pas de worker séparé).
+TASKS = {
+    'default': {
+        'BACKEND': os.getenv(
+            'TASKS_BACKEND',
+            'django.tasks.backends.immediate.ImmediateBackend' if is_testing else 'insurance_web.tasks.backends.DatabaseBackend',
+        ),
+        'OPTIONS': {
+            'MAX_ATTEMPTS': int(os.getenv('TASKS_MAX_ATTEMPTS', '3')),
+            'RETRY_BACKOFF': int(os.getenv('TASKS_RETRY_BACKOFF', '10')),
+            'WORKERS': int(os.getenv('TASKS_WORKERS', '4')),
+        },
+    },
+}
+
+# Inspection des requêtes SQL par requête HTTP (en-têtes X-Query-Count, alertes N+1).
+# Désactivée hors DEBUG sauf QUERY_INSPECTOR=1 ; les budgets sont vérifiés par
+# insurance_web/tests/test_query_budgets.py.
+QUERY_INSPECTOR = {
+    'ENABLED': os.getenv('QUERY_INSPECTOR', str(DEBUG)).lower() in ('true', '1', 'yes'),
+    'REPEAT_THRESHOLD': int(os.getenv('QUERY_INSPECTOR_REPEAT_THRESHOLD', '5')),
+}
+QUERY_BUDGETS = {
+    'insurance_web:conseiller_dashboard': 10,
+    'insurance_web:conseiller_calendar': 8,
+    'insurance_web:conseiller_clients': 6,
+    'insurance_web:my_appointments': 8,
+}
+
+# Profilage à la demande (en-tête X-Profile pour le staff, utilisateurs listés ou
+# échantillonnage) ; profils cProfile (.prof) ou piles échantillonnées (.folded)
+# écrits dans logs/profiles/.
+PROFILING = {
+    'ENABLED': os.getenv('PROFILING_ENABLED', 'False').lower() in ('true', '1', 'yes'),
+    'HEADER': 'X-Profile',
+    'USERS': [u for u in os.getenv('PROFILING_USERS', '').split(',') if u],
+    'SAMPLE_RATE': float(os.getenv('PROFILING_SAMPLE_RATE', '0')),
+    'OUTPUT': os.getenv('PROFILING_OUTPUT', 'cprofile'),
+    'DIR': BASE_DIR / 'logs' / 'profiles',
+}
+
+# Métriques Prometheus (/metrics) : chaque processus écrit ses valeurs dans
+# METRICS_DIR, fusionnées à la lecture. Accès avec METRICS_TOKEN (Bearer) ou
+# depuis METRICS_ALLOWED_IPS.
+METRICS = {
+    'ENABLED': os.getenv('METRICS_ENABLED', 'True').lower() in ('true', '1', 'yes'),
+    'DIR': None if is_testing else os.getenv('METRICS_DIR', str(BASE_DIR / 'logs' / 'metrics')),
+    'FLUSH_INTERVAL': int(os.getenv('METRICS_FLUSH_INTERVAL', '5')),
+    'TOKEN': os.getenv('METRICS_TOKEN', ''),
+    'ALLOWED_IPS': [ip for ip in os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip],
+}
+
+# Caches partagés par tous les processus de l'hôte (workers gunicorn, worker de
+# tâches, scheduler via le volume CACHE_DIR) : fichiers SQLite en WAL, sans
+# service externe. Le cache 'sessions' doit être partagé (une session invalidée
+# par un worker ne doit plus être servie par un autre).
+CACHE_DIR = os.getenv('CACHE_DIR', str(BASE_DIR / 'cache'))
+if is_testing:
+    CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'sessions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'sessions'},
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'insurance_web.cache_backends.SQLiteCache',
+            'LOCATION': os.path.join(CACHE_DIR, 'default.sqlite3'),
+            'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '50000'))},
+        },
+        'sessions': {
+            'BACKEND': 'insurance_web.cache_backends.SQLiteCache',
+            'LOCATION': os.path.join(CACHE_DIR, 'sessions.sqlite3'),
+            'TIMEOUT': None,
+            'OPTIONS': {'MAX_ENTRIES': int(os.getenv('SESSION_CACHE_MAX_ENTRIES', '100000'))},
+        },
+    }
+
+# Cache des pages anonymes (accueil, connexion, inscription) et du fragment
+# de la liste des conseillers ; invalidé à l'ajout d'un conseiller ou au
+# changement de rôle (insurance_web/utils/page_cache.py).
+PAGE_CACHE = {
+    'ENABLED': not is_testing and os.getenv('PAGE_CACHE_ENABLED', 'True').lower() in ('true', '1', 'yes'),
+    'TIMEOUT': int(os.getenv('PAGE_CACHE_TIMEOUT', '300')),
+    'CACHE': 'default',
+}
+
+# Instantané colonnaire des prédictions/profils lu par les statistiques admin,
+# mis à jour par `manage.py refresh_analytics_snapshot` (scheduler). Les
+# prédictions plus récentes que WATERMARK_LAG secondes attendent le passage
+# suivant (transactions encore ouvertes).
+ANALYTICS = {
+    'SNAPSHOT_DIR': os.getenv('ANALYTICS_SNAPSHOT_DIR', os.path.join(CACHE_DIR, 'analytics')),
+    'WATERMARK_LAG': int(os.getenv('ANALYTICS_WATERMARK_LAG', '60')),
+}
+
+# Stockage des prédictions : les variables sont enregistrées une fois par
+# profil distinct (PredictionFeatures), voir prediction_storage_service.
+# - COALESCE_WINDOW : une prédiction identique (même client, même auteur, mêmes
+#   variables, même montant) refaite moins de COALESCE_WINDOW secondes après la
+#   précédente incrémente son repeat_count au lieu d'insérer une ligne
+#   (0 : pas de regroupement). L'historique et les statistiques comptent alors
+#   des lignes ; l'export inclut repeat_count.
+# Regroupement de l'existant : `manage.py coalesce_predictions`.
+PREDICTION_STORAGE = {
+    'COALESCE_WINDOW': int(os.getenv('PREDICTION_COALESCE_WINDOW', '0')),
+}
+
+# Évaluation en ombre d'un modèle candidat (insurance_web/services/shadow_service.py) :
+# une fraction SAMPLE_RATE des entrées de calculate_insurance_premium est notée
+# en arrière-plan par le modèle MODEL_PATH, les écarts sont agrégés en mémoire
+# puis ajoutés à la table ShadowScore toutes les FLUSH_INTERVAL secondes.
+# Désactivé sans MODEL_PATH. Rapport : `manage.py shadow_report`.
+SHADOW_MODEL = {
+    'MODEL_PATH': os.getenv('SHADOW_MODEL_PATH', ''),
+    'SAMPLE_RATE': float(os.getenv('SHADOW_SAMPLE_RATE', '0.1')),
+    'QUEUE_SIZE': int(os.getenv('SHADOW_QUEUE_SIZE', '1000')),
+    'BATCH_SIZE': int(os.getenv('SHADOW_BATCH_SIZE', '200')),
+    'FLUSH_INTERVAL': int(os.getenv('SHADOW_FLUSH_INTERVAL', '30')),
+}
+
+# Suivi de dérive (insurance_web/services/drift_service.py) : histogrammes à
+# intervalles fixes des entrées de calculate_insurance_premium et des primes
+# prédites, tenus en mémoire par processus et ajoutés à la table DriftHistogram
+# toutes les FLUSH_INTERVAL secondes. PSI calculé contre REFERENCE_PATH (construit
+# par `manage.py build_drift_reference`). Rapport : `manage.py drift_report`.
+DRIFT_MONITOR = {
+    'ENABLED': os.getenv('DRIFT_MONITOR_ENABLED', 'True').lower() in ('true', '1', 'yes'),
+    'FLUSH_INTERVAL': int(os.getenv('DRIFT_FLUSH_INTERVAL', '60')),
+    'REFERENCE_PATH': os.getenv('DRIFT_REFERENCE_PATH', str(BASE_DIR / 'model' / 'drift_reference.json')),
+    'BACKGROUND': not is_testing,
+}
+
+# Sessions : SESSION_MODE=db | cached_db | signed_cookies | hybrid
+# (hybrid : cookie signé pour les anonymes, cached_db une fois connecté).
+# Purge des sessions expirées via `manage.py purge_sessions`.
+SESSION_MODE = os.getenv('SESSION_MODE', 'cached_db')
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+    'hybrid': 'insurance_web.sessions',
+}[SESSION_MODE]
+SESSION_CACHE_ALIAS = 'sessions'
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -163,6 +331,9 @@ LOGGING = {
             'format': '{levelname} {asctime} [{name}] {pathname}:{lineno} - {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'insurance_web.log_handlers.JsonFormatter',
+        },
     },
     'filters': {
         'require_debug_false': {
@@ -177,7 +348,7 @@ LOGGING = {
             'level': 'INFO',
             'class': 'logging.StreamHandler',
             'stream': sys.stdout,
-            'formatter': 'simple',
+            'formatter': os.getenv('LOG_CONSOLE_FORMAT', 'simple'),
         },
         'file': {
             'level': 'INFO',
@@ -185,7 +356,7 @@ LOGGING = {
             'filename': BASE_DIR / 'logs' / 'insurance_web.log',
             'maxBytes': 1024 * 1024 * 10,  # 10 MB
             'backupCount': 5,
-            'formatter': 'detailed',
+            'formatter': 'json',
         },
         'error_file': {
             'level': 'ERROR',
@@ -193,7 +364,14 @@ LOGGING = {
             'filename': BASE_DIR / 'logs' / 'errors.log',
             'maxBytes': 1024 * 1024 * 10,  # 10 MB
             'backupCount': 5,
-            'formatter': 'detailed',
+            'formatter': 'json',
+        },
+        # Les handlers ci-dessus sont appelés par le thread du QueueListener,
+        # démarré par InsuranceWebConfig.ready() : la requête ne fait qu'empiler
+        'queue': {
+            'class': 'insurance_web.log_handlers.DeferredQueueHandler',
+            'handlers': ['console', 'file', 'error_file'],
+            'respect_handler_level': True,
         },
         'mail_admins': {
             'level': 'ERROR',
@@ -204,7 +382,7 @@ LOGGING = {
     },
     'loggers': {
         'django': {
-            'handlers': ['console', 'file'],
+            'handlers': ['queue'],
             'level': 'INFO',
             'propagate': False,
         },
@@ -219,7 +397,7 @@ LOGGING = {
             'propagate': False,
         },
         'insurance_web': {
-            'handlers': ['console', 'file', 'error_file'],
+            'handlers': ['queue'],
             'level': 'DEBUG' if DEBUG else 'INFO',
             'propagate': False,
         },
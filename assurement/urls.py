@@ -2,8 +2,11 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf.urls.i18n import i18n_patterns
 
+from insurance_web.views import MetricsView
+
 urlpatterns = [
     path('i18n/', include('django.conf.urls.i18n')),
+    path('metrics', MetricsView.as_view(), name='metrics'),
 ]
 
 urlpatterns += i18n_patterns(
@@ -2,3 +2,16 @@ import os
 
 os.environ['DJANGO_TESTING'] = '1'
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'assurement.settings')
+
+import pytest
+
+
+def pytest_collection_modifyitems(config, items):
+    # Tests du comportement propre à PostgreSQL : lancés avec TEST_POSTGRESQL=1
+    from django.db import connection
+    if connection.vendor == 'postgresql':
+        return
+    skip = pytest.mark.skip(reason="PostgreSQL requis (TEST_POSTGRESQL=1)")
+    for item in items:
+        if 'postgresql' in item.keywords:
+            item.add_marker(skip)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Profile, Appointment, ConseillerUnavailability, PricingConfiguration
+from .models import Profile, Appointment, AdvisorClient, ConseillerUnavailability, PricingConfiguration, NotificationArchive, QueuedTask
 
 
 @admin.register(Profile)
@@ -19,6 +19,14 @@ class AppointmentAdmin(admin.ModelAdmin):
     date_hierarchy = 'date_time'
 
 
+@admin.register(AdvisorClient)
+class AdvisorClientAdmin(admin.ModelAdmin):
+    list_display = ('conseiller', 'client', 'appointment_count', 'first_appointment_at', 'last_appointment_at')
+    list_filter = ('conseiller',)
+    search_fields = ('conseiller__email', 'client__email', 'client__first_name', 'client__last_name')
+    readonly_fields = ('appointment_count', 'first_appointment_at', 'last_appointment_at')
+
+
 @admin.register(ConseillerUnavailability)
 class ConseillerUnavailabilityAdmin(admin.ModelAdmin):
     list_display = ('conseiller', 'start_datetime', 'end_datetime', 'reason', 'created_at')
@@ -27,6 +35,24 @@ class ConseillerUnavailabilityAdmin(admin.ModelAdmin):
     date_hierarchy = 'start_datetime'
 
 
+@admin.register(NotificationArchive)
+class NotificationArchiveAdmin(admin.ModelAdmin):
+    list_display = ('notification_id', 'user', 'type', 'read', 'created_at', 'archived_at')
+    list_filter = ('type', 'read')
+    search_fields = ('user__email', 'message')
+    readonly_fields = ('archived_at',)
+    date_hierarchy = 'created_at'
+
+
+@admin.register(QueuedTask)
+class QueuedTaskAdmin(admin.ModelAdmin):
+    list_display = ('task_path', 'queue_name', 'status', 'attempts', 'duration_ms', 'enqueued_at', 'finished_at')
+    list_filter = ('status', 'queue_name', 'task_path')
+    search_fields = ('task_path', 'last_error')
+    readonly_fields = ('enqueued_at', 'started_at', 'last_attempted_at', 'finished_at', 'duration_ms', 'worker_id')
+    date_hierarchy = 'enqueued_at'
+
+
 @admin.register(PricingConfiguration)
 class PricingConfigurationAdmin(admin.ModelAdmin):
     list_display = ('monthly_base_fee', 'additional_charges_percentage', 'is_active', 'updated_at')
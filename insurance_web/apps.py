@@ -3,3 +3,13 @@ from django.apps import AppConfig
 
 class InsuranceWebConfig(AppConfig):
     name = 'insurance_web'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from .log_handlers import start_queue_listeners
+        from .utils.queries import install_query_counter
+        # Compteur de requêtes SQL de MetricsMiddleware, posé sur chaque connexion
+        connection_created.connect(install_query_counter)
+        # Les écritures de fichiers de log se font dans le thread du QueueListener
+        start_queue_listeners()
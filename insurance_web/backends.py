@@ -1,15 +1,99 @@
+import hashlib
+
+from django.conf import settings
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth.models import User
-from django.db.models import Q
+from django.core.cache import cache
+from django.db.models.functions import Lower
+
+from .metrics import record_cache_lookup
+
+# Durée de vie de l'association identifiant de connexion -> id utilisateur
+LOGIN_CACHE_TIMEOUT = 300
+
+
+def normalize_email(email):
+    """Forme canonique d'un email : sans espaces, en minuscules (clé de l'index unique)."""
+    return (email or '').strip().lower()
+
+
+def find_user_by_email(email):
+    """
+    Utilisateur dont l'email normalisé vaut ``email``, ou None.
+
+    Le filtre porte sur ``LOWER(email)`` pour utiliser l'index unique
+    ``auth_user_email_lower_uniq`` (migration 0016).
+    """
+    email = normalize_email(email)
+    if not email:
+        return None
+    return (
+        User._default_manager.alias(email_key=Lower('email'))
+        .filter(email_key=email)
+        .order_by('pk')
+        .first()
+    )
+
+
+def _login_cache_key(identifier):
+    digest = hashlib.sha256(identifier.encode('utf-8')).hexdigest()
+    return f'auth:login:{digest}'
+
+
+def _matches(user, identifier):
+    return normalize_email(user.email) == normalize_email(identifier) or user.username == identifier
+
+
+def find_login_user(identifier):
+    """
+    Utilisateur correspondant à l'identifiant saisi à la connexion (email, sinon username).
+
+    L'id trouvé est mis en cache : une connexion répétée ne fait plus qu'une
+    lecture par clé primaire. L'utilisateur relu est revérifié contre
+    l'identifiant, si bien qu'un email ou un username modifié invalide l'entrée.
+    """
+    key = _login_cache_key(identifier)
+    user_id = cache.get(key)
+    if user_id is not None:
+        user = User._default_manager.filter(pk=user_id).first()
+        if user is not None and _matches(user, identifier):
+            record_cache_lookup('login_user', hit=True)
+            return user
+        cache.delete(key)
+    record_cache_lookup('login_user', hit=False)
+
+    user = find_user_by_email(identifier) if '@' in identifier else None
+    if user is None:
+        user = User._default_manager.filter(username=identifier).first()
+    if user is not None:
+        cache.set(key, user.pk, getattr(settings, 'LOGIN_CACHE_TIMEOUT', LOGIN_CACHE_TIMEOUT))
+    return user
 
 
 class EmailBackend(ModelBackend):
+    """Connexion par email (normalisé) ou, à défaut, par nom d'utilisateur."""
+
     def authenticate(self, request, username=None, password=None, **kwargs):
-        try:
-            user = User.objects.get(Q(email=username) | Q(username=username))
-        except User.DoesNotExist:
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
             return None
-        
+
+        user = find_login_user(username.strip())
+        if user is None:
+            # Hache quand même le mot de passe : un identifiant inconnu coûte
+            # autant qu'un mauvais mot de passe (pas de canal temporel)
+            User().set_password(password)
+            return None
+
         if user.check_password(password) and self.user_can_authenticate(user):
             return user
         return None
+
+    def get_user(self, user_id):
+        """Utilisateur de la session, chargé avec son profil en une seule requête (jointure)."""
+        try:
+            user = User._default_manager.select_related('profile').get(pk=user_id)
+        except User.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,41 @@
+"""
+Micro-benchmarks lancés par ``manage.py benchmark <nom>``.
+
+Chaque module expose ``run(iterations)`` qui retourne une liste de
+``BenchmarkResult`` ; la commande se charge de l'affichage.
+"""
+import time
+from dataclasses import dataclass
+
+BENCHMARKS = {
+    'logging': 'insurance_web.benchmarks.logging_overhead',
+    'cache': 'insurance_web.benchmarks.cache',
+    'login': 'insurance_web.benchmarks.login',
+    'sessions': 'insurance_web.benchmarks.sessions',
+    'export': 'insurance_web.benchmarks.export',
+    'sensitivity': 'insurance_web.benchmarks.sensitivity',
+}
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    iterations: int
+    seconds: float
+    note: str = ''
+
+    @property
+    def per_op_us(self):
+        return self.seconds / self.iterations * 1e6 if self.iterations else 0.0
+
+    @property
+    def ops_per_second(self):
+        return self.iterations / self.seconds if self.seconds else float('inf')
+
+
+def time_calls(func, iterations):
+    """Durée totale (s) de ``iterations`` appels à ``func``."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return time.perf_counter() - start
@@ -0,0 +1,45 @@
+"""
+Coût par opération des backends de cache : LocMem (par processus), fichiers
+(``FileBasedCache``) et ``SQLiteCache`` (partagé, WAL).
+
+Opérations : ``get`` d'une clé présente, ``get`` manquant, ``set`` d'un petit
+dictionnaire et ``incr``. Seuls les deux derniers backends sont cohérents
+entre workers ; LocMem sert de référence.
+"""
+import tempfile
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from ..cache_backends import SQLiteCache
+from . import BenchmarkResult, time_calls
+
+VALUE = {'client_id': 42, 'premium': 1234.56, 'labels': ['a', 'b', 'c']}
+
+
+def _backends(directory):
+    params = {'OPTIONS': {'MAX_ENTRIES': 100000}}
+    return {
+        'locmem': LocMemCache('benchmark', params),
+        'file': FileBasedCache(f'{directory}/file', params),
+        'sqlite': SQLiteCache(f'{directory}/cache.sqlite3', params),
+    }
+
+
+def run(iterations=5000):
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for name, cache in _backends(directory).items():
+            cache.set('hit', VALUE)
+            cache.set('counter', 0)
+            counter = iter(range(iterations))
+            operations = {
+                'get hit': lambda: cache.get('hit'),
+                'get miss': lambda: cache.get('missing'),
+                'set': lambda: cache.set(f'key-{next(counter)}', VALUE),
+                'incr': lambda: cache.incr('counter'),
+            }
+            for operation, func in operations.items():
+                results.append(BenchmarkResult(f'{name} {operation}', iterations, time_calls(func, iterations)))
+            cache.clear()
+    return results
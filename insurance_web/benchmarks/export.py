@@ -0,0 +1,66 @@
+"""
+Débit et mémoire de l'export en flux (``services/export_service.py``).
+
+Les tuples sont générés à la volée avec la forme exacte de ``values_list``
+(pas de base de données) : on mesure la sérialisation CSV / JSONL et la
+compression gzip sur 5 millions de lignes par défaut. La note donne le
+volume produit et la hausse du pic de mémoire résidente du processus, qui
+doit rester de l'ordre de quelques Mo quel que soit le nombre de lignes.
+"""
+import resource
+import sys
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from ..services.export_service import EXPORTS, csv_stream, gzip_stream, jsonl_stream
+from . import BenchmarkResult
+
+CASES = (
+    ('predictions', 'csv', False),
+    ('predictions', 'jsonl', False),
+    ('predictions', 'csv', True),
+    ('appointments', 'csv', False),
+)
+
+
+def _values(kind, count):
+    created = datetime(2024, 1, 1, 9, 30, tzinfo=timezone.utc)
+    if kind == 'predictions':
+        for i in range(count):
+            yield (i, created, Decimal('4321.87'), 'Jean', 'Dupont', 'jean@example.com',
+                   'Marie', 'Martin', 'marie@example.com', 40, 'male', Decimal('25.10'), 2, 'no', 'northeast')
+    else:
+        for i in range(count):
+            yield (i, created, 60, 'confirmed', 'Jean', 'Dupont', 'jean@example.com',
+                   'Marie', 'Martin', 'marie@example.com', 'Bilan annuel', created)
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en Ko sous Linux, en octets sous macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run(iterations=5_000_000):
+    results = []
+    for kind, fmt, compress in CASES:
+        spec = EXPORTS[kind]
+        writer = csv_stream if fmt == 'csv' else jsonl_stream
+        stream = writer(spec.columns, map(spec.to_row, _values(kind, iterations)))
+        if compress:
+            stream = gzip_stream(stream)
+
+        rss_before = _peak_rss_mb()
+        written = 0
+        start = time.perf_counter()
+        for chunk in stream:
+            written += len(chunk)
+        seconds = time.perf_counter() - start
+        results.append(BenchmarkResult(
+            f"{kind} {fmt}{'.gz' if compress else ''}",
+            iterations,
+            seconds,
+            note=f'{written / 1e6:.0f} Mo, pic RSS +{_peak_rss_mb() - rss_before:.1f} Mo',
+        ))
+    return results
@@ -0,0 +1,85 @@
+"""
+Coût du logging sur le thread de la requête, par réservation.
+
+Une réservation émet les mêmes enregistrements que le parcours réel
+(``log_appointment``, notification créée, email envoyé). On compare :
+
+- ``sync`` : handlers console + fichiers appelés directement (configuration
+  historique, formatter texte) ;
+- ``queued`` : ``DeferredQueueHandler`` + ``QueueListener`` et formatter JSON,
+  la colonne « drain » donnant le temps mis par le listener pour vider la file.
+"""
+import io
+import logging
+import logging.handlers
+import os
+import queue
+import tempfile
+import time
+from types import SimpleNamespace
+
+from django.utils import timezone
+
+from ..log_handlers import DeferredQueueHandler, JsonFormatter
+from ..utils.logging import log_appointment, log_info, logger
+from . import BenchmarkResult, time_calls
+
+
+def _booking_logs(appointment):
+    log_appointment(appointment, 'created')
+    log_info(
+        "Notification created",
+        extra={'notification_id': 1, 'user_id': appointment.conseiller.id, 'notification_type': 'appointment_request'},
+    )
+    log_info(
+        "Appointment request email sent to %s", 'conseiller@example.com',
+        extra={'appointment_id': appointment.id, 'recipient_id': appointment.conseiller.id},
+    )
+
+
+def _handlers(directory, formatter):
+    console = logging.StreamHandler(io.StringIO())
+    console.setFormatter(logging.Formatter('{levelname} {asctime} {message}', style='{'))
+    file_handler = logging.handlers.RotatingFileHandler(os.path.join(directory, 'app.log'), maxBytes=10 * 1024 * 1024)
+    error_handler = logging.handlers.RotatingFileHandler(os.path.join(directory, 'errors.log'), maxBytes=10 * 1024 * 1024)
+    error_handler.setLevel(logging.ERROR)
+    for handler in (file_handler, error_handler):
+        handler.setFormatter(formatter)
+    return [console, file_handler, error_handler]
+
+
+def run(iterations=5000):
+    appointment = SimpleNamespace(
+        id=1,
+        conseiller=SimpleNamespace(id=2),
+        client=SimpleNamespace(id=3),
+        date_time=timezone.now(),
+    )
+    detailed = logging.Formatter('{levelname} {asctime} [{name}] {pathname}:{lineno} - {message}', style='{')
+    saved = (logger.handlers[:], logger.level, logger.propagate)
+    results = []
+    try:
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        with tempfile.TemporaryDirectory() as directory:
+            handlers = _handlers(directory, detailed)
+            logger.handlers = handlers
+            seconds = time_calls(lambda: _booking_logs(appointment), iterations)
+            results.append(BenchmarkResult('sync (texte)', iterations, seconds))
+            for handler in handlers:
+                handler.close()
+
+            handlers = _handlers(directory, JsonFormatter())
+            listener = logging.handlers.QueueListener(queue.SimpleQueue(), *handlers, respect_handler_level=True)
+            logger.handlers = [DeferredQueueHandler(listener.queue)]
+            listener.start()
+            seconds = time_calls(lambda: _booking_logs(appointment), iterations)
+            drain_start = time.perf_counter()
+            listener.stop()
+            drain = time.perf_counter() - drain_start
+            results.append(BenchmarkResult('queued (JSON)', iterations, seconds, note=f'drain {drain * 1000:.0f} ms'))
+            for handler in handlers:
+                handler.close()
+    finally:
+        logger.handlers, logger.level, logger.propagate = saved
+    return results
@@ -0,0 +1,64 @@
+"""
+Débit de connexion de ``EmailBackend.authenticate`` sous concurrence.
+
+Un compte temporaire est créé (puis supprimé) dans la base configurée. Pour
+1 puis ``THREADS`` threads, on mesure :
+
+- ``known`` : bon email / bon mot de passe (id en cache après le premier appel) ;
+- ``unknown`` : email inexistant, le hash factice doit coûter autant ;
+- ``wrong password`` : compte existant, mauvais mot de passe.
+
+Le hachage PBKDF2 libère le GIL : le débit doit croître avec les threads
+jusqu'au nombre de cœurs.
+"""
+import os
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.db import connection
+
+from ..backends import EmailBackend
+from . import BenchmarkResult
+
+THREADS = 4
+PASSWORD = 'benchmark-password'
+
+
+def _concurrent(func, iterations, threads):
+    per_thread = max(1, iterations // threads)
+
+    def worker():
+        try:
+            for _ in range(per_thread):
+                func()
+        finally:
+            connection.close()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return per_thread * threads, time.perf_counter() - start
+
+
+def run(iterations=40):
+    backend = EmailBackend()
+    email = f'benchmark-login-{os.getpid()}@example.com'
+    user = User.objects.create_user(username=f'benchmark-login-{os.getpid()}', email=email, password=PASSWORD)
+    cases = {
+        'known': lambda: backend.authenticate(None, username=email, password=PASSWORD),
+        'unknown': lambda: backend.authenticate(None, username=f'missing-{email}', password=PASSWORD),
+        'wrong password': lambda: backend.authenticate(None, username=email, password='wrong'),
+    }
+    results = []
+    try:
+        for threads in (1, THREADS):
+            for name, func in cases.items():
+                done, seconds = _concurrent(func, iterations, threads)
+                results.append(BenchmarkResult(f'{name} x{threads}', done, seconds))
+    finally:
+        user.delete()
+    return results
@@ -0,0 +1,41 @@
+"""
+Latence de l'analyse de sensibilité (``services/sensitivity_service.py``).
+
+Compare une grille d'environ 1000 points (IMC x fumeur x âge) prédite en un
+seul lot à la même grille prédite point par point, comme en resoumettant le
+formulaire de prédiction. Objectif : moins de 50 ms par grille.
+"""
+import time
+
+import numpy as np
+
+from ..services.prediction_service import calculate_insurance_premium
+from ..services.sensitivity_service import build_grid, sensitivity_grid
+from . import BenchmarkResult, time_calls
+
+BASE = {'age': 40, 'sex': 'male', 'bmi': 27.5, 'children': 1, 'smoker': 'yes', 'region': 'northeast'}
+AXES = [
+    ('bmi', [round(float(v), 1) for v in np.linspace(18.0, 40.0, 25)]),
+    ('smoker', ['no', 'yes']),
+    ('age', list(range(40, 60))),
+]
+
+
+def run(iterations=20):
+    sensitivity_grid(BASE, AXES)  # chargement du modèle hors mesure
+    points = len(build_grid(BASE, AXES))
+    results = [BenchmarkResult(
+        f'grille {points} points (lot)', iterations,
+        time_calls(lambda: sensitivity_grid(BASE, AXES), iterations),
+        note='par grille',
+    )]
+
+    # Point par point : une seule grille, l'ordre de grandeur suffit
+    rows = build_grid(BASE, AXES).to_dict('records')
+    start = time.perf_counter()
+    for row in rows:
+        calculate_insurance_premium(row)
+    results.append(BenchmarkResult(
+        f'grille {points} points (un appel par point)', 1, time.perf_counter() - start, note='par grille',
+    ))
+    return results
@@ -0,0 +1,83 @@
+"""
+Travail en base par requête selon le moteur de sessions (``SESSION_MODE``).
+
+Chaque moteur traverse ``SessionMiddleware`` pour deux parcours :
+
+- ``anonymous`` : une écriture à la première requête, puis des lectures ;
+- ``authenticated`` : session contenant un utilisateur, une écriture toutes
+  les quatre requêtes (comme un message flash ou un panier).
+
+La note donne le nombre moyen de requêtes SQL par requête HTTP. Le moteur
+``signed_cookies`` ne garde pas les parcours authentifiés côté serveur et
+n'est mesuré que pour information.
+"""
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.contrib.sessions.models import Session
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from ..utils.queries import QueryRecorder
+from . import BenchmarkResult, time_calls
+
+ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+    'hybrid': 'insurance_web.sessions',
+}
+
+
+class _Visitor:
+    """Navigateur simulé : renvoie le cookie de session reçu à chaque requête."""
+
+    def __init__(self, engine, authenticated):
+        self.authenticated = authenticated
+        self.cookie = None
+        self.requests = 0
+        self.session_keys = set()
+        self.factory = RequestFactory()
+        self.middleware = SessionMiddleware(self.view)
+        self.middleware.SessionStore = import_module(engine).SessionStore
+
+    def view(self, request):
+        if self.requests == 0:
+            request.session['visited'] = True
+            if self.authenticated:
+                request.session[SESSION_KEY] = '1'
+        elif self.authenticated and self.requests % 4 == 0:
+            request.session['last_seen'] = self.requests
+        else:
+            request.session.get('visited')
+        return HttpResponse()
+
+    def __call__(self):
+        request = self.factory.get('/')
+        if self.cookie:
+            request.COOKIES[settings.SESSION_COOKIE_NAME] = self.cookie
+        response = self.middleware(request)
+        self.requests += 1
+        morsel = response.cookies.get(settings.SESSION_COOKIE_NAME)
+        if morsel is not None and morsel.value:
+            self.cookie = morsel.value
+            self.session_keys.add(morsel.value)
+
+
+def run(iterations=2000):
+    results = []
+    for mode, engine in ENGINES.items():
+        for authenticated in (False, True):
+            visitor = _Visitor(engine, authenticated)
+            with QueryRecorder() as recorder:
+                seconds = time_calls(visitor, iterations)
+            Session.objects.filter(session_key__in=visitor.session_keys).delete()
+            results.append(BenchmarkResult(
+                f"{mode} {'authenticated' if authenticated else 'anonymous'}",
+                iterations,
+                seconds,
+                note=f'{recorder.count / iterations:.2f} SQL/req',
+            ))
+    return results
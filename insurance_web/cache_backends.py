@@ -0,0 +1,225 @@
+"""
+Backend de cache partagé par les processus d'un même hôte, sans service externe.
+
+``SQLiteCache`` stocke les entrées dans un fichier SQLite en mode WAL : les
+lectures ne bloquent pas les écritures et tous les workers gunicorn (et les
+conteneurs qui montent le même volume) voient les mêmes valeurs.
+
+- expiration : colonne ``expires`` (timestamp absolu, NULL = sans expiration) ;
+- éviction LRU approchée : ``accessed`` est rafraîchi au plus une fois par
+  ``ACCESS_GRANULARITY`` secondes par clé, et au-delà de ``MAX_ENTRIES`` les
+  entrées les moins récemment lues sont supprimées (1/``CULL_FREQUENCY``) ;
+- ``incr``/``decr`` atomiques : les entiers sont stockés tels quels et
+  incrémentés par un seul ``UPDATE … RETURNING`` ;
+- clés versionnées via ``make_and_validate_key`` (``version``, ``incr_version``).
+
+Configuration::
+
+    'default': {
+        'BACKEND': 'insurance_web.cache_backends.SQLiteCache',
+        'LOCATION': '/app/cache/default.sqlite3',
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    }
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entry (
+    key TEXT PRIMARY KEY,
+    value BLOB,
+    expires REAL,
+    accessed REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_entry_accessed ON cache_entry (accessed);
+CREATE INDEX IF NOT EXISTS cache_entry_expires ON cache_entry (expires);
+"""
+
+_ALIVE = '(expires IS NULL OR expires > ?)'
+
+
+def _dump(value):
+    # Les entiers restent des INTEGER SQLite pour permettre incr() en SQL
+    if type(value) is int and -2 ** 63 <= value < 2 ** 63:
+        return value
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def _load(value):
+    return value if isinstance(value, int) else pickle.loads(value)
+
+
+class SQLiteCache(BaseCache):
+    """Cache Django dans un fichier SQLite (WAL) partagé entre processus."""
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.location = location
+        self.access_granularity = float(options.get('ACCESS_GRANULARITY', 60))
+        self.cull_every = int(options.get('CULL_EVERY', 100))
+        self.busy_timeout = float(options.get('BUSY_TIMEOUT', 5))
+        self._local = threading.local()
+        self._writes = 0
+
+    # Connexions : une par thread et par processus (réouverte après un fork)
+
+    def _connection(self):
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            directory = os.path.dirname(self.location)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.location, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(_SCHEMA)
+            local.conn, local.pid = conn, os.getpid()
+        return local.conn
+
+    def _after_write(self, conn, now):
+        self._writes += 1
+        if self._writes % self.cull_every == 0:
+            self._cull(conn, now)
+
+    def _cull(self, conn, now):
+        conn.execute('DELETE FROM cache_entry WHERE expires <= ?', (now,))
+        count = conn.execute('SELECT COUNT(*) FROM cache_entry').fetchone()[0]
+        if count > self._max_entries:
+            if self._cull_frequency == 0:
+                conn.execute('DELETE FROM cache_entry')
+                return
+            conn.execute(
+                'DELETE FROM cache_entry WHERE key IN '
+                '(SELECT key FROM cache_entry ORDER BY accessed LIMIT ?)',
+                (count // self._cull_frequency,)
+            )
+
+    def _touch_accessed(self, conn, keys, now):
+        conn.executemany('UPDATE cache_entry SET accessed = ? WHERE key = ?', [(now, key) for key in keys])
+
+    # API Django
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        conn = self._connection()
+        now = time.time()
+        row = conn.execute(
+            f'SELECT value, accessed FROM cache_entry WHERE key = ? AND {_ALIVE}', (key, now)
+        ).fetchone()
+        if row is None:
+            return default
+        if now - row[1] > self.access_granularity:
+            self._touch_accessed(conn, [key], now)
+        return _load(row[0])
+
+    def get_many(self, keys, version=None):
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if not key_map:
+            return {}
+        conn = self._connection()
+        now = time.time()
+        placeholders = ','.join('?' * len(key_map))
+        rows = conn.execute(
+            f'SELECT key, value, accessed FROM cache_entry WHERE key IN ({placeholders}) AND {_ALIVE}',
+            (*key_map, now)
+        ).fetchall()
+        stale = [key for key, _value, accessed in rows if now - accessed > self.access_granularity]
+        if stale:
+            self._touch_accessed(conn, stale, now)
+        return {key_map[key]: _load(value) for key, value, _accessed in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        conn = self._connection()
+        now = time.time()
+        conn.execute(
+            'INSERT OR REPLACE INTO cache_entry (key, value, expires, accessed) VALUES (?, ?, ?, ?)',
+            (key, _dump(value), self.get_backend_timeout(timeout), now)
+        )
+        self._after_write(conn, now)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if not data:
+            return []
+        conn = self._connection()
+        now = time.time()
+        expires = self.get_backend_timeout(timeout)
+        rows = [
+            (self.make_and_validate_key(key, version=version), _dump(value), expires, now)
+            for key, value in data.items()
+        ]
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(
+                'INSERT OR REPLACE INTO cache_entry (key, value, expires, accessed) VALUES (?, ?, ?, ?)', rows
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        self._after_write(conn, now)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        conn = self._connection()
+        now = time.time()
+        # Remplace seulement une entrée expirée : test et écriture en une instruction
+        cursor = conn.execute(
+            'INSERT INTO cache_entry (key, value, expires, accessed) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires, '
+            'accessed = excluded.accessed WHERE cache_entry.expires IS NOT NULL AND cache_entry.expires <= ?',
+            (key, _dump(value), self.get_backend_timeout(timeout), now, now)
+        )
+        self._after_write(conn, now)
+        return cursor.rowcount > 0
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        cursor = self._connection().execute(
+            f'UPDATE cache_entry SET expires = ? WHERE key = ? AND {_ALIVE}',
+            (self.get_backend_timeout(timeout), key, now)
+        )
+        return cursor.rowcount > 0
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            f"UPDATE cache_entry SET value = value + ? WHERE key = ? AND typeof(value) = 'integer' AND {_ALIVE} "
+            'RETURNING value',
+            (delta, key, time.time())
+        ).fetchone()
+        if row is None:
+            raise ValueError("Key '%s' not found or not an integer" % key)
+        return row[0]
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute('DELETE FROM cache_entry WHERE key = ?', (key,))
+        return cursor.rowcount > 0
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        if keys:
+            self._connection().executemany('DELETE FROM cache_entry WHERE key = ?', [(key,) for key in keys])
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            f'SELECT 1 FROM cache_entry WHERE key = ? AND {_ALIVE}', (key, time.time())
+        ).fetchone()
+        return row is not None
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache_entry')
+
+    def close(self, **kwargs):
+        # Connexions conservées d'une requête à l'autre (comme LocMemCache)
+        pass
@@ -46,4 +46,33 @@ NOTIFICATION_TYPE_CHOICES = [
     ('appointment_request', _('Appointment Request')),
     ('appointment_accepted', _('Appointment Accepted')),
     ('appointment_rejected', _('Appointment Rejected')),
-]
\ No newline at end of file
+]
+# Types de notification accompagnés d'un email (immédiat ou regroupé en digest)
+EMAIL_NOTIFICATION_TYPES = frozenset({
+    'appointment_confirmation',
+    'appointment_cancelled',
+    'appointment_rescheduled',
+    'appointment_request',
+    'appointment_accepted',
+    'appointment_rejected',
+})
+EMAIL_DELIVERY_CHOICES = [
+    ('immediate', _('One email per notification')),
+    ('digest', _('Grouped digest')),
+]
+
+DIGEST_INTERVAL_CHOICES = [
+    (15, _('Every 15 minutes')),
+    (30, _('Every 30 minutes')),
+    (60, _('Every hour')),
+    (240, _('Every 4 hours')),
+    (1440, _('Once a day')),
+]
+
+# Bornes basses des tranches d'âge (statistiques, segments du modèle en ombre)
+AGE_BANDS = (18, 25, 35, 45, 55, 65)
+AGE_BAND_LABELS = (
+    [f'< {AGE_BANDS[0]}']
+    + [f'{low}-{high - 1}' for low, high in zip(AGE_BANDS, AGE_BANDS[1:])]
+    + [f'{AGE_BANDS[-1]}+']
+)
@@ -1,6 +1,12 @@
+from .permissions import get_roles
 from .services.notification_service import get_unread_notifications_count
 
 
+def roles(request):
+    """Ajoute les indicateurs de rôle (``roles.is_conseiller``…) au contexte des templates"""
+    return {'roles': getattr(request, 'roles', None) or get_roles(request.user)}
+
+
 def notifications(request):
     """Ajoute le nombre de notifications non lues au contexte de tous les templates"""
     if request.user.is_authenticated:
@@ -1,15 +1,18 @@
 from .auth_forms import CustomUserCreationForm, ProfileForm
-from .prediction_forms import PredictionForm
+from .prediction_forms import PredictionForm, SensitivityForm
 from .appointment_forms import AppointmentForm, UnavailabilityForm
 from .admin_forms import AdminUserManagementForm, AdminUserRoleForm, PricingConfigurationForm
+from .search_forms import ClientSearchForm
 
 __all__ = [
     'CustomUserCreationForm',
     'ProfileForm',
     'PredictionForm',
+    'SensitivityForm',
     'AppointmentForm',
     'UnavailabilityForm',
     'AdminUserManagementForm',
     'AdminUserRoleForm',
     'PricingConfigurationForm',
+    'ClientSearchForm',
 ]
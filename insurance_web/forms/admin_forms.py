@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth.models import User
 from django.utils.translation import gettext_lazy as _
+from ..backends import find_user_by_email, normalize_email
 from ..constants import ROLE_CHOICES
 
 
@@ -59,8 +60,8 @@ class AdminUserManagementForm(forms.Form):
     )
     
     def clean_email(self):
-        email = self.cleaned_data.get('email')
-        if User.objects.filter(email=email).exists():
+        email = normalize_email(self.cleaned_data.get('email'))
+        if find_user_by_email(email) is not None:
             raise forms.ValidationError(_("A user with this email already exists."))
         return email
     
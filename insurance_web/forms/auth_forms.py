@@ -2,7 +2,8 @@ from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 from django.utils.translation import gettext_lazy as _
-from ..constants import SEX_CHOICES, SMOKER_CHOICES, REGION_CHOICES
+from ..backends import find_user_by_email, normalize_email
+from ..constants import SEX_CHOICES, SMOKER_CHOICES, REGION_CHOICES, EMAIL_DELIVERY_CHOICES, DIGEST_INTERVAL_CHOICES
 from ..models import Profile
 
 
@@ -83,8 +84,8 @@ class CustomUserCreationForm(UserCreationForm):
         return password2
     
     def clean_email(self):
-        email = self.cleaned_data.get("email")
-        if User.objects.filter(email=email).exists():
+        email = normalize_email(self.cleaned_data.get("email"))
+        if find_user_by_email(email) is not None:
             raise forms.ValidationError(_("A user with this email already exists."))
         return email
     
@@ -215,9 +216,28 @@ class ProfileForm(forms.ModelForm):
         })
     )
     
+    email_delivery = forms.ChoiceField(
+        label=_("Email notifications"),
+        choices=EMAIL_DELIVERY_CHOICES,
+        required=False,
+        widget=forms.Select()
+    )
+    
+    digest_interval_minutes = forms.TypedChoiceField(
+        label=_("Digest frequency"),
+        choices=DIGEST_INTERVAL_CHOICES,
+        coerce=int,
+        required=False,
+        empty_value=None,
+        widget=forms.Select()
+    )
+    
     class Meta:
         model = Profile
-        fields = ['age', 'sex', 'height', 'weight', 'children', 'smoker', 'region', 'additional_info']
+        fields = [
+            'age', 'sex', 'height', 'weight', 'children', 'smoker', 'region', 'additional_info',
+            'email_delivery', 'digest_interval_minutes',
+        ]
     
     def __init__(self, *args, **kwargs):
         user = kwargs.pop('user', None)
@@ -230,10 +250,11 @@ class ProfileForm(forms.ModelForm):
             self.fields['email'].initial = user.email
     
     def clean_email(self):
-        email = self.cleaned_data.get("email")
+        email = normalize_email(self.cleaned_data.get("email"))
         user = getattr(self, 'user', None)
         if user:
             # Vérifier si l'email existe déjà pour un autre utilisateur
-            if User.objects.filter(email=email).exclude(pk=user.pk).exists():
+            existing = find_user_by_email(email)
+            if existing is not None and existing.pk != user.pk:
                 raise forms.ValidationError(_("A user with this email already exists."))
         return email
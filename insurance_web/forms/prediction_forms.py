@@ -1,3 +1,4 @@
+import numpy as np
 from django import forms
 from django.utils.translation import gettext_lazy as _
 from ..constants import SEX_CHOICES, SMOKER_CHOICES, REGION_CHOICES
@@ -87,3 +88,60 @@ class PredictionForm(forms.Form):
             'rows': 4
         })
     )
+
+
+class SensitivityForm(forms.Form):
+    """
+    Profil de base et axes de l'analyse de sensibilité (paramètres GET de
+    l'endpoint JSON ; pas de widget, le formulaire n'est pas affiché).
+    """
+    age = forms.IntegerField(min_value=18, max_value=100)
+    sex = forms.ChoiceField(choices=SEX_CHOICES)
+    bmi = forms.DecimalField(min_value=10, max_value=50, decimal_places=2)
+    children = forms.IntegerField(min_value=0, max_value=10, required=False)
+    smoker = forms.ChoiceField(choices=SMOKER_CHOICES)
+    region = forms.ChoiceField(choices=REGION_CHOICES)
+
+    # Axes (tous facultatifs)
+    bmi_min = forms.DecimalField(min_value=10, max_value=50, decimal_places=2, required=False)
+    bmi_max = forms.DecimalField(min_value=10, max_value=50, decimal_places=2, required=False)
+    bmi_steps = forms.IntegerField(min_value=2, max_value=100, required=False)
+    smoker_toggle = forms.BooleanField(required=False)
+    age_horizon = forms.IntegerField(min_value=1, max_value=50, required=False)
+    age_step = forms.IntegerField(min_value=1, max_value=10, required=False)
+    all_regions = forms.BooleanField(required=False)
+
+    DEFAULT_BMI_STEPS = 10
+
+    def clean(self):
+        cleaned_data = super().clean()
+        bmi_min, bmi_max = cleaned_data.get('bmi_min'), cleaned_data.get('bmi_max')
+        if (bmi_min is None) != (bmi_max is None):
+            raise forms.ValidationError(_("Both bmi_min and bmi_max are required for a BMI range."))
+        if bmi_min is not None and bmi_min >= bmi_max:
+            raise forms.ValidationError(_("bmi_min must be lower than bmi_max."))
+        age, horizon = cleaned_data.get('age'), cleaned_data.get('age_horizon')
+        if age is not None and horizon and age + horizon > 100:
+            raise forms.ValidationError(_("Age horizon cannot go beyond 100 years old."))
+        if cleaned_data.get('children') is None:
+            cleaned_data['children'] = 0
+        return cleaned_data
+
+    def base_profile(self):
+        return {name: self.cleaned_data[name] for name in ('age', 'sex', 'bmi', 'children', 'smoker', 'region')}
+
+    def axes(self):
+        """Axes demandés, dans l'ordre : IMC, fumeur, âge, région."""
+        data = self.cleaned_data
+        axes = []
+        if data.get('bmi_min') is not None:
+            steps = data.get('bmi_steps') or self.DEFAULT_BMI_STEPS
+            values = np.linspace(float(data['bmi_min']), float(data['bmi_max']), steps)
+            axes.append(('bmi', [round(float(v), 2) for v in values]))
+        if data.get('smoker_toggle'):
+            axes.append(('smoker', [value for value, _label in SMOKER_CHOICES]))
+        if data.get('age_horizon'):
+            axes.append(('age', list(range(data['age'], data['age'] + data['age_horizon'] + 1, data.get('age_step') or 1))))
+        if data.get('all_regions'):
+            axes.append(('region', [value for value, _label in REGION_CHOICES]))
+        return axes
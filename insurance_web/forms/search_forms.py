@@ -0,0 +1,55 @@
+from django import forms
+from django.utils.translation import gettext_lazy as _
+
+from ..constants import REGION_CHOICES
+
+INPUT_CLASS = (
+    'w-full px-4 py-3 bg-white border border-gray-300 rounded-md text-slate-900 placeholder-slate-400 '
+    'focus:outline-none focus:ring-2 focus:ring-blue-500 focus:border-transparent transition-colors'
+)
+
+
+class ClientSearchForm(forms.Form):
+    """Critères de recherche de clients (liste, endpoint JSON, autocomplétion)."""
+    q = forms.CharField(
+        label=_("Search"),
+        required=False,
+        max_length=100,
+        widget=forms.TextInput(attrs={
+            'class': INPUT_CLASS,
+            'placeholder': _('Name or email'),
+            'autocomplete': 'off',
+            'type': 'search',
+        })
+    )
+    region = forms.ChoiceField(
+        label=_("Region"),
+        required=False,
+        choices=[('', _('All regions'))] + REGION_CHOICES,
+        widget=forms.Select(attrs={'class': INPUT_CLASS})
+    )
+    age_min = forms.IntegerField(
+        label=_("Minimum age"),
+        required=False,
+        min_value=0,
+        max_value=120,
+        widget=forms.NumberInput(attrs={'class': INPUT_CLASS, 'placeholder': _('Min age')})
+    )
+    age_max = forms.IntegerField(
+        label=_("Maximum age"),
+        required=False,
+        min_value=0,
+        max_value=120,
+        widget=forms.NumberInput(attrs={'class': INPUT_CLASS, 'placeholder': _('Max age')})
+    )
+
+    def search_kwargs(self):
+        """Arguments de ``search_clients`` (critères invalides ignorés)."""
+        self.is_valid()  # cleaned_data ne garde que les champs valides
+        data = self.cleaned_data
+        return {
+            'query': data.get('q') or '',
+            'region': data.get('region') or None,
+            'age_min': data.get('age_min'),
+            'age_max': data.get('age_max'),
+        }
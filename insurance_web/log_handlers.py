@@ -0,0 +1,89 @@
+"""
+Formatter et handlers de logging référencés par ``LOGGING``.
+
+Ce module est chargé par logging.config avant l'initialisation des applications
+Django : il ne doit importer aucun modèle.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+
+# Attributs standard d'un LogRecord : tout le reste provient de ``extra``
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Une ligne JSON par enregistrement, avec le contexte passé dans ``extra``
+    (``appointment_id``, ``user_id``…) au premier niveau.
+    """
+
+    def format(self, record):
+        data = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'location': f'{record.pathname}:{record.lineno}',
+            'process': record.process,
+            'thread': record.threadName,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                data[key] = value
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            data['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(data, default=str, ensure_ascii=False)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler qui laisse le formatage au thread du QueueListener.
+
+    Comme ``QueueHandler.prepare``, le message (``msg % args``) est calculé
+    dans le thread appelant, sur une copie de l'enregistrement : les
+    arguments peuvent changer ou ne plus être lisibles (objets liés à la
+    requête, chaînes traduisibles dans la langue active) une fois la requête
+    terminée. La file étant en mémoire (pas de pickling), la mise en forme
+    finale (JSON, texte) et la traceback restent à la charge des handlers,
+    hors du thread de la requête.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+_started_listeners = []
+
+
+def start_queue_listeners():
+    """
+    Démarre les QueueListener créés par ``LOGGING`` (handlers ``DeferredQueueHandler``).
+
+    logging.config crée le listener d'un QueueHandler déclaré avec ``handlers``
+    sans le démarrer ; appelé au chargement de l'application, arrêté à la sortie
+    du processus après avoir vidé la file.
+    """
+    for name in logging.getHandlerNames():
+        listener = getattr(logging.getHandlerByName(name), 'listener', None)
+        if listener is None or listener in _started_listeners:
+            continue
+        listener.start()
+        _started_listeners.append(listener)
+
+
+def stop_queue_listeners():
+    while _started_listeners:
+        _started_listeners.pop().stop()
+
+
+atexit.register(stop_queue_listeners)
@@ -0,0 +1,25 @@
+from importlib import import_module
+
+from django.core.management.base import BaseCommand
+
+from insurance_web.benchmarks import BENCHMARKS
+
+
+class Command(BaseCommand):
+    help = "Lance un micro-benchmark (voir insurance_web/benchmarks/) et affiche le coût par opération."
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(BENCHMARKS), help="Benchmark à lancer")
+        parser.add_argument('--iterations', type=int, default=None, help="Nombre d'opérations (défaut: propre au benchmark)")
+
+    def handle(self, *args, **options):
+        module = import_module(BENCHMARKS[options['name']])
+        kwargs = {'iterations': options['iterations']} if options['iterations'] else {}
+        for result in module.run(**kwargs):
+            line = (
+                f"{result.name:<28} {result.iterations:>9} op  {result.per_op_us:>10.1f} µs/op  "
+                f"{result.ops_per_second:>12.0f} op/s"
+            )
+            if result.note:
+                line += f"  ({result.note})"
+            self.stdout.write(line)
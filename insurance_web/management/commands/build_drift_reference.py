@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from insurance_web.services.drift_service import recorded_histograms, reference_from_training, save_reference
+
+
+class Command(BaseCommand):
+    help = (
+        "Construit la distribution de référence du suivi de dérive, depuis les "
+        "données d'entraînement (--csv) ou une période de production (--days)."
+    )
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument('--csv', help="Données d'entraînement (age, sex, bmi, children, smoker, region)")
+        source.add_argument('--days', type=int, help="Derniers jours complets de production (hier inclus)")
+        parser.add_argument('--output', default=None, help="Fichier JSON (défaut: DRIFT_MONITOR['REFERENCE_PATH'])")
+
+    def handle(self, *args, **options):
+        if options['csv']:
+            counts = reference_from_training(options['csv'])
+            source = f"training:{options['csv']}"
+        else:
+            until = timezone.localdate() - timedelta(days=1)
+            since = until - timedelta(days=options['days'] - 1)
+            counts = recorded_histograms(since, until)
+            source = f"production:{since}..{until}"
+        if not any(sum(buckets) for buckets in counts.values()):
+            raise CommandError("Aucune observation pour construire la référence.")
+        path = save_reference(counts, source, options['output'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Référence enregistrée dans {path} ({sum(counts['age'])} observation(s), source {source})."
+        ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from insurance_web.services.prediction_storage_service import BATCH_SIZE, coalesce_existing
+
+
+class Command(BaseCommand):
+    help = (
+        "Regroupe les prédictions identiques déjà enregistrées (même client, auteur, "
+        "variables et montant) refaites dans la fenêtre de regroupement."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help=f"Prédictions mises à jour ou supprimées par requête (défaut: {BATCH_SIZE})")
+        parser.add_argument('--window', type=int, default=None,
+                            help="Fenêtre de regroupement en secondes (défaut: PREDICTION_STORAGE['COALESCE_WINDOW'])")
+
+    def handle(self, *args, **options):
+        removed = coalesce_existing(window=options['window'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{removed} prédiction(s) en double regroupée(s) dans repeat_count de la première."
+        ))
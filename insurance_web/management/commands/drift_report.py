@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from insurance_web.services.drift_service import drift_report
+
+
+class Command(BaseCommand):
+    help = (
+        "Indice de stabilité de population (PSI) des entrées du modèle et des "
+        "primes prédites par rapport à la distribution de référence."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help="Nombre de jours couverts (défaut: 7, 0 : tout)")
+        parser.add_argument('--buckets', action='store_true', help="Détaille les intervalles de chaque variable")
+
+    def handle(self, *args, **options):
+        since = timezone.localdate() - timedelta(days=options['days'] - 1) if options['days'] else None
+        report = drift_report(since=since)
+        if report['reference'] is None:
+            self.stdout.write(self.style.WARNING(
+                "Aucune référence : lancez « manage.py build_drift_reference » (PSI non calculé)."
+            ))
+        else:
+            self.stdout.write(f"Référence : {report['reference']['source']} ({report['reference']['created_at']})")
+        self.stdout.write(f"{'variable':<12}{'n':>10}{'PSI':>10}  statut")
+        for line in report['features']:
+            value = '-' if line['psi'] is None else f"{line['psi']:.4f}"
+            self.stdout.write(f"{line['feature']:<12}{line['count']:>10}{value:>10}  {line['status']}")
+            if options['buckets']:
+                for bucket in line['buckets']:
+                    expected = '-' if bucket['expected'] is None else f"{bucket['expected']:.1f}%"
+                    self.stdout.write(f"    {bucket['label']:<14}{expected:>8}{bucket['actual']:>8.1f}%")
@@ -0,0 +1,50 @@
+import sys
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from insurance_web.services.export_service import CHUNK_SIZE, EXPORTS, FORMATS, export_stream
+
+
+class Command(BaseCommand):
+    help = "Exporte en flux l'historique des prédictions ou des rendez-vous (CSV ou JSONL, gzip optionnel)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS), help="Données à exporter")
+        parser.add_argument('-o', '--output', default='-', help="Fichier de sortie ('-' pour la sortie standard)")
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv', help="Format (défaut: csv)")
+        parser.add_argument('--gzip', action='store_true', help="Compresse la sortie au format gzip")
+        parser.add_argument('--advisor', type=int, help="Limite l'export aux lignes de ce conseiller (id)")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help=f"Lignes lues par aller-retour avec la base (défaut: {CHUNK_SIZE})")
+
+    def handle(self, *args, **options):
+        advisor = options['advisor']
+        if advisor is not None and not User.objects.filter(pk=advisor).exists():
+            raise CommandError(f"Conseiller introuvable: {advisor}")
+
+        path = options['output']
+        try:
+            output = sys.stdout.buffer if path == '-' else open(path, 'wb')
+        except OSError as e:
+            raise CommandError(f"Impossible d'ouvrir {path}: {e}")
+
+        start = time.perf_counter()
+        written = 0
+        try:
+            for chunk in export_stream(
+                options['kind'], options['format'], advisor=advisor,
+                compress=options['gzip'], chunk_size=options['chunk_size'],
+            ):
+                output.write(chunk)
+                written += len(chunk)
+        finally:
+            if path == '-':
+                output.flush()
+            else:
+                output.close()
+
+        self.stderr.write(self.style.SUCCESS(
+            f"{written / 1e6:.1f} Mo écrits en {time.perf_counter() - start:.1f} s."
+        ))
@@ -0,0 +1,66 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from insurance_web.services.import_service import import_clients, read_client_rows
+from insurance_web.tasks import enqueue_on_commit
+from insurance_web.tasks.account_tasks import send_account_activations
+
+
+def _rate(stats):
+    return stats['read'] / stats['seconds'] if stats['seconds'] else 0
+
+
+class Command(BaseCommand):
+    help = (
+        "Importe des clients depuis un fichier CSV (avec en-tête) ou JSONL : colonnes email, "
+        "first_name, last_name, password (optionnel), age, sex, height, weight, bmi, children, "
+        "smoker, region, additional_info."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Fichier à importer ('-' pour l'entrée standard)")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help="Format (défaut: d'après l'extension)")
+        parser.add_argument('--chunk-size', type=int, default=1000, help="Lignes par lot (défaut: 1000)")
+        parser.add_argument('--hash-workers', type=int, default=os.cpu_count() or 1,
+                            help="Threads de hachage des mots de passe (défaut: nombre de cœurs)")
+        parser.add_argument('--unusable-passwords', action='store_true',
+                            help="Ignore la colonne password : comptes sans mot de passe utilisable")
+        parser.add_argument('--send-activation', action='store_true',
+                            help="Met en file un email d'activation pour les comptes sans mot de passe")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        send_activation = options['send_activation']
+
+        def on_chunk(users, stats):
+            if send_activation:
+                ids = [user.pk for user in users if not user.has_usable_password()]
+                if ids:
+                    enqueue_on_commit(send_account_activations, ids)
+            self.stdout.write(
+                f"{stats['read']} ligne(s) lue(s), {stats['created']} créée(s) "
+                f"({_rate(stats):.0f} lignes/s)"
+            )
+
+        try:
+            stream = sys.stdin if path == '-' else open(path, encoding='utf-8', newline='')
+        except OSError as e:
+            raise CommandError(f"Impossible d'ouvrir {path}: {e}")
+        with stream:
+            stats = import_clients(
+                read_client_rows(stream, fmt),
+                chunk_size=options['chunk_size'],
+                hash_workers=options['hash_workers'],
+                use_passwords=not options['unusable_passwords'],
+                on_chunk=on_chunk,
+            )
+
+        for line, email, message in stats['errors']:
+            self.stderr.write(f"Ligne {line} ({email or '-'}) : {message}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['created']} client(s) créé(s), {stats['skipped']} déjà inscrit(s) ou en double, "
+            f"{stats['invalid']} invalide(s) en {stats['seconds']:.1f} s ({_rate(stats):.0f} lignes/s)."
+        ))
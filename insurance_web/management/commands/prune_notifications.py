@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from insurance_web.services.notification_service import prune_expired_notifications
+
+
+class Command(BaseCommand):
+    help = "Supprime ou archive les notifications expirées par lots (voir NOTIFICATION_RETENTION_DAYS)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Nombre de lignes par lot (défaut: 1000)")
+        parser.add_argument('--archive', action='store_true', help="Copie les notifications dans NotificationArchive avant suppression")
+        parser.add_argument('--dry-run', action='store_true', help="Compte les notifications expirées sans rien supprimer")
+        parser.add_argument('--pause', type=float, default=0, help="Pause en secondes entre deux lots")
+
+    def handle(self, *args, **options):
+        stats = prune_expired_notifications(
+            batch_size=options['batch_size'],
+            archive=options['archive'],
+            dry_run=options['dry_run'],
+            pause=options['pause'],
+        )
+        if options['dry_run']:
+            self.stdout.write(f"{stats['deleted']} notification(s) expirée(s) seraient supprimée(s).")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['deleted']} notification(s) supprimée(s), {stats['archived']} archivée(s) "
+            f"en {stats['batches']} lot(s)."
+        ))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from insurance_web.sessions import purge_expired_sessions
+
+
+class Command(BaseCommand):
+    help = "Supprime les sessions expirées de django_session par lots (alternative à clearsessions)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Nombre de sessions par lot (défaut: 1000)")
+        parser.add_argument('--dry-run', action='store_true', help="Compte les sessions expirées sans rien supprimer")
+        parser.add_argument('--pause', type=float, default=0, help="Pause en secondes entre deux lots")
+
+    def handle(self, *args, **options):
+        stats = purge_expired_sessions(
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+            pause=options['pause'],
+        )
+        if options['dry_run']:
+            self.stdout.write(f"{stats['deleted']} session(s) expirée(s) seraient supprimée(s).")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['deleted']} session(s) supprimée(s) en {stats['batches']} lot(s)."
+        ))
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from insurance_web.services.analytics_service import warm_snapshot_stats
+from insurance_web.services.snapshot_service import CHUNK_SIZE, refresh_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Met à jour l'instantané colonnaire des prédictions et profils lu par les "
+        "statistiques admin (ajout incrémental, ou reconstruction avec --full), "
+        "puis précalcule les statistiques affichées."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help="Reconstruit tout l'instantané (prend en compte les suppressions)")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help=f"Lignes lues par aller-retour avec la base (défaut: {CHUNK_SIZE})")
+        parser.add_argument(
+            '--loop', type=int, default=0,
+            help="Tourne en continu et relance la mise à jour toutes les N secondes (0 : un seul passage)"
+        )
+
+    def handle(self, *args, **options):
+        full = options['full']
+        while True:
+            stats = refresh_snapshot(full=full, chunk_size=options['chunk_size'])
+            # Calcul hors requête : la page admin lit le cache
+            warm_snapshot_stats()
+            if not stats['changed']:
+                self.stdout.write("Instantané inchangé.")
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Instantané {'reconstruit' if stats['mode'] == 'full' else 'mis à jour'} : "
+                    f"{stats['predictions']} prédiction(s) ajoutée(s) ({stats['total_predictions']} au total), "
+                    f"{stats['profiles']} profil(s), en {stats['seconds']:.1f} s."
+                ))
+            if not options['loop']:
+                return
+            # Reconstruction complète seulement au premier passage
+            full = False
+            time.sleep(options['loop'])
@@ -0,0 +1,39 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from insurance_web.tasks.runner import TaskWorker, task_metrics
+
+
+class Command(BaseCommand):
+    help = "Exécute les tâches de fond en file (backend DatabaseBackend) avec un pool de threads."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4, help="Nombre de tâches exécutées en parallèle (défaut: 4)")
+        parser.add_argument('--queue', action='append', dest='queues', help="File à consommer (répétable, défaut: toutes celles du backend)")
+        parser.add_argument('--backend', default='default', help="Alias du backend dans TASKS (défaut: default)")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Attente en secondes quand la file est vide")
+        parser.add_argument('--stats-interval', type=int, default=60, help="Période de journalisation des métriques (s)")
+        parser.add_argument('--once', action='store_true', help="Vide la file puis s'arrête")
+
+    def handle(self, *args, **options):
+        worker = TaskWorker(
+            queues=options['queues'],
+            threads=options['threads'],
+            poll_interval=options['poll_interval'],
+            backend=options['backend'],
+        )
+        if not options['once']:
+            # Arrêt propre : les tâches en cours se terminent avant la sortie
+            signal.signal(signal.SIGTERM, lambda *_args: worker.stop())
+            self.stdout.write(f"Worker {worker.worker_id[:8]} démarré ({options['threads']} thread(s), files: {', '.join(worker.queues)})")
+        try:
+            worker.run(once=options['once'], stats_interval=options['stats_interval'])
+        except KeyboardInterrupt:
+            worker.stop()
+
+        for name, stats in sorted(task_metrics.snapshot().items()):
+            self.stdout.write(
+                f"{name}: {stats['count']} exécution(s), {stats['failures']} échec(s), "
+                f"moyenne {stats['total_ms'] / stats['count']:.1f} ms, max {stats['max_ms']:.1f} ms"
+            )
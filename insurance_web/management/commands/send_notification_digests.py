@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from insurance_web.services.email_service import send_notification_digests
+
+
+class Command(BaseCommand):
+    help = "Envoie les digests de notifications des utilisateurs dont la fenêtre est échue."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help="Nombre d'utilisateurs par lot (défaut: 200)")
+        parser.add_argument(
+            '--loop', type=int, default=0,
+            help="Tourne en continu et relance l'envoi toutes les N secondes (0 : un seul passage)"
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            stats = send_notification_digests(batch_size=options['batch_size'])
+            if stats['emails'] or stats['failed'] or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{stats['emails']} digest(s) envoyé(s) pour {stats['notifications']} notification(s), "
+                    f"{stats['failed']} en échec."
+                ))
+            if not options['loop']:
+                return
+            time.sleep(options['loop'])
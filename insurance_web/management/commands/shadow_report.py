@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from insurance_web.services.shadow_service import SEGMENTS, shadow_report
+
+
+class Command(BaseCommand):
+    help = (
+        "Résume les écarts entre le modèle candidat (évaluation en ombre) et le "
+        "modèle de production, par segment."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--by', nargs='*', choices=SEGMENTS, default=['smoker'],
+                            help="Segmentation (plusieurs possibles ; sans valeur : global)")
+        parser.add_argument('--candidate', default=None, help="Version du modèle candidat (défaut: toutes)")
+        parser.add_argument('--days', type=int, default=7, help="Nombre de jours couverts (défaut: 7, 0 : tout)")
+
+    def handle(self, *args, **options):
+        since = timezone.localdate() - timedelta(days=options['days'] - 1) if options['days'] else None
+        report = shadow_report(by=options['by'], candidate=options['candidate'], since=since)
+        if not report:
+            self.stdout.write(self.style.WARNING("Aucun écart enregistré (SHADOW_MODEL['MODEL_PATH'] défini ?)."))
+            return
+        self.stdout.write(
+            f"{'candidat':<13}{'production':<13}{'segment':<28}{'n':>8}{'prime moy.':>12}"
+            f"{'écart moy.':>12}{'|écart| moy.':>14}{'écart %':>9}{'RMSE':>10}{'max':>10}"
+        )
+        for line in report:
+            segment = ' / '.join(str(line[name]) for name in options['by']) or 'global'
+            self.stdout.write(
+                f"{line['candidate_version']:<13}{line['production_version']:<13}{segment:<28}{line['count']:>8}"
+                f"{line['mean_production']:>12.2f}{line['mean_delta']:>+12.2f}{line['mean_abs_delta']:>14.2f}"
+                f"{line['relative_delta']:>+8.2f}%{line['rmse']:>10.2f}{line['max_abs_delta']:>10.2f}"
+            )
@@ -0,0 +1,320 @@
+"""
+Métriques applicatives au format d'exposition texte Prometheus (``/metrics``).
+
+Chaque processus (worker gunicorn, ``run_tasks``…) agrège ses compteurs et
+histogrammes en mémoire ; un thread d'arrière-plan les écrit toutes les
+``FLUSH_INTERVAL`` secondes dans son propre fichier
+``METRICS['DIR']/metrics-<hôte>-<pid>.json`` (écriture atomique), jamais sur le
+chemin de la requête. L'endpoint fusionne les fichiers de tous les processus :
+les valeurs sont donc globales quel que soit le worker qui répond.
+
+Les fichiers des processus arrêtés (PID absent sur cet hôte, ou fichier non
+réécrit depuis ``STALE_AFTER`` intervalles) sont ignorés et supprimés à la
+fusion : un redémarrage de worker apparaît à Prometheus comme une remise à
+zéro de compteur, que ``rate()`` gère.
+
+Sans ``DIR`` (tests), les métriques ne couvrent que le processus courant.
+"""
+import atexit
+import glob
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STALE_AFTER = 10  # intervalles d'écriture sans mise à jour avant d'ignorer un fichier
+
+
+def _label_key(labelnames, labels):
+    if set(labels) != set(labelnames):
+        raise ValueError(f"Expected labels {labelnames}, got {sorted(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+
+class Counter:
+    """Compteur monotone, éventuellement étiqueté."""
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = registry or default_registry
+        self.registry.register(self)
+
+    def inc(self, amount=1, **labels):
+        self.registry.add_counter(self.name, _label_key(self.labelnames, labels), amount)
+
+
+class Histogram:
+    """Histogramme cumulatif à buckets fixes (observations en secondes par défaut)."""
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.registry = registry or default_registry
+        self.registry.register(self)
+
+    def observe(self, value, **labels):
+        self.registry.add_observation(self, _label_key(self.labelnames, labels), value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe la durée du bloc, y compris s'il lève une exception."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+
+class MetricsRegistry:
+    """Valeurs du processus courant et fusion avec les fichiers des autres processus."""
+
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._flusher_pid = None
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+
+    @property
+    def directory(self):
+        return getattr(settings, 'METRICS', {}).get('DIR')
+
+    @property
+    def interval(self):
+        return getattr(settings, 'METRICS', {}).get('FLUSH_INTERVAL', 5)
+
+    def add_counter(self, name, key, amount):
+        self._ensure_flusher()
+        with self._lock:
+            self._counters[(name, key)] = self._counters.get((name, key), 0) + amount
+
+    def add_observation(self, histogram, key, value):
+        self._ensure_flusher()
+        with self._lock:
+            state = self._histograms.get((histogram.name, key))
+            if state is None:
+                state = self._histograms[(histogram.name, key)] = [[0] * len(histogram.buckets), 0.0, 0]
+            for i, bound in enumerate(histogram.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def snapshot(self):
+        """Valeurs du processus courant, sérialisables en JSON."""
+        with self._lock:
+            return {
+                'counters': [[name, list(key), value] for (name, key), value in self._counters.items()],
+                'histograms': [
+                    [name, list(key), list(counts), total, count]
+                    for (name, key), (counts, total, count) in self._histograms.items()
+                ],
+            }
+
+    def _path(self):
+        # L'hôte distingue les conteneurs qui partagent le répertoire (PID identiques)
+        return os.path.join(self.directory, f'metrics-{socket.gethostname()}-{os.getpid()}.json')
+
+    def _ensure_flusher(self):
+        """Démarre le thread d'écriture du processus (à nouveau après un fork)."""
+        if self._flusher_pid == os.getpid() or not self.directory:
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            if self._flusher_pid is not None:
+                # Processus forké : les valeurs héritées sont déjà dans le fichier du parent
+                self._counters.clear()
+                self._histograms.clear()
+            self._flusher_pid = os.getpid()
+        threading.Thread(target=self._run_flusher, name='metrics-flush', daemon=True).start()
+
+    def _run_flusher(self):
+        pid = os.getpid()
+        while self._flusher_pid == pid:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    def flush(self):
+        """Écrit le fichier du processus courant (remplacement atomique)."""
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path()
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    def _is_stale(self, path):
+        """Fichier d'un processus arrêté : PID absent sur cet hôte, ou plus réécrit."""
+        host, _sep, pid = os.path.basename(path)[len('metrics-'):-len('.json')].rpartition('-')
+        if host == socket.gethostname() and pid.isdigit():
+            try:
+                os.kill(int(pid), 0)
+            except ProcessLookupError:
+                return True
+            except PermissionError:
+                pass
+        try:
+            age = time.time() - os.path.getmtime(path)
+        except OSError:
+            return True
+        return age > STALE_AFTER * max(self.interval, 1)
+
+    def collect(self):
+        """Fusionne les valeurs de tous les processus vivants (fichiers périmés supprimés)."""
+        snapshots = [self.snapshot()]
+        if self.directory:
+            own = self._path()
+            for path in glob.glob(os.path.join(self.directory, 'metrics-*.json')):
+                if path == own:
+                    continue
+                if self._is_stale(path):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                    continue
+                try:
+                    with open(path, encoding='utf-8') as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+
+        counters, histograms = {}, {}
+        for snapshot in snapshots:
+            for name, key, value in snapshot['counters']:
+                counters[(name, tuple(key))] = counters.get((name, tuple(key)), 0) + value
+            for name, key, counts, total, count in snapshot['histograms']:
+                state = histograms.setdefault((name, tuple(key)), [[0] * len(counts), 0.0, 0])
+                if len(state[0]) != len(counts):
+                    continue
+                state[0] = [a + b for a, b in zip(state[0], counts)]
+                state[1] += total
+                state[2] += count
+        return counters, histograms
+
+    def render(self):
+        """Texte au format d'exposition Prometheus 0.0.4."""
+        counters, histograms = self.collect()
+        lines = []
+        for name, metric in sorted(self.metrics.items()):
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.type}')
+            if metric.type == 'counter':
+                for (metric_name, key), value in sorted(counters.items()):
+                    if metric_name == name:
+                        lines.append(f'{name}{_format_labels(metric.labelnames, key)} {_format_value(value)}')
+                continue
+            for (metric_name, key), (counts, total, count) in sorted(histograms.items()):
+                if metric_name != name:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(metric.buckets, counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(metric.labelnames + ('le',), key + (_format_value(bound),))
+                    lines.append(f'{name}_bucket{labels} {cumulative}')
+                labels = _format_labels(metric.labelnames + ('le',), key + ('+Inf',))
+                lines.append(f'{name}_bucket{labels} {count}')
+                labels = _format_labels(metric.labelnames, key)
+                lines.append(f'{name}_sum{labels} {_format_value(total)}')
+                lines.append(f'{name}_count{labels} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+default_registry = MetricsRegistry()
+atexit.register(default_registry.flush)
+
+
+# Prédiction
+PREDICTION_DURATION = Histogram(
+    'insurance_prediction_duration_seconds', 'Duration of calculate_insurance_premium.'
+)
+PREDICTIONS = Counter(
+    'insurance_predictions_total', 'Premium predictions by outcome (success, invalid, error).', ['outcome']
+)
+SHADOW_PREDICTIONS = Counter(
+    'insurance_shadow_predictions_total',
+    'Inputs sampled for the candidate model by outcome (queued, dropped, scored, error).', ['outcome']
+)
+MODEL_LOAD_DURATION = Histogram(
+    'insurance_model_load_duration_seconds', 'Time spent loading the ML pipeline from disk.',
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
+# Caches (hit / miss)
+CACHE_REQUESTS = Counter(
+    'insurance_cache_requests_total', 'Cache lookups by cache name and result (hit, miss).', ['cache', 'result']
+)
+
+# Rendez-vous
+BOOKING_CONFLICTS = Counter(
+    'insurance_booking_conflicts_total', 'Rejected bookings by conflict reason.', ['reason']
+)
+
+# Emails et notifications
+EMAIL_SEND_DURATION = Histogram(
+    'insurance_email_send_duration_seconds', 'Duration of SMTP sends by email kind.', ['kind']
+)
+EMAIL_FAILURES = Counter(
+    'insurance_email_failures_total', 'Failed email sends by email kind.', ['kind']
+)
+NOTIFICATIONS_CREATED = Counter(
+    'insurance_notifications_created_total', 'Notifications created by type.', ['type']
+)
+
+# Vues et tâches
+VIEW_DURATION = Histogram(
+    'insurance_view_duration_seconds', 'Request duration by URL name.', ['view']
+)
+VIEW_DB_QUERIES = Histogram(
+    'insurance_view_db_queries', 'SQL queries per request by URL name.', ['view'],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200)
+)
+TASK_DURATION = Histogram(
+    'insurance_task_duration_seconds', 'Background task duration by task and outcome.', ['task', 'outcome']
+)
+
+
+def record_cache_lookup(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
@@ -0,0 +1,228 @@
+"""
+Middlewares du projet.
+"""
+import os
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+from django.utils.text import slugify
+from django.utils.translation import gettext as _
+
+from .metrics import VIEW_DB_QUERIES, VIEW_DURATION
+from .permissions import get_roles
+from .utils.logging import log_info, log_warning
+from .utils.profiling import CodeProfiler, RequestProfile, activate_profile
+from .utils.queries import QueryCounter, QueryRecorder
+
+
+class ProfileAuthenticationMiddleware(AuthenticationMiddleware):
+    """
+    AuthenticationMiddleware qui expose aussi ``request.roles`` (UserRoles).
+
+    ``request.user`` est chargé par ``EmailBackend.get_user`` avec son profil
+    (une requête jointe) ; les indicateurs de rôle sont calculés une fois et
+    partagés par les mixins, les vérifications de permissions et les templates.
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.roles = SimpleLazyObject(lambda: get_roles(request.user))
+
+
+class QueryInspectorMiddleware:
+    """
+    Compte les requêtes SQL de chaque requête HTTP et signale les N+1.
+
+    Activé par ``QUERY_INSPECTOR['ENABLED']`` (par défaut en DEBUG) ; sinon le
+    middleware se retire de la chaîne au démarrage et ne coûte rien.
+
+    Journalise un avertissement quand une même forme de requête est exécutée
+    au moins ``REPEAT_THRESHOLD`` fois, ou quand la vue dépasse le budget
+    déclaré pour son nom d'URL dans ``QUERY_BUDGETS``. Ajoute les en-têtes
+    ``X-Query-Count`` et ``X-Query-Time-Ms`` à la réponse.
+    """
+
+    def __init__(self, get_response):
+        options = getattr(settings, 'QUERY_INSPECTOR', {})
+        if not options.get('ENABLED', settings.DEBUG):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.repeat_threshold = options.get('REPEAT_THRESHOLD', 5)
+        self.budgets = getattr(settings, 'QUERY_BUDGETS', {})
+
+    def __call__(self, request):
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+
+        response['X-Query-Count'] = str(recorder.count)
+        response['X-Query-Time-Ms'] = f'{recorder.duration_ms:.1f}'
+
+        match = getattr(request, 'resolver_match', None)
+        url_name = match.view_name if match else None
+        extra = {'path': request.path, 'url_name': url_name, 'query_count': recorder.count}
+
+        for shape, count in recorder.repeated(self.repeat_threshold):
+            log_warning(
+                _("Possible N+1 on %(path)s: query executed %(count)s times: %(sql)s") % {
+                    'path': request.path, 'count': count, 'sql': shape
+                },
+                extra={**extra, 'repeat_count': count, 'sql': shape}
+            )
+
+        budget = self.budgets.get(url_name)
+        if budget is not None and recorder.count > budget:
+            log_warning(
+                _("Query budget exceeded on %(url_name)s: %(count)s queries (budget %(budget)s)") % {
+                    'url_name': url_name, 'count': recorder.count, 'budget': budget
+                },
+                extra={**extra, 'budget': budget}
+            )
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Profilage à la demande de requêtes isolées (à placer après AuthenticationMiddleware).
+
+    Une requête est profilée si :
+    - elle porte l'en-tête ``PROFILING['HEADER']`` (``X-Profile: 1``) et vient
+      d'un membre du staff ou d'un administrateur (ou que DEBUG est actif) ;
+    - l'utilisateur fait partie de ``PROFILING['USERS']`` ;
+    - ou elle est tirée au sort selon ``PROFILING['SAMPLE_RATE']``.
+
+    Pour une requête profilée : durée totale, temps et nombre de requêtes SQL,
+    temps de rendu des templates et sections applicatives (``ml_predict``…)
+    sont journalisés et renvoyés dans l'en-tête ``Server-Timing`` ; le profil
+    (cProfile ``.prof`` ou piles ``.folded`` selon ``OUTPUT``) est écrit dans
+    ``PROFILING['DIR']``.
+
+    Sans ``PROFILING['ENABLED']`` le middleware se retire de la chaîne au démarrage.
+    """
+
+    def __init__(self, get_response):
+        options = getattr(settings, 'PROFILING', {})
+        if not options.get('ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.header = options.get('HEADER', 'X-Profile')
+        self.users = frozenset(options.get('USERS', ()))
+        self.sample_rate = options.get('SAMPLE_RATE', 0.0)
+        self.output = options.get('OUTPUT', 'cprofile')
+        self.interval = options.get('SAMPLE_INTERVAL', 0.005)
+        self.directory = options.get('DIR', os.path.join(settings.BASE_DIR, 'logs', 'profiles'))
+
+    def should_profile(self, request):
+        if request.headers.get(self.header) and (settings.DEBUG or self._is_staff(request.user)):
+            return True
+        if self.users and request.user.is_authenticated and request.user.get_username() in self.users:
+            return True
+        return bool(self.sample_rate) and random.random() < self.sample_rate
+
+    @staticmethod
+    def _is_staff(user):
+        return user.is_authenticated and (user.is_staff or user.profile.is_admin())
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        profile = request.request_profile = RequestProfile()
+        profiler = CodeProfiler(self.output, self.interval)
+        start = time.perf_counter()
+        with activate_profile(profile), QueryRecorder() as queries, profiler:
+            response = self.get_response(request)
+        wall_ms = (time.perf_counter() - start) * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        name = match.view_name if match else request.path
+        path = profiler.dump(self._profile_path(name, wall_ms))
+
+        timings = {
+            'wall_ms': round(wall_ms, 1),
+            'sql_ms': round(queries.duration_ms, 1),
+            'sql_count': queries.count,
+            'template_ms': round(profile.timings['template'], 1),
+            'ml_predict_ms': round(profile.timings['ml_predict'], 1),
+        }
+        log_info(
+            _("Profiled %(method)s %(path)s: %(wall).1f ms, %(count)s queries (%(sql).1f ms)") % {
+                'method': request.method, 'path': request.path, 'wall': wall_ms,
+                'count': queries.count, 'sql': queries.duration_ms,
+            },
+            extra={'url_name': name, 'profile_file': path, **timings}
+        )
+        response['Server-Timing'] = ', '.join([
+            f"app;dur={timings['wall_ms']}",
+            f"db;dur={timings['sql_ms']};desc=\"{queries.count} queries\"",
+            f"tpl;dur={timings['template_ms']}",
+            f"ml;dur={timings['ml_predict_ms']}",
+        ])
+        return response
+
+    def process_template_response(self, request, response):
+        profile = getattr(request, 'request_profile', None)
+        if profile is not None:
+            render = response.render
+
+            def timed_render():
+                with profile.section('template'):
+                    return render()
+
+            response.render = timed_render
+        return response
+
+    def _profile_path(self, name, wall_ms):
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = timezone.now().strftime('%Y%m%d-%H%M%S-%f')
+        slug = slugify(name.replace(':', '-').replace('/', '-')) or 'root'
+        return os.path.join(self.directory, f'{stamp}-{os.getpid()}-{slug}-{int(wall_ms)}ms')
+
+
+class MetricsMiddleware:
+    """
+    Durée et nombre de requêtes SQL par nom d'URL, exposés sur ``/metrics``.
+
+    Le label est le nom de la route (``insurance_web:profile``), jamais le
+    chemin brut, pour borner le nombre de séries. Les requêtes SQL sont
+    seulement comptées (``QueryCounter``). Synchrone ou asynchrone selon la
+    chaîne (ASGI : pas de passage par un thread). Désactivé par
+    ``METRICS['ENABLED'] = False``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS', {}).get('ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        with QueryCounter() as queries:
+            response = self.get_response(request)
+        self._observe(request, start, queries)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        with QueryCounter() as queries:
+            response = await self.get_response(request)
+        self._observe(request, start, queries)
+        return response
+
+    @staticmethod
+    def _observe(request, start, queries):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        VIEW_DURATION.observe(time.perf_counter() - start, view=view)
+        VIEW_DB_QUERIES.observe(queries.count, view=view)
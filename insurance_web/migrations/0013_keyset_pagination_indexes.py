@@ -0,0 +1,35 @@
+# Generated by Django 6.0.1 on 2026-10-19 06:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('insurance_web', '0012_notification_read_at_archive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['client', 'date_time', 'id'], name='appointment_client_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['conseiller', 'client', 'date_time', 'id'], name='appointment_cons_client_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='notification_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prediction',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='prediction_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='prediction',
+            index=models.Index(fields=['user', 'created_by', 'created_at', 'id'], name='prediction_user_creator_idx'),
+        ),
+    ]
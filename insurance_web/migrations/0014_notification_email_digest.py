@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-19 06:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('insurance_web', '0013_keyset_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='email_pending',
+            field=models.BooleanField(default=False, verbose_name='Pending digest email'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='digest_interval_minutes',
+            field=models.PositiveIntegerField(choices=[(15, 'Every 15 minutes'), (30, 'Every 30 minutes'), (60, 'Every hour'), (240, 'Every 4 hours'), (1440, 'Once a day')], default=15, verbose_name='Digest frequency'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='email_delivery',
+            field=models.CharField(choices=[('immediate', 'One email per notification'), ('digest', 'Grouped digest')], default='immediate', max_length=20, verbose_name='Email notifications'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='next_digest_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('email_pending', True)), fields=['user', 'created_at'], name='notification_email_pending_idx'),
+        ),
+    ]
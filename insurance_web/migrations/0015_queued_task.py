@@ -0,0 +1,44 @@
+# Generated by Django 6.0.1 on 2026-10-19 06:43
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('insurance_web', '0014_notification_email_digest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueuedTask',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('task_path', models.CharField(max_length=255, verbose_name='Task')),
+                ('queue_name', models.CharField(default='default', max_length=32, verbose_name='Queue')),
+                ('priority', models.IntegerField(default=0, verbose_name='Priority')),
+                ('args', models.JSONField(default=list)),
+                ('kwargs', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('READY', 'Ready'), ('RUNNING', 'Running'), ('FAILED', 'Failed'), ('SUCCESSFUL', 'Successful')], default='READY', max_length=16, verbose_name='Status')),
+                ('run_after', models.DateTimeField(blank=True, null=True, verbose_name='Run after')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Attempts')),
+                ('max_attempts', models.PositiveIntegerField(default=3, verbose_name='Max attempts')),
+                ('worker_id', models.CharField(blank=True, max_length=64)),
+                ('enqueued_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('last_attempted_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('duration_ms', models.FloatField(blank=True, null=True, verbose_name='Duration (ms)')),
+                ('return_value', models.JSONField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('exception_class_path', models.CharField(blank=True, max_length=255)),
+            ],
+            options={
+                'verbose_name': 'Queued task',
+                'verbose_name_plural': 'Queued tasks',
+                'ordering': ['-enqueued_at'],
+                'indexes': [models.Index(fields=['status', 'queue_name', '-priority', 'enqueued_at'], name='queued_task_fetch_idx')],
+            },
+        ),
+    ]
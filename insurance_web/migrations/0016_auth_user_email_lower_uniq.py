@@ -0,0 +1,39 @@
+# Index unique sur l'email normalisé de auth_user (recherche de EmailBackend)
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def check_duplicate_emails(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    duplicates = list(
+        User.objects.exclude(email='')
+        .values(email_key=Lower('email'))
+        .annotate(total=Count('id'))
+        .filter(total__gt=1)
+        .values_list('email_key', flat=True)[:20]
+    )
+    if duplicates:
+        raise RuntimeError(
+            "Duplicate emails (case-insensitive) must be merged before adding the unique index: "
+            + ', '.join(duplicates)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('insurance_web', '0015_queued_task'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_emails, migrations.RunPython.noop),
+        # Index fonctionnel partiel : les comptes sans email ne sont pas concernés
+        migrations.RunSQL(
+            sql="CREATE UNIQUE INDEX auth_user_email_lower_uniq ON auth_user (LOWER(email)) WHERE email <> ''",
+            reverse_sql="DROP INDEX auth_user_email_lower_uniq",
+        ),
+    ]
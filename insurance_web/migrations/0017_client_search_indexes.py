@@ -0,0 +1,79 @@
+# Index de la recherche de clients : trigrammes (PostgreSQL) ou FTS5 (SQLite)
+# sur le nom et l'email de auth_user, ordre d'affichage, filtres du profil.
+
+from django.conf import settings
+from django.db import migrations, models
+
+POSTGRESQL_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    # Mêmes expressions que les lookups icontains / istartswith de Django (UPPER(col::text))
+    "CREATE INDEX auth_user_first_name_trgm ON auth_user USING gin (UPPER(first_name) gin_trgm_ops)",
+    "CREATE INDEX auth_user_last_name_trgm ON auth_user USING gin (UPPER(last_name) gin_trgm_ops)",
+    "CREATE INDEX auth_user_email_trgm ON auth_user USING gin (UPPER(email) gin_trgm_ops)",
+]
+POSTGRESQL_BACKWARD = [
+    "DROP INDEX IF EXISTS auth_user_first_name_trgm",
+    "DROP INDEX IF EXISTS auth_user_last_name_trgm",
+    "DROP INDEX IF EXISTS auth_user_email_trgm",
+]
+
+# Table FTS5 à contenu externe (auth_user), tenue à jour par triggers
+SQLITE_FORWARD = [
+    """CREATE VIRTUAL TABLE insurance_web_user_fts USING fts5(
+        first_name, last_name, email,
+        content='auth_user', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER insurance_web_user_fts_ai AFTER INSERT ON auth_user BEGIN
+        INSERT INTO insurance_web_user_fts(rowid, first_name, last_name, email)
+        VALUES (new.id, new.first_name, new.last_name, new.email);
+    END""",
+    """CREATE TRIGGER insurance_web_user_fts_ad AFTER DELETE ON auth_user BEGIN
+        INSERT INTO insurance_web_user_fts(insurance_web_user_fts, rowid, first_name, last_name, email)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.email);
+    END""",
+    """CREATE TRIGGER insurance_web_user_fts_au AFTER UPDATE OF first_name, last_name, email ON auth_user BEGIN
+        INSERT INTO insurance_web_user_fts(insurance_web_user_fts, rowid, first_name, last_name, email)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.email);
+        INSERT INTO insurance_web_user_fts(rowid, first_name, last_name, email)
+        VALUES (new.id, new.first_name, new.last_name, new.email);
+    END""",
+    "INSERT INTO insurance_web_user_fts(insurance_web_user_fts) VALUES ('rebuild')",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS insurance_web_user_fts_ai",
+    "DROP TRIGGER IF EXISTS insurance_web_user_fts_ad",
+    "DROP TRIGGER IF EXISTS insurance_web_user_fts_au",
+    "DROP TABLE IF EXISTS insurance_web_user_fts",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for sql in statements.get(vendor, ()):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('insurance_web', '0016_auth_user_email_lower_uniq'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'postgresql': POSTGRESQL_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            _run({'postgresql': POSTGRESQL_BACKWARD, 'sqlite': SQLITE_BACKWARD}),
+        ),
+        # Ordre d'affichage des résultats : parcours d'index + pagination par curseur
+        migrations.RunSQL(
+            sql="CREATE INDEX auth_user_name_order_idx ON auth_user (last_name, first_name, id)",
+            reverse_sql="DROP INDEX auth_user_name_order_idx",
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['region', 'age'], name='profile_region_age_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 6.0.1 on 2026-10-19 08:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Min
+
+BATCH_SIZE = 1000
+
+
+def backfill_advisor_clients(apps, schema_editor):
+    """Un lien par couple (conseiller, client) ayant au moins un rendez-vous."""
+    Appointment = apps.get_model('insurance_web', 'Appointment')
+    AdvisorClient = apps.get_model('insurance_web', 'AdvisorClient')
+    pairs = (
+        Appointment.objects.order_by()
+        .values('conseiller_id', 'client_id')
+        .annotate(count=Count('id'), first=Min('date_time'), last=Max('date_time'))
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    batch = []
+    for pair in pairs:
+        batch.append(AdvisorClient(
+            conseiller_id=pair['conseiller_id'],
+            client_id=pair['client_id'],
+            appointment_count=pair['count'],
+            first_appointment_at=pair['first'],
+            last_appointment_at=pair['last'],
+        ))
+        if len(batch) >= BATCH_SIZE:
+            AdvisorClient.objects.bulk_create(batch)
+            batch = []
+    AdvisorClient.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('insurance_web', '0017_client_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdvisorClient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('appointment_count', models.PositiveIntegerField(default=0, verbose_name='Appointments')),
+                ('first_appointment_at', models.DateTimeField(verbose_name='First appointment')),
+                ('last_appointment_at', models.DateTimeField(verbose_name='Last appointment')),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='advisor_links', to=settings.AUTH_USER_MODEL, verbose_name='Client')),
+                ('conseiller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='advisor_clients', to=settings.AUTH_USER_MODEL, verbose_name='Advisor')),
+            ],
+            options={
+                'verbose_name': 'Advisor client',
+                'verbose_name_plural': 'Advisor clients',
+                'constraints': [models.UniqueConstraint(fields=('conseiller', 'client'), name='advisor_client_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_advisor_clients, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 6.0.1 on 2026-10-19 08:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('insurance_web', '0018_advisor_client'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PredictionFeatures',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('feature_hash', models.CharField(max_length=64, unique=True)),
+                ('age', models.IntegerField(blank=True, null=True, verbose_name='Age')),
+                ('sex', models.CharField(blank=True, choices=[('male', 'Male'), ('female', 'Female')], max_length=10, null=True, verbose_name='Gender')),
+                ('bmi', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, verbose_name='BMI (Body Mass Index)')),
+                ('children', models.IntegerField(default=0, verbose_name='Number of Children')),
+                ('smoker', models.CharField(blank=True, choices=[('yes', 'Yes'), ('no', 'No')], max_length=3, null=True, verbose_name='Smoker')),
+                ('region', models.CharField(blank=True, choices=[('northwest', 'Northwest'), ('northeast', 'Northeast'), ('southwest', 'Southwest'), ('southeast', 'Southeast')], max_length=20, null=True, verbose_name='Region')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Prediction features',
+                'verbose_name_plural': 'Prediction features',
+            },
+        ),
+        migrations.AddField(
+            model_name='prediction',
+            name='repeat_count',
+            field=models.PositiveIntegerField(default=1, verbose_name='Repeats'),
+        ),
+        migrations.AddField(
+            model_name='prediction',
+            name='features',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='predictions', to='insurance_web.predictionfeatures'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0.1 on 2026-10-19 08:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('insurance_web', '0019_prediction_features'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShadowScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('candidate_version', models.CharField(max_length=12, verbose_name='Candidate model')),
+                ('production_version', models.CharField(max_length=12, verbose_name='Production model')),
+                ('day', models.DateField(verbose_name='Day')),
+                ('smoker', models.CharField(choices=[('yes', 'Yes'), ('no', 'No')], max_length=3, verbose_name='Smoker')),
+                ('region', models.CharField(choices=[('northwest', 'Northwest'), ('northeast', 'Northeast'), ('southwest', 'Southwest'), ('southeast', 'Southeast')], max_length=20, verbose_name='Region')),
+                ('age_band', models.CharField(max_length=8, verbose_name='Age band')),
+                ('count', models.PositiveBigIntegerField(default=0)),
+                ('sum_production', models.FloatField(default=0)),
+                ('sum_delta', models.FloatField(default=0)),
+                ('sum_abs_delta', models.FloatField(default=0)),
+                ('sum_sq_delta', models.FloatField(default=0)),
+                ('max_abs_delta', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Shadow score',
+                'verbose_name_plural': 'Shadow scores',
+                'constraints': [models.UniqueConstraint(fields=('candidate_version', 'production_version', 'day', 'smoker', 'region', 'age_band'), name='shadow_score_segment_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-19 09:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('insurance_web', '0020_shadow_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DriftHistogram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Day')),
+                ('feature', models.CharField(max_length=20, verbose_name='Feature')),
+                ('bucket', models.PositiveSmallIntegerField(verbose_name='Bucket')),
+                ('count', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Drift histogram bucket',
+                'verbose_name_plural': 'Drift histogram buckets',
+                'constraints': [models.UniqueConstraint(fields=('day', 'feature', 'bucket'), name='drift_histogram_bucket_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Index btree des préfixes courts de la recherche de clients (PostgreSQL) :
+# en dessous de trois caractères, les index trigrammes de la migration 0017
+# ne filtrent rien et la recherche se fait en début de champ (istartswith).
+
+from django.conf import settings
+from django.db import migrations
+
+# UPPER() renvoie du text : classe d'opérateurs text_pattern_ops (LIKE 'AB%'
+# indépendant de la collation), même expression que les lookups istartswith
+POSTGRESQL_FORWARD = [
+    "CREATE INDEX auth_user_first_name_prefix ON auth_user (UPPER(first_name) text_pattern_ops)",
+    "CREATE INDEX auth_user_last_name_prefix ON auth_user (UPPER(last_name) text_pattern_ops)",
+    "CREATE INDEX auth_user_email_prefix ON auth_user (UPPER(email) text_pattern_ops)",
+]
+POSTGRESQL_BACKWARD = [
+    "DROP INDEX IF EXISTS auth_user_first_name_prefix",
+    "DROP INDEX IF EXISTS auth_user_last_name_prefix",
+    "DROP INDEX IF EXISTS auth_user_email_prefix",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            for sql in statements:
+                schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('insurance_web', '0021_drift_histogram'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(POSTGRESQL_FORWARD), _run(POSTGRESQL_BACKWARD)),
+    ]
@@ -0,0 +1,80 @@
+# Rattache les prédictions existantes à leurs variables normalisées
+# (PredictionFeatures) avant la suppression des colonnes de Prediction (0024).
+# Mêmes normalisation et empreinte que prediction_storage_service, recopiées
+# ici pour que la migration ne dépende pas du code courant.
+
+import hashlib
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import migrations
+
+FEATURE_FIELDS = ('age', 'sex', 'bmi', 'children', 'smoker', 'region')
+BATCH_SIZE = 2000
+
+
+def _normalize(values):
+    if values['bmi'] is not None:
+        values['bmi'] = Decimal(str(values['bmi'])).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    if values['children'] is None:
+        values['children'] = 0
+    return values
+
+
+def _hash(values):
+    canonical = '|'.join('' if values[name] is None else str(values[name]) for name in FEATURE_FIELDS)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def backfill(apps, schema_editor):
+    Prediction = apps.get_model('insurance_web', 'Prediction')
+    PredictionFeatures = apps.get_model('insurance_web', 'PredictionFeatures')
+    last_id = 0
+    while True:
+        rows = list(
+            Prediction.objects.filter(features__isnull=True, id__gt=last_id)
+            .order_by('id')
+            .only('id', *FEATURE_FIELDS)[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+        last_id = rows[-1].id
+        values_by_hash = {}
+        hashes = []
+        for prediction in rows:
+            values = _normalize({name: getattr(prediction, name) for name in FEATURE_FIELDS})
+            key = _hash(values)
+            values_by_hash.setdefault(key, values)
+            hashes.append(key)
+        known = dict(
+            PredictionFeatures.objects.filter(feature_hash__in=values_by_hash).values_list('feature_hash', 'id')
+        )
+        PredictionFeatures.objects.bulk_create(
+            [PredictionFeatures(feature_hash=key, **values) for key, values in values_by_hash.items() if key not in known],
+            ignore_conflicts=True,
+        )
+        known = dict(
+            PredictionFeatures.objects.filter(feature_hash__in=values_by_hash).values_list('feature_hash', 'id')
+        )
+        for prediction, key in zip(rows, hashes):
+            prediction.features_id = known[key]
+        Prediction.objects.bulk_update(rows, ['features'])
+
+
+def restore(apps, schema_editor):
+    Prediction = apps.get_model('insurance_web', 'Prediction')
+    rows = Prediction.objects.filter(features__isnull=False).select_related('features')
+    for prediction in rows.iterator(chunk_size=BATCH_SIZE):
+        for name in FEATURE_FIELDS:
+            setattr(prediction, name, getattr(prediction.features, name))
+        prediction.save(update_fields=FEATURE_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('insurance_web', '0022_client_search_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, restore),
+    ]
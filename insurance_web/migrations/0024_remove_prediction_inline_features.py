@@ -0,0 +1,20 @@
+# Les variables des prédictions ne sont plus stockées que dans
+# PredictionFeatures (rattachement par 0023).
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('insurance_web', '0023_backfill_prediction_features'),
+    ]
+
+    operations = [
+        migrations.RemoveField(model_name='prediction', name='age'),
+        migrations.RemoveField(model_name='prediction', name='sex'),
+        migrations.RemoveField(model_name='prediction', name='bmi'),
+        migrations.RemoveField(model_name='prediction', name='children'),
+        migrations.RemoveField(model_name='prediction', name='smoker'),
+        migrations.RemoveField(model_name='prediction', name='region'),
+    ]
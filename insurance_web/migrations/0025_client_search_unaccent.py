@@ -0,0 +1,61 @@
+# Recherche de clients insensible aux accents sur PostgreSQL : le prénom et le
+# nom sont indexés sans accents, comme la table FTS5 de SQLite
+# (remove_diacritics). unaccent() n'est pas IMMUTABLE (son dictionnaire peut
+# changer) et ne peut donc pas servir dans un index : insurance_web_unaccent
+# fixe le dictionnaire et se déclare IMMUTABLE.
+
+from django.conf import settings
+from django.db import migrations
+
+NAME_FIELDS = ('first_name', 'last_name')
+
+POSTGRESQL_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    """CREATE OR REPLACE FUNCTION insurance_web_unaccent(text) RETURNS text AS $$
+        SELECT public.unaccent('public.unaccent'::regdictionary, $1)
+    $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT""",
+] + [
+    sql
+    for field in NAME_FIELDS
+    for sql in (
+        f"DROP INDEX IF EXISTS auth_user_{field}_trgm",
+        f"DROP INDEX IF EXISTS auth_user_{field}_prefix",
+        # Mêmes expressions que les lookups de search_service (UPPER(insurance_web_unaccent(col)))
+        f"CREATE INDEX auth_user_{field}_trgm ON auth_user "
+        f"USING gin (UPPER(insurance_web_unaccent({field})) gin_trgm_ops)",
+        f"CREATE INDEX auth_user_{field}_prefix ON auth_user "
+        f"(UPPER(insurance_web_unaccent({field})) text_pattern_ops)",
+    )
+]
+POSTGRESQL_BACKWARD = [
+    sql
+    for field in NAME_FIELDS
+    for sql in (
+        f"DROP INDEX IF EXISTS auth_user_{field}_trgm",
+        f"DROP INDEX IF EXISTS auth_user_{field}_prefix",
+        f"CREATE INDEX auth_user_{field}_trgm ON auth_user USING gin (UPPER({field}) gin_trgm_ops)",
+        f"CREATE INDEX auth_user_{field}_prefix ON auth_user (UPPER({field}) text_pattern_ops)",
+    )
+] + [
+    "DROP FUNCTION IF EXISTS insurance_web_unaccent(text)",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            for sql in statements:
+                schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('insurance_web', '0024_remove_prediction_inline_features'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(POSTGRESQL_FORWARD), _run(POSTGRESQL_BACKWARD)),
+    ]
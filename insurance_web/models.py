@@ -1,9 +1,12 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
+from django.tasks import TaskResultStatus
 from django.utils.translation import gettext_lazy as _
-from .constants import SEX_CHOICES, SMOKER_CHOICES, REGION_CHOICES, ROLE_CHOICES, APPOINTMENT_STATUS_CHOICES, NOTIFICATION_TYPE_CHOICES, UNAVAILABILITY_REASON_CHOICES
+from .constants import SEX_CHOICES, SMOKER_CHOICES, REGION_CHOICES, ROLE_CHOICES, APPOINTMENT_STATUS_CHOICES, NOTIFICATION_TYPE_CHOICES, UNAVAILABILITY_REASON_CHOICES, EMAIL_DELIVERY_CHOICES, DIGEST_INTERVAL_CHOICES
 
 class Profile(models.Model):
 
@@ -26,12 +29,30 @@ class Profile(models.Model):
     region = models.CharField(max_length=20, choices=REGION_CHOICES, null=True, blank=True, verbose_name=_("Region"))
     additional_info = models.TextField(null=True, blank=True, verbose_name=_("Additional Information"))
     
+    email_delivery = models.CharField(
+        max_length=20,
+        choices=EMAIL_DELIVERY_CHOICES,
+        default=EMAIL_DELIVERY_CHOICES[0][0],
+        verbose_name=_("Email notifications")
+    )
+    digest_interval_minutes = models.PositiveIntegerField(
+        choices=DIGEST_INTERVAL_CHOICES,
+        default=DIGEST_INTERVAL_CHOICES[0][0],
+        verbose_name=_("Digest frequency")
+    )
+    # Prochain envoi possible d'un digest (None : dès le prochain passage du planificateur)
+    next_digest_at = models.DateTimeField(null=True, blank=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = _("Profile")
         verbose_name_plural = _("Profiles")
+        indexes = [
+            # Filtres de la recherche de clients (région, tranche d'âge)
+            models.Index(fields=['region', 'age'], name='profile_region_age_idx'),
+        ]
     
     def __str__(self):
         return _("Profile of %(name)s") % {'name': self.user.get_full_name() or self.user.email}
@@ -53,6 +74,39 @@ class Profile(models.Model):
     
     def can_view_all_profiles(self):
         return self.is_conseiller() or self.is_admin()
+    
+    def uses_email_digest(self):
+        return self.email_delivery == EMAIL_DELIVERY_CHOICES[1][0]
+    
+    # Valeurs lues en base (ou au dernier save) pour savoir si le profil a été modifié
+    _TRACKED_EXCLUDE = ('updated_at',)
+    
+    def _snapshot(self):
+        return {
+            f.attname: getattr(self, f.attname)
+            for f in self._meta.concrete_fields
+            if f.attname not in self._TRACKED_EXCLUDE and f.attname in self.__dict__
+        }
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_values = instance._snapshot()
+        return instance
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        snapshot = self._snapshot()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and getattr(self, '_saved_values', None) is not None:
+            attnames = {self._meta.get_field(name).attname for name in update_fields}
+            self._saved_values.update({k: v for k, v in snapshot.items() if k in attnames})
+        else:
+            self._saved_values = snapshot
+    
+    def has_unsaved_changes(self):
+        saved = getattr(self, '_saved_values', None)
+        return saved is None or saved != self._snapshot()
 
 
 @receiver(post_save, sender=User)
@@ -63,8 +117,61 @@ def create_user_profile(sender, instance, created, **kwargs):
 
 @receiver(post_save, sender=User)
 def save_user_profile(sender, instance, **kwargs):
-    if hasattr(instance, 'profile'):
-        instance.profile.save()
+    # Seul un profil déjà chargé sur cette instance peut avoir été modifié via
+    # user.profile : ne pas le relire, et ne l'écrire que s'il a changé
+    # (évite une requête à chaque mise à jour de last_login, par exemple).
+    profile = instance._state.fields_cache.get('profile')
+    if profile is not None and profile.has_unsaved_changes():
+        profile.save()
+
+
+@receiver(post_save, sender=Profile)
+def invalidate_cached_pages_on_role_change(sender, instance, created, **kwargs):
+    # post_save est émis avant la mise à jour de _saved_values : rôle précédent
+    from .utils.page_cache import invalidate_page_cache
+    previous = (getattr(instance, '_saved_values', None) or {}).get('role')
+    if previous != instance.role and ROLE_CHOICES[1][0] in (previous, instance.role):
+        invalidate_page_cache()
+
+
+_ADVISOR_DISPLAY_FIELDS = ('first_name', 'last_name', 'email')
+
+
+def _advisor_display(user):
+    return tuple(user.__dict__.get(name) for name in _ADVISOR_DISPLAY_FIELDS)
+
+
+@receiver(post_init, sender=User)
+def remember_advisor_display(sender, instance, **kwargs):
+    # Nom et email lus en base, pour ne chercher le rôle que s'ils changent
+    instance._loaded_display = _advisor_display(instance)
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_pages_on_advisor_change(sender, instance, created, update_fields=None, **kwargs):
+    # Nom et email des conseillers affichés dans les fragments en cache
+    # (liste des conseillers) ; last_login seul (connexion) ne change rien
+    from .utils.page_cache import invalidate_page_cache
+    if update_fields is not None and not set(_ADVISOR_DISPLAY_FIELDS) & set(update_fields):
+        return
+    current = _advisor_display(instance)
+    previous, instance._loaded_display = getattr(instance, '_loaded_display', None), current
+    if created or previous == current:
+        return
+    profile = instance._state.fields_cache.get('profile')
+    if profile is not None:
+        role = profile.role
+    else:
+        role = Profile.objects.filter(user=instance).values_list('role', flat=True).first()
+    if role == ROLE_CHOICES[1][0]:
+        invalidate_page_cache()
+
+
+@receiver(post_delete, sender=Profile)
+def invalidate_cached_pages_on_profile_delete(sender, instance, **kwargs):
+    from .utils.page_cache import invalidate_page_cache
+    if instance.is_conseiller():
+        invalidate_page_cache()
 
 class Appointment(models.Model):
     conseiller = models.ForeignKey(
@@ -90,6 +197,19 @@ class Appointment(models.Model):
         verbose_name = _("Appointment")
         verbose_name_plural = _("Appointments")
         ordering = ['date_time']
+        indexes = [
+            # Pagination par curseur (date_time, id) des rendez-vous d'un client / d'un couple conseiller-client
+            models.Index(fields=['client', 'date_time', 'id'], name='appointment_client_date_idx'),
+            models.Index(fields=['conseiller', 'client', 'date_time', 'id'], name='appointment_cons_client_idx'),
+        ]
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Couple lu en base, pour mettre à jour l'ancien lien si le rendez-vous est réattribué
+        if 'conseiller_id' in instance.__dict__ and 'client_id' in instance.__dict__:
+            instance._loaded_pair = (instance.conseiller_id, instance.client_id)
+        return instance
     
     def __str__(self):
         conseiller_name = self.conseiller.get_full_name() or self.conseiller.email
@@ -101,6 +221,66 @@ class Appointment(models.Model):
         }
 
 
+class AdvisorClient(models.Model):
+    """
+    Lien conseiller-client dénormalisé (un par couple ayant au moins un rendez-vous).
+
+    Tenu à jour par les signaux des rendez-vous (``advisor_client_service``) :
+    « ce client est-il suivi par ce conseiller ? » est une lecture par index
+    unique au lieu d'un parcours de l'historique des rendez-vous.
+    """
+    conseiller = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='advisor_clients',
+        verbose_name=_("Advisor")
+    )
+    client = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='advisor_links',
+        verbose_name=_("Client")
+    )
+    appointment_count = models.PositiveIntegerField(default=0, verbose_name=_("Appointments"))
+    first_appointment_at = models.DateTimeField(verbose_name=_("First appointment"))
+    last_appointment_at = models.DateTimeField(verbose_name=_("Last appointment"))
+
+    class Meta:
+        verbose_name = _("Advisor client")
+        verbose_name_plural = _("Advisor clients")
+        constraints = [
+            models.UniqueConstraint(fields=['conseiller', 'client'], name='advisor_client_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.conseiller_id} - {self.client_id}"
+
+
+@receiver(post_save, sender=Appointment)
+def sync_advisor_client_on_appointment_save(sender, instance, created, raw=False, **kwargs):
+    from .services.advisor_client_service import record_appointment, refresh_advisor_client
+    if raw:
+        return
+    if created:
+        record_appointment(instance)
+    else:
+        # Date (report) ou couple modifiés : recalcul sur les rendez-vous du couple
+        previous = getattr(instance, '_loaded_pair', None)
+        current = (instance.conseiller_id, instance.client_id)
+        if previous and previous != current:
+            refresh_advisor_client(*previous)
+        refresh_advisor_client(*current)
+    instance._loaded_pair = (instance.conseiller_id, instance.client_id)
+
+
+@receiver(post_delete, sender=Appointment)
+def sync_advisor_client_on_appointment_delete(sender, instance, **kwargs):
+    from .services.advisor_client_service import refresh_advisor_client
+    # Pas de création ici : lors d'une suppression en cascade d'un utilisateur,
+    # le lien disparaît avec lui
+    refresh_advisor_client(instance.conseiller_id, instance.client_id, create=False)
+
+
 class ConseillerUnavailability(models.Model):
     """Indisponibilité du conseiller (vacances, maladie, formation, etc.)."""
     conseiller = models.ForeignKey(
@@ -134,22 +314,69 @@ class ConseillerUnavailability(models.Model):
         }
 
 
-class Prediction(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='predictions')
-    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='predictions_created_by')
-    predicted_amount = models.DecimalField(max_digits=10, decimal_places=2)
-    created_at = models.DateTimeField(auto_now_add=True)
+class PredictionFeatures(models.Model):
+    """
+    Variables d'entrée distinctes des prédictions : une ligne par combinaison,
+    identifiée par ``feature_hash`` (voir ``prediction_storage_service``).
+    """
+    feature_hash = models.CharField(max_length=64, unique=True)
     age = models.IntegerField(null=True, blank=True, verbose_name=_("Age"))
     sex = models.CharField(max_length=10, choices=SEX_CHOICES, null=True, blank=True, verbose_name=_("Gender"))
     bmi = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, verbose_name=_("BMI (Body Mass Index)"))
     children = models.IntegerField(default=0, verbose_name=_("Number of Children"))
     smoker = models.CharField(max_length=3, choices=SMOKER_CHOICES, null=True, blank=True, verbose_name=_("Smoker"))
     region = models.CharField(max_length=20, choices=REGION_CHOICES, null=True, blank=True, verbose_name=_("Region"))
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Prediction features")
+        verbose_name_plural = _("Prediction features")
+
+    def __str__(self):
+        return self.feature_hash[:12]
+
+
+class PredictionManager(models.Manager):
+
+    def create(self, **kwargs):
+        """
+        Accepte les variables (``age``, ``sex``, ``bmi``…) à la place de
+        ``features`` : elles sont rattachées à leur ligne ``PredictionFeatures``,
+        créée au besoin.
+        """
+        from .services.prediction_storage_service import FEATURE_FIELDS, get_or_create_features, normalize_features
+        values = {name: kwargs.pop(name) for name in FEATURE_FIELDS if name in kwargs}
+        if values:
+            kwargs['features'] = get_or_create_features(normalize_features(values))
+        return super().create(**kwargs)
+
+
+class Prediction(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='predictions')
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='predictions_created_by')
+    predicted_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Variables d'entrée, partagées entre prédictions identiques (None : aucune variable enregistrée)
+    features = models.ForeignKey(
+        PredictionFeatures,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='predictions',
+    )
+    # Nombre de fois où cette prédiction a été refaite à l'identique (fenêtre de regroupement)
+    repeat_count = models.PositiveIntegerField(default=1, verbose_name=_("Repeats"))
+
+    objects = PredictionManager()
 
     class Meta: 
         verbose_name = _("Prediction")
         verbose_name_plural = _("Predictions")
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id'], name='prediction_user_created_idx'),
+            models.Index(fields=['user', 'created_by', 'created_at', 'id'], name='prediction_user_creator_idx'),
+        ]
 
     def __str__(self):
         user_name = self.user.get_full_name() or self.user.email
@@ -159,6 +386,61 @@ class Prediction(models.Model):
         }
 
 
+class ShadowScore(models.Model):
+    """
+    Écarts agrégés entre le modèle candidat et le modèle de production sur un
+    échantillon des prédictions réelles (voir ``shadow_service``), par jour
+    et par segment (fumeur, région, tranche d'âge).
+    """
+    candidate_version = models.CharField(max_length=12, verbose_name=_("Candidate model"))
+    production_version = models.CharField(max_length=12, verbose_name=_("Production model"))
+    day = models.DateField(verbose_name=_("Day"))
+    smoker = models.CharField(max_length=3, choices=SMOKER_CHOICES, verbose_name=_("Smoker"))
+    region = models.CharField(max_length=20, choices=REGION_CHOICES, verbose_name=_("Region"))
+    age_band = models.CharField(max_length=8, verbose_name=_("Age band"))
+    count = models.PositiveBigIntegerField(default=0)
+    sum_production = models.FloatField(default=0)
+    sum_delta = models.FloatField(default=0)  # candidat - production
+    sum_abs_delta = models.FloatField(default=0)
+    sum_sq_delta = models.FloatField(default=0)
+    max_abs_delta = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Shadow score")
+        verbose_name_plural = _("Shadow scores")
+        constraints = [
+            models.UniqueConstraint(
+                fields=['candidate_version', 'production_version', 'day', 'smoker', 'region', 'age_band'],
+                name='shadow_score_segment_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.candidate_version} vs {self.production_version} {self.day} ({self.count})"
+
+
+class DriftHistogram(models.Model):
+    """
+    Histogrammes des entrées et des primes prédites par jour (voir
+    ``drift_service``) : une ligne par variable et par intervalle fixe.
+    """
+    day = models.DateField(verbose_name=_("Day"))
+    feature = models.CharField(max_length=20, verbose_name=_("Feature"))
+    bucket = models.PositiveSmallIntegerField(verbose_name=_("Bucket"))
+    count = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = _("Drift histogram bucket")
+        verbose_name_plural = _("Drift histogram buckets")
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'feature', 'bucket'], name='drift_histogram_bucket_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.feature}[{self.bucket}] ({self.count})"
+
+
 class Notification(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
     appointment = models.ForeignKey(
@@ -171,6 +453,9 @@ class Notification(models.Model):
     type = models.CharField(max_length=30, choices=NOTIFICATION_TYPE_CHOICES, verbose_name=_("Type"))
     message = models.TextField(verbose_name=_("Message"))
     read = models.BooleanField(default=False, verbose_name=_("Read"))
+    read_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Read at"))
+    # En attente d'envoi dans le prochain digest email de l'utilisateur
+    email_pending = models.BooleanField(default=False, verbose_name=_("Pending digest email"))
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -178,6 +463,16 @@ class Notification(models.Model):
         verbose_name = _("Notification")
         verbose_name_plural = _("Notifications")
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'read'], name='notification_user_read_idx'),
+            models.Index(fields=['type', 'created_at'], name='notification_type_created_idx'),
+            models.Index(fields=['user', 'created_at', 'id'], name='notification_user_created_idx'),
+            models.Index(
+                fields=['user', 'created_at'],
+                name='notification_email_pending_idx',
+                condition=models.Q(email_pending=True),
+            ),
+        ]
 
     def __str__(self):
         user_name = self.user.get_full_name() or self.user.email
@@ -189,6 +484,30 @@ class Notification(models.Model):
         return _("Notification for %(user)s") % {'user': user_name}
 
 
+class NotificationArchive(models.Model):
+    """Copie compacte d'une notification expirée, retirée de la table active par la rétention."""
+    notification_id = models.BigIntegerField(verbose_name=_("Original notification ID"))
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_notifications')
+    appointment_id = models.BigIntegerField(null=True, blank=True)
+    type = models.CharField(max_length=30, choices=NOTIFICATION_TYPE_CHOICES, verbose_name=_("Type"))
+    message = models.TextField(verbose_name=_("Message"))
+    read = models.BooleanField(default=False, verbose_name=_("Read"))
+    read_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Read at"))
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Archived notification")
+        verbose_name_plural = _("Archived notifications")
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='notif_archive_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return _("Archived notification %(id)s") % {'id': self.notification_id}
+
+
 class PricingConfiguration(models.Model):
     """
     Configuration globale des prix (singleton).
@@ -241,4 +560,44 @@ class PricingConfiguration(models.Model):
                 additional_charges_percentage=0.00,
                 is_active=True
             )
-        return config
\ No newline at end of file
+        return config
+
+
+class QueuedTask(models.Model):
+    """Tâche en file d'attente du backend de tâches en base (voir insurance_web.tasks)."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    task_path = models.CharField(max_length=255, verbose_name=_("Task"))
+    queue_name = models.CharField(max_length=32, default='default', verbose_name=_("Queue"))
+    priority = models.IntegerField(default=0, verbose_name=_("Priority"))
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    status = models.CharField(
+        max_length=16,
+        choices=TaskResultStatus.choices,
+        default=TaskResultStatus.READY,
+        verbose_name=_("Status")
+    )
+    run_after = models.DateTimeField(null=True, blank=True, verbose_name=_("Run after"))
+    attempts = models.PositiveIntegerField(default=0, verbose_name=_("Attempts"))
+    max_attempts = models.PositiveIntegerField(default=3, verbose_name=_("Max attempts"))
+    worker_id = models.CharField(max_length=64, blank=True)
+    enqueued_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    last_attempted_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration_ms = models.FloatField(null=True, blank=True, verbose_name=_("Duration (ms)"))
+    return_value = models.JSONField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    exception_class_path = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        verbose_name = _("Queued task")
+        verbose_name_plural = _("Queued tasks")
+        ordering = ['-enqueued_at']
+        indexes = [
+            # Sélection des tâches prêtes par le worker
+            models.Index(fields=['status', 'queue_name', '-priority', 'enqueued_at'], name='queued_task_fetch_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task_path} ({self.status})"
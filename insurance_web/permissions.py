@@ -1,8 +1,50 @@
-from django.core.exceptions import PermissionDenied
+from django.core.exceptions import ObjectDoesNotExist, PermissionDenied
 from django.contrib.auth.models import AnonymousUser
 from django.utils.translation import gettext as _
 
 
+class UserRoles:
+    """
+    Rôle d'un utilisateur, résolu une seule fois puis mis en cache sur l'instance.
+
+    Évite de relire ``user.profile`` dans chaque mixin, vérification de
+    permission et template d'une même requête.
+    """
+    __slots__ = ('is_authenticated', 'has_profile', 'role', 'role_display', 'is_user', 'is_conseiller', 'is_admin')
+
+    def __init__(self, user):
+        self.is_authenticated = bool(user.is_authenticated)
+        profile = None
+        if self.is_authenticated:
+            try:
+                profile = user.profile
+            except ObjectDoesNotExist:
+                profile = None
+        self.has_profile = profile is not None
+        self.role = profile.role if profile else None
+        self.role_display = profile.get_role_display() if profile else ''
+        self.is_user = bool(profile and profile.is_user())
+        self.is_conseiller = bool(profile and profile.is_conseiller())
+        self.is_admin = bool(profile and profile.is_admin())
+
+    @property
+    def is_conseiller_or_admin(self):
+        return self.is_conseiller or self.is_admin
+
+
+def get_roles(user):
+    """
+    Retourne le UserRoles de ``user``, calculé au premier appel.
+
+    Recalculé si le rôle du profil (déjà chargé, sans requête) a changé depuis.
+    """
+    roles = getattr(user, '_roles', None)
+    if roles is None or (roles.has_profile and user.profile.role != roles.role):
+        roles = UserRoles(user)
+        user._roles = roles
+    return roles
+
+
 def check_user_authenticated(user):
     """Vérifie que l'utilisateur est authentifié"""
     if isinstance(user, AnonymousUser) or not user.is_authenticated:
@@ -12,29 +54,30 @@ def check_user_authenticated(user):
 def check_user_permission(user):
     """Vérifie que l'utilisateur a un profil utilisateur valide"""
     check_user_authenticated(user)
-    if not hasattr(user, 'profile'):
+    if not get_roles(user).has_profile:
         raise PermissionDenied(_("User profile not found."))
 
 
 def check_conseiller_permission(user, allow_admin=True):
     """Vérifie que l'utilisateur est conseiller (ou admin si allow_admin=True)"""
     check_user_permission(user)
-    if not user.profile.is_conseiller():
-        if not (allow_admin and user.profile.is_admin()):
+    roles = get_roles(user)
+    if not roles.is_conseiller:
+        if not (allow_admin and roles.is_admin):
             raise PermissionDenied(_("You do not have the necessary permissions to access this resource."))
 
 
 def check_admin_permission(user):
     """Vérifie que l'utilisateur est administrateur"""
     check_user_permission(user)
-    if not user.profile.is_admin():
+    if not get_roles(user).is_admin:
         raise PermissionDenied(_("You do not have administrator permissions to access this resource."))
 
 
 def check_own_resource_or_admin(user, resource_user):
     """Vérifie que l'utilisateur est propriétaire de la ressource ou est admin"""
     check_user_permission(user)
-    if user.id != resource_user.id and not user.profile.is_admin():
+    if user.id != resource_user.id and not get_roles(user).is_admin:
         raise PermissionDenied(_("You can only access your own resources."))
 
 
@@ -47,17 +90,16 @@ def check_not_self_action(user, target_user, action_name="perform this action"):
 
 def has_conseiller_permission(user, allow_admin=True):
     """Retourne True si l'utilisateur est conseiller (ou admin si allow_admin=True)"""
-    if not user.is_authenticated or not hasattr(user, 'profile'):
+    roles = get_roles(user)
+    if not roles.has_profile:
         return False
-    if user.profile.is_conseiller():
+    if roles.is_conseiller:
         return True
-    if allow_admin and user.profile.is_admin():
+    if allow_admin and roles.is_admin:
         return True
     return False
 
 
 def has_admin_permission(user):
     """Retourne True si l'utilisateur est administrateur"""
-    if not user.is_authenticated or not hasattr(user, 'profile'):
-        return False
-    return user.profile.is_admin()
+    return get_roles(user).is_admin
@@ -0,0 +1,20 @@
+from .brokers import (
+    BaseBroker,
+    InMemoryBroker,
+    PostgresBroker,
+    Subscription,
+    get_broker,
+    set_broker,
+)
+from .streams import format_sse, notification_event_stream
+
+__all__ = [
+    'BaseBroker',
+    'InMemoryBroker',
+    'PostgresBroker',
+    'Subscription',
+    'get_broker',
+    'set_broker',
+    'format_sse',
+    'notification_event_stream',
+]
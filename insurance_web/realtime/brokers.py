@@ -0,0 +1,221 @@
+"""
+Brokers pub/sub pour la diffusion temps réel des notifications (SSE).
+
+Un broker reçoit des événements publiés depuis le code synchrone (vues, services)
+et les distribue aux abonnements asynchrones ouverts par les flux SSE.
+"""
+import asyncio
+import json
+import select
+import threading
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from ..utils.logging import log_error, log_warning
+
+
+class Subscription:
+    """
+    Abonnement d'un flux SSE aux événements d'un utilisateur.
+
+    Les événements sont déposés dans une file asyncio bornée, sur la boucle
+    d'événements de l'abonné. Si le client ne consomme pas assez vite, les
+    événements les plus anciens sont abandonnés (le compteur est de toute façon
+    renvoyé à chaque lot).
+    """
+
+    def __init__(self, broker, user_id, loop, maxsize):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, event):
+        """Dépose un événement dans la file (à appeler depuis la boucle de l'abonné)."""
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        """Attend le prochain événement ; retourne None si le délai expire."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def drain(self):
+        """Retourne les événements déjà en attente sans bloquer."""
+        events = []
+        while not self.queue.empty():
+            events.append(self.queue.get_nowait())
+        return events
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class BaseBroker:
+    """Interface commune des brokers de notifications."""
+
+    def publish(self, user_id, event):
+        """Publie un événement (dict sérialisable en JSON) pour un utilisateur."""
+        raise NotImplementedError
+
+    def subscribe(self, user_id):
+        """Ouvre un abonnement aux événements d'un utilisateur (depuis une coroutine)."""
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+
+class InMemoryBroker(BaseBroker):
+    """
+    Broker en mémoire, limité au processus courant.
+
+    Chaque abonnement ne coûte qu'une file asyncio : des milliers de connexions
+    inactives par worker restent peu coûteuses. Utilisé pour les tests et les
+    déploiements mono-processus.
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        subscription = Subscription(self, user_id, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def subscriber_count(self, user_id=None):
+        """Nombre d'abonnements ouverts (pour un utilisateur ou au total)."""
+        with self._lock:
+            if user_id is not None:
+                return len(self._subscriptions.get(user_id, ()))
+            return sum(len(subs) for subs in self._subscriptions.values())
+
+    def publish(self, user_id, event):
+        self._dispatch(user_id, event)
+
+    def _dispatch(self, user_id, event):
+        """Distribue un événement aux abonnés locaux, quel que soit le thread appelant."""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # Boucle fermée : la connexion a disparu sans se désabonner
+                self.unsubscribe(subscription)
+
+
+class PostgresBroker(InMemoryBroker):
+    """
+    Broker inter-processus basé sur LISTEN/NOTIFY de PostgreSQL.
+
+    La publication passe par ``pg_notify`` sur la connexion Django ; chaque
+    worker qui a au moins un abonné démarre un thread d'écoute dédié qui
+    redistribue les événements à ses abonnés locaux. Aucun service externe
+    n'est nécessaire au-delà de la base de données.
+    """
+
+    channel = 'insurance_web_notifications'
+
+    def __init__(self, queue_size=100, poll_timeout=5.0):
+        super().__init__(queue_size=queue_size)
+        self.poll_timeout = poll_timeout
+        self._listener = None
+        self._listener_lock = threading.Lock()
+
+    def publish(self, user_id, event):
+        payload = json.dumps({'user_id': user_id, 'event': event}, default=str)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.channel, payload])
+
+    def subscribe(self, user_id):
+        self._ensure_listener()
+        return super().subscribe(user_id)
+
+    def _ensure_listener(self):
+        with self._listener_lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(
+                    target=self._listen,
+                    name='notification-broker-listener',
+                    daemon=True,
+                )
+                self._listener.start()
+
+    def _connect(self):
+        import psycopg2
+        import psycopg2.extensions
+
+        db = settings.DATABASES['default']
+        conn = psycopg2.connect(
+            dbname=db.get('NAME'),
+            user=db.get('USER'),
+            password=db.get('PASSWORD'),
+            host=db.get('HOST'),
+            port=db.get('PORT'),
+        )
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN {self.channel}')
+        return conn
+
+    def _listen(self):
+        try:
+            conn = self._connect()
+        except Exception as e:
+            log_error("Notification broker listener could not connect: %s", e, exc_info=True)
+            return
+        try:
+            while True:
+                if select.select([conn], [], [], self.poll_timeout) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    try:
+                        message = json.loads(notify.payload)
+                    except ValueError:
+                        log_warning("Invalid notification broker payload", extra={'payload': notify.payload})
+                        continue
+                    self._dispatch(message['user_id'], message['event'])
+        except Exception as e:
+            log_error("Notification broker listener stopped: %s", e, exc_info=True)
+        finally:
+            conn.close()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Retourne le broker configuré par ``NOTIFICATION_BROKER`` (instance unique par processus)."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                broker_path = getattr(settings, 'NOTIFICATION_BROKER', 'insurance_web.realtime.brokers.InMemoryBroker')
+                _broker = import_string(broker_path)()
+    return _broker
+
+
+def set_broker(broker):
+    """Remplace le broker du processus (tests) ; None réinitialise depuis les settings."""
+    global _broker
+    _broker = broker
@@ -0,0 +1,56 @@
+"""
+Flux Server-Sent Events des notifications d'un utilisateur.
+"""
+import asyncio
+import json
+
+from django.conf import settings
+
+from ..services.notification_service import aget_unread_notifications_count
+from .brokers import get_broker
+
+
+def format_sse(event, data, event_id=None):
+    """Formate un message SSE (``event``/``id``/``data``)."""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data, default=str)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+async def notification_event_stream(user, broker=None, heartbeat=None, max_age=None):
+    """
+    Générateur asynchrone des événements SSE pour un utilisateur.
+
+    Envoie le compteur de notifications non lues à la connexion, puis chaque
+    nouvelle notification suivie du compteur mis à jour (une seule requête par
+    lot d'événements). Un commentaire de keep-alive est émis toutes les
+    ``heartbeat`` secondes ; la connexion est fermée après ``max_age`` secondes
+    et le navigateur se reconnecte automatiquement.
+    """
+    broker = broker or get_broker()
+    heartbeat = heartbeat or getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT', 15)
+    max_age = max_age or getattr(settings, 'NOTIFICATION_STREAM_MAX_AGE', 300)
+    retry_ms = getattr(settings, 'NOTIFICATION_STREAM_RETRY_MS', 5000)
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_age
+    subscription = broker.subscribe(user.id)
+    try:
+        yield f'retry: {retry_ms}\n\n'
+        yield format_sse('unread_count', {'count': await aget_unread_notifications_count(user)})
+
+        while loop.time() < deadline:
+            event = await subscription.get(timeout=min(heartbeat, max(deadline - loop.time(), 0)))
+            if event is None:
+                yield ': keep-alive\n\n'
+                continue
+
+            for item in [event] + subscription.drain():
+                if item.get('type') == 'notification':
+                    yield format_sse('notification', item, event_id=item.get('id'))
+            yield format_sse('unread_count', {'count': await aget_unread_notifications_count(user)})
+    finally:
+        subscription.close()
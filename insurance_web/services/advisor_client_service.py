@@ -0,0 +1,76 @@
+"""
+Maintenance et lecture du lien conseiller-client (``AdvisorClient``).
+
+Un rendez-vous créé met à jour le lien de façon incrémentale (compteur +1,
+bornes de dates) ; un report, une réattribution ou une suppression recalcule
+le lien à partir des rendez-vous du couple (index ``appointment_cons_client_idx``).
+Le lien est supprimé quand le couple n'a plus de rendez-vous. Les rendez-vous
+annulés comptent : ils ne retirent pas le client au conseiller.
+
+Les mises à jour en masse (``QuerySet.update``) n'émettent pas de signaux :
+seul le statut est modifié ainsi, ce qui n'affecte pas le lien.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateTimeField, F, Max, Min, Value
+from django.db.models.functions import Greatest, Least
+
+from ..models import AdvisorClient, Appointment
+from .search_service import invalidate_client_typeahead
+
+
+def record_appointment(appointment):
+    """Prend en compte un nouveau rendez-vous (une requête si le lien existe déjà)."""
+    date_time = Value(appointment.date_time, output_field=DateTimeField())
+    links = AdvisorClient.objects.filter(conseiller_id=appointment.conseiller_id, client_id=appointment.client_id)
+    changes = {
+        'appointment_count': F('appointment_count') + 1,
+        'first_appointment_at': Least('first_appointment_at', date_time),
+        'last_appointment_at': Greatest('last_appointment_at', date_time),
+    }
+    if links.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            AdvisorClient.objects.create(
+                conseiller_id=appointment.conseiller_id,
+                client_id=appointment.client_id,
+                appointment_count=1,
+                first_appointment_at=appointment.date_time,
+                last_appointment_at=appointment.date_time,
+            )
+    except IntegrityError:
+        # Lien créé entre-temps par une requête concurrente
+        links.update(**changes)
+        return
+    invalidate_client_typeahead(appointment.conseiller_id)
+
+
+def refresh_advisor_client(conseiller_id, client_id, create=True):
+    """
+    Recalcule le lien d'un couple à partir de ses rendez-vous.
+
+    Args:
+        create: Crée le lien s'il manque (sinon, mise à jour ou suppression seulement)
+    """
+    stats = Appointment.objects.filter(conseiller_id=conseiller_id, client_id=client_id).aggregate(
+        appointment_count=Count('id'),
+        first_appointment_at=Min('date_time'),
+        last_appointment_at=Max('date_time'),
+    )
+    links = AdvisorClient.objects.filter(conseiller_id=conseiller_id, client_id=client_id)
+    if not stats['appointment_count']:
+        if links.delete()[0]:
+            invalidate_client_typeahead(conseiller_id)
+        return
+    if links.update(**stats) or not create:
+        return
+    _link, created = AdvisorClient.objects.update_or_create(
+        conseiller_id=conseiller_id, client_id=client_id, defaults=stats
+    )
+    if created:
+        invalidate_client_typeahead(conseiller_id)
+
+
+def is_advisor_client(conseiller, client):
+    """Le conseiller a-t-il (eu) au moins un rendez-vous avec ce client ?"""
+    return AdvisorClient.objects.filter(conseiller=conseiller, client=client).exists()
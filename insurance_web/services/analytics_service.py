@@ -0,0 +1,206 @@
+"""
+Statistiques des primes calculées sur l'instantané colonnaire (``snapshot_service``).
+
+Toutes les agrégations sont vectorisées (NumPy) sur les colonnes en
+``np.memmap`` : pas de requête SQL, pas de boucle Python par ligne. Le
+résultat de ``get_snapshot_stats`` est mis en cache par ``build_id`` (et
+langue, pour les libellés) : il n'est recalculé qu'après un rafraîchissement
+de l'instantané.
+"""
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import translation
+from django.utils.translation import gettext as _
+
+from ..constants import AGE_BAND_LABELS, AGE_BANDS, REGION_CHOICES, SEX_CHOICES, SMOKER_CHOICES
+from ..utils.logging import log_info
+from .snapshot_service import MISSING, load_snapshot
+
+PERCENTILES = (10, 25, 50, 75, 90, 99)
+HISTOGRAM_BINS = 20
+STATS_CACHE_TIMEOUT = 24 * 3600
+
+CATEGORY_LABELS = {
+    'sex': dict(SEX_CHOICES),
+    'smoker': dict(SMOKER_CHOICES),
+    'region': dict(REGION_CHOICES),
+}
+
+
+def summarize(amounts):
+    """Effectif, moyenne, extrêmes et percentiles d'un tableau de primes."""
+    if amounts.size == 0:
+        return {'count': 0}
+    percentiles = np.percentile(amounts, PERCENTILES)
+    return {
+        'count': int(amounts.size),
+        'mean': float(amounts.mean()),
+        'min': float(amounts.min()),
+        'max': float(amounts.max()),
+        'percentiles': {f'p{p}': float(v) for p, v in zip(PERCENTILES, percentiles)},
+    }
+
+
+def histogram(amounts, bins=HISTOGRAM_BINS):
+    """
+    Répartition des primes en ``bins`` classes de même largeur jusqu'au 99e
+    percentile ; la dernière classe regroupe les valeurs au-delà.
+    """
+    if amounts.size == 0:
+        return []
+    low, high = float(amounts.min()), float(np.percentile(amounts, 99))
+    if high <= low:
+        high = low + 1
+    edges = np.linspace(low, high, bins + 1)
+    counts, _edges = np.histogram(np.minimum(amounts, high), bins=edges)
+    peak = counts.max()
+    return [
+        {
+            'low': float(edges[i]),
+            'high': float(edges[i + 1]),
+            'count': int(count),
+            'share': float(100 * count / peak),
+        }
+        for i, count in enumerate(counts)
+    ]
+
+
+def _group_stats(amounts, codes, labels):
+    """Statistiques par groupe (codes entiers >= 0 ; MISSING ignoré)."""
+    known = codes >= 0
+    counts = np.bincount(codes[known], minlength=len(labels))
+    sums = np.bincount(codes[known], weights=amounts[known], minlength=len(labels))
+    groups = []
+    for code, label in enumerate(labels):
+        if not counts[code]:
+            continue
+        # Peu de groupes : un masque + sélection (np.partition, O(n)) par groupe
+        median, p90 = np.percentile(amounts[codes == code], (50, 90))
+        groups.append({
+            'label': label,
+            'count': int(counts[code]),
+            'mean': float(sums[code] / counts[code]),
+            'median': float(median),
+            'p90': float(p90),
+        })
+    return groups
+
+
+def premiums_by_category(table, column):
+    """Primes par valeur d'une colonne catégorielle (sexe, fumeur, région)."""
+    labels = CATEGORY_LABELS[column]
+    names = [str(labels.get(value, value)) for value in table.categories[column]]
+    return _group_stats(np.asarray(table['amount']), np.asarray(table[column]).astype(np.int64), names)
+
+
+def premiums_by_age_band(table):
+    ages = np.asarray(table['age'])
+    codes = np.digitize(ages, AGE_BANDS).astype(np.int64)
+    codes[ages == MISSING] = MISSING
+    return _group_stats(np.asarray(table['amount']), codes, AGE_BAND_LABELS)
+
+
+def monthly_trend(table):
+    """Nombre de prédictions et prime moyenne par mois de création."""
+    if table.rows == 0:
+        return []
+    months = np.asarray(table['created_at']).astype('datetime64[s]').astype('datetime64[M]').astype(np.int64)
+    first = months.min()
+    counts = np.bincount(months - first)
+    sums = np.bincount(months - first, weights=np.asarray(table['amount']))
+    peak = counts.max()
+    return [
+        {
+            'month': str(np.datetime64(int(first + offset), 'M')),
+            'count': int(count),
+            'mean': float(sums[offset] / count),
+            'share': float(100 * count / peak),
+        }
+        for offset, count in enumerate(counts) if count
+    ]
+
+
+def client_mix(profiles):
+    """Répartition des profils clients (rôle 'user') par région et statut fumeur."""
+    users = np.asarray(profiles['role']) == profiles.categories['role'].index('user')
+    mix = {}
+    for column in ('region', 'smoker'):
+        codes = np.asarray(profiles[column])[users]
+        counts = np.bincount(codes[codes >= 0].astype(np.int64), minlength=len(profiles.categories[column]))
+        labels = CATEGORY_LABELS[column]
+        mix[column] = [
+            {'label': str(labels.get(value, value)), 'count': int(count)}
+            for value, count in zip(profiles.categories[column], counts)
+        ]
+    mix['clients'] = int(users.sum())
+    return mix
+
+
+def compute_stats(snapshot):
+    predictions = snapshot['predictions']
+    amounts = np.asarray(predictions['amount'])
+    return {
+        'built_at': snapshot.built_at,
+        'watermark': snapshot.watermark,
+        'summary': summarize(amounts),
+        'histogram': histogram(amounts),
+        'by_region': premiums_by_category(predictions, 'region'),
+        'by_sex': premiums_by_category(predictions, 'sex'),
+        'by_smoker': premiums_by_category(predictions, 'smoker'),
+        'by_age': premiums_by_age_band(predictions),
+        'monthly': monthly_trend(predictions),
+        'clients': client_mix(snapshot['profiles']),
+    }
+
+
+def _stats_key(snapshot):
+    return f'analytics:stats:{snapshot.build_id}:{translation.get_language()}'
+
+
+def _compute_and_cache(snapshot):
+    stats = compute_stats(snapshot)
+    cache.set(_stats_key(snapshot), stats, STATS_CACHE_TIMEOUT)
+    log_info(
+        _("Analytics stats computed over %(rows)s predictions") % {'rows': snapshot['predictions'].rows},
+        extra={'rows': snapshot['predictions'].rows, 'build_id': snapshot.build_id}
+    )
+    return stats
+
+
+def get_snapshot_stats():
+    """
+    Statistiques de l'instantané courant (mises en cache par build_id), ou None
+    si aucun instantané n'a encore été construit.
+
+    Normalement précalculées par ``warm_snapshot_stats`` après chaque
+    rafraîchissement ; calculées ici seulement si le cache est vide.
+    """
+    snapshot = load_snapshot()
+    if snapshot is None:
+        return None
+    stats = cache.get(_stats_key(snapshot))
+    if stats is None:
+        stats = _compute_and_cache(snapshot)
+    return stats
+
+
+def warm_snapshot_stats():
+    """
+    Calcule et met en cache les statistiques de l'instantané courant pour
+    chaque langue, hors requête (commande ``refresh_analytics_snapshot``).
+    Rien n'est recalculé si elles sont déjà en cache pour ce ``build_id``.
+
+    Returns:
+        int: Nombre de langues calculées
+    """
+    snapshot = load_snapshot()
+    if snapshot is None:
+        return 0
+    computed = 0
+    for language, _name in settings.LANGUAGES:
+        with translation.override(language):
+            if cache.get(_stats_key(snapshot)) is None:
+                _compute_and_cache(snapshot)
+                computed += 1
+    return computed
@@ -4,21 +4,11 @@ from django.db import transaction
 from datetime import datetime, timedelta
 from calendar import monthrange
 
+from ..metrics import BOOKING_CONFLICTS
 from ..models import Appointment, ConseillerUnavailability
-from ..utils.logging import log_error, log_appointment, log_warning
+from ..utils.logging import log_error
 from ..exceptions import AppointmentError, AppointmentConflictError
-from .notification_service import (
-    create_appointment_request_notification,
-    create_appointment_response_notification,
-    create_appointment_by_conseiller_notification,
-    create_notification,
-)
-from .email_service import (
-    send_appointment_confirmation_email,
-    send_appointment_cancellation_email,
-    send_appointment_rescheduled_email,
-    send_appointment_request_email,
-)
+from ..tasks import enqueue_on_commit, appointment_tasks
 
 
 def get_available_slots(conseiller, selected_date, existing_appointments):
@@ -100,6 +90,7 @@ def check_appointment_conflict(conseiller, date_time, duration_minutes):
     ).exclude(status='cancelled')
     
     if conflicting_appointments.exists():
+        BOOKING_CONFLICTS.inc(reason='appointment')
         return True, _("This time slot is no longer available. Please choose another one.")
     
     overlapping_unavailability = ConseillerUnavailability.objects.filter(
@@ -108,6 +99,7 @@ def check_appointment_conflict(conseiller, date_time, duration_minutes):
         end_datetime__gt=date_time,
     )
     if overlapping_unavailability.exists():
+        BOOKING_CONFLICTS.inc(reason='unavailability')
         return True, _("You are unavailable during this period (vacation, leave, etc.). Please choose another time.")
     
     return False, None
@@ -144,53 +136,11 @@ def create_appointment(conseiller, client, date_time, duration_minutes, notes=''
             notes=notes,
             status=status
         )
-        log_appointment(appointment, 'created')
-        
-        # S'assurer que le rendez-vous est bien sauvegardé
-        appointment.refresh_from_db()
-    
-        try:
-            if created_by_conseiller:
-                create_appointment_by_conseiller_notification(appointment)
-                # Envoyer un email de confirmation au client
-                try:
-                    email_sent = send_appointment_confirmation_email(appointment, recipient=client)
-                    if not email_sent:
-                        log_warning(
-                            _("Email confirmation not sent (recipient may not have email address)"),
-                            extra={'appointment_id': appointment.id, 'client_id': client.id}
-                        )
-                except Exception as email_error:
-                    log_error(
-                        _("Failed to send confirmation email: %(error)s") % {'error': email_error},
-                        exc_info=True,
-                        extra={'appointment_id': appointment.id, 'client_id': client.id}
-                    )
-            else:
-                create_appointment_request_notification(appointment)
-                # Envoyer un email de demande au conseiller
-                try:
-                    email_sent = send_appointment_request_email(appointment, recipient=conseiller)
-                    if not email_sent:
-                        log_warning(
-                            _("Email request not sent (recipient may not have email address)"),
-                            extra={'appointment_id': appointment.id, 'conseiller_id': conseiller.id}
-                        )
-                except Exception as email_error:
-                    log_error(
-                        _("Failed to send request email: %(error)s") % {'error': email_error},
-                        exc_info=True,
-                        extra={'appointment_id': appointment.id, 'conseiller_id': conseiller.id}
-                    )
-        except Exception as notification_error:
-            log_error(
-                _("Failed to create notification for appointment: %(error)s") % {'error': notification_error},
-                exc_info=True,
-                extra={
-                    'appointment_id': appointment.id,
-                    'conseiller_id': conseiller.id,
-                }
-            )
+        # Journalisation, notification et email sont exécutés par le worker de tâches
+        enqueue_on_commit(
+            appointment_tasks.appointment_created, appointment.id,
+            created_by_conseiller=created_by_conseiller,
+        )
         
         return appointment
     except Exception as e:
@@ -212,7 +162,7 @@ def get_appointments_for_calendar(conseiller, year=None, month=None):
         try:
             current_date = datetime(int(year), int(month), 1).date()
         except (ValueError, TypeError) as e:
-            log_error(f"Invalid date parameters: year={year}, month={month}", exc_info=True)
+            log_error("Invalid date parameters: year=%s, month=%s", year, month, exc_info=True)
             current_date = datetime.now().date().replace(day=1)
     else:
         current_date = datetime.now().date().replace(day=1)
@@ -281,6 +231,8 @@ def get_week_calendar_data(conseiller, week_start_date=None):
             date_time__lt=end_dt,
         ).exclude(status='cancelled').order_by('date_time')
     
+    # Le template affiche le client de chaque rendez-vous
+    appointments = appointments.select_related('client')
     unavailabilities = get_conseiller_unavailability(conseiller, week_start_date, week_dates[-1])
     
     for apt in appointments:
@@ -360,26 +312,7 @@ def accept_appointment(appointment_id, conseiller):
         appointment.status = 'confirmed'
         appointment.save()
         
-        log_appointment(appointment, 'accepted')
-        
-        try:
-            create_appointment_response_notification(appointment, 'accepted')
-            # Envoyer un email de confirmation au client
-            try:
-                send_appointment_confirmation_email(appointment, recipient=appointment.client)
-            except Exception as email_error:
-                log_warning(
-                    _("Failed to send confirmation email: %(error)s") % {'error': email_error},
-                    extra={'appointment_id': appointment.id}
-                )
-        except Exception as notification_error:
-            log_warning(
-                _("Failed to create notification for appointment acceptance: %(error)s") % {'error': notification_error},
-                extra={
-                    'appointment_id': appointment.id,
-                    'conseiller_id': conseiller.id,
-                }
-            )
+        enqueue_on_commit(appointment_tasks.appointment_accepted, appointment.id)
         
         return appointment
     except Appointment.DoesNotExist:
@@ -427,25 +360,7 @@ def reject_appointment(appointment_id, conseiller, reason=None):
         appointment.status = 'cancelled'
         appointment.save()
         
-        log_appointment(appointment, 'rejected')
-        
-        try:
-            create_appointment_response_notification(appointment, 'rejected', reason=reason)
-            try:
-                send_appointment_cancellation_email(appointment, cancelled_by=conseiller, recipient=appointment.client)
-            except Exception as email_error:
-                log_warning(
-                    _("Failed to send cancellation email: %(error)s") % {'error': email_error},
-                    extra={'appointment_id': appointment.id}
-                )
-        except Exception as notification_error:
-            log_warning(
-                _("Failed to create notification for appointment rejection: %(error)s") % {'error': notification_error},
-                extra={
-                    'appointment_id': appointment.id,
-                    'conseiller_id': conseiller.id,
-                }
-            )
+        enqueue_on_commit(appointment_tasks.appointment_rejected, appointment.id, reason=reason)
         
         return appointment
     except Appointment.DoesNotExist:
@@ -492,34 +407,7 @@ def cancel_appointment(appointment_id, user):
         appointment.status = 'cancelled'
         appointment.save()
         
-        log_appointment(appointment, 'cancelled')
-        
-        other_user = appointment.client if user == appointment.conseiller else appointment.conseiller
-        canceller_name = user.get_full_name() or user.email
-        appointment_date = appointment.date_time.strftime('%d/%m/%Y à %H:%M')
-        message = _("The appointment with %(canceller)s on %(date)s has been cancelled.") % {
-            'canceller': canceller_name,
-            'date': appointment_date,
-        }
-        try:
-            create_notification(
-                user=other_user,
-                notification_type='appointment_cancelled',
-                message=message,
-                appointment=appointment,
-            )
-            try:
-                send_appointment_cancellation_email(appointment, cancelled_by=user, recipient=other_user)
-            except Exception as email_error:
-                log_warning(
-                    _("Failed to send cancellation email: %(error)s") % {'error': email_error},
-                    extra={'appointment_id': appointment.id}
-                )
-        except Exception as notification_error:
-            log_warning(
-                _("Failed to create cancellation notification: %(error)s") % {'error': notification_error},
-                extra={'appointment_id': appointment.id},
-            )
+        enqueue_on_commit(appointment_tasks.appointment_cancelled, appointment.id, user.id)
         
         return appointment
     except Appointment.DoesNotExist:
@@ -577,6 +465,7 @@ def reschedule_appointment(appointment_id, user, new_date_time, duration_minutes
         for other in other_appointments:
             other_end = other.date_time + timedelta(minutes=other.duration_minutes)
             if other.date_time < new_end and other_end > new_date_time:
+                BOOKING_CONFLICTS.inc(reason='appointment')
                 raise AppointmentConflictError(_("This time slot is no longer available. Please choose another one."))
         
         old_date_time = appointment.date_time
@@ -586,39 +475,10 @@ def reschedule_appointment(appointment_id, user, new_date_time, duration_minutes
             appointment.notes = notes
         appointment.save()
         
-        log_appointment(appointment, 'rescheduled')
-        
-        other_user = appointment.client if user == appointment.conseiller else appointment.conseiller
-        rescheduler_name = user.get_full_name() or user.email
-        new_date_str = new_date_time.strftime('%d/%m/%Y à %H:%M')
-        message = _("The appointment with %(name)s has been rescheduled to %(date)s.") % {
-            'name': rescheduler_name,
-            'date': new_date_str,
-        }
-        try:
-            create_notification(
-                user=other_user,
-                notification_type='appointment_rescheduled',
-                message=message,
-                appointment=appointment,
-            )   
-            try:
-                send_appointment_rescheduled_email(
-                    appointment, 
-                    rescheduled_by=user, 
-                    old_date_time=old_date_time, 
-                    recipient=other_user
-                )
-            except Exception as email_error:
-                log_warning(
-                    _("Failed to send rescheduled email: %(error)s") % {'error': email_error},
-                    extra={'appointment_id': appointment.id}
-                )
-        except Exception as notification_error:
-            log_warning(
-                _("Failed to create reschedule notification: %(error)s") % {'error': notification_error},
-                extra={'appointment_id': appointment.id},
-            )
+        enqueue_on_commit(
+            appointment_tasks.appointment_rescheduled, appointment.id, user.id,
+            old_date_time.isoformat(),
+        )
         
         return appointment
     except Appointment.DoesNotExist:
@@ -0,0 +1,326 @@
+"""
+Suivi de la dérive des entrées du modèle et des primes prédites.
+
+``observe`` est appelée par ``calculate_insurance_premium`` après chaque
+prédiction réussie. Chaque variable suivie (âge, IMC, enfants, fumeur,
+région, prime prédite) a des intervalles fixes (``BUCKETS``) : une
+observation se réduit à un calcul d'indice et un incrément dans un tableau du
+processus, en temps constant, sans accès à la base.
+
+Les compteurs sont tenus par jour d'observation. Un thread d'arrière-plan
+par processus (``utils.aggregation``) les ajoute toutes les
+``FLUSH_INTERVAL`` secondes aux lignes de ``DriftHistogram`` du même jour
+(incréments SQL) : les workers fusionnent en base, et une observation faite
+juste avant minuit reste comptée la veille. Les rapports lisent la base et ont
+donc jusqu'à ``FLUSH_INTERVAL`` secondes de retard.
+
+La stabilité de population (PSI) est calculée entre les histogrammes d'une
+période et une distribution de référence enregistrée en JSON
+(``REFERENCE_PATH``) par ``manage.py build_drift_reference``, à partir des
+données d'entraînement (CSV) ou d'une période de production jugée saine.
+Rapport : ``manage.py drift_report`` et la page d'administration.
+"""
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db.models import F, Sum
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from ..constants import REGION_CHOICES
+from ..exceptions import InvalidPredictionDataError
+from ..models import DriftHistogram
+from ..utils.aggregation import ProcessAggregator, add_to_row
+from ..utils.logging import log_info
+
+
+class NumericBuckets:
+    """Intervalles de largeur fixe ; les valeurs hors bornes vont dans le premier ou le dernier."""
+
+    def __init__(self, start, width, count, integer=False):
+        self.start = start
+        self.width = width
+        self.count = count
+        self.integer = integer
+
+    @property
+    def size(self):
+        return self.count
+
+    def index(self, value):
+        position = int((value - self.start) // self.width)
+        return 0 if position < 0 else min(position, self.count - 1)
+
+    def label(self, position):
+        low = self.start + position * self.width
+        if position == self.count - 1:
+            return f'{low:g}+'
+        if self.integer:
+            return f'{low:g}' if self.width == 1 else f'{low:g}–{low + self.width - 1:g}'
+        return f'{low:g}–{low + self.width:g}'
+
+
+class CategoricalBuckets:
+    """Un intervalle par modalité connue, plus un pour les valeurs inattendues."""
+
+    def __init__(self, values):
+        self.values = tuple(values)
+        self._positions = {value: position for position, value in enumerate(self.values)}
+
+    @property
+    def size(self):
+        return len(self.values) + 1
+
+    def index(self, value):
+        return self._positions.get(value, len(self.values))
+
+    def label(self, position):
+        return self.values[position] if position < len(self.values) else 'other'
+
+
+BUCKETS = {
+    'age': NumericBuckets(18, 5, 17, integer=True),  # 18–22 … 98+
+    'bmi': NumericBuckets(10, 2.5, 16),  # 10–12.5 … 47.5+
+    'children': NumericBuckets(0, 1, 6, integer=True),  # 0 … 5+
+    'smoker': CategoricalBuckets(('no', 'yes')),
+    'region': CategoricalBuckets(code for code, _label in REGION_CHOICES),
+    'amount': NumericBuckets(0, 2500, 25),  # 0–2500 … 60000+
+}
+INPUTS = ('age', 'bmi', 'children', 'smoker', 'region')
+
+# Seuils usuels du PSI : < 0.1 stable, < 0.25 dérive modérée, au-delà significative
+PSI_THRESHOLDS = (0.1, 0.25)
+PSI_EPSILON = 1e-4
+
+_counts = {}  # jour -> {variable: [compteur par intervalle]}
+
+
+def _options():
+    return getattr(settings, 'DRIFT_MONITOR', {})
+
+
+def _empty():
+    return {name: [0] * spec.size for name, spec in BUCKETS.items()}
+
+
+def _reset():
+    _counts.clear()
+
+
+def observe(features, amount):
+    """
+    Compte une prédiction dans les histogrammes du processus, pour le jour courant.
+
+    Args:
+        features: Variables de la prédiction (age, bmi, children, smoker, region…)
+        amount: Prime prédite
+    """
+    options = _options()
+    if not options.get('ENABLED', True):
+        return
+    values = {**features, 'amount': amount}
+    try:
+        positions = [(name, spec.index(values[name])) for name, spec in BUCKETS.items()]
+    except (KeyError, TypeError, ValueError):
+        # Le suivi ne doit jamais faire échouer une prédiction
+        return
+    day = timezone.localdate()
+    _process.ensure_process()
+    with _process.lock:
+        counts = _counts.get(day)
+        if counts is None:
+            counts = _counts[day] = _empty()
+        for name, position in positions:
+            counts[name][position] += 1
+    if options.get('BACKGROUND', True):
+        _process.ensure_worker()
+
+
+def flush():
+    """
+    Ajoute les compteurs du processus à ``DriftHistogram``, chacun au jour de
+    son observation ; retourne le nombre de lignes écrites.
+    """
+    global _counts
+    _process.ensure_process()
+    with _process.lock:
+        by_day, _counts = _counts, {}
+    written = 0
+    for day, counts in by_day.items():
+        for feature, buckets in counts.items():
+            for bucket, count in enumerate(buckets):
+                if count:
+                    add_to_row(
+                        DriftHistogram, {'day': day, 'feature': feature, 'bucket': bucket},
+                        {'count': F('count') + count}, {'count': count},
+                    )
+                    written += 1
+    return written
+
+
+def _run():
+    while True:
+        time.sleep(_options().get('FLUSH_INTERVAL', 60))
+        _process.safe_flush(_("Drift histograms flush failed: %(error)s"))
+
+
+_process = ProcessAggregator('drift-monitor', run=_run, reset=_reset, flush=flush, has_pending=lambda: bool(_counts))
+
+
+def histogram(feature, values):
+    """Comptes de ``values`` sur les intervalles de ``feature``."""
+    spec = BUCKETS[feature]
+    counts = [0] * spec.size
+    for value in values:
+        counts[spec.index(value)] += 1
+    return counts
+
+
+def recorded_histograms(since=None, until=None):
+    """Histogrammes enregistrés en base, cumulés sur les jours ``since`` à ``until`` inclus."""
+    rows = DriftHistogram.objects.all()
+    if since:
+        rows = rows.filter(day__gte=since)
+    if until:
+        rows = rows.filter(day__lte=until)
+    counts = _empty()
+    for feature, bucket, total in rows.values_list('feature', 'bucket').annotate(total=Sum('count')):
+        if feature in counts and bucket < len(counts[feature]):
+            counts[feature][bucket] = total
+    return counts
+
+
+def reference_from_training(path):
+    """
+    Référence construite depuis les données d'entraînement (CSV avec les
+    colonnes age, sex, bmi, children, smoker, region). La référence des
+    primes est la distribution des prédictions du modèle de production sur
+    ces lignes, comparable aux primes observées.
+    """
+    from .prediction_service import FEATURES, predict_premiums
+
+    rows = pd.read_csv(path)
+    missing = [name for name in FEATURES if name not in rows.columns]
+    if missing:
+        raise InvalidPredictionDataError(_("Missing required fields: %(fields)s") % {'fields': missing})
+    counts = {name: histogram(name, rows[name].tolist()) for name in INPUTS}
+    counts['amount'] = histogram('amount', predict_premiums(rows[list(FEATURES)]).tolist())
+    return counts
+
+
+def save_reference(counts, source, path=None):
+    """Enregistre une référence (comptes par variable) en JSON ; retourne le chemin."""
+    path = path or _options()['REFERENCE_PATH']
+    document = {
+        'source': source,
+        'created_at': timezone.now().isoformat(),
+        'features': {
+            name: {
+                'labels': [BUCKETS[name].label(position) for position in range(BUCKETS[name].size)],
+                'counts': counts[name],
+            }
+            for name in BUCKETS if sum(counts.get(name, ()))
+        },
+    }
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(document, f, indent=2)
+    os.replace(tmp_path, path)
+    log_info(_("Drift reference saved to %(path)s") % {'path': path}, extra={'source': source})
+    return path
+
+
+def load_reference(path=None):
+    """
+    Référence enregistrée, ou None si absente.
+
+    Returns:
+        dict: {'source', 'created_at', 'features': {variable: comptes}} ; les
+        variables dont les intervalles ne correspondent plus à ``BUCKETS`` sont ignorées
+    """
+    path = path or _options().get('REFERENCE_PATH')
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        document = json.load(f)
+    return {
+        'source': document.get('source'),
+        'created_at': document.get('created_at'),
+        'features': {
+            name: entry['counts']
+            for name, entry in document.get('features', {}).items()
+            if name in BUCKETS and len(entry['counts']) == BUCKETS[name].size
+        },
+    }
+
+
+def psi(expected, actual, epsilon=PSI_EPSILON):
+    """
+    Indice de stabilité de population entre deux histogrammes de mêmes
+    intervalles : somme de (a - e) * ln(a / e) sur les proportions, les
+    intervalles vides étant ramenés à ``epsilon``. None si l'un est vide.
+    """
+    expected = np.asarray(expected, dtype=np.float64)
+    actual = np.asarray(actual, dtype=np.float64)
+    if not expected.sum() or not actual.sum():
+        return None
+    expected = np.maximum(expected / expected.sum(), epsilon)
+    actual = np.maximum(actual / actual.sum(), epsilon)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def psi_status(value):
+    if value is None:
+        return 'unknown'
+    if value < PSI_THRESHOLDS[0]:
+        return 'stable'
+    return 'moderate' if value < PSI_THRESHOLDS[1] else 'significant'
+
+
+def _shares(counts):
+    total = sum(counts)
+    return [100 * count / total if total else 0.0 for count in counts]
+
+
+def drift_report(since=None, until=None, reference=None):
+    """
+    PSI de chaque variable suivie entre la période et la référence.
+
+    Args:
+        since, until: Jours inclus (défaut : tout l'historique)
+        reference: Référence (``load_reference``) ; chargée depuis
+            ``REFERENCE_PATH`` si None
+
+    Returns:
+        dict: {'reference': {'source', 'created_at'} ou None, 'features':
+        [{'feature', 'count', 'psi', 'status', 'buckets': [{'label',
+        'expected' (%), 'actual' (%)}]}]}
+    """
+    if reference is None:
+        reference = load_reference()
+    expected_counts = reference['features'] if reference else {}
+    current = recorded_histograms(since, until)
+    features = []
+    for name, spec in BUCKETS.items():
+        actual = current[name]
+        expected = expected_counts.get(name)
+        value = psi(expected, actual) if expected else None
+        expected_shares = _shares(expected) if expected else [None] * spec.size
+        features.append({
+            'feature': name,
+            'count': sum(actual),
+            'psi': value,
+            'status': psi_status(value),
+            'buckets': [
+                {'label': spec.label(position), 'expected': share, 'actual': actual_share}
+                for position, (share, actual_share) in enumerate(zip(expected_shares, _shares(actual)))
+            ],
+        })
+    return {
+        'reference': {'source': reference['source'], 'created_at': reference['created_at']} if reference else None,
+        'features': features,
+    }
@@ -2,16 +2,67 @@
 Service d'envoi d'emails pour les notifications de rendez-vous.
 """
 import os
-from django.core.mail import send_mail, EmailMultiAlternatives
+from datetime import timedelta
+from itertools import groupby
+from django.core.mail import send_mail, EmailMultiAlternatives, get_connection
 from django.template.loader import render_to_string
+from django.utils import timezone, translation
 from django.utils.translation import gettext_lazy as _, activate, get_language
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.contrib.auth.tokens import default_token_generator
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from django.db.models import Q
 from django.urls import reverse
 
+from ..metrics import EMAIL_FAILURES, EMAIL_SEND_DURATION
+from ..models import Notification, Profile
 from ..utils.logging import log_error, log_info, log_warning
 
 
+def _send(email, kind):
+    """Envoie ``email`` en mesurant la durée et les échecs d'envoi (métriques par type d'email)."""
+    try:
+        with EMAIL_SEND_DURATION.time(kind=kind):
+            return email.send()
+    except Exception:
+        EMAIL_FAILURES.inc(kind=kind)
+        raise
+
+
+def uses_email_digest(user):
+    """
+    Indique si l'utilisateur reçoit ses notifications par digest plutôt qu'un email par événement.
+    
+    Args:
+        user: Utilisateur destinataire
+        
+    Returns:
+        bool: True si le profil est en mode digest
+    """
+    profile = getattr(user, 'profile', None)
+    return profile is not None and profile.uses_email_digest()
+
+
+def _defer_to_digest(recipient, appointment):
+    """
+    Diffère l'email au prochain digest si le destinataire est en mode digest.
+    
+    La notification associée sera incluse dans le prochain digest.
+    
+    Returns:
+        bool: True si l'email est différé (ne pas l'envoyer maintenant)
+    """
+    if not uses_email_digest(recipient):
+        return False
+    log_info(
+        _("Email deferred to digest for %(email)s") % {'email': recipient.email},
+        extra={'appointment_id': appointment.id, 'recipient_id': recipient.id}
+    )
+    return True
+
+
 def send_appointment_confirmation_email(appointment, recipient=None):
     """
     Envoie un email de confirmation de rendez-vous.
@@ -21,7 +72,7 @@ def send_appointment_confirmation_email(appointment, recipient=None):
         recipient: Utilisateur destinataire (par défaut: le client)
         
     Returns:
-        bool: True si l'email a été envoyé avec succès, False sinon
+        bool: True si l'email a été envoyé (ou différé au digest), False sinon
     """
     if recipient is None:
         recipient = appointment.client
@@ -33,6 +84,9 @@ def send_appointment_confirmation_email(appointment, recipient=None):
         )
         return False
     
+    if _defer_to_digest(recipient, appointment):
+        return True
+    
     try:
         user_language = getattr(recipient, 'profile', None)
         if user_language and hasattr(user_language, 'language'):
@@ -71,7 +125,7 @@ def send_appointment_confirmation_email(appointment, recipient=None):
         )
         email.attach_alternative(html_content, "text/html")
         
-        email.send()
+        _send(email, 'confirmation')
         
         log_info(
             _("Appointment confirmation email sent to %(email)s") % {'email': recipient.email},
@@ -98,7 +152,7 @@ def send_appointment_cancellation_email(appointment, cancelled_by, recipient=Non
         recipient: Utilisateur destinataire (par défaut: l'autre partie)
         
     Returns:
-        bool: True si l'email a été envoyé avec succès, False sinon
+        bool: True si l'email a été envoyé (ou différé au digest), False sinon
     """
     if recipient is None:
         recipient = appointment.conseiller if cancelled_by == appointment.client else appointment.client
@@ -110,6 +164,9 @@ def send_appointment_cancellation_email(appointment, cancelled_by, recipient=Non
         )
         return False
     
+    if _defer_to_digest(recipient, appointment):
+        return True
+    
     try:
         user_language = getattr(recipient, 'profile', None)
         if user_language and hasattr(user_language, 'language'):
@@ -148,7 +205,7 @@ def send_appointment_cancellation_email(appointment, cancelled_by, recipient=Non
         )
         email.attach_alternative(html_content, "text/html")
         
-        email.send()
+        _send(email, 'cancellation')
         
         log_info(
             _("Appointment cancellation email sent to %(email)s") % {'email': recipient.email},
@@ -176,7 +233,7 @@ def send_appointment_rescheduled_email(appointment, rescheduled_by, old_date_tim
         recipient: Utilisateur destinataire (par défaut: l'autre partie)
         
     Returns:
-        bool: True si l'email a été envoyé avec succès, False sinon
+        bool: True si l'email a été envoyé (ou différé au digest), False sinon
     """
     if recipient is None:
         recipient = appointment.conseiller if rescheduled_by == appointment.client else appointment.client
@@ -188,6 +245,9 @@ def send_appointment_rescheduled_email(appointment, rescheduled_by, old_date_tim
         )
         return False
     
+    if _defer_to_digest(recipient, appointment):
+        return True
+    
     try:
         user_language = getattr(recipient, 'profile', None)
         if user_language and hasattr(user_language, 'language'):
@@ -228,7 +288,7 @@ def send_appointment_rescheduled_email(appointment, rescheduled_by, old_date_tim
         )
         email.attach_alternative(html_content, "text/html")
         
-        email.send()
+        _send(email, 'rescheduled')
         
         log_info(
             _("Appointment rescheduled email sent to %(email)s") % {'email': recipient.email},
@@ -254,7 +314,7 @@ def send_appointment_request_email(appointment, recipient=None):
         recipient: Utilisateur destinataire (par défaut: le conseiller)
         
     Returns:
-        bool: True si l'email a été envoyé avec succès, False sinon
+        bool: True si l'email a été envoyé (ou différé au digest), False sinon
     """
     if recipient is None:
         recipient = appointment.conseiller
@@ -266,6 +326,9 @@ def send_appointment_request_email(appointment, recipient=None):
         )
         return False
     
+    if _defer_to_digest(recipient, appointment):
+        return True
+    
     try:
         user_language = getattr(recipient, 'profile', None)
         if user_language and hasattr(user_language, 'language'):
@@ -304,7 +367,7 @@ def send_appointment_request_email(appointment, recipient=None):
         )
         email.attach_alternative(html_content, "text/html")
         
-        email.send()
+        _send(email, 'request')
         
         log_info(
             _("Appointment request email sent to %(email)s") % {'email': recipient.email},
@@ -319,3 +382,208 @@ def send_appointment_request_email(appointment, recipient=None):
             extra={'appointment_id': appointment.id, 'recipient_id': recipient.id}
         )
         return False
+
+
+def send_account_activation_email(user):
+    """
+    Envoie à un client importé le lien de définition de son mot de passe.
+    
+    Le lien est un jeton de réinitialisation (``default_token_generator``),
+    invalidé dès que le mot de passe est défini.
+    
+    Args:
+        user: Utilisateur créé sans mot de passe utilisable
+        
+    Returns:
+        bool: True si l'email a été envoyé, False sinon
+    """
+    if not user.email:
+        return False
+    
+    try:
+        site_url = os.getenv('SITE_URL', 'http://localhost:8000')
+        with translation.override('fr'):
+            path = reverse('insurance_web:account_activate', kwargs={
+                'uidb64': urlsafe_base64_encode(force_bytes(user.pk)),
+                'token': default_token_generator.make_token(user),
+            })
+            context = {
+                'recipient': user,
+                'site_url': site_url,
+                'activation_url': f"{site_url}{path}",
+            }
+            html_content = render_to_string('emails/account_activation.html', context)
+            text_content = render_to_string('emails/account_activation.txt', context)
+            subject = _("Activez votre compte Assur'aimant")
+        
+        email = EmailMultiAlternatives(
+            subject=str(subject),
+            body=text_content,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[user.email],
+        )
+        email.attach_alternative(html_content, "text/html")
+        _send(email, 'activation')
+        return True
+        
+    except Exception as e:
+        log_error(
+            _("Error sending account activation email: %(error)s") % {'error': e},
+            exc_info=True,
+            extra={'recipient_id': user.id}
+        )
+        return False
+
+
+def _build_digest_email(recipient, notifications, site_url):
+    """Construit l'email digest (texte + HTML) regroupant les notifications d'un utilisateur."""
+    with translation.override('fr'):
+        notifications_url = f"{site_url}/fr{reverse('insurance_web:notifications')}"
+        context = {
+            'recipient': recipient,
+            'notifications': notifications,
+            'count': len(notifications),
+            'site_url': site_url,
+            'notifications_url': notifications_url,
+        }
+        html_content = render_to_string('emails/notification_digest.html', context)
+        text_content = render_to_string('emails/notification_digest.txt', context)
+        subject = _("Vos notifications (%(count)s)") % {'count': len(notifications)}
+    
+    email = EmailMultiAlternatives(
+        subject=str(subject),
+        body=text_content,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[recipient.email],
+    )
+    email.attach_alternative(html_content, "text/html")
+    return email
+
+
+def _mark_digests_sent(batch, now):
+    """Marque les notifications envoyées et planifie le prochain digest de chaque utilisateur."""
+    notification_ids = [nid for _email, _user, _interval, ids in batch for nid in ids]
+    Notification.objects.filter(id__in=notification_ids).update(email_pending=False)
+    
+    # Une requête par fréquence distincte (quelques valeurs possibles)
+    by_interval = {}
+    for _email, user_id, interval, _ids in batch:
+        by_interval.setdefault(interval, []).append(user_id)
+    for interval, user_ids in by_interval.items():
+        Profile.objects.filter(user_id__in=user_ids).update(
+            next_digest_at=now + timedelta(minutes=interval)
+        )
+
+
+def _reopen(connection):
+    """Rouvre la connexion après une erreur d'envoi ; False si le serveur reste injoignable."""
+    try:
+        connection.close()
+        connection.open()
+    except Exception as e:
+        log_error(_("Cannot reopen email connection: %(error)s") % {'error': e}, exc_info=True)
+        return False
+    return True
+
+
+def _flush_digests(connection, batch, now, stats):
+    """
+    Envoie les digests du lot un par un et marque ceux qui sont partis : un
+    échec n'entraîne pas le renvoi des précédents au passage suivant.
+
+    Returns:
+        bool: False si la connexion n'a pas pu être rouverte après une erreur
+        (le reste du lot attend le passage suivant)
+    """
+    delivered = []
+    try:
+        for item in batch:
+            email, user_id, _interval, ids = item
+            try:
+                with EMAIL_SEND_DURATION.time(kind='digest'):
+                    sent = connection.send_messages([email])
+            except Exception as e:
+                EMAIL_FAILURES.inc(kind='digest')
+                stats['failed'] += 1
+                log_error(
+                    _("Error sending notification digests: %(error)s") % {'error': e},
+                    exc_info=True,
+                    extra={'recipient_id': user_id, 'notification_count': len(ids)}
+                )
+                # La session SMTP est probablement inutilisable
+                if not _reopen(connection):
+                    return False
+                continue
+            if sent:
+                delivered.append(item)
+    finally:
+        if delivered:
+            _mark_digests_sent(delivered, now)
+            stats['emails'] += len(delivered)
+            stats['notifications'] += sum(len(ids) for _email, _user, _interval, ids in delivered)
+    return True
+
+
+def send_notification_digests(now=None, batch_size=200):
+    """
+    Envoie les digests de notifications de tous les utilisateurs dont la fenêtre est échue.
+    
+    Les utilisateurs concernés sont traités par lots : une requête charge les
+    notifications en attente de tout le lot, les emails sont envoyés un par un
+    sur une même connexion SMTP, puis ceux qui sont partis sont marqués en deux
+    requêtes UPDATE. Un digest dont l'envoi échoue reste en attente et sera
+    retenté au passage suivant ; la connexion est rouverte après l'erreur.
+    
+    Args:
+        now: Date de référence (par défaut: maintenant)
+        batch_size: Nombre d'utilisateurs traités par lot
+        
+    Returns:
+        dict: {'emails': ..., 'notifications': ..., 'failed': ...}
+    """
+    now = now or timezone.now()
+    site_url = os.getenv('SITE_URL', 'http://localhost:8000')
+    stats = {'emails': 0, 'notifications': 0, 'failed': 0}
+    
+    # Fenêtre échue, ou utilisateur repassé en mode immédiat avec des notifications en attente
+    pending = Notification.objects.filter(email_pending=True).filter(
+        Q(user__profile__next_digest_at__isnull=True)
+        | Q(user__profile__next_digest_at__lte=now)
+        | ~Q(user__profile__email_delivery='digest')
+    )
+    user_ids = sorted(set(pending.values_list('user_id', flat=True)))
+    if not user_ids:
+        return stats
+    
+    connection = get_connection()
+    try:
+        # Ouvre la session SMTP une fois pour tous les lots (send_messages la réutilise)
+        connection.open()
+        for start in range(0, len(user_ids), batch_size):
+            chunk = pending.filter(
+                user_id__in=user_ids[start:start + batch_size]
+            ).select_related('user', 'user__profile').order_by('user_id', 'created_at', 'id')
+            
+            batch = []
+            for user_id, group in groupby(chunk, key=lambda n: n.user_id):
+                notifications = list(group)
+                recipient = notifications[0].user
+                ids = [n.id for n in notifications]
+                if not recipient.email:
+                    Notification.objects.filter(id__in=ids).update(email_pending=False)
+                    continue
+                email = _build_digest_email(recipient, notifications, site_url)
+                batch.append((email, user_id, recipient.profile.digest_interval_minutes, ids))
+            if batch and not _flush_digests(connection, batch, now, stats):
+                break
+    finally:
+        connection.close()
+    
+    if stats['emails'] or stats['failed']:
+        log_info(
+            _("Notification digests sent: %(emails)s email(s), %(count)s notification(s)") % {
+                'emails': stats['emails'], 'count': stats['notifications']
+            },
+            extra=stats
+        )
+    return stats
@@ -0,0 +1,214 @@
+"""
+Export en flux des prédictions et des rendez-vous (CSV ou JSONL, gzip optionnel).
+
+Les lignes sont lues avec ``.iterator(chunk_size=...)`` (curseur serveur sous
+PostgreSQL), sérialisées une à une et regroupées en blocs d'environ
+``BUFFER_SIZE`` octets : la mémoire reste constante quel que soit le nombre
+de lignes, et la réponse commence avant la fin de la requête SQL. Sous ASGI,
+le flux est enveloppé par ``async_stream`` : Django matérialiserait sinon
+tout l'itérateur synchrone en liste avant d'envoyer le premier octet.
+
+Les noms du client et du conseiller viennent de la même requête (jointure
+sur ``auth_user``, comme ``select_related``) ; on lit des tuples via
+``values_list`` plutôt que des instances de modèles, qui coûteraient
+plusieurs microsecondes par ligne sur des millions de lignes.
+"""
+import csv
+import json
+import zlib
+from dataclasses import dataclass
+from typing import Callable
+
+from asgiref.sync import sync_to_async
+
+from ..models import Appointment, Prediction
+
+CHUNK_SIZE = 2000
+BUFFER_SIZE = 64 * 1024
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+def _name(first_name, last_name, email):
+    """Équivalent de ``get_full_name() or email`` sur des colonnes brutes."""
+    return f'{first_name} {last_name}'.strip() or email
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+def _decimal(value):
+    return str(value) if value is not None else None
+
+
+def _prediction_row(v):
+    return (
+        v[0], _iso(v[1]), _decimal(v[2]),
+        _name(v[3], v[4], v[5]), _name(v[6], v[7], v[8]),
+        v[9], v[10], _decimal(v[11]), v[12], v[13], v[14], v[15],
+    )
+
+
+def _appointment_row(v):
+    return (
+        v[0], _iso(v[1]), v[2], v[3],
+        _name(v[4], v[5], v[6]), _name(v[7], v[8], v[9]),
+        v[10], _iso(v[11]),
+    )
+
+
+@dataclass(frozen=True)
+class ExportSpec:
+    model: type
+    columns: tuple
+    fields: tuple
+    advisor_field: str
+    to_row: Callable
+
+
+EXPORTS = {
+    'predictions': ExportSpec(
+        model=Prediction,
+        columns=(
+            'id', 'created_at', 'predicted_amount', 'client', 'advisor',
+            'age', 'sex', 'bmi', 'children', 'smoker', 'region', 'repeat_count',
+        ),
+        fields=(
+            'id', 'created_at', 'predicted_amount',
+            'user__first_name', 'user__last_name', 'user__email',
+            'created_by__first_name', 'created_by__last_name', 'created_by__email',
+            'features__age', 'features__sex', 'features__bmi', 'features__children',
+            'features__smoker', 'features__region', 'repeat_count',
+        ),
+        advisor_field='created_by',
+        to_row=_prediction_row,
+    ),
+    'appointments': ExportSpec(
+        model=Appointment,
+        columns=(
+            'id', 'date_time', 'duration_minutes', 'status', 'client', 'advisor',
+            'notes', 'created_at',
+        ),
+        fields=(
+            'id', 'date_time', 'duration_minutes', 'status',
+            'client__first_name', 'client__last_name', 'client__email',
+            'conseiller__first_name', 'conseiller__last_name', 'conseiller__email',
+            'notes', 'created_at',
+        ),
+        advisor_field='conseiller',
+        to_row=_appointment_row,
+    ),
+}
+
+
+def export_rows(kind, advisor=None, chunk_size=CHUNK_SIZE):
+    """
+    Itère sur les lignes (tuples dans l'ordre de ``EXPORTS[kind].columns``).
+
+    Args:
+        kind: 'predictions' ou 'appointments'
+        advisor: Si fourni, limite l'export aux lignes de ce conseiller
+            (prédictions qu'il a faites, rendez-vous qu'il assure)
+        chunk_size: Lignes lues par aller-retour avec la base
+
+    Raises:
+        KeyError: Si ``kind`` est inconnu
+    """
+    spec = EXPORTS[kind]
+    queryset = spec.model.objects.all()
+    if advisor is not None:
+        queryset = queryset.filter(**{spec.advisor_field: advisor})
+    # Ordre de la clé primaire : parcours d'index, pas de tri de toute la table
+    values = queryset.order_by('pk').values_list(*spec.fields).iterator(chunk_size=chunk_size)
+    to_row = spec.to_row
+    for item in values:
+        yield to_row(item)
+
+
+class _LineBuffer:
+    """Pseudo-fichier (cible de ``csv.writer``) qui accumule les lignes jusqu'au prochain bloc."""
+
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+
+    def write(self, value):
+        self.parts.append(value)
+        self.size += len(value)
+
+    def drain(self):
+        data = ''.join(self.parts)
+        self.parts = []
+        self.size = 0
+        return data
+
+
+def csv_stream(columns, rows, buffer_size=BUFFER_SIZE):
+    """Blocs d'octets CSV (avec en-tête) pour les tuples ``rows``."""
+    buffer = _LineBuffer()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.size >= buffer_size:
+            yield buffer.drain().encode()
+    if buffer.size:
+        yield buffer.drain().encode()
+
+
+def jsonl_stream(columns, rows, buffer_size=BUFFER_SIZE):
+    """Blocs d'octets JSONL (un objet par ligne) pour les tuples ``rows``."""
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    buffer = _LineBuffer()
+    for row in rows:
+        buffer.write(dumps(dict(zip(columns, row))) + '\n')
+        if buffer.size >= buffer_size:
+            yield buffer.drain().encode()
+    if buffer.size:
+        yield buffer.drain().encode()
+
+
+def gzip_stream(chunks, level=6):
+    """Compresse à la volée un flux de blocs d'octets au format gzip."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(kind, fmt='csv', advisor=None, compress=False, chunk_size=CHUNK_SIZE):
+    """
+    Flux d'octets de l'export ``kind`` au format ``fmt`` ('csv' ou 'jsonl').
+
+    Raises:
+        KeyError: Si ``kind`` ou ``fmt`` est inconnu
+    """
+    writer = {'csv': csv_stream, 'jsonl': jsonl_stream}[fmt]
+    stream = writer(EXPORTS[kind].columns, export_rows(kind, advisor, chunk_size))
+    return gzip_stream(stream) if compress else stream
+
+
+async def async_stream(chunks):
+    """
+    Itérateur asynchrone sur un flux de blocs synchrone : chaque bloc est
+    produit dans le thread synchrone (celui de la connexion à la base), un à
+    la fois.
+    """
+    chunks = iter(chunks)
+    next_chunk = sync_to_async(next)
+    try:
+        while (chunk := await next_chunk(chunks, None)) is not None:
+            yield chunk
+    finally:
+        # Client déconnecté : libère le curseur côté serveur
+        await sync_to_async(chunks.close)()
+
+
+def export_filename(kind, fmt, compress=False):
+    return f'{kind}.{fmt}' + ('.gz' if compress else '')
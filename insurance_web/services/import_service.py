@@ -0,0 +1,224 @@
+"""
+Import en masse de clients (migration d'un portefeuille existant).
+
+Les lignes sont lues en flux (CSV ou JSONL) et traitées par lots : une
+requête pour écarter les emails déjà inscrits, une pour les usernames pris,
+puis ``bulk_create`` des utilisateurs et de leurs profils. ``bulk_create``
+n'émet pas ``post_save`` : ``create_user_profile`` / ``save_user_profile`` ne
+sont pas appelés ligne à ligne, les profils sont créés ici directement.
+
+Mots de passe : s'ils sont fournis, ils sont hachés dans un pool de threads
+(PBKDF2 / Argon2 libèrent le GIL) ; sinon le compte reçoit un mot de passe
+inutilisable et un email d'activation (lien de définition du mot de passe).
+"""
+import csv
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import InvalidOperation
+from functools import reduce
+from operator import or_
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from ..backends import normalize_email
+from ..models import Profile
+
+MAX_REPORTED_ERRORS = 1000
+INSERT_ATTEMPTS = 3
+
+PROFILE_FIELDS = ('age', 'sex', 'height', 'weight', 'bmi', 'children', 'smoker', 'region', 'additional_info')
+
+
+def read_client_rows(stream, fmt='csv'):
+    """Itère sur les lignes (dict) d'un fichier CSV (avec en-tête) ou JSONL ouvert en texte."""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _clean(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _build_profile(row):
+    """Profil (non enregistré) à partir des colonnes de la ligne ; lève ValidationError."""
+    values = {name: _clean(row.get(name)) for name in PROFILE_FIELDS}
+    if values['children'] is None:
+        values['children'] = 0
+    profile = Profile(**values)
+    profile.clean_fields(exclude=['user', 'role'])
+    if profile.bmi is None and profile.height and profile.weight:
+        try:
+            profile.bmi = round(profile.weight / (profile.height * profile.height), 2)
+        except (InvalidOperation, ZeroDivisionError):
+            pass
+    return profile
+
+
+def _hash_passwords(passwords, executor):
+    """Hache les mots de passe (None -> mot de passe inutilisable), en parallèle si possible."""
+    if executor is None:
+        return [make_password(p) for p in passwords]
+    return list(executor.map(make_password, passwords))
+
+
+def _unique_usernames(emails):
+    """Usernames dérivés de l'email (comme SignupView), uniques en base et dans le lot."""
+    bases = {email: email.split('@')[0][:140] for email in emails}
+    taken = set(
+        User.objects.filter(username__in=set(bases.values())).values_list('username', flat=True)
+    )
+    prefixes = {base for base in bases.values() if base in taken}
+    if prefixes:
+        # Suffixes numériques déjà attribués (jean1, jean2…) : une seule requête
+        collisions = reduce(or_, (Q(username__startswith=base) for base in prefixes))
+        taken.update(User.objects.filter(collisions).values_list('username', flat=True))
+    usernames = {}
+    for email, base in bases.items():
+        username, counter = base, 1
+        while username in taken:
+            username = f'{base}{counter}'
+            counter += 1
+        taken.add(username)
+        usernames[email] = username
+    return usernames
+
+
+def _import_chunk(chunk, stats, executor, use_passwords):
+    candidates = {}
+    for row in chunk:
+        stats['read'] += 1
+        email = normalize_email(row.get('email'))
+        try:
+            validate_email(email)
+            profile = _build_profile(row)
+        except ValidationError as e:
+            stats['invalid'] += 1
+            if len(stats['errors']) < MAX_REPORTED_ERRORS:
+                stats['errors'].append((stats['read'], email, '; '.join(e.messages)))
+            continue
+        if email in candidates:
+            stats['skipped'] += 1
+            continue
+        candidates[email] = (row, profile)
+
+    existing = _existing_emails(candidates)
+    stats['skipped'] += len(existing)
+    new = [(email, row, profile) for email, (row, profile) in candidates.items() if email not in existing]
+    if not new:
+        return []
+
+    passwords = _hash_passwords(
+        [(_clean(row.get('password')) if use_passwords else None) for _email, row, _profile in new], executor
+    )
+    for attempt in range(1, INSERT_ATTEMPTS + 1):
+        try:
+            users = _create_users(new, passwords)
+            break
+        except IntegrityError:
+            # Inscription concurrente : email ou username pris depuis les vérifications
+            if attempt == INSERT_ATTEMPTS:
+                raise
+            taken = _existing_emails([email for email, _row, _profile in new])
+            kept = [i for i, (email, _row, _profile) in enumerate(new) if email not in taken]
+            stats['skipped'] += len(new) - len(kept)
+            new = [new[i] for i in kept]
+            passwords = [passwords[i] for i in kept]
+            if not new:
+                return []
+    stats['created'] += len(users)
+    return users
+
+
+def _existing_emails(emails):
+    return set(
+        User.objects.annotate(email_key=Lower('email'))
+        .filter(email_key__in=list(emails))
+        .values_list('email_key', flat=True)
+    )
+
+
+def _create_users(new, passwords):
+    """Crée les utilisateurs et leurs profils en une transaction ; IntegrityError si un conflit apparaît."""
+    usernames = _unique_usernames([email for email, _row, _profile in new])
+    users = [
+        User(
+            username=usernames[email],
+            email=email,
+            first_name=(_clean(row.get('first_name')) or '')[:150],
+            last_name=(_clean(row.get('last_name')) or '')[:150],
+            password=password,
+        )
+        for (email, row, _profile), password in zip(new, passwords)
+    ]
+    with transaction.atomic():
+        users = User.objects.bulk_create(users)
+        profiles = []
+        for user, (_email, _row, profile) in zip(users, new):
+            profile.user = user
+            profiles.append(profile)
+        Profile.objects.bulk_create(profiles)
+    return users
+
+
+def import_clients(rows, chunk_size=1000, hash_workers=4, use_passwords=True, on_chunk=None):
+    """
+    Crée les clients décrits par ``rows`` (dicts : email, first_name, last_name,
+    password, colonnes du profil) par lots de ``chunk_size``.
+
+    Les emails invalides ou dont le profil ne passe pas la validation sont
+    comptés dans ``invalid`` ; les emails déjà inscrits (ou en double dans le
+    fichier) dans ``skipped``, y compris ceux inscrits pendant l'import : un
+    lot en conflit (``IntegrityError``) est retenté sans ces lignes, avec de
+    nouveaux usernames.
+
+    Args:
+        rows: Itérable de dicts (voir ``read_client_rows``)
+        chunk_size: Nombre de lignes par lot (une transaction par lot)
+        hash_workers: Threads de hachage des mots de passe (0 : séquentiel)
+        use_passwords: Si False, ignore la colonne password (comptes inutilisables)
+        on_chunk: Rappel ``on_chunk(users, stats)`` après chaque lot
+
+    Returns:
+        dict: {'read', 'created', 'skipped', 'invalid', 'seconds', 'errors'}
+        (``errors`` : au plus MAX_REPORTED_ERRORS tuples (ligne, email, message))
+    """
+    stats = {'read': 0, 'created': 0, 'skipped': 0, 'invalid': 0, 'seconds': 0.0, 'errors': []}
+    start = time.perf_counter()
+    executor = ThreadPoolExecutor(hash_workers, thread_name_prefix='hash') if hash_workers and use_passwords else None
+    try:
+        for chunk in _chunks(rows, chunk_size):
+            users = _import_chunk(chunk, stats, executor, use_passwords)
+            stats['seconds'] = time.perf_counter() - start
+            if on_chunk is not None:
+                on_chunk(users, stats)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        stats['seconds'] = time.perf_counter() - start
+    return stats
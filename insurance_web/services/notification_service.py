@@ -1,12 +1,21 @@
+import time
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.utils import timezone
 from django.utils.translation import gettext as _
 from django.utils.formats import date_format
 from django.db import transaction
+from django.db.models import Q
 from django.core.exceptions import ValidationError
 
-from ..models import Notification, Appointment
+from ..metrics import NOTIFICATIONS_CREATED
+from ..models import Notification, NotificationArchive, Appointment
 from ..utils.logging import log_error, log_info
-from ..constants import NOTIFICATION_TYPE_CHOICES
+from ..constants import EMAIL_NOTIFICATION_TYPES, NOTIFICATION_TYPE_CHOICES
 from ..exceptions import NotificationError
+from .email_service import uses_email_digest
 
 
 def create_notification(user, notification_type, message, appointment=None):
@@ -37,8 +46,11 @@ def create_notification(user, notification_type, message, appointment=None):
             user=user,
             type=notification_type,
             appointment=appointment,
-            message=message
+            message=message,
+            # En mode digest, l'email est envoyé plus tard par send_notification_digests
+            email_pending=notification_type in EMAIL_NOTIFICATION_TYPES and uses_email_digest(user),
         )
+        NOTIFICATIONS_CREATED.inc(type=notification_type)
         log_info(
             _("Notification created"),
             extra={
@@ -48,6 +60,7 @@ def create_notification(user, notification_type, message, appointment=None):
                 'appointment_id': appointment.id if appointment else None,
             }
         )
+        transaction.on_commit(partial(publish_notification_event, notification))
         return notification
     except Exception as e:
         log_error(
@@ -61,6 +74,40 @@ def create_notification(user, notification_type, message, appointment=None):
         )
         raise
 
+def publish_notification_event(notification):
+    """
+    Pousse une nouvelle notification vers les flux SSE ouverts de son destinataire.
+    
+    Appelée après le commit de la transaction ; une erreur du broker est
+    journalisée mais n'empêche jamais la création de la notification.
+    """
+    _publish_user_event(notification.user_id, {
+        'type': 'notification',
+        'id': notification.id,
+        'notification_type': notification.type,
+        'message': notification.message,
+        'appointment_id': notification.appointment_id,
+        'created_at': notification.created_at.isoformat(),
+    })
+
+
+def publish_unread_count_changed(user):
+    """Signale aux flux SSE de l'utilisateur que son compteur de non lues a changé."""
+    transaction.on_commit(partial(_publish_user_event, user.id, {'type': 'unread_count_changed'}))
+
+
+def _publish_user_event(user_id, event):
+    from ..realtime.brokers import get_broker
+    try:
+        get_broker().publish(user_id, event)
+    except Exception as e:
+        log_error(
+            _("Error publishing notification event: %(error)s") % {'error': e},
+            exc_info=True,
+            extra={'user_id': user_id, 'event_type': event.get('type')},
+        )
+
+
 def create_appointment_by_conseiller_notification(appointment):
     """
     Crée une notification pour le client lorsqu'un conseiller planifie un rendez-vous pour lui.
@@ -199,6 +246,11 @@ def get_unread_notifications_count(user):
     return Notification.objects.filter(user=user, read=False).count()
 
 
+async def aget_unread_notifications_count(user):
+    """Version asynchrone de get_unread_notifications_count (flux SSE)."""
+    return await Notification.objects.filter(user=user, read=False).acount()
+
+
 def get_user_notifications(user, unread_only=False, limit=None):
     """
     Récupère les notifications d'un utilisateur.
@@ -234,59 +286,71 @@ def get_user_notifications(user, unread_only=False, limit=None):
 
 def mark_notification_as_read(notification_id, user):
     """
-    Marque une notification comme lue en la supprimant (elle ne réapparaît plus).
+    Marque une notification comme lue (une seule requête UPDATE).
+    
+    La ligne est conservée : elle sort du compteur de non lues et sera purgée
+    par la rétention (voir prune_expired_notifications).
     
     Args:
         notification_id: ID de la notification
         user: Utilisateur propriétaire de la notification (pour sécurité)
         
     Returns:
-        bool: True si la notification a été supprimée, False sinon
+        bool: True si la notification vient d'être marquée comme lue, False si elle l'était déjà
         
     Raises:
         NotificationError: Si la notification n'existe pas ou n'appartient pas à l'utilisateur
     """
     try:
-        notification = Notification.objects.get(id=notification_id, user=user)
-        notification.delete()
+        updated = Notification.objects.filter(id=notification_id, user=user, read=False).update(
+            read=True,
+            read_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        if not updated:
+            if not Notification.objects.filter(id=notification_id, user=user).exists():
+                raise NotificationError(_("Notification not found or you don't have permission to access it"))
+            return False
+        publish_unread_count_changed(user)
         log_info(
-            _("Notification deleted after read"),
+            _("Notification marked as read"),
             extra={
                 'notification_id': notification_id,
                 'user_id': user.id,
             }
         )
         return True
-    except Notification.DoesNotExist:
-        raise NotificationError(_("Notification not found or you don't have permission to access it"))
+    except NotificationError:
+        raise
     except Exception as e:
         log_error(
-            _("Error deleting notification: %(error)s") % {'error': e},
+            _("Error marking notification as read: %(error)s") % {'error': e},
             exc_info=True,
             extra={
                 'notification_id': notification_id,
                 'user_id': user.id,
             }
         )
-        raise NotificationError(_("Failed to delete notification: %(error)s") % {'error': e})
+        raise NotificationError(_("Failed to mark notification as read: %(error)s") % {'error': e})
 
 
 def mark_all_notifications_as_read(user):
     """
-    Supprime toutes les notifications non lues d'un utilisateur (considérées comme lues).
+    Marque toutes les notifications non lues d'un utilisateur comme lues.
     
     Args:
-        user: Utilisateur pour qui supprimer les notifications non lues
+        user: Utilisateur concerné
         
     Returns:
-        int: Nombre de notifications supprimées
+        int: Nombre de notifications marquées comme lues
     """
     try:
-        qs = Notification.objects.filter(user=user, read=False)
-        count = qs.count()
-        qs.delete()
+        now = timezone.now()
+        count = Notification.objects.filter(user=user, read=False).update(read=True, read_at=now, updated_at=now)
+        if count:
+            publish_unread_count_changed(user)
         log_info(
-            _("All unread notifications deleted"),
+            _("All unread notifications marked as read"),
             extra={
                 'user_id': user.id,
                 'count': count,
@@ -295,10 +359,101 @@ def mark_all_notifications_as_read(user):
         return count
     except Exception as e:
         log_error(
-            _("Error deleting notifications: %(error)s") % {'error': e},
+            _("Error marking notifications as read: %(error)s") % {'error': e},
             exc_info=True,
             extra={
                 'user_id': user.id,
             }
         )
-        raise NotificationError(_("Failed to delete notifications: %(error)s") % {'error': e})
\ No newline at end of file
+        raise NotificationError(_("Failed to mark notifications as read: %(error)s") % {'error': e})
+
+
+def get_notification_expiry_filter(now=None):
+    """
+    Construit le filtre des notifications expirées selon la configuration de rétention.
+    
+    - ``NOTIFICATION_RETENTION_DAYS`` : durée de vie par type (clé ``'default'`` pour les autres types)
+    - ``NOTIFICATION_READ_RETENTION_DAYS`` : durée de conservation après lecture
+    
+    Args:
+        now: Date de référence (par défaut: maintenant)
+        
+    Returns:
+        Q: Condition à appliquer sur Notification
+    """
+    now = now or timezone.now()
+    retention = dict(getattr(settings, 'NOTIFICATION_RETENTION_DAYS', {}))
+    default_days = retention.pop('default', 180)
+    read_days = getattr(settings, 'NOTIFICATION_READ_RETENTION_DAYS', 30)
+    
+    expired = Q(read=True, read_at__lt=now - timedelta(days=read_days))
+    for notification_type, days in retention.items():
+        expired |= Q(type=notification_type, created_at__lt=now - timedelta(days=days))
+    expired |= Q(created_at__lt=now - timedelta(days=default_days)) & ~Q(type__in=list(retention))
+    return expired
+
+
+def prune_expired_notifications(batch_size=1000, archive=False, dry_run=False, now=None, pause=0):
+    """
+    Supprime (ou archive) les notifications expirées par lots bornés.
+    
+    Les lots sont parcourus par plages de clés (``id``) croissantes, chacun dans
+    sa propre transaction courte : aucun verrou long n'est posé sur la table et
+    la suppression suit l'ordre d'insertion, ce qui reste efficace si la table
+    est partitionnée par date.
+    
+    Args:
+        batch_size: Nombre maximum de lignes par lot
+        archive: Si True, copie les lignes dans NotificationArchive avant suppression
+        dry_run: Si True, compte seulement les notifications expirées
+        now: Date de référence (par défaut: maintenant)
+        pause: Pause en secondes entre deux lots (pour lisser la charge)
+        
+    Returns:
+        dict: {'deleted': int, 'archived': int, 'batches': int}
+    """
+    expired = Notification.objects.filter(get_notification_expiry_filter(now))
+    stats = {'deleted': 0, 'archived': 0, 'batches': 0}
+    
+    if dry_run:
+        stats['deleted'] = expired.count()
+        return stats
+    
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            ids = list(
+                expired.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            batch = expired.filter(id__gte=ids[0], id__lte=ids[-1])
+            if archive:
+                archived = NotificationArchive.objects.bulk_create([
+                    NotificationArchive(
+                        notification_id=row['id'],
+                        user_id=row['user_id'],
+                        appointment_id=row['appointment_id'],
+                        type=row['type'],
+                        message=row['message'],
+                        read=row['read'],
+                        read_at=row['read_at'],
+                        created_at=row['created_at'],
+                    )
+                    for row in batch.values(
+                        'id', 'user_id', 'appointment_id', 'type', 'message', 'read', 'read_at', 'created_at'
+                    )
+                ])
+                stats['archived'] += len(archived)
+            deleted, _details = batch.delete()
+            stats['deleted'] += deleted
+            stats['batches'] += 1
+        last_id = ids[-1]
+        if pause:
+            time.sleep(pause)
+    
+    log_info(
+        _("Expired notifications pruned"),
+        extra=dict(stats, archive=archive),
+    )
+    return stats
@@ -1,12 +1,18 @@
+import hashlib
 import joblib
 import os
+import time
 from django.conf import settings
 import pandas as pd 
 from django.db import transaction
 
 from django.utils.translation import gettext as _
+from ..metrics import MODEL_LOAD_DURATION, PREDICTION_DURATION, PREDICTIONS, record_cache_lookup
 from ..models import Prediction, PricingConfiguration
 from ..utils.logging import log_error, log_prediction, log_critical
+from ..utils.profiling import profile_section
+from . import drift_service, shadow_service
+from .prediction_storage_service import coalesce_repeat, get_or_create_features, normalize_features
 from ..exceptions import (
     PredictionError,
     ModelNotFoundError,
@@ -15,17 +21,21 @@ from ..exceptions import (
 
 
 MODEL_PATH = os.path.join(settings.BASE_DIR, 'model', 'gb_pipeline.joblib')
+FEATURES = ('age', 'sex', 'bmi', 'children', 'smoker', 'region')
 _model = None
+_model_version = None
 
 
 def _load_model():
     """Charge le modèle ML en cache"""
     global _model
+    record_cache_lookup('ml_model', hit=_model is not None)
     if _model is None:
         try:
             if not os.path.exists(MODEL_PATH):
                 raise ModelNotFoundError(_("Model file not found at %(path)s") % {'path': MODEL_PATH})
-            _model = joblib.load(MODEL_PATH)
+            with profile_section('model_load'), MODEL_LOAD_DURATION.time():
+                _model = joblib.load(MODEL_PATH)
         except FileNotFoundError:
             log_critical(_("Model file not found at %(path)s") % {'path': MODEL_PATH})
             raise ModelNotFoundError(_("Model file not found at %(path)s") % {'path': MODEL_PATH})
@@ -35,6 +45,21 @@ def _load_model():
     return _model
 
 
+def model_version():
+    """
+    Empreinte courte du fichier modèle (clé de cache des résultats dérivés du
+    modèle) ; calculée une fois par processus.
+    """
+    global _model_version
+    if _model_version is None:
+        try:
+            with open(MODEL_PATH, 'rb') as f:
+                _model_version = hashlib.file_digest(f, 'sha256').hexdigest()[:12]
+        except FileNotFoundError:
+            raise ModelNotFoundError(_("Model file not found at %(path)s") % {'path': MODEL_PATH})
+    return _model_version
+
+
 def _validate_prediction_data(form_data):
     """Valide les données de prédiction"""
     required_fields = ['age', 'sex', 'bmi', 'children', 'smoker', 'region']
@@ -71,8 +96,13 @@ def calculate_insurance_premium(form_data):
         ModelNotFoundError: Si le modèle ML n'est pas trouvé
         PredictionError: Si une erreur survient lors du calcul
     """
-    _validate_prediction_data(form_data)
+    try:
+        _validate_prediction_data(form_data)
+    except InvalidPredictionDataError:
+        PREDICTIONS.inc(outcome='invalid')
+        raise
     
+    start = time.perf_counter()
     try:
         model = _load_model()
         data = {
@@ -84,15 +114,59 @@ def calculate_insurance_premium(form_data):
             'region': [form_data['region']]
         }
         df = pd.DataFrame(data)
-        prediction = model.predict(df)[0]
-        return round(float(prediction), 2)
+        with profile_section('ml_predict'):
+            prediction = model.predict(df)[0]
+        PREDICTIONS.inc(outcome='success')
     except (InvalidPredictionDataError, ModelNotFoundError):
+        PREDICTIONS.inc(outcome='error')
         raise
     except Exception as e:
+        PREDICTIONS.inc(outcome='error')
         log_error(_("Error calculating insurance premium: %(error)s") % {'error': e}, exc_info=True, extra={
             'form_data': form_data
         })
         raise PredictionError(_("Failed to calculate insurance premium: %(error)s") % {'error': e})
+    finally:
+        PREDICTION_DURATION.observe(time.perf_counter() - start)
+
+    # Suivi du modèle, hors du calcul : une erreur ne doit pas faire échouer la prédiction
+    features = {name: values[0] for name, values in data.items()}
+    try:
+        # Histogrammes de dérive (compteurs en mémoire, voir drift_service)
+        drift_service.observe(features, prediction)
+        # Échantillon pour le modèle candidat (file non bloquante, voir shadow_service)
+        shadow_service.submit(features, prediction)
+    except Exception as e:
+        log_error(_("Model monitoring failed: %(error)s") % {'error': e}, exc_info=True)
+    return round(float(prediction), 2)
+
+
+def predict_premiums(features):
+    """
+    Prédit les primes de plusieurs profils en un seul appel au modèle.
+
+    Args:
+        features: DataFrame (ou dict de colonnes) avec age, sex, bmi, children,
+            smoker, region ; les valeurs doivent déjà être validées
+
+    Returns:
+        numpy.ndarray: Primes prédites, dans l'ordre des lignes
+
+    Raises:
+        ModelNotFoundError: Si le modèle ML n'est pas trouvé
+        PredictionError: Si une erreur survient lors du calcul
+    """
+    model = _load_model()
+    if not isinstance(features, pd.DataFrame):
+        features = pd.DataFrame(features)
+    try:
+        with profile_section('ml_predict_batch'):
+            return model.predict(features[list(FEATURES)])
+    except Exception as e:
+        log_error(_("Error in batch premium prediction: %(error)s") % {'error': e}, exc_info=True, extra={
+            'rows': len(features)
+        })
+        raise PredictionError(_("Failed to calculate insurance premium: %(error)s") % {'error': e})
 
 
 @transaction.atomic
@@ -100,6 +174,11 @@ def create_prediction(user, created_by, form_data, predicted_amount):
     """
     Crée une prédiction et met à jour le profil utilisateur.
     
+    Les variables sont rattachées à leur ligne ``PredictionFeatures``. Si
+    ``PREDICTION_STORAGE['COALESCE_WINDOW']`` est activé, une prédiction
+    identique récente est réutilisée au lieu d'être dupliquée ; le profil
+    n'est écrit que s'il a changé (voir ``prediction_storage_service``).
+    
     Args:
         user: Utilisateur pour qui la prédiction est créée
         created_by: Utilisateur qui a créé la prédiction
@@ -107,7 +186,7 @@ def create_prediction(user, created_by, form_data, predicted_amount):
         predicted_amount: Montant prédit
         
     Returns:
-        Prediction: Instance de prédiction créée
+        Prediction: Instance de prédiction créée (ou réutilisée)
         
     Raises:
         PredictionError: Si une erreur survient lors de la création
@@ -118,12 +197,15 @@ def create_prediction(user, created_by, form_data, predicted_amount):
     try:
         additional_info = form_data.pop('additional_info', None)
         
-        prediction = Prediction.objects.create(
-            user=user,
-            created_by=created_by,
-            predicted_amount=predicted_amount,
-            **form_data
-        )
+        features = get_or_create_features(normalize_features(form_data))
+        prediction = coalesce_repeat(user, created_by, features, predicted_amount)
+        if prediction is None:
+            prediction = Prediction.objects.create(
+                user=user,
+                created_by=created_by,
+                predicted_amount=predicted_amount,
+                features=features,
+            )
         
         if additional_info is not None:
             form_data['additional_info'] = additional_info
@@ -132,7 +214,11 @@ def create_prediction(user, created_by, form_data, predicted_amount):
         for key, value in form_data.items():
             if hasattr(profile, key):
                 setattr(profile, key, value)
-        profile.save()
+        if profile.bmi is not None:
+            # Valeur telle qu'enregistrée, pour comparer avec celle lue en base
+            profile.bmi = normalize_features({'bmi': profile.bmi})['bmi']
+        if profile.has_unsaved_changes():
+            profile.save()
         
         log_prediction(created_by, predicted_amount, form_data)
         
@@ -0,0 +1,134 @@
+"""
+Stockage compact des prédictions.
+
+- Chaque vecteur de variables distinct (âge, sexe, IMC, enfants, fumeur,
+  région) est enregistré une fois dans ``PredictionFeatures``, identifié par
+  une empreinte SHA-256 de sa forme canonique ; les prédictions le
+  référencent (``Prediction.features``) au lieu de recopier les colonnes.
+  Les lecteurs (historique, export, instantané analytique) passent par
+  ``features``.
+- ``settings.PREDICTION_STORAGE['COALESCE_WINDOW']`` (désactivé par défaut) :
+  une prédiction identique (même client, même auteur, mêmes variables, même
+  montant) refaite dans la fenêtre n'insère pas de ligne : le compteur
+  ``repeat_count`` de la précédente est incrémenté. Les lecteurs qui
+  comptent des lignes (historique, instantané) voient alors une prédiction ;
+  l'export inclut ``repeat_count``.
+
+Les prédictions antérieures sont rattachées à leurs variables par la
+migration 0023 ; les doublons déjà enregistrés se regroupent avec
+``coalesce_existing`` (commande ``coalesce_predictions``).
+"""
+import hashlib
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from itertools import groupby
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import Prediction, PredictionFeatures
+
+FEATURE_FIELDS = ('age', 'sex', 'bmi', 'children', 'smoker', 'region')
+BATCH_SIZE = 2000
+
+_CENT = Decimal('0.01')
+
+
+def _options():
+    return getattr(settings, 'PREDICTION_STORAGE', {})
+
+
+def normalize_features(data):
+    """Variables sous leur forme stockée (IMC arrondi au centième, enfants 0 par défaut)."""
+    values = {name: data.get(name) for name in FEATURE_FIELDS}
+    if values['bmi'] is not None:
+        values['bmi'] = Decimal(str(values['bmi'])).quantize(_CENT, rounding=ROUND_HALF_UP)
+    if values['children'] is None:
+        values['children'] = 0
+    return values
+
+
+def feature_hash(values):
+    """Empreinte de variables normalisées (``normalize_features``)."""
+    canonical = '|'.join('' if values[name] is None else str(values[name]) for name in FEATURE_FIELDS)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def get_or_create_features(values):
+    features, _created = PredictionFeatures.objects.get_or_create(
+        feature_hash=feature_hash(values), defaults=values
+    )
+    return features
+
+
+def coalesce_repeat(user, created_by, features, predicted_amount, now=None):
+    """
+    Prédiction identique récente à réutiliser (compteur incrémenté), ou None.
+    """
+    window = _options().get('COALESCE_WINDOW', 0)
+    if not window or features is None:
+        return None
+    since = (now or timezone.now()) - timedelta(seconds=window)
+    previous = (
+        Prediction.objects
+        .filter(user=user, created_by=created_by, features=features, created_at__gte=since)
+        .order_by('-created_at', '-id')
+        .first()
+    )
+    if previous is None or previous.predicted_amount != Decimal(str(predicted_amount)).quantize(_CENT):
+        return None
+    Prediction.objects.filter(pk=previous.pk).update(repeat_count=F('repeat_count') + 1)
+    previous.repeat_count += 1
+    return previous
+
+
+def coalesce_existing(window=None, batch_size=BATCH_SIZE):
+    """
+    Regroupe les prédictions déjà enregistrées selon la règle de
+    ``coalesce_repeat`` : dans chaque suite (client, auteur, variables,
+    montant), une prédiction faite moins de ``window`` secondes après celle
+    retenue est supprimée et comptée dans ``repeat_count`` de celle-ci.
+
+    Les prédictions sans variables enregistrées sont ignorées.
+
+    Returns:
+        int: Nombre de prédictions supprimées
+    """
+    window = timedelta(seconds=_options().get('COALESCE_WINDOW', 0) if window is None else window)
+    if not window:
+        return 0
+    rows = (
+        Prediction.objects.filter(features__isnull=False)
+        .order_by('user_id', 'created_by_id', 'features_id', 'predicted_amount', 'created_at', 'id')
+        .values_list('id', 'user_id', 'created_by_id', 'features_id', 'predicted_amount', 'created_at', 'repeat_count')
+        .iterator(chunk_size=batch_size)
+    )
+    repeats = {}
+    duplicates = []
+
+    def close(anchor):
+        if anchor and anchor[3] != anchor[2]:
+            repeats[anchor[0]] = anchor[3]
+
+    for _key, group in groupby(rows, key=lambda row: row[1:5]):
+        anchor = None  # [id, created_at, repeat_count initial, repeat_count regroupé]
+        for pk, *_rest, created_at, repeat_count in group:
+            if anchor and created_at - anchor[1] <= window:
+                anchor[3] += repeat_count
+                duplicates.append(pk)
+            else:
+                close(anchor)
+                anchor = [pk, created_at, repeat_count, repeat_count]
+        close(anchor)
+
+    removed = 0
+    with transaction.atomic():
+        Prediction.objects.bulk_update(
+            [Prediction(pk=pk, repeat_count=count) for pk, count in repeats.items()],
+            ['repeat_count'], batch_size=batch_size,
+        )
+        for start in range(0, len(duplicates), batch_size):
+            removed += Prediction.objects.filter(pk__in=duplicates[start:start + batch_size]).delete()[0]
+    return removed
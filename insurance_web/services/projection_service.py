@@ -0,0 +1,190 @@
+"""
+Projection de la prime d'un client sur les années à venir (vieillissement).
+
+Pour chaque profil complet, on génère une ligne par année (âge + 0 … âge + N,
+sans dépasser ``MAX_AGE``), les autres variables restant celles du profil, et
+toutes les lignes de tous les profils demandés sont prédites en un seul appel
+au modèle (``predict_premiums``).
+
+Les trajectoires sont mises en cache par (empreinte du profil, version du
+modèle, horizon) : un profil modifié ou un nouveau modèle change la clé, sans
+invalidation explicite. ``portfolio_projection`` calcule le portefeuille
+entier d'un conseiller par lots de ``CHUNK_SIZE`` clients.
+"""
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+from django.core.cache import cache
+
+from ..exceptions import InvalidPredictionDataError
+from .prediction_service import FEATURES, _validate_prediction_data, model_version, predict_premiums
+from .search_service import client_scope
+
+DEFAULT_YEARS = 20
+MIN_YEARS = 10
+MAX_YEARS = 30
+MAX_AGE = 100
+CHUNK_SIZE = 1000
+PROJECTION_CACHE_TIMEOUT = 7 * 24 * 3600
+
+_PROFILE_FIELDS = tuple(f'profile__{name}' for name in FEATURES)
+
+
+def clamp_years(years):
+    try:
+        years = int(years)
+    except (TypeError, ValueError):
+        return DEFAULT_YEARS
+    return max(MIN_YEARS, min(years, MAX_YEARS))
+
+
+def profile_features(profile):
+    """Variables du modèle pour un profil, ou None si le profil est incomplet ou invalide."""
+    features = {name: getattr(profile, name) for name in FEATURES}
+    return _checked(features)
+
+
+def _checked(features):
+    if features['children'] is None:
+        features['children'] = 0
+    if any(value is None for value in features.values()):
+        return None
+    features['bmi'] = float(features['bmi'])
+    try:
+        _validate_prediction_data(features)
+    except InvalidPredictionDataError:
+        return None
+    return features
+
+
+def profile_hash(features):
+    return hashlib.sha256(json.dumps(features, sort_keys=True).encode()).hexdigest()[:20]
+
+
+def _aging_rows(profiles, years):
+    """Lignes de vieillissement de tous les profils (une par profil et par année)."""
+    ages = np.array([features['age'] for features in profiles], dtype=np.int64)
+    counts = np.minimum(years, MAX_AGE - ages) + 1
+    starts = np.cumsum(counts) - counts
+    offsets = np.arange(counts.sum()) - np.repeat(starts, counts)
+    columns = {
+        name: np.repeat(np.array([features[name] for features in profiles], dtype=object), counts)
+        for name in FEATURES if name != 'age'
+    }
+    columns['age'] = np.repeat(ages, counts) + offsets
+    columns['bmi'] = columns['bmi'].astype(np.float64)
+    columns['children'] = columns['children'].astype(np.int64)
+    return pd.DataFrame(columns), counts
+
+
+def project_premiums(profiles, years=DEFAULT_YEARS):
+    """
+    Trajectoires de prime (une liste par profil, année 0 à ``years``).
+
+    Args:
+        profiles: Liste de dicts de variables (``profile_features``) ou None
+        years: Horizon en années (borné à [MIN_YEARS, MAX_YEARS])
+
+    Returns:
+        list: Pour chaque profil, la liste des primes annuelles prédites
+        (raccourcie si l'âge dépasse ``MAX_AGE``), ou None si le profil est None
+    """
+    years = clamp_years(years)
+    version = model_version()
+    keys = [
+        f'projection:{version}:{years}:{profile_hash(features)}' if features else None
+        for features in profiles
+    ]
+    cached = cache.get_many({key for key in keys if key})
+    missing = {}
+    for key, features in zip(keys, profiles):
+        if key and key not in cached and key not in missing:
+            missing[key] = features
+
+    if missing:
+        rows, counts = _aging_rows(list(missing.values()), years)
+        premiums = np.round(predict_premiums(rows), 2).tolist()
+        computed = {}
+        start = 0
+        for key, count in zip(missing, counts.tolist()):
+            computed[key] = premiums[start:start + count]
+            start += count
+        cache.set_many(computed, PROJECTION_CACHE_TIMEOUT)
+        cached.update(computed)
+    return [cached[key] if key else None for key in keys]
+
+
+def client_projection(user, years=DEFAULT_YEARS):
+    """
+    Trajectoire de prime d'un client pour l'affichage, ou None si son profil
+    est incomplet.
+
+    Returns:
+        dict: {'years', 'points': [{'offset', 'age', 'premium', 'change'}]}
+        avec ``change`` en % par rapport à la prime actuelle
+    """
+    features = profile_features(user.profile)
+    if features is None:
+        return None
+    years = clamp_years(years)
+    premiums = project_premiums([features], years)[0]
+    current = premiums[0]
+    return {
+        'years': years,
+        'points': [
+            {
+                'offset': offset,
+                'age': features['age'] + offset,
+                'premium': premium,
+                'change': round(100 * (premium - current) / current, 1) if current else 0.0,
+                'share': 100 * premium / max(premiums),
+            }
+            for offset, premium in enumerate(premiums)
+        ],
+    }
+
+
+def portfolio_projection(user, years=DEFAULT_YEARS, chunk_size=CHUNK_SIZE):
+    """
+    Projection agrégée du portefeuille de ``user`` (ses clients, ou tous les
+    clients pour un admin), par lots de ``chunk_size`` clients.
+
+    Returns:
+        dict: {'years', 'clients', 'projected', 'offsets', 'total', 'mean'} ;
+        ``total`` et ``mean`` par année, sur les clients encore projetés
+        (âge <= MAX_AGE)
+    """
+    years = clamp_years(years)
+    totals = np.zeros(years + 1)
+    counts = np.zeros(years + 1, dtype=np.int64)
+    clients = projected = 0
+    rows = client_scope(user, include_admins=False).order_by('pk').values_list(*_PROFILE_FIELDS)
+    batch = []
+
+    def flush():
+        nonlocal projected
+        profiles = [features for features in map(_checked, batch) if features]
+        for premiums in project_premiums(profiles, years):
+            totals[:len(premiums)] += premiums
+            counts[:len(premiums)] += 1
+        projected += len(profiles)
+        batch.clear()
+
+    for values in rows.iterator(chunk_size=chunk_size):
+        clients += 1
+        batch.append(dict(zip(FEATURES, values)))
+        if len(batch) >= chunk_size:
+            flush()
+    flush()
+
+    means = np.divide(totals, counts, out=np.zeros_like(totals), where=counts > 0)
+    return {
+        'years': years,
+        'clients': clients,
+        'projected': projected,
+        'offsets': list(range(years + 1)),
+        'total': np.round(totals, 2).tolist(),
+        'mean': np.round(means, 2).tolist(),
+    }
@@ -0,0 +1,185 @@
+"""
+Recherche de clients par nom, email, région et âge.
+
+Le texte libre est découpé en termes (au plus ``MAX_TERMS``), qui doivent tous
+apparaître dans le prénom, le nom ou l'email :
+
+- PostgreSQL : chaque mot saisi est cherché entier dans l'email (une
+  adresse « paul@example.fr » n'est pas découpée), ou mot par mot dans le
+  prénom et le nom, sans accents (``insurance_web_unaccent``). ``icontains``
+  et ``istartswith`` sont servis par les index GIN trigrammes
+  (``UPPER(...) gin_trgm_ops``, migrations 0017 et 0025). Un terme de moins
+  de ``MIN_CONTAINS_LENGTH`` caractères n'a pas de trigramme complet (l'index
+  GIN ne filtrerait rien) : il est cherché en début de champ, servi par les
+  index btree ``UPPER(...) text_pattern_ops`` (migrations 0022 et 0025) ;
+- SQLite (tests, développement) : table FTS5 ``insurance_web_user_fts``,
+  tenue à jour par triggers ; correspondance par préfixe de mot.
+
+Les résultats sont triés par (nom, prénom, id), l'ordre de l'index
+``auth_user_name_order_idx``, et paginés par curseur : une page coûte le
+même prix quel que soit le nombre d'utilisateurs.
+
+Le sélecteur de client (``typeahead_clients``) renvoie au plus
+``TYPEAHEAD_MAX_LIMIT`` suggestions classées (début du nom, puis de l'email),
+mises en cache par conseiller. La clé inclut une version par conseiller,
+incrémentée quand il gagne ou perd un client (lien ``AdvisorClient`` créé ou
+supprimé) ; les autres changements (nouvel inscrit vu par un admin,
+renommage) attendent l'expiration (``TYPEAHEAD_CACHE_TIMEOUT``).
+"""
+import hashlib
+import re
+import time
+import unicodedata
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Case, CharField, F, Func, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.lookups import IContains, IStartsWith
+
+from ..permissions import get_roles
+
+MAX_TERMS = 5
+MIN_CONTAINS_LENGTH = 3
+ORDERING = ('last_name', 'first_name', 'id')
+PAGE_SIZE = 20
+TYPEAHEAD_LIMIT = 8
+TYPEAHEAD_MAX_LIMIT = 20
+TYPEAHEAD_CACHE_TIMEOUT = 60
+
+FTS_TABLE = 'insurance_web_user_fts'
+
+
+def client_scope(user, include_admins=True):
+    """
+    Utilisateurs consultables par ``user`` : pour un admin, tous les
+    utilisateurs hors conseillers (et hors admins si ``include_admins`` est
+    faux, pour prédire ou réserver) ; pour un conseiller, ses clients (liens
+    ``AdvisorClient``, un par client ayant eu un rendez-vous avec lui).
+    """
+    if get_roles(user).is_admin:
+        excluded = ('conseiller',) if include_admins else ('conseiller', 'admin')
+        return User.objects.exclude(pk=user.pk).exclude(profile__role__in=excluded)
+    return User.objects.filter(advisor_links__conseiller=user)
+
+
+def search_terms(query):
+    """Termes de recherche normalisés (mots, en minuscules)."""
+    return re.findall(r'\w+', (query or '').lower())[:MAX_TERMS]
+
+
+class Unaccent(Func):
+    """``insurance_web_unaccent(col)`` : ``unaccent`` déclarée IMMUTABLE, donc indexable (migration 0025)."""
+    function = 'insurance_web_unaccent'
+    output_field = CharField()
+
+
+def strip_accents(text):
+    return ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+
+
+def _lookup(term, prefix):
+    return IStartsWith if prefix or len(term) < MIN_CONTAINS_LENGTH else IContains
+
+
+def _match_postgresql(queryset, query, prefix):
+    # Un mot saisi (« jean-pierre », « paul@example.fr ») est cherché entier dans
+    # l'email, ou mot par mot dans le prénom et le nom (accents ignorés)
+    for chunk in (query or '').lower().split()[:MAX_TERMS]:
+        words = search_terms(chunk)
+        if not words:
+            continue
+        condition = Q(_lookup(chunk, prefix)(F('email'), chunk))
+        names = Q()
+        for word in words:
+            term = strip_accents(word)
+            lookup = _lookup(term, prefix)
+            names &= Q(lookup(Unaccent('first_name'), term)) | Q(lookup(Unaccent('last_name'), term))
+        queryset = queryset.filter(condition | names)
+    return queryset
+
+
+def _match_fts5(queryset, terms):
+    # Termes limités à \w : pas d'échappement nécessaire dans la syntaxe MATCH
+    expression = ' AND '.join(f'"{term}"*' for term in terms)
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (expression,)
+    ))
+
+
+def search_clients(user, query='', region=None, age_min=None, age_max=None, prefix=False, include_admins=True):
+    """
+    QuerySet des clients de ``user`` correspondant aux critères, trié par ``ORDERING``.
+
+    Args:
+        user: Conseiller ou admin qui recherche
+        query: Texte libre (nom, prénom, email)
+        region: Code région exact
+        age_min, age_max: Bornes d'âge incluses
+        prefix: Correspondance en début de mot seulement (autocomplétion)
+        include_admins: Voir ``client_scope``
+    """
+    queryset = client_scope(user, include_admins).select_related('profile')
+    terms = search_terms(query)
+    if terms:
+        if connections[queryset.db].vendor == 'postgresql':
+            queryset = _match_postgresql(queryset, query, prefix)
+        else:
+            queryset = _match_fts5(queryset, terms)
+    if region:
+        queryset = queryset.filter(profile__region=region)
+    if age_min is not None:
+        queryset = queryset.filter(profile__age__gte=age_min)
+    if age_max is not None:
+        queryset = queryset.filter(profile__age__lte=age_max)
+    return queryset.order_by(*ORDERING)
+
+
+def _typeahead_version_key(user_id):
+    return f'clients:typeahead:version:{user_id}'
+
+
+def invalidate_client_typeahead(user_id):
+    """Invalide les suggestions en cache du conseiller ``user_id``."""
+    key = _typeahead_version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time()), timeout=None)
+
+
+def _rank(term):
+    """0 : un nom commence par le terme ; 1 : l'email ; 2 : correspondance ailleurs."""
+    return Case(
+        When(Q(last_name__istartswith=term) | Q(first_name__istartswith=term), then=Value(0)),
+        When(email__istartswith=term, then=Value(1)),
+        default=Value(2),
+        output_field=IntegerField(),
+    )
+
+
+def typeahead_clients(user, query, limit=TYPEAHEAD_LIMIT, include_admins=True):
+    """
+    Suggestions du sélecteur de client : ``[{'id', 'name', 'email'}]``, au plus
+    ``limit`` (borné à ``TYPEAHEAD_MAX_LIMIT``), les débuts de nom en premier.
+
+    Sans saisie, retourne les premiers clients par ordre alphabétique.
+    """
+    limit = max(1, min(limit, TYPEAHEAD_MAX_LIMIT))
+    terms = search_terms(query)
+    version = cache.get_or_set(_typeahead_version_key(user.pk), lambda: int(time.time()), timeout=None)
+    digest = hashlib.sha256(' '.join(terms).encode()).hexdigest()[:16]
+    key = f'clients:typeahead:{user.pk}:{version}:{int(include_admins)}:{limit}:{digest}'
+    items = cache.get(key)
+    if items is None:
+        queryset = search_clients(user, query, prefix=True, include_admins=include_admins)
+        if terms:
+            queryset = queryset.annotate(rank=_rank(terms[0])).order_by('rank', *ORDERING)
+        rows = queryset.values_list('id', 'first_name', 'last_name', 'email')[:limit]
+        items = [
+            {'id': pk, 'name': f'{first_name} {last_name}'.strip() or email, 'email': email}
+            for pk, first_name, last_name, email in rows
+        ]
+        cache.set(key, items, TYPEAHEAD_CACHE_TIMEOUT)
+    return items
@@ -0,0 +1,253 @@
+"""
+Évaluation en ombre d'un modèle candidat sur les prédictions réelles.
+
+Avant de remplacer ``gb_pipeline.joblib``, le modèle réentraîné
+(``SHADOW_MODEL['MODEL_PATH']``) est comparé à la production sans toucher
+aux réponses :
+
+- ``submit`` est appelée par ``calculate_insurance_premium`` après chaque
+  prédiction réussie ; une fraction ``SAMPLE_RATE`` des entrées est déposée
+  dans une file bornée (``put_nowait`` : jamais d'attente sur le chemin de la
+  requête, l'entrée est abandonnée si la file est pleine) ;
+- un thread d'arrière-plan par processus vide la file par lots, note chaque
+  lot en un appel au modèle candidat et cumule les écarts (candidat -
+  production) en mémoire, par jour et segment (fumeur, région, tranche d'âge) ;
+- toutes les ``FLUSH_INTERVAL`` secondes, les cumuls sont ajoutés aux lignes de
+  ``ShadowScore`` (incréments SQL) : les processus fusionnent en base.
+
+Un thread suffit : la prédiction par lot passe l'essentiel de son temps dans
+du code natif, et la file bornée protège la mémoire si le candidat prend du
+retard. Rapport : ``manage.py shadow_report``.
+"""
+import hashlib
+import queue
+import random
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db.models import F, FloatField, Max, Sum, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from ..constants import AGE_BAND_LABELS, AGE_BANDS
+from ..metrics import SHADOW_PREDICTIONS
+from ..models import ShadowScore
+from ..utils.aggregation import ProcessAggregator, add_to_row
+from ..utils.logging import log_error, log_info
+
+_queue = None
+_candidate = None  # (chemin, version, modèle)
+_pending = {}  # segment -> [count, sum_production, sum_delta, sum_abs_delta, sum_sq_delta, max_abs_delta]
+_next_flush = 0.0
+
+
+def _options():
+    return getattr(settings, 'SHADOW_MODEL', {})
+
+
+def is_enabled():
+    return bool(_options().get('MODEL_PATH'))
+
+
+def _reset():
+    global _queue
+    _queue = queue.Queue(maxsize=_options().get('QUEUE_SIZE', 1000))
+    _pending.clear()
+
+
+def _get_queue():
+    _process.ensure_process()
+    return _queue
+
+
+def submit(features, production_amount):
+    """
+    Échantillonne une entrée pour le modèle candidat (sans jamais bloquer).
+
+    Args:
+        features: Variables de la prédiction (age, sex, bmi, children, smoker, region)
+        production_amount: Prime calculée par le modèle de production
+
+    Returns:
+        bool: True si l'entrée a été mise en file
+    """
+    options = _options()
+    if not options.get('MODEL_PATH') or random.random() >= options.get('SAMPLE_RATE', 0):
+        return False
+    try:
+        _get_queue().put_nowait((dict(features), float(production_amount), timezone.localdate()))
+    except queue.Full:
+        SHADOW_PREDICTIONS.inc(outcome='dropped')
+        return False
+    SHADOW_PREDICTIONS.inc(outcome='queued')
+    if options.get('BACKGROUND', True):
+        _process.ensure_worker()
+    return True
+
+
+def _file_version(path):
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()[:12]
+
+
+def _load_candidate():
+    global _candidate
+    path = _options()['MODEL_PATH']
+    if _candidate is None or _candidate[0] != path:
+        _candidate = (path, _file_version(path), joblib.load(path))
+        log_info(_("Shadow model loaded from %(path)s") % {'path': path}, extra={'version': _candidate[1]})
+    return _candidate[1], _candidate[2]
+
+
+def score_batch(batch):
+    """Note un lot ``[(variables, prime de production, jour)]`` et cumule les écarts."""
+    from .prediction_service import model_version
+
+    try:
+        version, model = _load_candidate()
+        rows = pd.DataFrame([features for features, _amount, _day in batch])
+        candidate = model.predict(rows)
+    except Exception as e:
+        SHADOW_PREDICTIONS.inc(len(batch), outcome='error')
+        log_error(_("Shadow scoring failed: %(error)s") % {'error': e}, exc_info=True)
+        return
+    production = np.array([amount for _features, amount, _day in batch])
+    deltas = candidate - production
+    bands = np.digitize(rows['age'].to_numpy(dtype=np.int64), AGE_BANDS)
+    production_version = model_version()
+
+    with _process.lock:
+        for (features, amount, day), delta, band in zip(batch, deltas.tolist(), bands.tolist()):
+            key = (version, production_version, day, features['smoker'], features['region'], AGE_BAND_LABELS[band])
+            totals = _pending.setdefault(key, [0, 0.0, 0.0, 0.0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += amount
+            totals[2] += delta
+            totals[3] += abs(delta)
+            totals[4] += delta * delta
+            totals[5] = max(totals[5], abs(delta))
+    SHADOW_PREDICTIONS.inc(len(batch), outcome='scored')
+
+
+def _add_to_row(key, totals):
+    candidate_version, production_version, day, smoker, region, age_band = key
+    count, sum_production, sum_delta, sum_abs_delta, sum_sq_delta, max_abs_delta = totals
+    segment = dict(
+        candidate_version=candidate_version, production_version=production_version,
+        day=day, smoker=smoker, region=region, age_band=age_band,
+    )
+    changes = {
+        'count': F('count') + count,
+        'sum_production': F('sum_production') + sum_production,
+        'sum_delta': F('sum_delta') + sum_delta,
+        'sum_abs_delta': F('sum_abs_delta') + sum_abs_delta,
+        'sum_sq_delta': F('sum_sq_delta') + sum_sq_delta,
+        'max_abs_delta': Greatest('max_abs_delta', Value(max_abs_delta, output_field=FloatField())),
+        'updated_at': timezone.now(),
+    }
+    add_to_row(ShadowScore, segment, changes, dict(
+        count=count, sum_production=sum_production, sum_delta=sum_delta,
+        sum_abs_delta=sum_abs_delta, sum_sq_delta=sum_sq_delta, max_abs_delta=max_abs_delta,
+    ))
+
+
+def flush():
+    """Ajoute les cumuls en mémoire à ``ShadowScore`` ; retourne le nombre de segments écrits."""
+    global _next_flush, _pending
+    _next_flush = time.monotonic() + _options().get('FLUSH_INTERVAL', 30)
+    with _process.lock:
+        pending, _pending = _pending, {}
+    for key, totals in pending.items():
+        _add_to_row(key, totals)
+    return len(pending)
+
+
+def drain():
+    """Note tout ce qui est en file puis écrit les cumuls (tests, arrêt du processus)."""
+    batch_size = _options().get('BATCH_SIZE', 200)
+    batch = []
+    while True:
+        try:
+            batch.append(_get_queue().get_nowait())
+        except queue.Empty:
+            break
+        if len(batch) >= batch_size:
+            score_batch(batch)
+            batch = []
+    if batch:
+        score_batch(batch)
+    return flush()
+
+
+def _take_batch(timeout):
+    items = _get_queue()
+    try:
+        batch = [items.get(timeout=timeout)]
+    except queue.Empty:
+        return []
+    batch_size = _options().get('BATCH_SIZE', 200)
+    while len(batch) < batch_size:
+        try:
+            batch.append(items.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+
+def _run():
+    while True:
+        batch = _take_batch(timeout=max(0.0, _next_flush - time.monotonic()) or 1.0)
+        if batch:
+            score_batch(batch)
+        if time.monotonic() >= _next_flush and _pending:
+            _process.safe_flush(_("Shadow scores flush failed: %(error)s"))
+
+
+_process = ProcessAggregator('shadow-scoring', run=_run, reset=_reset, flush=flush, has_pending=lambda: bool(_pending))
+
+
+SEGMENTS = ('smoker', 'region', 'age_band')
+
+
+def shadow_report(by=('smoker',), candidate=None, since=None):
+    """
+    Écarts candidat - production agrégés par segment.
+
+    Args:
+        by: Colonnes de segmentation (parmi ``SEGMENTS`` ; vide : global)
+        candidate: Version du candidat (défaut : toutes)
+        since: Premier jour inclus (date)
+
+    Returns:
+        list: dicts {segment..., 'candidate_version', 'production_version',
+        'count', 'mean_production', 'mean_delta', 'mean_abs_delta',
+        'relative_delta' (%), 'rmse', 'max_abs_delta'}, par écart absolu moyen décroissant
+    """
+    rows = ShadowScore.objects.all()
+    if candidate:
+        rows = rows.filter(candidate_version=candidate)
+    if since:
+        rows = rows.filter(day__gte=since)
+    groups = ('candidate_version', 'production_version', *by)
+    report = []
+    for row in rows.values(*groups).annotate(
+        n=Sum('count'), production=Sum('sum_production'), delta=Sum('sum_delta'),
+        abs_delta=Sum('sum_abs_delta'), sq_delta=Sum('sum_sq_delta'), max_abs=Max('max_abs_delta'),
+    ).order_by(*groups):
+        n = row['n']
+        report.append({
+            **{name: row[name] for name in groups},
+            'count': n,
+            'mean_production': row['production'] / n,
+            'mean_delta': row['delta'] / n,
+            'mean_abs_delta': row['abs_delta'] / n,
+            'relative_delta': 100 * row['delta'] / row['production'] if row['production'] else 0.0,
+            'rmse': (row['sq_delta'] / n) ** 0.5,
+            'max_abs_delta': row['max_abs'],
+        })
+    report.sort(key=lambda line: line['mean_abs_delta'], reverse=True)
+    return report
@@ -0,0 +1,359 @@
+"""
+Instantané colonnaire des prédictions et des profils pour les statistiques.
+
+Les requêtes d'agrégation (répartition des primes par région, âge, fumeur…)
+ne tournent plus sur la table vivante ``insurance_web_prediction`` : une
+commande périodique recopie les colonnes utiles dans des fichiers binaires
+NumPy (un fichier par colonne, type fixe), que les vues ouvrent en
+``np.memmap`` et agrègent de façon vectorisée (``analytics_service``).
+
+Disposition de ``ANALYTICS['SNAPSHOT_DIR']`` ::
+
+    manifest.json                 tables, nombre de lignes, filigrane
+    predictions-<id>/<col>.bin    colonnes des prédictions (ajout incrémental)
+    profiles-<id>/<col>.bin       colonnes des profils (réécrites à chaque passage)
+
+Les prédictions sont ajoutées par filigrane sur ``created_at`` : chaque passage
+lit ``watermark < created_at <= maintenant - WATERMARK_LAG`` (le délai couvre
+les transactions encore ouvertes) et ajoute les lignes en fin de fichier. Le
+manifeste, réécrit atomiquement en dernier, fait foi : un lecteur ne lit que
+``rows`` lignes, et un passage interrompu est tronqué au passage suivant. Les
+suppressions de prédictions ne sont prises en compte qu'à la reconstruction
+complète (``full=True``). Les profils, modifiables et peu nombreux, sont
+relus à chaque passage dans un nouveau répertoire, abandonné s'il est
+identique au précédent.
+
+``build_id`` ne change que si le contenu change (lignes ajoutées, profils
+modifiés, reconstruction) : les statistiques mises en cache par ``build_id``
+restent valables entre deux passages sans nouveauté.
+
+Pas de dépendance à pyarrow : le format ``.bin`` + manifeste JSON suffit au
+memory-mapping et se relit avec ``numpy.fromfile`` depuis n'importe quel outil.
+"""
+import fcntl
+import filecmp
+import json
+import math
+import os
+import shutil
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from itertools import batched
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from ..constants import REGION_CHOICES, ROLE_CHOICES, SEX_CHOICES, SMOKER_CHOICES
+from ..models import Prediction, Profile
+
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+CHUNK_SIZE = 20000
+
+MISSING = -1  # valeur des entiers et catégories absents (NaN pour les flottants)
+
+
+@dataclass(frozen=True)
+class Column:
+    name: str
+    dtype: str
+    field: str
+    kind: str = 'int'  # 'int', 'float', 'datetime' (secondes epoch) ou 'category'
+    categories: tuple = ()
+
+    def encoder(self):
+        if self.kind == 'float':
+            return lambda v: math.nan if v is None else float(v)
+        if self.kind == 'datetime':
+            return lambda v: int(v.timestamp())
+        if self.kind == 'category':
+            codes = {value: code for code, value in enumerate(self.categories)}
+            return lambda v: codes.get(v, MISSING)
+        return lambda v: MISSING if v is None else v
+
+
+def _codes(choices):
+    return tuple(value for value, _label in choices)
+
+
+TABLES = {
+    'predictions': (Prediction, (
+        Column('id', 'int64', 'id'),
+        Column('created_at', 'int64', 'created_at', 'datetime'),
+        Column('amount', 'float64', 'predicted_amount', 'float'),
+        Column('user_id', 'int64', 'user_id'),
+        Column('created_by_id', 'int64', 'created_by_id'),
+        Column('age', 'int16', 'features__age'),
+        Column('sex', 'int8', 'features__sex', 'category', _codes(SEX_CHOICES)),
+        Column('bmi', 'float32', 'features__bmi', 'float'),
+        Column('children', 'int16', 'features__children'),
+        Column('smoker', 'int8', 'features__smoker', 'category', _codes(SMOKER_CHOICES)),
+        Column('region', 'int8', 'features__region', 'category', _codes(REGION_CHOICES)),
+    )),
+    'profiles': (Profile, (
+        Column('user_id', 'int64', 'user_id'),
+        Column('role', 'int8', 'role', 'category', _codes(ROLE_CHOICES)),
+        Column('age', 'int16', 'age'),
+        Column('sex', 'int8', 'sex', 'category', _codes(SEX_CHOICES)),
+        Column('bmi', 'float32', 'bmi', 'float'),
+        Column('children', 'int16', 'children'),
+        Column('smoker', 'int8', 'smoker', 'category', _codes(SMOKER_CHOICES)),
+        Column('region', 'int8', 'region', 'category', _codes(REGION_CHOICES)),
+    )),
+}
+
+
+def _options():
+    return getattr(settings, 'ANALYTICS', {})
+
+
+def snapshot_dir():
+    return _options().get('SNAPSHOT_DIR') or os.path.join(settings.CACHE_DIR, 'analytics')
+
+
+def _schema(columns):
+    return {c.name: {'dtype': c.dtype, 'categories': list(c.categories)} for c in columns}
+
+
+# --- Écriture -----------------------------------------------------------------
+
+def _to_arrays(rows, columns, encoders):
+    values = list(zip(*rows))
+    return [
+        np.fromiter(map(encode, column_values), dtype=column.dtype, count=len(rows))
+        for column, encode, column_values in zip(columns, encoders, values)
+    ]
+
+
+def _append_rows(directory, columns, queryset, chunk_size):
+    """Ajoute en fin de fichiers les lignes de ``queryset`` ; retourne le nombre de lignes."""
+    encoders = [column.encoder() for column in columns]
+    files = [open(os.path.join(directory, f'{column.name}.bin'), 'ab') for column in columns]
+    added = 0
+    try:
+        rows = queryset.values_list(*(c.field for c in columns)).iterator(chunk_size=chunk_size)
+        for chunk in batched(rows, chunk_size):
+            for f, array in zip(files, _to_arrays(chunk, columns, encoders)):
+                f.write(array.tobytes())
+            added += len(chunk)
+    finally:
+        for f in files:
+            f.close()
+    return added
+
+
+def _truncate(directory, columns, rows):
+    """Coupe les lignes écrites par un passage interrompu (au-delà du manifeste)."""
+    for column in columns:
+        path = os.path.join(directory, f'{column.name}.bin')
+        size = rows * np.dtype(column.dtype).itemsize
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        if os.path.getsize(path) != size:
+            os.truncate(path, size)
+
+
+def _same_table(root, old_dir, new_dir, columns):
+    """Vrai si les colonnes de ``new_dir`` sont identiques octet par octet à celles de ``old_dir``."""
+    names = [f'{column.name}.bin' for column in columns]
+    _match, mismatch, errors = filecmp.cmpfiles(
+        os.path.join(root, old_dir), os.path.join(root, new_dir), names, shallow=False
+    )
+    return not mismatch and not errors
+
+
+def _new_table_dir(root, table):
+    name = f'{table}-{uuid.uuid4().hex[:12]}'
+    os.makedirs(os.path.join(root, name))
+    return name
+
+
+def read_manifest(root=None):
+    try:
+        with open(os.path.join(root or snapshot_dir(), MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _write_manifest(root, manifest):
+    tmp = os.path.join(root, f'.{MANIFEST}.{os.getpid()}')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(root, MANIFEST))
+
+
+def _remove_stale_dirs(root, manifest):
+    keep = {table['dir'] for table in manifest['tables'].values()}
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if os.path.isdir(path) and name not in keep:
+            # Les lecteurs qui ont encore les fichiers en memmap ne sont pas gênés (inodes conservés)
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def _is_compatible(manifest):
+    return bool(manifest) and manifest.get('version') == FORMAT_VERSION and all(
+        name in manifest['tables'] and manifest['tables'][name]['columns'] == _schema(columns)
+        for name, (_model, columns) in TABLES.items()
+    )
+
+
+def refresh_snapshot(full=False, chunk_size=CHUNK_SIZE, now=None):
+    """
+    Met à jour l'instantané (ajout incrémental des prédictions, ou reconstruction).
+
+    Args:
+        full: Reconstruit tout (sinon : incrémental si l'instantané existe et
+            a le même schéma)
+        chunk_size: Lignes lues par aller-retour avec la base
+        now: Instant de référence (tests)
+
+    Returns:
+        dict: {'mode': 'full'|'incremental', 'changed', 'build_id',
+        'predictions': lignes ajoutées, 'total_predictions', 'profiles', 'seconds'}
+    """
+    start = time.perf_counter()
+    root = snapshot_dir()
+    os.makedirs(root, exist_ok=True)
+    lag = timedelta(seconds=_options().get('WATERMARK_LAG', 60))
+    upper = (now or timezone.now()) - lag
+
+    with open(os.path.join(root, '.lock'), 'w') as lock:
+        # Un seul rafraîchissement à la fois (scheduler + lancement manuel)
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        manifest = read_manifest(root)
+        incremental = not full and _is_compatible(manifest)
+
+        _model, columns = TABLES['predictions']
+        if incremental:
+            entry = manifest['tables']['predictions']
+            directory = os.path.join(root, entry['dir'])
+            try:
+                _truncate(directory, columns, entry['rows'])
+            except FileNotFoundError:
+                incremental = False
+        if incremental:
+            watermark = datetime.fromisoformat(manifest['watermark'])
+            queryset = Prediction.objects.filter(created_at__gt=watermark, created_at__lte=upper)
+            rows = entry['rows']
+            dir_name = entry['dir']
+        else:
+            dir_name = _new_table_dir(root, 'predictions')
+            directory = os.path.join(root, dir_name)
+            queryset = Prediction.objects.filter(created_at__lte=upper)
+            rows = 0
+        added = _append_rows(directory, columns, queryset.order_by('created_at', 'id'), chunk_size)
+        tables = {'predictions': {'dir': dir_name, 'rows': rows + added, 'columns': _schema(columns)}}
+
+        _model, columns = TABLES['profiles']
+        profiles_dir = _new_table_dir(root, 'profiles')
+        profiles = _append_rows(
+            os.path.join(root, profiles_dir), columns, Profile.objects.order_by('user_id'), chunk_size
+        )
+        changed = not incremental or added > 0
+        previous = manifest['tables']['profiles'] if incremental else None
+        if previous and previous['rows'] == profiles and _same_table(root, previous['dir'], profiles_dir, columns):
+            shutil.rmtree(os.path.join(root, profiles_dir), ignore_errors=True)
+            profiles_dir = previous['dir']
+        else:
+            changed = True
+        tables['profiles'] = {'dir': profiles_dir, 'rows': profiles, 'columns': _schema(columns)}
+
+        manifest = {
+            'version': FORMAT_VERSION,
+            'build_id': uuid.uuid4().hex if changed else manifest['build_id'],
+            'built_at': timezone.now().isoformat() if changed else manifest['built_at'],
+            'watermark': upper.isoformat(),
+            'tables': tables,
+        }
+        _write_manifest(root, manifest)
+        _remove_stale_dirs(root, manifest)
+
+    return {
+        'mode': 'incremental' if incremental else 'full',
+        'changed': changed,
+        'build_id': manifest['build_id'],
+        'predictions': added,
+        'total_predictions': tables['predictions']['rows'],
+        'profiles': profiles,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+# --- Lecture ------------------------------------------------------------------
+
+@dataclass
+class SnapshotTable:
+    rows: int
+    columns: dict
+    categories: dict = field(default_factory=dict)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+
+@dataclass
+class Snapshot:
+    build_id: str
+    built_at: datetime
+    watermark: datetime
+    tables: dict
+
+    def __getitem__(self, name):
+        return self.tables[name]
+
+
+def _map_column(path, dtype, rows):
+    if rows == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=(rows,))
+
+
+_loaded = None
+
+
+def load_snapshot():
+    """
+    Instantané courant, colonnes ouvertes en lecture seule par ``np.memmap``.
+
+    Réutilisé tant que le manifeste n'a pas changé ; None s'il n'existe pas encore.
+    """
+    global _loaded
+    root = snapshot_dir()
+    for _attempt in range(2):
+        manifest = read_manifest(root)
+        if manifest is None or manifest.get('version') != FORMAT_VERSION:
+            return None
+        if _loaded is not None and _loaded.build_id == manifest['build_id']:
+            return _loaded
+        try:
+            tables = {}
+            for name, entry in manifest['tables'].items():
+                directory = os.path.join(root, entry['dir'])
+                tables[name] = SnapshotTable(
+                    rows=entry['rows'],
+                    columns={
+                        column: _map_column(os.path.join(directory, f'{column}.bin'), spec['dtype'], entry['rows'])
+                        for column, spec in entry['columns'].items()
+                    },
+                    categories={
+                        column: spec['categories'] for column, spec in entry['columns'].items() if spec['categories']
+                    },
+                )
+        except FileNotFoundError:
+            # Répertoire supprimé par un rafraîchissement entre la lecture du manifeste et l'ouverture
+            continue
+        _loaded = Snapshot(
+            build_id=manifest['build_id'],
+            built_at=datetime.fromisoformat(manifest['built_at']),
+            watermark=datetime.fromisoformat(manifest['watermark']),
+            tables=tables,
+        )
+        return _loaded
+    return None
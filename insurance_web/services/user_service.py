@@ -7,12 +7,12 @@ def update_profile_from_form_data(profile, form_data):
             if hasattr(profile, key):
                 setattr(profile, key, value)
         except Exception as e:
-            log_error(f"Error updating profile from form data: {e}")
+            log_error("Error updating profile from form data: %s", e)
             continue
     try:
         profile.save()
     except Exception as e:
-        log_error(f"Error saving profile: {e}")
+        log_error("Error saving profile: %s", e)
         return None
     return profile
 
@@ -0,0 +1,108 @@
+"""
+Sessions : moteur hybride et purge des sessions expirées.
+
+``SESSION_MODE=hybrid`` (``SESSION_ENGINE = 'insurance_web.sessions'``) garde
+la session des visiteurs anonymes dans un cookie signé — aucune lecture ni
+écriture de ``django_session`` — et bascule en ``cached_db`` dès qu'un
+utilisateur est connecté. Le cookie est signé, pas chiffré : les parcours
+anonymes ne doivent rien y mettre de confidentiel.
+"""
+import time
+
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.contrib.sessions.backends.signed_cookies import SessionStore as SignedCookieStore
+from django.contrib.sessions.models import Session
+from django.db import transaction
+from django.utils import timezone
+
+
+def _is_signed(session_key):
+    # Les clés cached_db sont alphanumériques ; un cookie signé contient des ':'
+    return bool(session_key) and ':' in session_key
+
+
+class SessionStore(CachedDBStore):
+    """Cookie signé tant que la session est anonyme, cached_db ensuite."""
+
+    def load(self):
+        if _is_signed(self.session_key):
+            cookie = SignedCookieStore(self.session_key)
+            data = cookie.load()
+            if cookie.modified:
+                # Signature invalide ou cookie expiré
+                self._session_key = None
+            return data
+        return super().load()
+
+    async def aload(self):
+        if _is_signed(self.session_key):
+            return self.load()
+        return await super().aload()
+
+    def exists(self, session_key):
+        return not _is_signed(session_key) and super().exists(session_key)
+
+    def create(self):
+        if SESSION_KEY not in self._get_session(no_load=True):
+            self.modified = True
+            return
+        super().create()
+
+    def save(self, must_create=False):
+        data = self._get_session(no_load=must_create)
+        if SESSION_KEY not in data:
+            cookie = SignedCookieStore()
+            cookie._session_cache = data
+            cookie.save()
+            self._session_key = cookie.session_key
+            return
+        if _is_signed(self.session_key):
+            # Connexion : la session quitte le cookie pour la base
+            self._session_key = None
+            must_create = True
+        super().save(must_create=must_create)
+
+    def delete(self, session_key=None):
+        if _is_signed(session_key or self.session_key):
+            self._session_key = None
+            return
+        super().delete(session_key)
+
+
+def purge_expired_sessions(batch_size=1000, dry_run=False, now=None, pause=0):
+    """
+    Supprime les sessions expirées de ``django_session`` par lots bornés.
+
+    Chaque lot suit l'index ``expire_date`` et s'exécute dans sa propre
+    transaction courte, au lieu du DELETE unique de ``clearsessions``.
+
+    Args:
+        batch_size: Nombre maximum de sessions par lot
+        dry_run: Si True, compte seulement les sessions expirées
+        now: Date de référence (par défaut: maintenant)
+        pause: Pause en secondes entre deux lots
+
+    Returns:
+        dict: {'deleted': int, 'batches': int}
+    """
+    expired = Session.objects.filter(expire_date__lt=now or timezone.now())
+    stats = {'deleted': 0, 'batches': 0}
+
+    if dry_run:
+        stats['deleted'] = expired.count()
+        return stats
+
+    while True:
+        with transaction.atomic():
+            keys = list(expired.order_by('expire_date').values_list('session_key', flat=True)[:batch_size])
+            if not keys:
+                break
+            deleted, _ = Session.objects.filter(session_key__in=keys).delete()
+        stats['deleted'] += deleted
+        stats['batches'] += 1
+        if len(keys) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return stats
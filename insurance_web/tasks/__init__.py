@@ -0,0 +1,26 @@
+"""
+File de tâches de fond du projet, construite sur django.tasks.
+
+Le backend est choisi par le setting ``TASKS`` (voir backends.py) ; les
+tâches métier sont définies dans les modules ``*_tasks.py`` de ce package.
+"""
+from functools import partial
+
+from django.db import transaction
+
+
+def enqueue_on_commit(task, *args, **kwargs):
+    """
+    Met une tâche en file une fois la transaction courante validée.
+
+    Les backends du projet (``commit_safe``) gèrent eux-mêmes le commit : la
+    tâche est enregistrée immédiatement. Pour les autres (ImmediateBackend
+    en test, par exemple), l'appel est différé à ``transaction.on_commit``.
+    """
+    if getattr(task.get_backend(), 'commit_safe', False):
+        return task.enqueue(*args, **kwargs)
+    transaction.on_commit(partial(task.enqueue, *args, **kwargs))
+    return None
+
+
+__all__ = ['enqueue_on_commit']
@@ -0,0 +1,23 @@
+"""
+Emails liés aux comptes, envoyés hors de la commande ou de la requête.
+"""
+from django.contrib.auth.models import User
+from django.tasks import task
+from django.utils.translation import gettext as _
+
+from ..services.email_service import send_account_activation_email
+from ..utils.logging import log_info
+
+
+@task
+def send_account_activations(user_ids):
+    """Envoie l'email d'activation aux clients importés qui n'ont pas encore de mot de passe."""
+    sent = 0
+    for user in User.objects.filter(pk__in=user_ids, is_active=True).iterator():
+        if not user.has_usable_password() and send_account_activation_email(user):
+            sent += 1
+    log_info(
+        _("Account activation emails sent: %(sent)s of %(total)s") % {'sent': sent, 'total': len(user_ids)},
+        extra={'sent': sent, 'total': len(user_ids)}
+    )
+    return sent
@@ -0,0 +1,145 @@
+"""
+Effets de bord des changements d'état d'un rendez-vous (journalisation,
+notification, email), exécutés hors de la requête.
+
+Les arguments sont des identifiants (sérialisables en JSON) : le rendez-vous
+est relu au moment de l'exécution. Une erreur de notification lève une
+exception et la tâche est retentée ; un échec d'envoi d'email est seulement
+journalisé, pour ne pas dupliquer la notification lors d'un nouvel essai.
+"""
+from datetime import datetime
+
+from django.contrib.auth.models import User
+from django.tasks import task
+from django.utils.translation import gettext as _
+
+from ..models import Appointment
+from ..services.email_service import (
+    send_appointment_confirmation_email,
+    send_appointment_cancellation_email,
+    send_appointment_rescheduled_email,
+    send_appointment_request_email,
+)
+from ..services.notification_service import (
+    create_appointment_by_conseiller_notification,
+    create_appointment_request_notification,
+    create_appointment_response_notification,
+    create_notification,
+)
+from ..utils.logging import log_appointment, log_warning
+
+
+def _get_appointment(appointment_id):
+    try:
+        return Appointment.objects.select_related('conseiller', 'client').get(pk=appointment_id)
+    except Appointment.DoesNotExist:
+        log_warning(
+            _("Appointment %(id)s no longer exists, side effects skipped") % {'id': appointment_id},
+            extra={'appointment_id': appointment_id}
+        )
+        return None
+
+
+def _warn_email_not_sent(message, appointment, recipient):
+    log_warning(message, extra={'appointment_id': appointment.id, 'recipient_id': recipient.id})
+
+
+@task
+def appointment_created(appointment_id, created_by_conseiller=False):
+    """Notifie le client (rendez-vous créé par le conseiller) ou le conseiller (demande du client)."""
+    appointment = _get_appointment(appointment_id)
+    if appointment is None:
+        return
+    log_appointment(appointment, 'created')
+
+    if created_by_conseiller:
+        create_appointment_by_conseiller_notification(appointment)
+        if not send_appointment_confirmation_email(appointment, recipient=appointment.client):
+            _warn_email_not_sent(
+                _("Email confirmation not sent (recipient may not have email address)"),
+                appointment, appointment.client
+            )
+    else:
+        create_appointment_request_notification(appointment)
+        if not send_appointment_request_email(appointment, recipient=appointment.conseiller):
+            _warn_email_not_sent(
+                _("Email request not sent (recipient may not have email address)"),
+                appointment, appointment.conseiller
+            )
+
+
+@task
+def appointment_accepted(appointment_id):
+    appointment = _get_appointment(appointment_id)
+    if appointment is None:
+        return
+    log_appointment(appointment, 'accepted')
+    create_appointment_response_notification(appointment, 'accepted')
+    if not send_appointment_confirmation_email(appointment, recipient=appointment.client):
+        _warn_email_not_sent(_("Failed to send confirmation email"), appointment, appointment.client)
+
+
+@task
+def appointment_rejected(appointment_id, reason=None):
+    appointment = _get_appointment(appointment_id)
+    if appointment is None:
+        return
+    log_appointment(appointment, 'rejected')
+    create_appointment_response_notification(appointment, 'rejected', reason=reason)
+    if not send_appointment_cancellation_email(
+        appointment, cancelled_by=appointment.conseiller, recipient=appointment.client
+    ):
+        _warn_email_not_sent(_("Failed to send cancellation email"), appointment, appointment.client)
+
+
+@task
+def appointment_cancelled(appointment_id, cancelled_by_id):
+    """Prévient l'autre participant de l'annulation."""
+    appointment = _get_appointment(appointment_id)
+    if appointment is None:
+        return
+    log_appointment(appointment, 'cancelled')
+
+    user = User.objects.get(pk=cancelled_by_id)
+    other_user = appointment.client if user == appointment.conseiller else appointment.conseiller
+    message = _("The appointment with %(canceller)s on %(date)s has been cancelled.") % {
+        'canceller': user.get_full_name() or user.email,
+        'date': appointment.date_time.strftime('%d/%m/%Y à %H:%M'),
+    }
+    create_notification(
+        user=other_user,
+        notification_type='appointment_cancelled',
+        message=message,
+        appointment=appointment,
+    )
+    if not send_appointment_cancellation_email(appointment, cancelled_by=user, recipient=other_user):
+        _warn_email_not_sent(_("Failed to send cancellation email"), appointment, other_user)
+
+
+@task
+def appointment_rescheduled(appointment_id, rescheduled_by_id, old_date_time):
+    """Prévient l'autre participant du report ; ``old_date_time`` est une date ISO 8601."""
+    appointment = _get_appointment(appointment_id)
+    if appointment is None:
+        return
+    log_appointment(appointment, 'rescheduled')
+
+    user = User.objects.get(pk=rescheduled_by_id)
+    other_user = appointment.client if user == appointment.conseiller else appointment.conseiller
+    message = _("The appointment with %(name)s has been rescheduled to %(date)s.") % {
+        'name': user.get_full_name() or user.email,
+        'date': appointment.date_time.strftime('%d/%m/%Y à %H:%M'),
+    }
+    create_notification(
+        user=other_user,
+        notification_type='appointment_rescheduled',
+        message=message,
+        appointment=appointment,
+    )
+    if not send_appointment_rescheduled_email(
+        appointment,
+        rescheduled_by=user,
+        old_date_time=datetime.fromisoformat(old_date_time),
+        recipient=other_user
+    ):
+        _warn_email_not_sent(_("Failed to send rescheduled email"), appointment, other_user)
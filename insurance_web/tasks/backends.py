@@ -0,0 +1,191 @@
+"""
+Backends django.tasks du projet.
+
+- ``DatabaseBackend`` : file d'attente persistante (table QueuedTask) consommée
+  par ``manage.py run_tasks``.
+- ``InProcessBackend`` : exécuteur asynchrone dans le processus web (pool de
+  threads), sans worker séparé ; les tâches sont perdues si le processus s'arrête.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.exceptions import ValidationError
+from django.db import connections, transaction
+from django.tasks import TaskResult, TaskResultStatus
+from django.tasks.backends.base import BaseTaskBackend
+from django.tasks.base import TaskError
+from django.tasks.exceptions import TaskResultDoesNotExist
+from django.tasks.signals import task_enqueued, task_finished, task_started
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+from django.utils.json import normalize_json
+from django.utils.module_loading import import_string
+from django.utils.translation import gettext as _
+
+from ..models import QueuedTask
+from ..utils.logging import log_error, log_warning
+from .runner import call_task, is_retryable, retry_delay
+
+
+class DatabaseBackend(BaseTaskBackend):
+    """
+    Tâches stockées en base et exécutées par ``manage.py run_tasks``.
+
+    OPTIONS : ``MAX_ATTEMPTS`` (3), ``RETRY_BACKOFF`` en secondes (10),
+    ``STALE_AFTER`` en secondes avant de reprendre une tâche RUNNING abandonnée (600),
+    ``RECOVER_INTERVAL`` en secondes entre deux recherches de telles tâches (60).
+    """
+    supports_defer = True
+    supports_priority = True
+    supports_get_result = True
+
+    # L'INSERT appartient à la transaction en cours : la tâche n'est visible
+    # par le worker qu'après le commit, enqueue() peut donc être appelé directement.
+    commit_safe = True
+
+    def enqueue(self, task, args, kwargs):
+        self.validate_task(task)
+        row = QueuedTask.objects.create(
+            task_path=task.module_path,
+            queue_name=task.queue_name,
+            priority=task.priority,
+            args=normalize_json(args),
+            kwargs=normalize_json(kwargs),
+            run_after=task.run_after,
+            max_attempts=self.options.get('MAX_ATTEMPTS', 3),
+        )
+        task_result = self.to_task_result(row, task)
+        task_enqueued.send(type(self), task_result=task_result)
+        return task_result
+
+    def get_result(self, result_id):
+        try:
+            row = QueuedTask.objects.get(pk=result_id)
+        except (QueuedTask.DoesNotExist, ValidationError, ValueError):
+            raise TaskResultDoesNotExist(result_id)
+        return self.to_task_result(row)
+
+    def to_task_result(self, row, task=None):
+        """Construit le TaskResult django.tasks correspondant à une ligne QueuedTask."""
+        task = task or import_string(row.task_path)
+        errors = []
+        if row.last_error:
+            errors.append(TaskError(exception_class_path=row.exception_class_path, traceback=row.last_error))
+        result = TaskResult(
+            task=task,
+            id=str(row.id),
+            status=row.status,
+            enqueued_at=row.enqueued_at,
+            started_at=row.started_at,
+            last_attempted_at=row.last_attempted_at,
+            finished_at=row.finished_at,
+            args=row.args,
+            kwargs=row.kwargs,
+            backend=self.alias,
+            errors=errors,
+            worker_ids=[row.worker_id] * row.attempts,
+        )
+        object.__setattr__(result, '_return_value', row.return_value)
+        return result
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor(workers):
+    # task_backends crée une instance de backend par thread : le pool est partagé au niveau du module
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='inprocess-task')
+        return _executor
+
+
+class InProcessBackend(BaseTaskBackend):
+    """
+    Exécute les tâches dans un pool de threads du processus courant, après le commit.
+
+    OPTIONS : ``WORKERS`` (4), ``MAX_ATTEMPTS`` (3), ``RETRY_BACKOFF`` en secondes (1).
+    Un nouvel essai est replanifié par un minuteur (``threading.Timer``) : le
+    délai d'attente n'occupe pas de thread du pool.
+    """
+    supports_get_result = False
+
+    # La soumission au pool est elle-même différée à transaction.on_commit
+    commit_safe = True
+
+    def __init__(self, alias, params):
+        super().__init__(alias, params)
+        self.worker_id = get_random_string(32)
+
+    def enqueue(self, task, args, kwargs):
+        self.validate_task(task)
+        task_result = TaskResult(
+            task=task,
+            id=get_random_string(32),
+            status=TaskResultStatus.READY,
+            enqueued_at=timezone.now(),
+            started_at=None,
+            last_attempted_at=None,
+            finished_at=None,
+            args=args,
+            kwargs=kwargs,
+            backend=self.alias,
+            errors=[],
+            worker_ids=[],
+        )
+        executor = _get_executor(self.options.get('WORKERS', 4))
+        transaction.on_commit(lambda: executor.submit(self._execute, task_result))
+        task_enqueued.send(type(self), task_result=task_result)
+        return task_result
+
+    def _execute(self, task_result, attempt=1):
+        task = task_result.task
+        max_attempts = self.options.get('MAX_ATTEMPTS', 3)
+        if attempt == 1:
+            object.__setattr__(task_result, 'status', TaskResultStatus.RUNNING)
+            object.__setattr__(task_result, 'started_at', timezone.now())
+            task_started.send(type(self), task_result=task_result)
+        object.__setattr__(task_result, 'last_attempted_at', timezone.now())
+        task_result.worker_ids.append(self.worker_id)
+        try:
+            try:
+                value, _duration_ms = call_task(task, task_result.args, task_result.kwargs, task_result)
+            except Exception as e:
+                task_result.errors.append(TaskError(
+                    exception_class_path=f"{type(e).__module__}.{type(e).__qualname__}",
+                    traceback=str(e),
+                ))
+                if attempt < max_attempts and is_retryable(e):
+                    log_warning(
+                        _("Task %(task)s failed (attempt %(attempt)s/%(max)s), retrying") % {
+                            'task': task.module_path, 'attempt': attempt, 'max': max_attempts
+                        },
+                        extra={'task_id': task_result.id, 'error': str(e)}
+                    )
+                    self._schedule_retry(task_result, attempt + 1)
+                    return
+                log_error(
+                    _("Task %(task)s failed after %(attempts)s attempt(s)") % {
+                        'task': task.module_path, 'attempts': attempt
+                    },
+                    exc_info=True,
+                    extra={'task_id': task_result.id}
+                )
+                object.__setattr__(task_result, 'status', TaskResultStatus.FAILED)
+            else:
+                object.__setattr__(task_result, '_return_value', normalize_json(value))
+                object.__setattr__(task_result, 'status', TaskResultStatus.SUCCESSFUL)
+            object.__setattr__(task_result, 'finished_at', timezone.now())
+            task_finished.send(type(self), task_result=task_result)
+        finally:
+            connections.close_all()
+
+    def _schedule_retry(self, task_result, attempt):
+        """Resoumet la tâche au pool après le délai de backoff, sans bloquer de thread."""
+        delay = retry_delay(self.options.get('RETRY_BACKOFF', 1), attempt - 1).total_seconds()
+        executor = _get_executor(self.options.get('WORKERS', 4))
+        timer = threading.Timer(delay, executor.submit, args=(self._execute, task_result, attempt))
+        timer.daemon = True
+        timer.start()
@@ -0,0 +1,255 @@
+"""
+Exécution des tâches : mesure des durées, worker en base avec pool de threads.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import timedelta
+from traceback import format_exception
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import close_old_connections, connections
+from django.db.models import F, Q
+from django.tasks import TaskContext, TaskResultStatus, task_backends
+from django.tasks.signals import task_finished, task_started
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+from django.utils.json import normalize_json
+from django.utils.module_loading import import_string
+from django.utils.translation import gettext as _
+
+from ..metrics import TASK_DURATION
+from ..models import QueuedTask
+from ..utils.logging import log_error, log_info, log_warning
+
+
+class TaskMetrics:
+    """Agrégats de durée par tâche (nombre, échecs, total, max), partagés entre threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, name, duration_ms, succeeded):
+        with self._lock:
+            stats = self._stats.setdefault(name, {'count': 0, 'failures': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            stats['count'] += 1
+            stats['total_ms'] += duration_ms
+            stats['max_ms'] = max(stats['max_ms'], duration_ms)
+            if not succeeded:
+                stats['failures'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+task_metrics = TaskMetrics()
+
+
+def call_task(task, args, kwargs, task_result=None):
+    """
+    Exécute la fonction d'une tâche et enregistre sa durée dans ``task_metrics``
+    et dans l'histogramme Prometheus ``insurance_task_duration_seconds``.
+
+    Returns:
+        tuple: (valeur de retour, durée en millisecondes)
+    """
+    if task.takes_context:
+        args = [TaskContext(task_result=task_result), *args]
+    start = time.perf_counter()
+    try:
+        value = task.call(*args, **kwargs)
+    except Exception:
+        duration_ms = (time.perf_counter() - start) * 1000
+        task_metrics.record(task.module_path, duration_ms, succeeded=False)
+        TASK_DURATION.observe(duration_ms / 1000, task=task.module_path, outcome='failure')
+        raise
+    duration_ms = (time.perf_counter() - start) * 1000
+    task_metrics.record(task.module_path, duration_ms, succeeded=True)
+    TASK_DURATION.observe(duration_ms / 1000, task=task.module_path, outcome='success')
+    return value, duration_ms
+
+
+def is_retryable(error):
+    """
+    Un nouvel essai a-t-il une chance d'aboutir ? Non pour un objet disparu
+    (``User.DoesNotExist``, ``Appointment.DoesNotExist``…) : la tâche échoue
+    définitivement.
+    """
+    return not isinstance(error, ObjectDoesNotExist)
+
+
+def retry_delay(backoff, attempt):
+    """Délai avant la tentative suivante : backoff exponentiel (backoff, 2×backoff, 4×backoff…)."""
+    return timedelta(seconds=backoff * (2 ** max(attempt - 1, 0)))
+
+
+class TaskWorker:
+    """
+    Worker du backend en base : réserve les tâches prêtes et les exécute dans un pool de threads.
+
+    La réservation est un UPDATE conditionnel (``status=READY``) : plusieurs
+    workers peuvent tourner en parallèle sans exécuter deux fois la même tâche.
+    """
+
+    def __init__(self, queues=None, threads=4, poll_interval=1.0, backend='default'):
+        self.backend = task_backends[backend]
+        self.queues = list(queues or self.backend.queues)
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.worker_id = get_random_string(32)
+        self.backoff = self.backend.options.get('RETRY_BACKOFF', 10)
+        self.recover_interval = self.backend.options.get('RECOVER_INTERVAL', 60)
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def recover_stale_tasks(self, older_than=None):
+        """Remet en file les tâches RUNNING abandonnées par un worker arrêté brutalement."""
+        older_than = older_than or self.backend.options.get('STALE_AFTER', 600)
+        return QueuedTask.objects.filter(
+            status=TaskResultStatus.RUNNING,
+            queue_name__in=self.queues,
+            last_attempted_at__lt=timezone.now() - timedelta(seconds=older_than),
+        ).update(status=TaskResultStatus.READY)
+
+    def claim(self, limit):
+        """Réserve jusqu'à ``limit`` tâches prêtes et retourne leurs identifiants."""
+        now = timezone.now()
+        candidates = list(
+            QueuedTask.objects.filter(status=TaskResultStatus.READY, queue_name__in=self.queues)
+            .filter(Q(run_after__isnull=True) | Q(run_after__lte=now))
+            .order_by('-priority', 'enqueued_at')
+            .values_list('id', flat=True)[:limit]
+        )
+        claimed = []
+        for task_id in candidates:
+            updated = QueuedTask.objects.filter(pk=task_id, status=TaskResultStatus.READY).update(
+                status=TaskResultStatus.RUNNING,
+                worker_id=self.worker_id,
+                last_attempted_at=now,
+                attempts=F('attempts') + 1,
+            )
+            if updated:
+                claimed.append(task_id)
+        return claimed
+
+    def run_task(self, task_id):
+        """Exécute une tâche réservée et enregistre son résultat (succès, nouvel essai ou échec)."""
+        row = QueuedTask.objects.get(pk=task_id)
+        now = timezone.now()
+        if row.started_at is None:
+            row.started_at = now
+        task = None
+        try:
+            task = import_string(row.task_path)
+            task_result = self.backend.to_task_result(row, task)
+            task_started.send(sender=type(self.backend), task_result=task_result)
+            value, duration_ms = call_task(task, row.args, row.kwargs, task_result)
+        except Exception as e:
+            row.duration_ms = None
+            row.last_error = ''.join(format_exception(e))
+            row.exception_class_path = f"{type(e).__module__}.{type(e).__qualname__}"
+            if row.attempts < row.max_attempts and is_retryable(e):
+                row.status = TaskResultStatus.READY
+                row.run_after = timezone.now() + retry_delay(self.backoff, row.attempts)
+                log_warning(
+                    _("Task %(task)s failed (attempt %(attempt)s/%(max)s), retrying") % {
+                        'task': row.task_path, 'attempt': row.attempts, 'max': row.max_attempts
+                    },
+                    extra={'task_id': str(row.id), 'task_path': row.task_path, 'error': str(e)}
+                )
+            else:
+                row.status = TaskResultStatus.FAILED
+                row.finished_at = timezone.now()
+                log_error(
+                    _("Task %(task)s failed after %(attempts)s attempt(s)") % {
+                        'task': row.task_path, 'attempts': row.attempts
+                    },
+                    extra={'task_id': str(row.id), 'task_path': row.task_path, 'error': str(e)}
+                )
+        else:
+            row.status = TaskResultStatus.SUCCESSFUL
+            row.finished_at = timezone.now()
+            row.duration_ms = duration_ms
+            row.return_value = normalize_json(value)
+            row.last_error = ''
+        row.save(update_fields=[
+            'status', 'started_at', 'finished_at', 'run_after', 'duration_ms',
+            'return_value', 'last_error', 'exception_class_path',
+        ])
+        if row.status != TaskResultStatus.READY and task is not None:
+            task_finished.send(sender=type(self.backend), task_result=self.backend.to_task_result(row, task))
+        return row.status
+
+    def _run_in_thread(self, task_id):
+        try:
+            return self.run_task(task_id)
+        finally:
+            # Chaque thread du pool a sa propre connexion : la libérer après la tâche
+            connections.close_all()
+
+    def run(self, once=False, stats_interval=60):
+        """
+        Boucle principale.
+
+        Args:
+            once: Si True, s'arrête dès qu'il n'y a plus de tâche prête
+            stats_interval: Période (s) de journalisation des métriques de durée
+        """
+        self.recover_stale_tasks()
+        last_stats = last_recovery = time.monotonic()
+        in_flight = set()
+        with ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='task-worker') as pool:
+            while not self._stop.is_set():
+                close_old_connections()
+                free = self.threads - len(in_flight)
+                claimed = self.claim(free) if free else []
+                for task_id in claimed:
+                    in_flight.add(pool.submit(self._run_in_thread, task_id))
+
+                if not in_flight:
+                    if once:
+                        break
+                    self._stop.wait(self.poll_interval)
+                else:
+                    done, _pending = wait(in_flight, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        in_flight.discard(future)
+                        if future.exception():
+                            log_error(
+                                _("Task worker error: %(error)s") % {'error': future.exception()},
+                                extra={'worker_id': self.worker_id}
+                            )
+
+                # Tâches d'un autre worker arrêté brutalement pendant que celui-ci tourne
+                if time.monotonic() - last_recovery >= self.recover_interval:
+                    recovered = self.recover_stale_tasks()
+                    if recovered:
+                        log_warning(
+                            _("%(count)s stale task(s) requeued") % {'count': recovered},
+                            extra={'worker_id': self.worker_id}
+                        )
+                    last_recovery = time.monotonic()
+
+                if stats_interval and time.monotonic() - last_stats >= stats_interval:
+                    self.log_metrics()
+                    last_stats = time.monotonic()
+            wait(in_flight)
+        self.log_metrics()
+
+    def log_metrics(self):
+        for name, stats in sorted(task_metrics.snapshot().items()):
+            log_info(
+                _("Task %(task)s: %(count)s run(s), %(failures)s failure(s), avg %(avg).1f ms, max %(max).1f ms") % {
+                    'task': name, 'count': stats['count'], 'failures': stats['failures'],
+                    'avg': stats['total_ms'] / stats['count'], 'max': stats['max_ms'],
+                },
+                extra={'task_path': name, **stats}
+            )
@@ -0,0 +1,114 @@
+import os
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone, translation
+
+from insurance_web.models import Prediction
+from insurance_web.services import snapshot_service
+from insurance_web.services.analytics_service import get_snapshot_stats, warm_snapshot_stats
+from insurance_web.services.snapshot_service import load_snapshot, read_manifest, refresh_snapshot
+
+
+def _predict(user, amount, region='northeast', smoker='no', age=40):
+    return Prediction.objects.create(
+        user=user, created_by=user, predicted_amount=Decimal(amount),
+        age=age, sex='male', bmi=Decimal('25.00'), children=0, smoker=smoker, region=region,
+    )
+
+
+@pytest.mark.django_db
+class TestAnalyticsSnapshot:
+
+    @pytest.fixture(autouse=True)
+    def _snapshot_dir(self, settings, tmp_path):
+        settings.ANALYTICS = {'SNAPSHOT_DIR': str(tmp_path), 'WATERMARK_LAG': 0}
+        self.root = tmp_path
+        cache.clear()
+
+    def setup_method(self):
+        self.client_user = User.objects.create_user(username='jean', password='testpass123')
+
+    def test_incremental_refresh_appends_only_new_predictions(self):
+        _predict(self.client_user, '1000.00')
+        _predict(self.client_user, '3000.00', region='southwest', smoker='yes')
+        assert refresh_snapshot()['mode'] == 'full'
+
+        _predict(self.client_user, '2000.00')
+        stats = refresh_snapshot(now=timezone.now() + timedelta(seconds=1))
+        assert (stats['mode'], stats['predictions'], stats['total_predictions']) == ('incremental', 1, 3)
+
+        predictions = load_snapshot()['predictions']
+        assert isinstance(predictions['amount'], np.memmap)
+        assert predictions['amount'].tolist() == [1000.0, 3000.0, 2000.0]
+        assert len([name for name in os.listdir(self.root) if name.startswith('profiles-')]) == 1
+
+    def test_interrupted_refresh_is_truncated(self):
+        _predict(self.client_user, '1000.00')
+        refresh_snapshot()
+        entry = read_manifest()['tables']['predictions']
+        with open(self.root / entry['dir'] / 'amount.bin', 'ab') as f:
+            f.write(np.zeros(5).tobytes())
+
+        refresh_snapshot(now=timezone.now() + timedelta(seconds=1))
+        assert (self.root / entry['dir'] / 'amount.bin').stat().st_size == 8
+
+    def test_unchanged_refresh_keeps_build_id_and_warms_stats(self):
+        _predict(self.client_user, '1000.00')
+        build_id = refresh_snapshot()['build_id']
+        assert warm_snapshot_stats() == 2, "Une entrée par langue"
+
+        stats = refresh_snapshot(now=timezone.now() + timedelta(seconds=1))
+        assert not stats['changed'] and stats['build_id'] == build_id, "Rien de neuf : même build_id"
+        assert warm_snapshot_stats() == 0, "Statistiques déjà en cache pour ce build_id"
+        assert len([name for name in os.listdir(self.root) if name.startswith('profiles-')]) == 1
+
+        self.client_user.profile.age = 50
+        self.client_user.profile.save()
+        assert refresh_snapshot(now=timezone.now() + timedelta(seconds=2))['build_id'] != build_id
+
+    def test_full_rebuild_drops_deleted_predictions(self):
+        prediction = _predict(self.client_user, '1000.00')
+        refresh_snapshot()
+        prediction.delete()
+        assert refresh_snapshot(full=True)['total_predictions'] == 0
+
+    def test_stats_by_region_and_age(self):
+        for amount, region, age in (('1000.00', 'northeast', 30), ('3000.00', 'northeast', 30), ('8000.00', 'southwest', 70)):
+            _predict(self.client_user, amount, region=region, age=age)
+        refresh_snapshot()
+
+        with translation.override('en'):
+            stats = get_snapshot_stats()
+        assert stats['summary']['count'] == 3 and stats['summary']['percentiles']['p50'] == 3000.0
+        assert [(g['label'], g['count'], g['median']) for g in stats['by_region']] == [
+            ('Northeast', 2, 2000.0), ('Southwest', 1, 8000.0),
+        ]
+        assert [g['label'] for g in stats['by_age']] == ['25-34', '65+']
+        assert sum(b['count'] for b in stats['histogram']) == 3
+        assert stats['clients']['clients'] == 1
+
+    def test_admin_stats_view_reads_the_snapshot(self, monkeypatch, django_assert_max_num_queries):
+        admin = User.objects.create_user(username='admin', password='testpass123')
+        admin.profile.role = 'admin'
+        admin.profile.save()
+        client = Client()
+        client.force_login(admin)
+        with translation.override('fr'):
+            url = reverse('insurance_web:admin_stats')
+
+        assert 'refresh_analytics_snapshot' in client.get(url).content.decode()
+
+        _predict(self.client_user, '1234.00')
+        refresh_snapshot()
+        monkeypatch.setattr(snapshot_service, '_loaded', None)
+        with django_assert_max_num_queries(4):
+            response = client.get(url)
+        assert response.status_code == 200
+        assert response.context['stats']['summary']['count'] == 1
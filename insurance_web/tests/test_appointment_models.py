@@ -167,4 +167,58 @@ class TestAppointmentModel:
             duration_minutes=60,
             notes='Test appointment'
         )
-        assert appointment.date_time == expected_date_time, "La date et l'heure devrait être le bon"
\ No newline at end of file
+        assert appointment.date_time == expected_date_time, "La date et l'heure devrait être le bon"
+
+@pytest.mark.django_db
+class TestAdvisorClient:
+
+    def setup_method(self):
+        self.conseiller = User.objects.create_user(username='conseiller', password='testpass123')
+        self.client_user = User.objects.create_user(username='client', password='testpass123')
+        self.start = timezone.now()
+
+    def _link(self):
+        from insurance_web.models import AdvisorClient
+        return AdvisorClient.objects.filter(conseiller=self.conseiller, client=self.client_user).first()
+
+    def test_link_tracks_count_and_date_range(self):
+        Appointment.objects.create(conseiller=self.conseiller, client=self.client_user, date_time=self.start)
+        later = Appointment.objects.create(
+            conseiller=self.conseiller, client=self.client_user, date_time=self.start + timedelta(days=3)
+        )
+        Appointment.objects.create(
+            conseiller=self.conseiller, client=self.client_user, date_time=self.start - timedelta(days=1)
+        )
+        link = self._link()
+        assert link.appointment_count == 3, "Chaque rendez-vous devrait être compté"
+        assert link.first_appointment_at == self.start - timedelta(days=1)
+        assert link.last_appointment_at == self.start + timedelta(days=3)
+
+        later = Appointment.objects.get(pk=later.pk)
+        later.date_time = self.start + timedelta(days=10)
+        later.save()
+        assert self._link().last_appointment_at == self.start + timedelta(days=10), "Un report devrait être pris en compte"
+
+    def test_link_removed_with_last_appointment(self):
+        first = Appointment.objects.create(conseiller=self.conseiller, client=self.client_user, date_time=self.start)
+        second = Appointment.objects.create(
+            conseiller=self.conseiller, client=self.client_user, date_time=self.start + timedelta(days=1)
+        )
+        first.delete()
+        assert self._link().appointment_count == 1
+        second.delete()
+        assert self._link() is None, "Le lien devrait disparaître avec le dernier rendez-vous"
+
+    def test_reassigned_appointment_moves_the_link(self):
+        other = User.objects.create_user(username='autre', password='testpass123')
+        appointment = Appointment.objects.create(conseiller=self.conseiller, client=self.client_user, date_time=self.start)
+        appointment = Appointment.objects.get(pk=appointment.pk)
+        appointment.conseiller = other
+        appointment.save()
+        assert self._link() is None
+        assert other.advisor_clients.get().client == self.client_user
+
+    def test_deleting_a_user_deletes_its_links(self):
+        Appointment.objects.create(conseiller=self.conseiller, client=self.client_user, date_time=self.start)
+        self.client_user.delete()
+        assert not self.conseiller.advisor_clients.exists()
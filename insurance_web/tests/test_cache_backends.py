@@ -0,0 +1,74 @@
+import multiprocessing
+import time
+
+import pytest
+
+from insurance_web.cache_backends import SQLiteCache
+
+
+def _make_cache(path, **options):
+    return SQLiteCache(str(path), {'OPTIONS': options})
+
+
+def _increment(path, times):
+    cache = _make_cache(path)
+    for _ in range(times):
+        cache.incr('counter')
+
+
+class TestSQLiteCache:
+
+    @pytest.fixture(autouse=True)
+    def _cache(self, tmp_path):
+        self.path = tmp_path / 'cache.sqlite3'
+        self.cache = _make_cache(self.path)
+
+    def test_get_set_and_expiry(self):
+        self.cache.set('profil', {'age': 40}, timeout=60)
+        self.cache.set('court', 'x', timeout=0.05)
+        assert self.cache.get('profil') == {'age': 40}
+        assert self.cache.get_many(['profil', 'absent']) == {'profil': {'age': 40}}
+        time.sleep(0.1)
+        assert self.cache.get('court') is None
+        assert self.cache.add('court', 'y'), "add devrait remplacer une entrée expirée"
+        assert not self.cache.add('court', 'z')
+        assert self.cache.get('court') == 'y'
+
+    def test_versioned_keys(self):
+        self.cache.set('tarif', 100, version=1)
+        self.cache.set('tarif', 200, version=2)
+        assert self.cache.get('tarif', version=1) == 100
+        assert self.cache.incr_version('tarif', version=2) == 3
+        assert self.cache.get('tarif', version=3) == 200
+        assert self.cache.get('tarif', version=2) is None
+
+    def test_values_are_shared_between_instances(self):
+        other = _make_cache(self.path)
+        self.cache.set('partagé', [1, 2])
+        assert other.get('partagé') == [1, 2]
+        other.delete('partagé')
+        assert not self.cache.has_key('partagé')
+
+    def test_incr_is_atomic_across_processes(self):
+        self.cache.set('counter', 0)
+        workers = [
+            multiprocessing.get_context('fork').Process(target=_increment, args=(self.path, 200))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        assert self.cache.get('counter') == 800
+        with pytest.raises(ValueError):
+            self.cache.incr('absent')
+
+    def test_cull_evicts_least_recently_used(self):
+        cache = _make_cache(self.path, MAX_ENTRIES=10, CULL_FREQUENCY=2, CULL_EVERY=1, ACCESS_GRANULARITY=0)
+        cache.set('chaud', 1)
+        for i in range(10):
+            time.sleep(0.001)
+            cache.set(f'froid-{i}', i)
+            cache.get('chaud')
+        assert cache.get('chaud') == 1, "La clé lue en dernier devrait survivre à l'éviction"
+        assert cache.get('froid-0') is None
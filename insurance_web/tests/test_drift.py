@@ -0,0 +1,120 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone, translation
+
+from insurance_web.models import DriftHistogram
+from insurance_web.services import drift_service
+from insurance_web.services.prediction_service import calculate_insurance_premium
+
+
+def _profile(**overrides):
+    return {'age': 40, 'sex': 'male', 'bmi': 25.0, 'children': 0, 'smoker': 'no', 'region': 'northeast', **overrides}
+
+
+@pytest.mark.django_db
+class TestDriftMonitor:
+
+    @pytest.fixture(autouse=True)
+    def _drift_settings(self, settings, monkeypatch, tmp_path):
+        self.reference_path = str(tmp_path / 'drift_reference.json')
+        settings.DRIFT_MONITOR = {
+            'ENABLED': True, 'FLUSH_INTERVAL': 60, 'REFERENCE_PATH': self.reference_path, 'BACKGROUND': False,
+        }
+        # Compteurs neufs, sans cumul d'un test précédent
+        monkeypatch.setattr(drift_service._process, '_pid', None)
+
+    def test_buckets_clamp_and_catch_unknown_values(self):
+        age = drift_service.BUCKETS['age']
+        assert age.index(18) == 0 and age.index(22) == 0 and age.index(23) == 1
+        assert age.index(100) == age.size - 1, "Au-delà de la borne : dernier intervalle"
+        assert drift_service.BUCKETS['amount'].index(-5.0) == 0
+        assert drift_service.BUCKETS['children'].label(5) == '5+'
+        region = drift_service.BUCKETS['region']
+        assert region.label(region.index('atlantis')) == 'other'
+
+    def test_workers_merge_into_daily_rows(self):
+        calculate_insurance_premium(_profile(age=30))
+        calculate_insurance_premium(_profile(age=31, smoker='yes'))
+        assert drift_service.flush() > 0
+        # Second passage (autre worker ou intervalle suivant) : incréments des mêmes lignes
+        drift_service.observe(_profile(age=32), 12000.0)
+        drift_service.flush()
+
+        counts = drift_service.recorded_histograms()
+        assert sum(counts['amount']) == 3
+        assert counts['age'][drift_service.BUCKETS['age'].index(30)] == 3
+        assert counts['smoker'] == [2, 1, 0]
+        assert DriftHistogram.objects.filter(feature='age').count() == 1, "Une ligne par intervalle et par jour"
+        assert drift_service.flush() == 0, "Rien à écrire sans nouvelle observation"
+
+    def test_disabled_monitor_counts_nothing(self, settings):
+        settings.DRIFT_MONITOR = {**settings.DRIFT_MONITOR, 'ENABLED': False}
+        calculate_insurance_premium(_profile())
+        assert drift_service.flush() == 0
+
+    def test_psi(self):
+        assert drift_service.psi([10, 20, 30], [1, 2, 3]) == pytest.approx(0.0)
+        assert drift_service.psi([50, 50], [90, 10]) > drift_service.PSI_THRESHOLDS[1]
+        assert drift_service.psi([50, 50], [0, 0]) is None
+        assert drift_service.psi_status(0.05) == 'stable' and drift_service.psi_status(0.3) == 'significant'
+
+    def test_report_against_training_reference(self, tmp_path):
+        training = tmp_path / 'insurance.csv'
+        training.write_text(
+            'age,sex,bmi,children,smoker,region,charges\n'
+            + ''.join(f'{age},female,27.5,1,no,southeast,5000\n' for age in range(20, 60))
+        )
+        call_command('build_drift_reference', '--csv', str(training), stdout=StringIO())
+        reference = drift_service.load_reference()
+        assert reference['source'].startswith('training:')
+        assert sum(reference['features']['amount']) == 40
+
+        for age in (62, 63, 64):
+            drift_service.observe(_profile(age=age, smoker='yes'), 40000.0)
+        drift_service.flush()
+        report = {line['feature']: line for line in drift_service.drift_report()['features']}
+        assert report['smoker']['status'] == 'significant', "Que des fumeurs contre aucun à l'entraînement"
+        assert report['age']['psi'] > drift_service.PSI_THRESHOLDS[1]
+
+        out = StringIO()
+        call_command('drift_report', '--buckets', stdout=out)
+        assert 'significant' in out.getvalue() and 'training:' in out.getvalue()
+
+    def test_reference_from_production_period(self, monkeypatch):
+        localdate = timezone.localdate
+        yesterday = localdate() - timedelta(days=1)
+        monkeypatch.setattr(timezone, 'localdate', lambda: yesterday)
+        drift_service.observe(_profile(), 3000.0)
+        monkeypatch.setattr(timezone, 'localdate', localdate)
+        drift_service.observe(_profile(age=80), 30000.0)
+        assert drift_service.flush() == 2 * len(drift_service.BUCKETS), \
+            "Un seul vidage : chaque observation reste comptée à son jour"
+
+        call_command('build_drift_reference', '--days', '7', stdout=StringIO())
+        reference = drift_service.load_reference()
+        assert sum(reference['features']['age']) == 1, "Le jour en cours n'entre pas dans la référence"
+
+        report = {line['feature']: line for line in drift_service.drift_report(since=timezone.localdate())['features']}
+        assert report['age']['status'] == 'significant'
+        assert report['region']['psi'] == pytest.approx(0.0)
+
+    def test_admin_drift_view(self):
+        admin = User.objects.create_user(username='admin', password='testpass123')
+        admin.profile.role = 'admin'
+        admin.profile.save()
+        client = Client()
+        client.force_login(admin)
+        with translation.override('fr'):
+            url = reverse('insurance_web:admin_drift')
+
+        response = client.get(url, {'days': 30})
+        assert response.status_code == 200
+        assert response.context['days'] == 30
+        assert response.context['drift']['reference'] is None
+        assert 'build_drift_reference' in response.content.decode()
@@ -0,0 +1,104 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import AsyncClient, Client
+from django.urls import reverse
+from django.utils import timezone, translation
+
+from insurance_web.models import Appointment, Prediction
+
+
+def _export_url(kind):
+    with translation.override('fr'):
+        return reverse('insurance_web:export', args=[kind])
+
+
+def _user(username, role='user', **kwargs):
+    user = User.objects.create_user(username=username, email=f'{username}@example.com', password='testpass123', **kwargs)
+    if role != 'user':
+        user.profile.role = role
+        user.profile.save()
+    return user
+
+
+@pytest.mark.django_db
+class TestExport:
+
+    def setup_method(self):
+        self.conseiller = _user('marie', 'conseiller', first_name='Marie', last_name='Martin')
+        self.other = _user('paul', 'conseiller')
+        self.client_user = _user('jean', first_name='Jean', last_name='Dupont')
+        for creator, amount in ((self.conseiller, '1200.50'), (self.conseiller, '980.00'), (self.other, '1500.00')):
+            Prediction.objects.create(
+                user=self.client_user, created_by=creator, predicted_amount=Decimal(amount),
+                age=40, sex='male', bmi=Decimal('25.10'), children=1, smoker='no', region='northeast',
+            )
+        Appointment.objects.create(
+            conseiller=self.conseiller, client=self.client_user,
+            date_time=timezone.now() + timedelta(days=1), notes='Bilan, "annuel"\nà préparer',
+        )
+
+    def _client(self, user):
+        client = Client()
+        client.force_login(user)
+        return client
+
+    def _get(self, user, kind, **params):
+        return self._client(user).get(_export_url(kind), params)
+
+    def test_advisor_streams_only_own_predictions_as_csv(self, django_assert_max_num_queries):
+        client = self._client(self.conseiller)
+        with django_assert_max_num_queries(4):
+            response = client.get(_export_url('predictions'))
+            content = b''.join(response.streaming_content).decode()
+        assert response.streaming
+        assert response['Content-Disposition'] == 'attachment; filename="predictions.csv"'
+
+        rows = list(csv.DictReader(io.StringIO(content)))
+        assert [row['predicted_amount'] for row in rows] == ['1200.50', '980.00'], "Seules ses prédictions devraient être exportées"
+        assert rows[0]['client'] == 'Jean Dupont' and rows[0]['advisor'] == 'Marie Martin'
+
+    def test_gzip_jsonl_keeps_multiline_notes(self):
+        response = self._get(self.conseiller, 'appointments', format='jsonl', gzip='1')
+        assert response['Content-Type'] == 'application/gzip'
+
+        lines = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+        assert len(lines) == 1
+        assert json.loads(lines[0])['notes'] == 'Bilan, "annuel"\nà préparer'
+
+    def test_admin_exports_everything_and_clients_are_refused(self):
+        admin = _user('admin', 'admin')
+        content = b''.join(self._get(admin, 'predictions').streaming_content).decode()
+        assert len(content.splitlines()) == 4
+
+        assert self._get(self.client_user, 'predictions').status_code == 302
+        assert self._get(admin, 'users').status_code == 404
+
+    @pytest.mark.django_db(transaction=True)
+    def test_asgi_streams_asynchronously(self):
+        async def scenario():
+            client = AsyncClient()
+            await client.aforce_login(self.conseiller)
+            response = await client.get(_export_url('predictions'), {'gzip': '1'})
+            assert response.is_async, "Sous ASGI, le flux devrait être asynchrone"
+            return [chunk async for chunk in response.streaming_content]
+
+        chunks = asyncio.run(scenario())
+        rows = list(csv.DictReader(io.StringIO(gzip.decompress(b''.join(chunks)).decode())))
+        assert [row['predicted_amount'] for row in rows] == ['1200.50', '980.00']
+
+    def test_command_writes_gzip_file(self, tmp_path):
+        path = tmp_path / 'predictions.csv.gz'
+        call_command('export_history', 'predictions', '--gzip', '--advisor', str(self.other.pk),
+                     '-o', str(path), '--chunk-size', '1', stderr=io.StringIO())
+
+        rows = list(csv.DictReader(io.StringIO(gzip.decompress(path.read_bytes()).decode())))
+        assert [row['predicted_amount'] for row in rows] == ['1500.00']
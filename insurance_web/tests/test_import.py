@@ -0,0 +1,81 @@
+import io
+import json
+import re
+
+import pytest
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.test import Client
+
+from insurance_web.models import Profile
+from insurance_web.services import import_service
+from insurance_web.services.import_service import import_clients, read_client_rows
+
+CSV = """email,first_name,last_name,password,age,sex,height,weight,children,smoker,region
+jean@example.com,Jean,Dupont,motdepasse123,40,male,1.80,81,2,no,northeast
+Marie@Example.com,Marie,Martin,,35,female,,,0,yes,southwest
+jean@example.com,Jean,Doublon,x,41,male,,,0,no,northeast
+pas-un-email,X,Y,,30,male,,,0,no,northeast
+paul@example.com,Paul,Durand,,52,autre,,,0,no,northeast
+"""
+
+
+@pytest.mark.django_db
+class TestImportClients:
+
+    def test_csv_import_creates_users_and_profiles(self, django_assert_max_num_queries):
+        User.objects.create_user(username='jean', email='existant@example.com', password='x')
+
+        with django_assert_max_num_queries(8):
+            stats = import_clients(read_client_rows(io.StringIO(CSV)), chunk_size=100, hash_workers=2)
+
+        assert (stats['read'], stats['created'], stats['skipped'], stats['invalid']) == (5, 2, 1, 2)
+        jean = User.objects.get(email='jean@example.com')
+        assert jean.username == 'jean1', "Le username devrait éviter celui déjà pris"
+        assert jean.check_password('motdepasse123')
+        assert jean.profile.age == 40 and str(jean.profile.bmi) == '25.00'
+        marie = User.objects.get(email='marie@example.com')
+        assert not marie.has_usable_password()
+        assert Profile.objects.count() == User.objects.count()
+        assert stats['errors'][0][1] == 'pas-un-email'
+
+    def test_concurrent_signup_is_skipped_without_aborting(self, monkeypatch):
+        unique_usernames = import_service._unique_usernames
+        calls = []
+
+        def signup_during_import(emails):
+            if not calls:
+                # Inscription entre la vérification des emails et l'insertion
+                User.objects.create_user(username='marie', email='Marie@example.com', password='x')
+            calls.append(emails)
+            return unique_usernames(emails)
+
+        monkeypatch.setattr(import_service, '_unique_usernames', signup_during_import)
+        stats = import_clients(read_client_rows(io.StringIO(CSV)), chunk_size=100, hash_workers=0)
+
+        assert (stats['created'], stats['skipped']) == (1, 2), "Le client inscrit entre-temps est ignoré"
+        assert len(calls) == 2, "Le lot est retenté une fois"
+        assert User.objects.get(email='jean@example.com').username == 'jean'
+        assert User.objects.filter(email__iexact='marie@example.com').count() == 1
+
+    def test_non_numeric_age_is_rejected(self):
+        rows = [{'email': 'paul@example.com', 'age': 'quarante'}]
+        stats = import_clients(rows, hash_workers=0)
+        assert stats['invalid'] == 1 and not User.objects.filter(email='paul@example.com').exists()
+
+    def test_command_sends_activation_links(self, tmp_path, django_capture_on_commit_callbacks):
+        path = tmp_path / 'clients.jsonl'
+        path.write_text(json.dumps({'email': 'lea@example.com', 'first_name': 'Léa', 'password': 'ignoré'}) + '\n')
+        out = io.StringIO()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            call_command('import_clients', str(path), '--unusable-passwords', '--send-activation', stdout=out)
+        assert '1 client(s) créé(s)' in out.getvalue()
+        assert len(mail.outbox) == 1
+
+        link = re.search(r'https?://[^/\s]+(/\S+/account/activate/\S+/)', mail.outbox[0].body).group(1)
+        client = Client()
+        set_password_url = client.get(link)['Location']
+        client.post(set_password_url, {'new_password1': 'Nouveau-mdp-2024', 'new_password2': 'Nouveau-mdp-2024'})
+        assert User.objects.get(email='lea@example.com').check_password('Nouveau-mdp-2024')
@@ -0,0 +1,130 @@
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import time
+
+import pytest
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from datetime import timedelta
+from types import SimpleNamespace
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.test import Client, RequestFactory
+from django.utils import timezone
+
+from insurance_web.metrics import BOOKING_CONFLICTS, VIEW_DB_QUERIES, Counter, Histogram, MetricsRegistry, default_registry
+from insurance_web.middleware import MetricsMiddleware
+from insurance_web.models import Appointment
+from insurance_web.services.appointment_service import check_appointment_conflict
+
+
+def _counter_value(name, **labels):
+    counters, _histograms = default_registry.collect()
+    return counters.get((name, tuple(str(v) for v in labels.values())), 0)
+
+
+class TestMetricsRegistry:
+    def setup_method(self):
+        self.registry = MetricsRegistry()
+        self.requests = Counter('app_requests_total', 'Requests.', ['status'], registry=self.registry)
+        self.latency = Histogram('app_latency_seconds', 'Latency.', buckets=(0.1, 1.0), registry=self.registry)
+
+    def test_exposition_format(self):
+        self.requests.inc(status='200')
+        self.requests.inc(2, status='200')
+        self.latency.observe(0.05)
+        self.latency.observe(0.5)
+        self.latency.observe(3)
+
+        text = self.registry.render()
+        assert '# TYPE app_requests_total counter' in text
+        assert 'app_requests_total{status="200"} 3' in text
+        assert 'app_latency_seconds_bucket{le="0.1"} 1' in text
+        assert 'app_latency_seconds_bucket{le="1.0"} 2' in text
+        assert 'app_latency_seconds_bucket{le="+Inf"} 3' in text
+        assert 'app_latency_seconds_count 3' in text
+
+    def test_rejects_unknown_labels(self):
+        with pytest.raises(ValueError):
+            self.requests.inc(code='200')
+
+    def test_merges_files_of_other_processes(self, settings, tmp_path):
+        settings.METRICS = {'DIR': str(tmp_path), 'FLUSH_INTERVAL': 60}
+        self.requests.inc(status='200')
+        self.latency.observe(0.5)
+        other = {
+            'counters': [['app_requests_total', ['200'], 4], ['app_requests_total', ['500'], 1]],
+            'histograms': [['app_latency_seconds', [], [1, 0], 0.05, 1]],
+        }
+        (tmp_path / 'metrics-worker-1.json').write_text(json.dumps(other))
+
+        text = self.registry.render()
+        assert 'app_requests_total{status="200"} 5' in text
+        assert 'app_requests_total{status="500"} 1' in text
+        assert 'app_latency_seconds_count 2' in text
+        self.registry.flush()
+        assert len(list(tmp_path.glob(f'metrics-*-{os.getpid()}.json'))) == 1, \
+            "Le processus devrait écrire son fichier"
+
+    def test_skips_and_removes_files_of_dead_processes(self, settings, tmp_path):
+        settings.METRICS = {'DIR': str(tmp_path), 'FLUSH_INTERVAL': 5}
+        exited = subprocess.Popen(['true'])
+        exited.wait()
+        snapshot = {'counters': [['app_requests_total', ['200'], 7]], 'histograms': []}
+        dead = tmp_path / f'metrics-{socket.gethostname()}-{exited.pid}.json'
+        old = tmp_path / 'metrics-other-host-12.json'
+        for path in (dead, old):
+            path.write_text(json.dumps(snapshot))
+        os.utime(old, (time.time() - 3600, time.time() - 3600))
+
+        assert 'app_requests_total{status="200"}' not in self.registry.render(), \
+            "Les compteurs des processus arrêtés ne devraient plus être fusionnés"
+        assert not dead.exists() and not old.exists()
+
+
+@pytest.mark.django_db
+class TestMetricsInstrumentation:
+    def test_booking_conflict_is_counted(self):
+        conseiller = User.objects.create_user(username='conseiller', password='testpass123')
+        client = User.objects.create_user(username='client', password='testpass123')
+        date_time = timezone.now() + timedelta(days=2)
+        Appointment.objects.create(conseiller=conseiller, client=client, date_time=date_time)
+
+        before = _counter_value(BOOKING_CONFLICTS.name, reason='appointment')
+        has_conflict, _message = check_appointment_conflict(conseiller, date_time, 60)
+        assert has_conflict
+        assert _counter_value(BOOKING_CONFLICTS.name, reason='appointment') == before + 1
+
+    def test_metrics_endpoint(self):
+        client = Client()
+        client.get('/fr/')
+        response = client.get('/metrics')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+        body = response.content.decode()
+        assert 'insurance_view_db_queries_bucket{view="insurance_web:home"' in body
+
+    @pytest.mark.django_db(transaction=True)
+    def test_middleware_counts_queries_under_asgi(self):
+        async def view(request):
+            await sync_to_async(User.objects.count)()
+            await sync_to_async(User.objects.exists)()
+            return HttpResponse()
+
+        middleware = MetricsMiddleware(view)
+        assert iscoroutinefunction(middleware), "Le middleware devrait rester asynchrone sous ASGI"
+        request = RequestFactory().get('/')
+        request.resolver_match = SimpleNamespace(view_name='tests:async')
+        asyncio.run(middleware(request))
+
+        _counters, histograms = default_registry.collect()
+        _buckets, total, count = histograms[(VIEW_DB_QUERIES.name, ('tests:async',))]
+        assert count >= 1 and total / count == 2, "Les deux requêtes SQL de la vue devraient être comptées"
+
+    def test_metrics_endpoint_requires_token(self, settings):
+        settings.METRICS = {**settings.METRICS, 'TOKEN': 'secret'}
+        client = Client()
+        assert client.get('/metrics').status_code == 403
+        assert client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').status_code == 200
@@ -0,0 +1,179 @@
+import pytest
+from io import StringIO
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+from insurance_web.models import Notification, NotificationArchive
+from insurance_web.services.notification_service import (
+    create_notification,
+    get_unread_notifications_count,
+    mark_notification_as_read,
+    mark_all_notifications_as_read,
+    prune_expired_notifications,
+)
+from insurance_web.services.appointment_service import create_appointment
+from insurance_web.services.email_service import send_notification_digests
+
+
+RETENTION = {'default': 180, 'appointment_reminder': 7}
+
+
+class FlakyBackend(EmailBackend):
+    """Backend en mémoire qui échoue sur le deuxième message, comme une session SMTP coupée."""
+    calls = opens = 0
+
+    def open(self):
+        FlakyBackend.opens += 1
+
+    def send_messages(self, messages):
+        FlakyBackend.calls += 1
+        if FlakyBackend.calls == 2:
+            raise OSError('connection reset')
+        return super().send_messages(messages)
+
+
+@pytest.mark.django_db
+class TestNotificationReadState:
+    def setup_method(self):
+        self.user = User.objects.create_user(username='notifuser', email='notif@example.com', password='testpass123')
+
+    def test_mark_as_read_keeps_row(self):
+        notification = create_notification(self.user, 'appointment_request', 'Demande')
+
+        assert mark_notification_as_read(notification.id, self.user) is True
+        notification.refresh_from_db()
+        assert notification.read and notification.read_at is not None, \
+            "La notification devrait être conservée et marquée comme lue"
+        assert get_unread_notifications_count(self.user) == 0
+        assert mark_notification_as_read(notification.id, self.user) is False, \
+            "Une notification déjà lue ne devrait pas être modifiée à nouveau"
+
+    def test_mark_all_as_read_returns_count(self):
+        for i in range(3):
+            create_notification(self.user, 'appointment_request', f'Demande {i}')
+
+        assert mark_all_notifications_as_read(self.user) == 3
+        assert Notification.objects.filter(user=self.user).count() == 3
+        assert get_unread_notifications_count(self.user) == 0
+
+
+@pytest.mark.django_db
+class TestNotificationRetention:
+    @pytest.fixture(autouse=True)
+    def retention_settings(self, settings):
+        settings.NOTIFICATION_RETENTION_DAYS = RETENTION
+        settings.NOTIFICATION_READ_RETENTION_DAYS = 30
+
+    def setup_method(self):
+        self.user = User.objects.create_user(username='retention', email='retention@example.com', password='testpass123')
+        now = timezone.now()
+        self.fresh = self._notification('appointment_request', now - timedelta(days=1))
+        self.old_reminder = self._notification('appointment_reminder', now - timedelta(days=10))
+        self.old_request = self._notification('appointment_request', now - timedelta(days=200))
+        self.read_long_ago = self._notification('appointment_request', now - timedelta(days=60), read_at=now - timedelta(days=40))
+
+    def _notification(self, notification_type, created_at, read_at=None):
+        notification = Notification.objects.create(
+            user=self.user, type=notification_type, message='Message',
+            read=read_at is not None, read_at=read_at,
+        )
+        Notification.objects.filter(pk=notification.pk).update(created_at=created_at)
+        return notification
+
+    def test_prune_uses_per_type_ttl_and_read_ttl(self):
+        stats = prune_expired_notifications(batch_size=1)
+
+        assert stats['deleted'] == 3 and stats['batches'] == 3, \
+            "Chaque notification expirée devrait être supprimée dans un lot borné"
+        assert list(Notification.objects.values_list('id', flat=True)) == [self.fresh.id]
+
+    def test_prune_archive_and_dry_run(self):
+        assert prune_expired_notifications(dry_run=True)['deleted'] == 3
+        assert Notification.objects.count() == 4, "Le mode dry-run ne devrait rien supprimer"
+
+        call_command('prune_notifications', '--archive', '--batch-size', '2', stdout=StringIO())
+
+        assert Notification.objects.count() == 1
+        archived_ids = set(NotificationArchive.objects.values_list('notification_id', flat=True))
+        assert archived_ids == {self.old_reminder.id, self.old_request.id, self.read_long_ago.id}
+
+
+@pytest.mark.django_db
+class TestNotificationDigest:
+    def setup_method(self):
+        self.conseiller = User.objects.create_user(username='digestcons', email='digest@example.com', password='testpass123')
+        self.conseiller.profile.role = 'conseiller'
+        self.conseiller.profile.email_delivery = 'digest'
+        self.conseiller.profile.digest_interval_minutes = 15
+        self.conseiller.profile.save()
+        self.clients = [
+            User.objects.create_user(username=f'digestclient{i}', email=f'digestclient{i}@example.com', password='testpass123')
+            for i in range(3)
+        ]
+
+    @pytest.fixture(autouse=True)
+    def run_tasks_on_commit(self, django_capture_on_commit_callbacks):
+        # Les notifications et emails sont envoyés par une tâche mise en file au commit
+        self.capture = lambda: django_capture_on_commit_callbacks(execute=True)
+
+    def _book(self, client, days):
+        with self.capture():
+            return create_appointment(self.conseiller, client, timezone.now() + timedelta(days=days), 60)
+
+    def test_requests_are_grouped_in_one_email(self):
+        for i, client in enumerate(self.clients):
+            self._book(client, i + 1)
+        assert len(mail.outbox) == 0, "Aucun email immédiat ne devrait partir en mode digest"
+        assert Notification.objects.filter(user=self.conseiller, email_pending=True).count() == 3
+
+        stats = send_notification_digests()
+
+        assert stats == {'emails': 1, 'notifications': 3, 'failed': 0}
+        assert len(mail.outbox) == 1 and mail.outbox[0].to == ['digest@example.com']
+        assert not Notification.objects.filter(email_pending=True).exists()
+        self.conseiller.profile.refresh_from_db()
+        assert self.conseiller.profile.next_digest_at is not None
+
+    def test_window_delays_next_digest(self):
+        self._book(self.clients[0], 1)
+        now = timezone.now()
+        send_notification_digests(now=now)
+        self._book(self.clients[1], 2)
+
+        assert send_notification_digests(now=now + timedelta(minutes=5))['emails'] == 0, \
+            "Le digest suivant devrait attendre la fin de la fenêtre"
+        assert send_notification_digests(now=now + timedelta(minutes=16))['emails'] == 1
+        assert len(mail.outbox) == 2
+
+    def test_immediate_mode_unchanged(self):
+        self.conseiller.profile.email_delivery = 'immediate'
+        self.conseiller.profile.save()
+        self._book(self.clients[0], 1)
+
+        assert len(mail.outbox) == 1, "Le mode immédiat devrait envoyer un email par demande"
+        assert not Notification.objects.filter(email_pending=True).exists()
+        assert send_notification_digests()['emails'] == 0
+
+    def test_failed_digest_does_not_resend_delivered_ones(self, settings):
+        settings.EMAIL_BACKEND = f'{__name__}.FlakyBackend'
+        FlakyBackend.calls = FlakyBackend.opens = 0
+        for client in self.clients:
+            client.profile.email_delivery = 'digest'
+            client.profile.save()
+            create_notification(client, 'appointment_accepted', 'Confirmé')
+        create_notification(self.clients[0], 'appointment_reminder', 'Rappel')
+
+        stats = send_notification_digests()
+
+        assert stats == {'emails': 2, 'notifications': 2, 'failed': 1}
+        assert FlakyBackend.opens == 2, "La connexion devrait être rouverte après l'erreur"
+        pending = Notification.objects.filter(email_pending=True)
+        assert [n.user for n in pending] == [self.clients[1]], "Seul le digest en échec reste en attente"
+        assert not Notification.objects.get(type='appointment_reminder').email_pending, \
+            "Un type sans email ne devrait pas entrer dans les digests"
+        send_notification_digests()
+        assert len(mail.outbox) == 3, "Les digests déjà envoyés ne devraient pas repartir"
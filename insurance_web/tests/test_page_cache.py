@@ -0,0 +1,118 @@
+import re
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import Client, RequestFactory
+from django.urls import reverse
+from django.utils import translation
+
+from insurance_web.utils import page_cache
+
+
+def _url(name, language='fr'):
+    with translation.override(language):
+        return reverse(f'insurance_web:{name}')
+
+
+def _csrf_token(response):
+    return re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', response.content.decode()).group(1)
+
+
+@pytest.mark.django_db
+class TestAnonymousPageCache:
+
+    @pytest.fixture(autouse=True)
+    def _enable_page_cache(self, settings):
+        settings.PAGE_CACHE = {'ENABLED': True, 'TIMEOUT': 60, 'CACHE': 'default'}
+        cache.clear()
+
+    def test_cached_page_gets_a_fresh_csrf_token(self, monkeypatch):
+        User.objects.create_user(username='client', email='client@example.com', password='testpass123')
+        Client().get(_url('login'))
+
+        def fail(*args, **kwargs):
+            raise AssertionError("La page devrait être servie depuis le cache")
+        monkeypatch.setattr(page_cache, '_store', fail)
+
+        client = Client(enforce_csrf_checks=True)
+        response = client.get(_url('login'))
+        assert response.status_code == 200
+        assert page_cache.CSRF_PLACEHOLDER not in response.content.decode()
+        assert 'Cookie' in response['Vary'] and 'Accept-Language' in response['Vary']
+        assert 'private' in response['Cache-Control']
+
+        response = client.post(_url('login'), {
+            'username': 'client@example.com',
+            'password': 'testpass123',
+            'csrfmiddlewaretoken': _csrf_token(response),
+        })
+        assert response.status_code == 302, "Le jeton inséré dans la page en cache devrait être accepté"
+
+    def test_pages_are_keyed_by_language(self):
+        Client().get(_url('signup', 'fr'))
+        english = Client().get(_url('signup', 'en'))
+        assert english['Content-Language'] == 'en'
+
+    def test_only_declared_query_params_are_keyed(self, monkeypatch):
+        Client().get(_url('signup') + '?utm_source=a')
+
+        def fail(*args, **kwargs):
+            raise AssertionError("Un paramètre ignoré ne devrait pas créer une nouvelle entrée")
+        monkeypatch.setattr(page_cache, '_store', fail)
+        assert Client().get(_url('signup') + '?utm_source=b').status_code == 200
+
+        factory = RequestFactory()
+        first = page_cache._page_key(factory.get('/page/', {'page': '1', 'x': '1'}), ('page',))
+        assert first == page_cache._page_key(factory.get('/page/', {'page': '1', 'x': '2'}), ('page',))
+        assert first != page_cache._page_key(factory.get('/page/', {'page': '2'}), ('page',)), \
+            "Un paramètre déclaré devrait distinguer les entrées"
+
+    def test_authenticated_users_bypass_the_cache(self):
+        Client().get(_url('home'))
+        User.objects.create_user(username='client', password='testpass123')
+        client = Client()
+        client.login(username='client', password='testpass123')
+        response = client.get(_url('home'))
+        assert 'client/dashboard.html' in [t.name for t in response.templates]
+
+    def test_role_change_invalidates_pages(self):
+        user = User.objects.create_user(username='futur', password='testpass123')
+        generation = page_cache.get_generation()
+        user.profile.children = 2
+        user.profile.save()
+        assert page_cache.get_generation() == generation, "Une modification sans changement de rôle ne devrait rien invalider"
+
+        user.profile.role = 'conseiller'
+        user.profile.save()
+        assert page_cache.get_generation() == generation + 1
+
+    def test_advisor_rename_invalidates_pages(self):
+        conseiller = User.objects.create_user(username='marie', first_name='Marie', password='testpass123')
+        conseiller.profile.role = 'conseiller'
+        conseiller.profile.save()
+        client = User.objects.create_user(username='client', password='testpass123')
+        generation = page_cache.get_generation()
+
+        client.first_name = 'Jean'
+        client.save()
+        conseiller.last_login = conseiller.date_joined
+        conseiller.save(update_fields=['last_login'])
+        User.objects.get(pk=conseiller.pk).save()
+        assert page_cache.get_generation() == generation, "Seuls le nom et l'email d'un conseiller comptent"
+
+        conseiller = User.objects.get(pk=conseiller.pk)
+        conseiller.email = 'marie.martin@example.com'
+        conseiller.save()
+        assert page_cache.get_generation() == generation + 1
+
+    def test_new_conseiller_appears_in_cached_list(self):
+        User.objects.create_user(username='client', password='testpass123')
+        client = Client()
+        client.login(username='client', password='testpass123')
+        assert 'Marie' not in client.get(_url('conseillers_list')).content.decode()
+
+        conseiller = User.objects.create_user(username='marie', first_name='Marie', password='testpass123')
+        conseiller.profile.role = 'conseiller'
+        conseiller.profile.save()
+        assert 'Marie' in client.get(_url('conseillers_list')).content.decode()
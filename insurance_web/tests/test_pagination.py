@@ -0,0 +1,107 @@
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone, translation
+
+from insurance_web.models import Appointment, Notification, Prediction
+from insurance_web.utils.pagination import InvalidCursor, paginate_keyset
+
+
+def _url(name, **kwargs):
+    with translation.override('fr'):
+        return reverse(f'insurance_web:{name}', kwargs=kwargs)
+
+
+def _prediction(user, created_at):
+    prediction = Prediction.objects.create(user=user, created_by=user, predicted_amount=Decimal('1000.00'))
+    Prediction.objects.filter(pk=prediction.pk).update(created_at=created_at)
+    return prediction
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    def setup_method(self):
+        self.user = User.objects.create_user(username='keyset', email='keyset@example.com', password='testpass123')
+        now = timezone.now()
+        # Plusieurs lignes partagent le même created_at : l'id départage
+        self.predictions = [_prediction(self.user, now - timedelta(minutes=i // 3)) for i in range(11)]
+
+    def test_walks_all_rows_without_duplicates(self):
+        queryset = Prediction.objects.filter(user=self.user)
+        seen, cursor, pages = [], None, 0
+        while True:
+            page = paginate_keyset(queryset, cursor=cursor, per_page=4)
+            seen.extend(p.id for p in page)
+            pages += 1
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+
+        expected = list(queryset.order_by('-created_at', '-id').values_list('id', flat=True))
+        assert seen == expected, "Chaque prédiction devrait apparaître une seule fois, dans l'ordre"
+        assert pages == 3
+
+    def test_ascending_keys_and_invalid_cursor(self):
+        queryset = Prediction.objects.filter(user=self.user)
+        first = paginate_keyset(queryset, ('created_at', 'id'), per_page=5)
+        second = paginate_keyset(queryset, ('created_at', 'id'), first.next_cursor, per_page=5)
+        assert first[-1].created_at <= second[0].created_at
+        assert first.is_first and not second.is_first
+
+        with pytest.raises(InvalidCursor):
+            paginate_keyset(queryset, cursor='pas-un-curseur')
+
+    def test_profile_load_more_endpoint(self):
+        client = Client()
+        client.login(username='keyset', password='testpass123')
+
+        data = client.get(_url('profile_predictions_more')).json()
+        assert len(data['items']) == 10 and data['next_cursor']
+        data = client.get(_url('profile_predictions_more'), {'cursor': data['next_cursor']}).json()
+        assert len(data['items']) == 1 and data['next_cursor'] is None
+
+        response = client.get(_url('profile_predictions_more'), {'cursor': '!!!'})
+        assert response.status_code == 400, "Un curseur invalide devrait renvoyer une erreur 400"
+
+    def test_profile_view_ignores_invalid_cursor(self):
+        client = Client()
+        client.login(username='keyset', password='testpass123')
+        response = client.get(_url('profile'), {'cursor': '!!!'})
+        assert response.status_code == 200
+        assert len(response.context['predictions']) == 10
+
+
+@pytest.mark.django_db
+class TestLoadMoreViews:
+    def setup_method(self):
+        self.user = User.objects.create_user(username='client', email='client@example.com', password='testpass123')
+        self.conseiller = User.objects.create_user(username='conseiller', email='cons@example.com', password='testpass123')
+        self.client = Client()
+        self.client.login(username='client', password='testpass123')
+
+    def test_my_appointments_sections_have_own_cursor(self):
+        now = timezone.now()
+        for i in range(25):
+            Appointment.objects.create(conseiller=self.conseiller, client=self.user, date_time=now + timedelta(days=i + 1))
+        Appointment.objects.create(conseiller=self.conseiller, client=self.user, date_time=now - timedelta(days=1))
+
+        response = self.client.get(_url('my_appointments'))
+        upcoming = response.context['upcoming_appointments']
+        assert len(upcoming) == 20 and upcoming.has_next
+        assert len(response.context['past_appointments']) == 1
+
+        data = self.client.get(
+            _url('my_appointments_more', section='upcoming'), {'cursor': upcoming.next_cursor}
+        ).json()
+        assert len(data['items']) == 5 and data['next_cursor'] is None
+        assert data['items'][0]['date_time'] > upcoming[19].date_time.isoformat()
+
+    def test_notifications_load_more_respects_unread_filter(self):
+        for i in range(3):
+            Notification.objects.create(user=self.user, type='appointment_request', message=f'N{i}', read=i == 0)
+
+        data = self.client.get(_url('notifications_more'), {'unread': 'true'}).json()
+        assert [item['message'] for item in data['items']] == ['N2', 'N1']
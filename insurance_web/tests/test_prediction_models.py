@@ -41,13 +41,13 @@ class TestPredictionModel:
         assert isinstance(prediction.predicted_amount, Decimal), "predicted_amount devrait être un Decimal"
         assert prediction.predicted_amount == Decimal('1000.50'), "Le montant prédit devrait être le bon"
         
-        assert prediction.age == 30, "L'âge devrait être le bon"
-        assert prediction.sex == 'male', "Le sexe devrait être le bon"
-        assert isinstance(prediction.bmi, Decimal), "bmi devrait être un Decimal"
-        assert prediction.bmi == Decimal('25.75'), "Le BMI devrait être le bon"
-        assert prediction.children == 0, "Le nombre d'enfants devrait être le bon"
-        assert prediction.smoker == 'no', "Le statut fumeur/non-fumeur devrait être le bon"
-        assert prediction.region == 'northwest', "La région devrait être le bon"
+        assert prediction.features.age == 30, "L'âge devrait être le bon"
+        assert prediction.features.sex == 'male', "Le sexe devrait être le bon"
+        assert isinstance(prediction.features.bmi, Decimal), "bmi devrait être un Decimal"
+        assert prediction.features.bmi == Decimal('25.75'), "Le BMI devrait être le bon"
+        assert prediction.features.children == 0, "Le nombre d'enfants devrait être le bon"
+        assert prediction.features.smoker == 'no', "Le statut fumeur/non-fumeur devrait être le bon"
+        assert prediction.features.region == 'northwest', "La région devrait être le bon"
         
         assert prediction.created_at is not None, "created_at devrait être défini automatiquement"
 
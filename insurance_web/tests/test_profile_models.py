@@ -114,4 +114,30 @@ class TestProfileModel:
         )
         assert user.profile.age is None, "L'âge devrait être None"
         assert user.profile.sex is None, "Le sexe devrait être None"
-        assert user.profile.bmi is None, "Le BMI devrait être None"
\ No newline at end of file
+        assert user.profile.bmi is None, "Le BMI devrait être None"
+
+@pytest.mark.django_db
+class TestProfileSaveSignal:
+
+    def _profile_updates(self, captured):
+        return [q['sql'] for q in captured if q['sql'].startswith('UPDATE "insurance_web_profile"')]
+
+    def test_user_save_skips_unchanged_profile(self, django_assert_num_queries):
+        user = User.objects.create_user(username='testuser', password='testpass123')
+        user = User.objects.select_related('profile').get(pk=user.pk)
+        with django_assert_num_queries(1) as captured:
+            user.save(update_fields=['last_login'])
+        assert not self._profile_updates(captured), "Le profil inchangé ne devrait pas être réécrit"
+
+    def test_user_save_without_loaded_profile_does_not_query_it(self, django_assert_num_queries):
+        User.objects.create_user(username='testuser', password='testpass123')
+        user = User.objects.get(username='testuser')
+        with django_assert_num_queries(1):
+            user.save()
+
+    def test_user_save_persists_modified_profile(self):
+        user = User.objects.create_user(username='testuser', password='testpass123')
+        user.profile.age = 42
+        user.save()
+        assert Profile.objects.get(user=user).age == 42, "La modification du profil devrait être enregistrée"
+        assert not user.profile.has_unsaved_changes()
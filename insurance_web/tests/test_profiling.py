@@ -0,0 +1,94 @@
+import pstats
+
+import pytest
+from django.contrib.auth.models import User
+from django.test import Client
+from django.urls import reverse
+from django.utils import translation
+
+from insurance_web.utils.profiling import (
+    CodeProfiler,
+    RequestProfile,
+    activate_profile,
+    profile_section,
+)
+
+
+def _url(name, **kwargs):
+    with translation.override('fr'):
+        return reverse(f'insurance_web:{name}', kwargs=kwargs)
+
+
+def _busy(n=20000):
+    return sum(i * i for i in range(n))
+
+
+class TestProfileSections:
+    def test_section_is_noop_without_active_profile(self):
+        with profile_section('ml_predict'):
+            _busy(10)
+
+    def test_sections_accumulate_in_active_profile(self):
+        profile = RequestProfile()
+        with activate_profile(profile):
+            for _ in range(2):
+                with profile_section('ml_predict'):
+                    _busy()
+        assert profile.counts['ml_predict'] == 2
+        assert profile.timings['ml_predict'] > 0
+
+    def test_collapsed_output(self, tmp_path):
+        profiler = CodeProfiler('collapsed', interval=0.001)
+        with profiler:
+            for _ in range(20):
+                _busy()
+        path = profiler.dump(tmp_path / 'busy')
+        assert path.endswith('.folded')
+        lines = open(path).read().splitlines()
+        assert lines and all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+        assert any('_busy' in line for line in lines), "La pile échantillonnée devrait contenir _busy"
+
+
+@pytest.mark.django_db
+class TestProfilingMiddleware:
+    @pytest.fixture(autouse=True)
+    def _enable_profiling(self, settings, tmp_path):
+        self.directory = tmp_path
+        settings.PROFILING = {'ENABLED': True, 'HEADER': 'X-Profile', 'SAMPLE_RATE': 0.0, 'DIR': str(tmp_path)}
+
+    def setup_method(self):
+        self.user = User.objects.create_user(username='client', password='testpass123')
+        self.client = Client()
+        self.client.login(username='client', password='testpass123')
+
+    def test_header_ignored_for_regular_users(self):
+        response = self.client.get(_url('profile'), HTTP_X_PROFILE='1')
+        assert 'Server-Timing' not in response
+        assert not list(self.directory.iterdir())
+
+    def test_staff_header_writes_cprofile(self):
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(_url('profile'), HTTP_X_PROFILE='1')
+
+        timing = response['Server-Timing']
+        assert 'app;dur=' in timing and 'db;dur=' in timing and 'tpl;dur=' in timing
+        files = list(self.directory.iterdir())
+        assert len(files) == 1 and files[0].suffix == '.prof'
+        assert pstats.Stats(str(files[0])).total_calls > 0
+
+    def test_flagged_user_is_profiled(self, settings):
+        settings.PROFILING = {**settings.PROFILING, 'USERS': ['client'], 'OUTPUT': 'collapsed'}
+        client = Client()
+        client.login(username='client', password='testpass123')
+        response = client.get(_url('profile'))
+        assert 'Server-Timing' in response
+        assert [f.suffix for f in self.directory.iterdir()] == ['.folded']
+
+    def test_disabled_middleware_is_removed(self, settings):
+        settings.PROFILING = {'ENABLED': False}
+        self.user.is_staff = True
+        self.user.save()
+        client = Client()
+        client.login(username='client', password='testpass123')
+        assert 'Server-Timing' not in client.get(_url('profile'), HTTP_X_PROFILE='1')
@@ -0,0 +1,179 @@
+import pytest
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone, translation
+
+from insurance_web.models import Appointment
+from insurance_web.utils.queries import QueryRecorder, normalize_sql
+
+# Une même forme de requête exécutée au moins autant de fois est un N+1
+REPEAT_THRESHOLD = 4
+
+
+def _url(name, **kwargs):
+    with translation.override('fr'):
+        return reverse(f'insurance_web:{name}', kwargs=kwargs)
+
+
+def _next_monday():
+    today = timezone.localdate()
+    return today + timedelta(days=7 - today.weekday())
+
+
+def measure(client, url_name, data=None, **kwargs):
+    """Exécute un GET et retourne le QueryRecorder de la requête."""
+    with QueryRecorder() as recorder:
+        response = client.get(_url(url_name, **kwargs), data)
+    assert response.status_code == 200, f"{url_name} devrait répondre 200"
+    return recorder
+
+
+def assert_query_budget(client, url_name, seed, data=None, small=2, large=8, **kwargs):
+    """
+    Vérifie qu'une page respecte son budget ``QUERY_BUDGETS`` et que son nombre
+    de requêtes ne dépend pas du nombre de lignes affichées.
+
+    ``seed(n)`` ajoute ``n`` lignes à la page.
+    """
+    seed(small)
+    client.get(_url(url_name, **kwargs), data)  # chauffe les caches (ContentType, session…)
+    before = measure(client, url_name, data, **kwargs)
+    seed(large - small)
+    after = measure(client, url_name, data, **kwargs)
+
+    repeated = after.repeated(REPEAT_THRESHOLD)
+    assert not repeated, f"{url_name} : requêtes répétées (N+1) : {repeated}"
+    assert after.count <= before.count, (
+        f"{url_name} : {before.count} requêtes avec {small} lignes, {after.count} avec {large}"
+    )
+    budget = settings.QUERY_BUDGETS[f'insurance_web:{url_name}']
+    assert after.count <= budget, f"{url_name} : {after.count} requêtes pour un budget de {budget}"
+
+
+class TestNormalizeSql:
+    def test_literals_and_in_lists_are_collapsed(self):
+        first = normalize_sql('SELECT * FROM "t" WHERE "t"."id" IN (%s, %s, %s) AND "t"."name" = \'a\'')
+        second = normalize_sql('SELECT *  FROM "t" WHERE "t"."id" IN (%s) AND "t"."name" = \'bb\'')
+        assert first == second == 'SELECT * FROM "t" WHERE "t"."id" IN (...) AND "t"."name" = ?'
+
+    def test_identifiers_with_digits_are_kept(self):
+        assert normalize_sql('SELECT "T3"."id" FROM "t2" LIMIT 21') == 'SELECT "T3"."id" FROM "t2" LIMIT ?'
+
+
+@pytest.mark.django_db
+class TestQueryRecorder:
+    def test_detects_repeated_shapes(self):
+        users = [User.objects.create_user(username=f'u{i}', password='testpass123') for i in range(5)]
+        with QueryRecorder() as recorder:
+            for user in User.objects.filter(id__in=[u.id for u in users]):
+                _ = user.profile.role
+        assert recorder.count == 6
+        (shape, count), = recorder.repeated(5)
+        assert count == 5 and 'insurance_web_profile' in shape
+
+
+@pytest.mark.django_db
+class TestQueryBudgets:
+    def setup_method(self):
+        self.conseiller = User.objects.create_user(
+            username='conseiller', email='conseiller@example.com', password='testpass123',
+            first_name='Claire', last_name='Martin'
+        )
+        self.conseiller.profile.role = 'conseiller'
+        self.conseiller.profile.save()
+        self.admin = User.objects.create_user(username='admin', email='admin@example.com', password='testpass123')
+        self.admin.profile.role = 'admin'
+        self.admin.profile.save()
+        self.client_user = User.objects.create_user(
+            username='client', email='client@example.com', password='testpass123'
+        )
+        self.week_start = _next_monday()
+        self.seeded = 0
+
+    def _login(self, username):
+        client = Client()
+        client.login(username=username, password='testpass123')
+        return client
+
+    def seed_clients(self, n):
+        """Ajoute ``n`` clients ayant chacun un rendez-vous en attente la semaine prochaine."""
+        tz = timezone.get_current_timezone()
+        for _ in range(n):
+            i = self.seeded
+            self.seeded += 1
+            client = User.objects.create_user(
+                username=f'client{i}', email=f'client{i}@example.com', password='testpass123',
+                first_name=f'Prénom{i}', last_name='Client'
+            )
+            client.profile.age = 30 + i
+            client.profile.region = 'northeast'
+            client.profile.save()
+            day = self.week_start + timedelta(days=i % 5)
+            date_time = timezone.make_aware(
+                timezone.datetime.combine(day, timezone.datetime.min.time().replace(hour=8 + i // 5)), tz
+            )
+            Appointment.objects.create(conseiller=self.conseiller, client=client, date_time=date_time)
+
+    def seed_my_appointments(self, n):
+        """Ajoute ``n`` rendez-vous à venir, passés et annulés, chacun avec un conseiller différent."""
+        now = timezone.now()
+        for _ in range(n):
+            i = self.seeded
+            self.seeded += 1
+            conseiller = User.objects.create_user(
+                username=f'cons{i}', email=f'cons{i}@example.com', password='testpass123'
+            )
+            Appointment.objects.create(conseiller=conseiller, client=self.client_user, date_time=now + timedelta(days=i + 1))
+            Appointment.objects.create(conseiller=conseiller, client=self.client_user, date_time=now - timedelta(days=i + 1))
+            Appointment.objects.create(
+                conseiller=conseiller, client=self.client_user, date_time=now + timedelta(days=i + 30), status='cancelled'
+            )
+
+    def test_conseiller_dashboard(self):
+        assert_query_budget(self._login('conseiller'), 'conseiller_dashboard', self.seed_clients)
+
+    def test_conseiller_calendar(self):
+        assert_query_budget(
+            self._login('conseiller'), 'conseiller_calendar', self.seed_clients,
+            data={'week_start': self.week_start.isoformat()}
+        )
+
+    def test_conseiller_clients_list(self):
+        assert_query_budget(self._login('conseiller'), 'conseiller_clients', self.seed_clients)
+
+    def test_conseiller_clients_list_as_admin(self):
+        assert_query_budget(self._login('admin'), 'conseiller_clients', self.seed_clients)
+
+    def test_my_appointments(self):
+        assert_query_budget(self._login('client'), 'my_appointments', self.seed_my_appointments)
+
+
+@pytest.mark.django_db
+class TestQueryInspectorMiddleware:
+    @pytest.fixture(autouse=True)
+    def _enable_inspector(self, settings):
+        settings.QUERY_INSPECTOR = {'ENABLED': True, 'REPEAT_THRESHOLD': 2}
+        settings.QUERY_BUDGETS = {'insurance_web:my_appointments': 1}
+
+    def test_reports_query_count_and_budget(self, monkeypatch):
+        warnings = []
+        monkeypatch.setattr('insurance_web.middleware.log_warning', lambda message, extra=None: warnings.append(extra))
+        User.objects.create_user(username='client', password='testpass123')
+        client = Client()
+        client.login(username='client', password='testpass123')
+
+        response = client.get(_url('my_appointments'))
+        assert int(response['X-Query-Count']) > 1
+        assert 'X-Query-Time-Ms' in response
+        assert any(extra.get('budget') == 1 for extra in warnings), \
+            "Le dépassement de budget devrait être journalisé"
+
+    def test_disabled_by_default_outside_debug(self, settings):
+        settings.QUERY_INSPECTOR = {}
+        User.objects.create_user(username='client', password='testpass123')
+        client = Client()
+        client.login(username='client', password='testpass123')
+        assert 'X-Query-Count' not in client.get(_url('my_appointments'))
@@ -0,0 +1,85 @@
+import asyncio
+import pytest
+from django.contrib.auth.models import User
+from django.test import Client
+from django.urls import reverse
+from django.utils import translation
+
+from insurance_web.realtime import InMemoryBroker, set_broker, notification_event_stream
+from insurance_web.services.notification_service import create_notification, mark_all_notifications_as_read
+
+
+class TestInMemoryBroker:
+    def test_publish_reaches_subscriber(self):
+        broker = InMemoryBroker()
+
+        async def scenario():
+            subscription = broker.subscribe(1)
+            broker.publish(1, {'type': 'notification', 'id': 42})
+            broker.publish(2, {'type': 'notification', 'id': 43})
+            event = await subscription.get(timeout=1)
+            other = await subscription.get(timeout=0.05)
+            subscription.close()
+            return event, other
+
+        event, other = asyncio.run(scenario())
+        assert event == {'type': 'notification', 'id': 42}, "L'abonné devrait recevoir son événement"
+        assert other is None, "Les événements d'un autre utilisateur ne devraient pas être reçus"
+        assert broker.subscriber_count() == 0, "L'abonnement devrait être libéré après close()"
+
+    def test_slow_subscriber_drops_oldest_events(self):
+        broker = InMemoryBroker(queue_size=2)
+
+        async def scenario():
+            subscription = broker.subscribe(1)
+            for i in range(5):
+                broker.publish(1, {'type': 'notification', 'id': i})
+            await asyncio.sleep(0)
+            events = subscription.drain()
+            subscription.close()
+            return events
+
+        events = asyncio.run(scenario())
+        assert [e['id'] for e in events] == [3, 4], "Seuls les événements les plus récents devraient être conservés"
+
+
+@pytest.mark.django_db(transaction=True)
+class TestNotificationStream:
+    def setup_method(self):
+        self.broker = InMemoryBroker()
+        set_broker(self.broker)
+        self.user = User.objects.create_user(username='streamuser', email='stream@example.com', password='testpass123')
+
+    def teardown_method(self):
+        set_broker(None)
+
+    def test_stream_sends_count_then_new_notification(self):
+        async def scenario():
+            stream = notification_event_stream(self.user, broker=self.broker, heartbeat=1, max_age=5)
+            chunks = [await stream.__anext__(), await stream.__anext__()]
+            await asyncio.to_thread(create_notification, self.user, 'appointment_request', 'Nouvelle demande')
+            chunks.append(await stream.__anext__())
+            chunks.append(await stream.__anext__())
+            await stream.aclose()
+            return chunks
+
+        retry, initial, notification, count = asyncio.run(scenario())
+        assert retry.startswith('retry:'), "Le flux devrait indiquer le délai de reconnexion"
+        assert 'event: unread_count' in initial and '"count": 0' in initial
+        assert 'event: notification' in notification and 'Nouvelle demande' in notification
+        assert '"count": 1' in count, "Le compteur devrait être renvoyé après la notification"
+        assert self.broker.subscriber_count() == 0
+
+    def test_mark_all_read_publishes_count_change(self, django_capture_on_commit_callbacks):
+        create_notification(self.user, 'appointment_request', 'A lire')
+        received = []
+        self.broker.publish = lambda user_id, event: received.append((user_id, event))
+        with django_capture_on_commit_callbacks(execute=True):
+            mark_all_notifications_as_read(self.user)
+        assert received == [(self.user.id, {'type': 'unread_count_changed'})]
+
+    def test_stream_requires_authentication(self):
+        with translation.override('fr'):
+            url = reverse('insurance_web:notification_stream')
+        response = Client().get(url)
+        assert response.status_code == 401
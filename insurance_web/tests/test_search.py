@@ -0,0 +1,140 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone, translation
+
+from insurance_web.models import Appointment
+from insurance_web.services.search_service import search_clients, typeahead_clients
+
+
+def _url(name):
+    with translation.override('fr'):
+        return reverse(f'insurance_web:{name}')
+
+
+def _user(username, first_name='', last_name='', role='user', age=None, region=None):
+    user = User.objects.create_user(
+        username=username, email=f'{username}@example.com', password='testpass123',
+        first_name=first_name, last_name=last_name,
+    )
+    user.profile.role = role
+    user.profile.age = age
+    user.profile.region = region
+    user.profile.save()
+    return user
+
+
+@pytest.mark.django_db
+class TestClientSearch:
+
+    def setup_method(self):
+        self.conseiller = _user('marie', 'Marie', 'Martin', role='conseiller')
+        self.jean = _user('jean.dupont', 'Jean', 'Dupont', age=40, region='northeast')
+        self.jeanne = _user('jeanne', 'Jeanne', 'Durand', age=25, region='southwest')
+        self.paul = _user('paul', 'Paul', 'Jeannot', age=60, region='northeast')
+        self.stranger = _user('jean.autre', 'Jean', 'Autre')
+        for client in (self.jean, self.jeanne, self.paul):
+            Appointment.objects.create(conseiller=self.conseiller, client=client, date_time=timezone.now())
+
+    def test_advisor_only_finds_own_clients(self):
+        found = list(search_clients(self.conseiller, 'jean'))
+        assert found == [self.jean, self.jeanne, self.paul], "Le client d'un autre conseiller ne devrait pas apparaître"
+
+    def test_all_terms_must_match_and_filters_apply(self):
+        assert list(search_clients(self.conseiller, 'Jean Dupont')) == [self.jean]
+        assert list(search_clients(self.conseiller, 'example', region='northeast', age_min=50)) == [self.paul]
+
+    def test_index_stays_in_sync_after_rename(self):
+        self.jeanne.last_name = 'Lefèvre'
+        self.jeanne.save()
+        assert list(search_clients(self.conseiller, 'lefevre')) == [self.jeanne], "Les accents devraient être ignorés"
+        assert not list(search_clients(self.conseiller, 'durand'))
+
+    def test_email_is_matched_whole(self):
+        assert list(search_clients(self.conseiller, 'jean.dupont@example.com')) == [self.jean]
+        assert list(search_clients(self.conseiller, 'Jeanne Durand')) == [self.jeanne]
+
+    @pytest.mark.postgresql
+    def test_postgresql_short_terms_and_accents(self):
+        assert list(search_clients(self.conseiller, 'du')) == [self.jean, self.jeanne], \
+            "Un terme court devrait être cherché en début de champ"
+        assert not list(search_clients(self.conseiller, 'nt'))
+        assert list(search_clients(self.conseiller, 'ont')) == [self.jean]
+        assert list(search_clients(self.conseiller, 'paul@example.com')) == [self.paul], \
+            "Une adresse ne devrait pas être découpée en termes courts"
+        self.jeanne.last_name = 'Lefèvre'
+        self.jeanne.save()
+        assert list(search_clients(self.conseiller, 'lefevre')) == [self.jeanne]
+        assert list(search_clients(self.conseiller, 'LEFÈVRE')) == [self.jeanne]
+
+    def test_admin_searches_all_non_advisors(self):
+        admin = _user('admin', role='admin')
+        assert list(search_clients(admin, 'jean')) == [self.stranger, self.jean, self.jeanne, self.paul]
+
+    def test_autocomplete_endpoint(self):
+        client = Client()
+        client.force_login(self.conseiller)
+        items = client.get(_url('conseiller_client_autocomplete'), {'q': 'du'}).json()['items']
+        assert [item['name'] for item in items] == ['Jean Dupont', 'Jeanne Durand']
+        assert items[0]['url'].endswith(f'/conseiller/clients/{self.jean.id}/')
+        assert client.get(_url('conseiller_client_autocomplete'), {'q': 'du', 'limit': 1}).json()['items'] == items[:1]
+
+    def test_search_endpoint_is_paginated(self, monkeypatch):
+        monkeypatch.setattr('insurance_web.views.conseiller_views.PAGE_SIZE', 2)
+        client = Client()
+        client.force_login(self.conseiller)
+
+        first = client.get(_url('conseiller_client_search'), {'q': 'example'}).json()
+        second = client.get(_url('conseiller_client_search'), {'q': 'example', 'cursor': first['next_cursor']}).json()
+        assert [item['name'] for item in first['items'] + second['items']] == ['Jean Dupont', 'Jeanne Durand', 'Paul Jeannot']
+        assert second['next_cursor'] is None
+
+    def test_list_page_shows_one_page_of_results(self, django_assert_max_num_queries):
+        client = Client()
+        client.force_login(self.conseiller)
+        client.get(_url('conseiller_clients'))
+        with django_assert_max_num_queries(6):
+            response = client.get(_url('conseiller_clients'), {'q': 'dupont'})
+        assert list(response.context['clients']) == [self.jean]
+        assert response.context['is_search']
+
+
+@pytest.mark.django_db
+class TestClientTypeahead:
+
+    def setup_method(self):
+        cache.clear()
+        self.conseiller = _user('marie', 'Marie', 'Martin', role='conseiller')
+        self.paul = _user('paul', 'Paul', 'Jeannot')
+        self.jean = _user('jean', 'Jean', 'Zola')
+        for client in (self.paul, self.jean):
+            Appointment.objects.create(conseiller=self.conseiller, client=client, date_time=timezone.now())
+
+    def test_name_prefix_ranks_first_and_limit_is_applied(self):
+        # Prénom ou nom commençant par "jean" : même rang, départage alphabétique
+        assert [item['id'] for item in typeahead_clients(self.conseiller, 'jean')] == [self.paul.id, self.jean.id]
+        assert [item['id'] for item in typeahead_clients(self.conseiller, 'zo')] == [self.jean.id]
+        assert len(typeahead_clients(self.conseiller, '', limit=1)) == 1
+        assert len(typeahead_clients(self.conseiller, '', limit=1000)) == 2
+
+    def test_email_prefix_ranks_after_name_prefix(self):
+        other = _user('zorro', 'Anne', 'Petit')
+        Appointment.objects.create(conseiller=self.conseiller, client=other, date_time=timezone.now())
+        # "zo" : début du nom de Jean Zola, mais seulement de l'email de Anne Petit
+        assert [item['id'] for item in typeahead_clients(self.conseiller, 'zo')] == [self.jean.id, other.id]
+
+    def test_results_are_cached_until_a_new_appointment(self, django_assert_num_queries):
+        typeahead_clients(self.conseiller, 'ja')
+        with django_assert_num_queries(0):
+            assert typeahead_clients(self.conseiller, 'ja') == []
+
+        jacques = _user('jacques', 'Jacques', 'Brel')
+        Appointment.objects.create(conseiller=self.conseiller, client=jacques, date_time=timezone.now())
+        assert [item['name'] for item in typeahead_clients(self.conseiller, 'ja')] == ['Jacques Brel']
+
+    def test_bookable_excludes_admins(self):
+        admin = _user('admin', 'Jean', 'Admin', role='admin')
+        names = [item['name'] for item in typeahead_clients(admin, 'jean', include_admins=False)]
+        assert names == ['Paul Jeannot', 'Jean Zola']
@@ -193,3 +193,68 @@ class TestSecurity:
         
         assert User.objects.filter(username='testuser').exists(), \
             "L'utilisateur devrait être créé même avec du contenu XSS"
+
+
+@pytest.mark.django_db
+class TestProfileAuthentication:
+
+    def test_user_and_profile_loaded_in_one_query(self, rf):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from insurance_web.middleware import ProfileAuthenticationMiddleware
+
+        user = User.objects.create_user(username='conseiller', password='testpass123')
+        user.profile.role = 'conseiller'
+        user.profile.save()
+        client = Client()
+        client.login(username='conseiller', password='testpass123')
+
+        request = rf.get('/')
+        request.session = client.session
+        assert request.session.get('_auth_user_id')
+        ProfileAuthenticationMiddleware(lambda r: None).process_request(request)
+
+        with CaptureQueriesContext(connection) as captured:
+            assert request.roles.is_conseiller and request.roles.role_display
+            assert request.user.profile.is_conseiller()
+        assert len(captured) == 1, "Utilisateur et profil devraient être lus en une seule requête jointe"
+        assert 'JOIN "insurance_web_profile"' in captured[0]['sql']
+
+
+@pytest.mark.django_db
+class TestEmailBackend:
+
+    def setup_method(self):
+        from django.core.cache import cache
+        from insurance_web.backends import EmailBackend
+        cache.clear()
+        self.backend = EmailBackend()
+        self.user = User.objects.create_user(
+            username='jdupont', email='Jean.Dupont@Example.com', password='testpass123'
+        )
+
+    def test_email_is_case_insensitive_with_username_fallback(self):
+        assert self.backend.authenticate(None, username=' jean.dupont@example.com', password='testpass123') == self.user
+        assert self.backend.authenticate(None, username='jdupont', password='testpass123') == self.user
+        assert self.backend.authenticate(None, username='jdupont', password='wrong') is None
+
+    def test_normalized_email_is_unique(self):
+        from django.db import IntegrityError, transaction
+        with pytest.raises(IntegrityError), transaction.atomic():
+            User.objects.create_user(username='autre', email='jean.dupont@example.COM', password='x')
+
+    def test_repeated_login_reuses_cached_id(self, django_assert_num_queries):
+        self.backend.authenticate(None, username='jean.dupont@example.com', password='testpass123')
+        with django_assert_num_queries(1):
+            assert self.backend.authenticate(None, username='jean.dupont@example.com', password='testpass123')
+
+        self.user.email = 'nouveau@example.com'
+        self.user.save()
+        assert self.backend.authenticate(None, username='jean.dupont@example.com', password='testpass123') is None, \
+            "Un email modifié ne devrait plus permettre la connexion via le cache"
+
+    def test_unknown_user_still_hashes_password(self, monkeypatch):
+        hashed = []
+        monkeypatch.setattr(User, 'set_password', lambda self, raw: hashed.append(raw))
+        assert self.backend.authenticate(None, username='inconnu@example.com', password='secret') is None
+        assert hashed == ['secret'], "Un identifiant inconnu devrait payer le coût d'un hachage"
@@ -169,3 +169,231 @@ class TestPredictionService:
         result_max_bmi = calculate_insurance_premium(form_data_max_bmi)
         assert isinstance(result_max_bmi, float), "Le résultat pour bmi=50.0 devrait être un float"
         assert result_max_bmi > 0, "Le résultat devrait être positif"
+
+
+@pytest.mark.django_db
+class TestSensitivityService:
+    BASE = {'age': 40, 'sex': 'male', 'bmi': 30.0, 'children': 1, 'smoker': 'yes', 'region': 'southeast'}
+
+    def test_grid_matches_single_predictions(self):
+        from insurance_web.services.sensitivity_service import sensitivity_grid
+        axes = [('bmi', [20.0, 30.0, 40.0]), ('smoker', ['no', 'yes'])]
+        result = sensitivity_grid(self.BASE, axes)
+
+        assert result['shape'] == [3, 2], "La matrice devrait avoir une dimension par axe"
+        assert result['premiums'][1][1] == result['base']['premium'] == calculate_insurance_premium(self.BASE)
+        assert result['premiums'][0][0] == calculate_insurance_premium({**self.BASE, 'bmi': 20.0, 'smoker': 'no'})
+
+    def test_grid_size_and_axes_are_checked(self):
+        from insurance_web.exceptions import InvalidPredictionDataError
+        from insurance_web.services.sensitivity_service import MAX_GRID_POINTS, sensitivity_grid
+        with pytest.raises(InvalidPredictionDataError):
+            sensitivity_grid(self.BASE, [('bmi', [20.0] * (MAX_GRID_POINTS + 1))])
+        with pytest.raises(InvalidPredictionDataError):
+            sensitivity_grid(self.BASE, [('height', [1.7])])
+
+    def test_endpoint_returns_the_matrix(self):
+        from django.contrib.auth.models import User
+        from django.test import Client
+        from django.urls import reverse
+        from django.utils import translation
+
+        conseiller = User.objects.create_user(username='conseiller', password='testpass123')
+        conseiller.profile.role = 'conseiller'
+        conseiller.profile.save()
+        client = Client()
+        client.force_login(conseiller)
+        with translation.override('fr'):
+            url = reverse('insurance_web:conseiller_sensitivity')
+
+        params = {**self.BASE, 'bmi_min': 20, 'bmi_max': 40, 'bmi_steps': 25, 'smoker_toggle': 1, 'age_horizon': 19}
+        data = client.get(url, params).json()
+        assert data['shape'] == [25, 2, 20], "Grille IMC x fumeur x âge de 1000 points"
+        assert [axis['name'] for axis in data['axes']] == ['bmi', 'smoker', 'age']
+        assert data['axes'][2]['values'][-1] == 59
+
+        assert client.get(url, {**params, 'bmi_max': 10}).status_code == 400
+
+
+@pytest.mark.django_db
+class TestProjectionService:
+
+    def _client(self, username, age, smoker='no'):
+        from django.contrib.auth.models import User
+        user = User.objects.create_user(username=username, password='testpass123')
+        profile = user.profile
+        profile.age, profile.sex, profile.bmi, profile.children = age, 'female', 24.5, 0
+        profile.smoker, profile.region = smoker, 'northwest'
+        profile.save()
+        return user
+
+    def setup_method(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_projection_matches_single_predictions(self):
+        from insurance_web.services.projection_service import client_projection
+        user = self._client('jeanne', 40)
+        projection = client_projection(user, years=10)
+
+        assert [point['age'] for point in projection['points']] == list(range(40, 51))
+        expected = calculate_insurance_premium({
+            'age': 50, 'sex': 'female', 'bmi': 24.5, 'children': 0, 'smoker': 'no', 'region': 'northwest',
+        })
+        assert projection['points'][-1]['premium'] == expected, "La prime projetée devrait être celle du modèle à 50 ans"
+
+    def test_batch_is_cached_per_profile_and_capped_at_max_age(self, monkeypatch):
+        from insurance_web.services import projection_service
+        profiles = [
+            projection_service.profile_features(self._client('a', 30).profile),
+            projection_service.profile_features(self._client('b', 95).profile),
+            None,
+        ]
+        calls = []
+        original = projection_service.predict_premiums
+        monkeypatch.setattr(projection_service, 'predict_premiums', lambda rows: calls.append(len(rows)) or original(rows))
+
+        first = projection_service.project_premiums(profiles, years=20)
+        assert [len(first[0]), len(first[1]), first[2]] == [21, 6, None], "Âge plafonné à 100 ans"
+        assert calls == [27], "Un seul appel au modèle pour tous les profils"
+
+        assert projection_service.project_premiums(profiles, years=20) == first
+        assert calls == [27], "Le second appel devrait être servi par le cache"
+
+    def test_portfolio_projection(self):
+        from django.contrib.auth.models import User
+        from django.utils import timezone
+        from insurance_web.models import Appointment
+        from insurance_web.services.projection_service import portfolio_projection
+
+        conseiller = User.objects.create_user(username='conseiller', password='testpass123')
+        conseiller.profile.role = 'conseiller'
+        conseiller.profile.save()
+        incomplete = User.objects.create_user(username='incomplet', password='testpass123')
+        for client in (self._client('a', 30), self._client('b', 50, smoker='yes'), incomplete):
+            Appointment.objects.create(conseiller=conseiller, client=client, date_time=timezone.now())
+
+        result = portfolio_projection(conseiller, years=10, chunk_size=1)
+        assert (result['clients'], result['projected']) == (3, 2)
+        assert len(result['total']) == 11
+        assert result['mean'][0] == pytest.approx(result['total'][0] / 2)
+
+    def test_client_detail_shows_projection(self):
+        from django.contrib.auth.models import User
+        from django.test import Client
+        from django.urls import reverse
+        from django.utils import timezone, translation
+        from insurance_web.models import Appointment
+
+        conseiller = User.objects.create_user(username='conseiller', password='testpass123')
+        conseiller.profile.role = 'conseiller'
+        conseiller.profile.save()
+        client_user = self._client('jeanne', 40)
+        Appointment.objects.create(conseiller=conseiller, client=client_user, date_time=timezone.now())
+        client = Client()
+        client.force_login(conseiller)
+        with translation.override('fr'):
+            url = reverse('insurance_web:conseiller_client_detail', args=[client_user.id])
+
+        response = client.get(url, {'years': 30})
+        assert response.context['projection']['years'] == 30
+        assert 'Dans 30 ans (70 ans)' in response.content.decode()
+
+
+@pytest.mark.django_db
+class TestPredictionStorage:
+    FORM = {'age': 40, 'sex': 'male', 'bmi': 27.4567, 'children': 1, 'smoker': 'no', 'region': 'northeast'}
+
+    def setup_method(self):
+        from django.contrib.auth.models import User
+        self.user = User.objects.create_user(username='jean', password='testpass123')
+
+    def test_identical_prediction_is_coalesced(self, settings):
+        from insurance_web.models import Prediction, PredictionFeatures
+        from insurance_web.services.prediction_service import create_prediction
+        settings.PREDICTION_STORAGE = {'COALESCE_WINDOW': 600}
+
+        first = create_prediction(self.user, self.user, dict(self.FORM), 1234.5)
+        again = create_prediction(self.user, self.user, dict(self.FORM), 1234.5)
+        assert again.pk == first.pk and again.repeat_count == 2, "La prédiction identique devrait être regroupée"
+
+        other = create_prediction(self.user, self.user, {**self.FORM, 'age': 41}, 1300.0)
+        assert other.pk != first.pk
+        assert Prediction.objects.count() == 2 and PredictionFeatures.objects.count() == 2
+        assert str(first.features.bmi) == '27.46', "L'IMC normalisé devrait être arrondi au centième"
+
+    def test_no_coalescing_without_window(self, settings):
+        from insurance_web.models import Prediction, PredictionFeatures
+        from insurance_web.services.prediction_service import create_prediction
+        settings.PREDICTION_STORAGE = {'COALESCE_WINDOW': 0}
+
+        create_prediction(self.user, self.user, dict(self.FORM), 1234.5)
+        create_prediction(self.user, self.user, dict(self.FORM), 1234.5)
+        assert Prediction.objects.count() == 2
+        assert PredictionFeatures.objects.count() == 1, "Les variables identiques ne devraient être stockées qu'une fois"
+
+    def test_unchanged_profile_is_not_saved(self, settings, django_assert_num_queries):
+        from django.contrib.auth.models import User
+        from insurance_web.services.prediction_service import create_prediction
+        settings.PREDICTION_STORAGE = {'COALESCE_WINDOW': 600}
+        create_prediction(self.user, self.user, dict(self.FORM), 1234.5)
+
+        user = User.objects.select_related('profile').get(pk=self.user.pk)
+        # Savepoint + features (get) + prédiction précédente + compteur : pas d'UPDATE du profil
+        with django_assert_num_queries(5):
+            create_prediction(user, user, dict(self.FORM), 1234.5)
+
+    def test_coalesce_existing(self):
+        from datetime import timedelta
+        from decimal import Decimal
+        from django.utils import timezone
+        from insurance_web.models import Prediction
+        from insurance_web.services.prediction_storage_service import coalesce_existing
+
+        rows = [
+            Prediction.objects.create(user=self.user, created_by=self.user, predicted_amount=Decimal('1234.50'), **self.FORM)
+            for _ in range(3)
+        ]
+        # La troisième est hors fenêtre par rapport à la première
+        Prediction.objects.filter(pk=rows[2].pk).update(created_at=timezone.now() + timedelta(hours=2))
+
+        assert len({row.features_id for row in rows}) == 1
+        assert coalesce_existing(window=600) == 1
+        assert sorted(Prediction.objects.values_list('repeat_count', flat=True)) == [1, 2]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestPredictionFeaturesMigration:
+
+    def _migrate(self, target=None):
+        """Migre vers ``target`` (défaut : dernière migration) ; retourne les modèles historiques."""
+        from django.db import connection
+        from django.db.migrations.executor import MigrationExecutor
+        executor = MigrationExecutor(connection)
+        targets = [('insurance_web', target)] if target else executor.loader.graph.leaf_nodes()
+        executor.migrate(targets)
+        executor.loader.build_graph()
+        return executor.loader.project_state(targets).apps
+
+    def test_inline_features_are_moved_before_columns_are_dropped(self):
+        from decimal import Decimal
+        apps = self._migrate('0022_client_search_prefix_indexes')
+        try:
+            User = apps.get_model('auth', 'User')
+            Prediction = apps.get_model('insurance_web', 'Prediction')
+            user = User.objects.create(username='jean')
+            for amount in ('1000.00', '1100.00'):
+                Prediction.objects.create(
+                    user=user, created_by=user, predicted_amount=Decimal(amount),
+                    age=40, sex='male', bmi=Decimal('27.46'), children=1, smoker='no', region='northeast',
+                )
+
+            apps = self._migrate('0024_remove_prediction_inline_features')
+            Prediction = apps.get_model('insurance_web', 'Prediction')
+            assert not Prediction.objects.filter(features__isnull=True).exists()
+            assert apps.get_model('insurance_web', 'PredictionFeatures').objects.count() == 1, \
+                "Des variables identiques devraient partager une seule ligne"
+            features = Prediction.objects.select_related('features').first().features
+            assert (features.age, features.bmi, features.region) == (40, Decimal('27.46'), 'northeast')
+        finally:
+            self._migrate()
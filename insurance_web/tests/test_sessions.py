@@ -0,0 +1,77 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone, translation
+
+from insurance_web.benchmarks import sessions as sessions_benchmark
+from insurance_web.sessions import SessionStore
+
+
+def _url(name):
+    with translation.override('fr'):
+        return reverse(f'insurance_web:{name}')
+
+
+@pytest.mark.django_db
+class TestHybridSessions:
+
+    def test_anonymous_session_stays_in_signed_cookie(self, django_assert_num_queries):
+        store = SessionStore()
+        store['cart'] = [1, 2]
+        with django_assert_num_queries(0):
+            store.save()
+        assert ':' in store.session_key
+        assert not Session.objects.exists()
+
+        with django_assert_num_queries(0):
+            assert SessionStore(store.session_key)['cart'] == [1, 2]
+
+    def test_tampered_cookie_is_reset(self):
+        store = SessionStore()
+        store['cart'] = [1]
+        store.save()
+        tampered = SessionStore(store.session_key[:-2] + 'xx')
+        assert tampered.get('cart') is None
+        assert tampered.session_key is None
+
+    def test_login_moves_session_to_database(self, settings):
+        settings.SESSION_ENGINE = 'insurance_web.sessions'
+        User.objects.create_user(username='client', email='client@example.com', password='testpass123')
+        client = Client()
+        client.get(_url('login'))
+        assert not Session.objects.exists(), "Un visiteur anonyme ne devrait pas créer de ligne django_session"
+
+        client.post(_url('login'), {'username': 'client@example.com', 'password': 'testpass123'})
+        assert Session.objects.count() == 1
+        assert client.get(_url('profile')).status_code == 200
+
+        client.post(_url('logout'))
+        assert client.get(_url('profile')).status_code == 302
+
+
+@pytest.mark.django_db
+class TestPurgeSessions:
+
+    def test_purge_in_batches(self):
+        past = timezone.now() - timedelta(days=1)
+        for i in range(5):
+            Session.objects.create(session_key=f'expired{i:04d}', session_data='', expire_date=past)
+        Session.objects.create(session_key='active0000', session_data='', expire_date=timezone.now() + timedelta(days=1))
+
+        out = StringIO()
+        call_command('purge_sessions', '--batch-size', '2', stdout=out)
+        assert '5 session(s) supprimée(s) en 3 lot(s)' in out.getvalue()
+        assert list(Session.objects.values_list('session_key', flat=True)) == ['active0000']
+
+    def test_benchmark_counts_queries_per_mode(self):
+        notes = {result.name: result.note for result in sessions_benchmark.run(iterations=8)}
+        assert notes['hybrid anonymous'] == '0.00 SQL/req'
+        assert notes['signed_cookies authenticated'] == '0.00 SQL/req'
+        assert notes['db anonymous'] != '0.00 SQL/req'
+        assert not Session.objects.exists(), "Le benchmark devrait supprimer ses sessions"
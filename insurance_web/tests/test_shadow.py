@@ -0,0 +1,81 @@
+from io import StringIO
+
+import numpy as np
+import pytest
+from django.core.management import call_command
+
+from insurance_web.models import ShadowScore
+from insurance_web.services import shadow_service
+from insurance_web.services.prediction_service import MODEL_PATH, calculate_insurance_premium, model_version
+
+
+class ConstantModel:
+    """Modèle candidat factice : prime fixe."""
+
+    def __init__(self, amount):
+        self.amount = amount
+
+    def predict(self, rows):
+        return np.full(len(rows), self.amount)
+
+
+def _profile(**overrides):
+    return {'age': 40, 'sex': 'male', 'bmi': 25.0, 'children': 0, 'smoker': 'no', 'region': 'northeast', **overrides}
+
+
+@pytest.mark.django_db
+class TestShadowScoring:
+
+    @pytest.fixture(autouse=True)
+    def _shadow_settings(self, settings, monkeypatch):
+        settings.SHADOW_MODEL = {
+            'MODEL_PATH': MODEL_PATH, 'SAMPLE_RATE': 1.0, 'QUEUE_SIZE': 10, 'BATCH_SIZE': 2, 'BACKGROUND': False,
+        }
+        self.settings = settings
+        # File neuve, sans cumul d'un test précédent
+        monkeypatch.setattr(shadow_service._process, '_pid', None)
+        monkeypatch.setattr(shadow_service, '_candidate', None)
+
+    def test_disabled_without_candidate_path(self):
+        self.settings.SHADOW_MODEL = {**self.settings.SHADOW_MODEL, 'MODEL_PATH': ''}
+        calculate_insurance_premium(_profile())
+        assert shadow_service.drain() == 0 and not ShadowScore.objects.exists()
+
+    def test_same_model_has_no_delta(self):
+        for age in (30, 40, 41):
+            calculate_insurance_premium(_profile(age=age))
+        assert shadow_service.drain() == 2, "Deux tranches d'âge : deux segments"
+
+        scores = ShadowScore.objects.all()
+        assert sum(score.count for score in scores) == 3
+        assert all(score.max_abs_delta < 1e-6 for score in scores), "Modèle identique : écart nul"
+        assert {score.production_version for score in scores} == {model_version()}
+
+    def test_deltas_accumulate_by_segment(self, monkeypatch):
+        monkeypatch.setattr(shadow_service, '_candidate', (MODEL_PATH, 'candidat', ConstantModel(10000.0)))
+        amounts = {
+            smoker: calculate_insurance_premium(_profile(smoker=smoker)) for smoker in ('no', 'yes')
+        }
+        shadow_service.drain()
+        calculate_insurance_premium(_profile(smoker='no'))
+        shadow_service.drain()
+
+        report = {line['smoker']: line for line in shadow_service.shadow_report(by=('smoker',))}
+        assert report['no']['count'] == 2, "Les passages successifs s'additionnent dans la même ligne"
+        assert report['no']['mean_delta'] == pytest.approx(10000.0 - amounts['no'])
+        assert report['yes']['max_abs_delta'] == pytest.approx(abs(10000.0 - amounts['yes']))
+
+        out = StringIO()
+        call_command('shadow_report', '--by', 'smoker', stdout=out)
+        assert 'candidat' in out.getvalue() and 'yes' in out.getvalue()
+
+    def test_full_queue_drops_without_blocking(self):
+        self.settings.SHADOW_MODEL = {**self.settings.SHADOW_MODEL, 'QUEUE_SIZE': 1}
+        assert shadow_service.submit(_profile(), 1000.0)
+        assert not shadow_service.submit(_profile(), 1000.0), "File pleine : l'entrée est abandonnée"
+
+    def test_monitoring_error_does_not_fail_prediction(self, monkeypatch):
+        def fail(*args, **kwargs):
+            raise RuntimeError('file indisponible')
+        monkeypatch.setattr(shadow_service, 'submit', fail)
+        assert calculate_insurance_premium(_profile()) > 0, "Le suivi ne devrait jamais faire échouer une prédiction"
@@ -0,0 +1,136 @@
+import time
+
+import pytest
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.tasks import TaskResultStatus, task
+from django.utils import timezone
+
+from insurance_web.models import Notification, QueuedTask
+from insurance_web.services.appointment_service import create_appointment
+from insurance_web.tasks.runner import TaskWorker, task_metrics
+
+
+@task
+def failing_task():
+    raise ValueError("boom")
+
+
+@task
+def missing_user_task():
+    User.objects.get(pk=0)
+
+
+FLAKY_CALLS = []
+
+
+@task
+def flaky_task(name):
+    """Échoue au premier appel, réussit ensuite."""
+    FLAKY_CALLS.append(name)
+    if FLAKY_CALLS.count(name) == 1:
+        raise ValueError("first attempt")
+    return name
+
+
+DATABASE_TASKS = {
+    'default': {
+        'BACKEND': 'insurance_web.tasks.backends.DatabaseBackend',
+        'OPTIONS': {'MAX_ATTEMPTS': 2, 'RETRY_BACKOFF': 30},
+    },
+}
+
+
+def _run_ready(worker):
+    return [worker.run_task(task_id) for task_id in worker.claim(10)]
+
+
+@pytest.mark.django_db
+class TestDatabaseTaskBackend:
+    @pytest.fixture(autouse=True)
+    def database_backend(self, settings):
+        settings.TASKS = DATABASE_TASKS
+
+    def setup_method(self):
+        task_metrics.reset()
+        self.conseiller = User.objects.create_user(username='taskcons', email='taskcons@example.com', password='testpass123')
+        self.client_user = User.objects.create_user(username='taskclient', email='taskclient@example.com', password='testpass123')
+
+    def test_booking_only_enqueues_side_effects(self):
+        appointment = create_appointment(self.conseiller, self.client_user, timezone.now() + timedelta(days=1), 60)
+
+        row = QueuedTask.objects.get()
+        assert row.task_path.endswith('appointment_tasks.appointment_created')
+        assert row.args == [appointment.id] and row.status == TaskResultStatus.READY
+        assert not Notification.objects.exists(), "La notification ne devrait pas être créée pendant la requête"
+
+        assert _run_ready(TaskWorker()) == [TaskResultStatus.SUCCESSFUL]
+        row.refresh_from_db()
+        assert row.duration_ms is not None and row.attempts == 1
+        assert Notification.objects.filter(user=self.conseiller, type='appointment_request').count() == 1
+        assert task_metrics.snapshot()[row.task_path]['count'] == 1
+
+    def test_failed_task_is_retried_then_marked_failed(self):
+        result = failing_task.enqueue()
+        worker = TaskWorker()
+
+        assert _run_ready(worker) == [TaskResultStatus.READY]
+        row = QueuedTask.objects.get(pk=result.id)
+        assert row.run_after > timezone.now(), "Le nouvel essai devrait être différé (backoff)"
+        assert _run_ready(worker) == [], "Une tâche différée ne devrait pas être reprise avant run_after"
+
+        QueuedTask.objects.filter(pk=result.id).update(run_after=timezone.now())
+        assert _run_ready(worker) == [TaskResultStatus.FAILED]
+
+        result.refresh()
+        assert result.status == TaskResultStatus.FAILED and result.attempts == 2
+        assert result.errors[0].exception_class is ValueError
+
+    def test_missing_object_fails_without_retry(self):
+        result = missing_user_task.enqueue()
+        assert _run_ready(TaskWorker()) == [TaskResultStatus.FAILED], \
+            "Un objet disparu ne réapparaîtra pas : pas de nouvel essai"
+        result.refresh()
+        assert result.attempts == 1
+
+    def test_claim_is_exclusive(self):
+        failing_task.enqueue()
+        first, second = TaskWorker(), TaskWorker()
+        assert len(first.claim(10)) == 1
+        assert second.claim(10) == [], "Une tâche réservée ne devrait pas l'être une seconde fois"
+
+
+@pytest.mark.django_db
+class TestImmediateBackendOnCommit:
+    def test_side_effects_run_after_commit(self, django_capture_on_commit_callbacks):
+        conseiller = User.objects.create_user(username='c1', email='c1@example.com', password='testpass123')
+        client_user = User.objects.create_user(username='u1', email='u1@example.com', password='testpass123')
+
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            create_appointment(conseiller, client_user, timezone.now() + timedelta(days=1), 60)
+        assert len(callbacks) == 1 and not Notification.objects.exists()
+
+        callbacks[0]()
+        assert Notification.objects.filter(user=conseiller).count() == 1
+
+
+@pytest.mark.django_db
+class TestInProcessBackend:
+    def test_retry_is_rescheduled_without_blocking_the_pool(self, settings, django_capture_on_commit_callbacks):
+        settings.TASKS = {
+            'default': {
+                'BACKEND': 'insurance_web.tasks.backends.InProcessBackend',
+                'OPTIONS': {'WORKERS': 1, 'MAX_ATTEMPTS': 2, 'RETRY_BACKOFF': 1},
+            },
+        }
+        FLAKY_CALLS.clear()
+        with django_capture_on_commit_callbacks(execute=True):
+            retried = flaky_task.enqueue('retried')
+            flaky_task.enqueue('other')
+
+        deadline = time.monotonic() + 5
+        while retried.status != TaskResultStatus.SUCCESSFUL and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert retried.status == TaskResultStatus.SUCCESSFUL and len(retried.worker_ids) == 2
+        assert FLAKY_CALLS.index('other') < FLAKY_CALLS.index('retried', 1), \
+            "L'unique thread du pool devrait rester libre pendant le délai de nouvel essai"
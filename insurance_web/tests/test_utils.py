@@ -1,5 +1,11 @@
+import json
+import logging
+import logging.handlers
+import queue
+
 import pytest
 from django.contrib.auth.models import User, AnonymousUser
+from django.core.management import call_command
 from django.test import RequestFactory
 from django.contrib.messages.storage.fallback import FallbackStorage
 from django.contrib.sessions.middleware import SessionMiddleware
@@ -10,6 +16,7 @@ from insurance_web.utils.decorators import (
     conseiller_or_admin_required
 )
 from insurance_web.backends import EmailBackend
+from insurance_web.log_handlers import DeferredQueueHandler, JsonFormatter
 from insurance_web.models import Profile
 
 
@@ -289,3 +296,37 @@ class TestEmailBackend:
             username='test@example.com',
             password='testpass123'
         )
+
+
+class TestStructuredLogging:
+    def _record(self, msg, *args, **extra):
+        record = logging.LogRecord('insurance_web', logging.INFO, __file__, 1, msg, args, None)
+        record.__dict__.update(extra)
+        return record
+
+    def test_json_formatter_keeps_extra(self):
+        line = JsonFormatter().format(self._record("Appointment %s", 'created', appointment_id=42, user_id=7))
+        data = json.loads(line)
+        assert data['message'] == 'Appointment created'
+        assert data['appointment_id'] == 42 and data['user_id'] == 7, \
+            "Le contexte passé dans extra devrait être conservé"
+        assert data['level'] == 'INFO' and 'args' not in data
+
+    def test_queue_handler_formats_message_on_caller_thread(self):
+        value = ['created']
+        records = queue.SimpleQueue()
+        handler = DeferredQueueHandler(records)
+        record = self._record("Appointment %s", value, appointment_id=42)
+        handler.handle(record)
+        value.append('cancelled')
+
+        queued = records.get_nowait()
+        assert queued.getMessage() == "Appointment ['created']", \
+            "Le message devrait être figé au moment de l'appel"
+        assert queued.args is None and queued.appointment_id == 42
+        assert record.args == (value,), "L'enregistrement d'origine ne devrait pas être modifié"
+
+    def test_logging_benchmark_command(self, capsys):
+        call_command('benchmark', 'logging', iterations=20)
+        output = capsys.readouterr().out
+        assert 'sync' in output and 'queued' in output
@@ -1,16 +1,19 @@
-from django.urls import path
+from django.urls import path, reverse_lazy
 from django.contrib.auth import views as auth_views
+from .utils.page_cache import cache_anonymous_page
 from .views import (
     HomeView,
     SignupView,
     LogoutView,
     ProfileView,
+    ProfilePredictionsMoreView,
     EditProfileView,
     PredictView,
     ConseillersListView,
     ConseillerAvailabilityView,
     CreateAppointmentView,
     MyAppointmentsView,
+    MyAppointmentsMoreView,
     AppointmentDetailView,
     CancelAppointmentView,
     RescheduleAppointmentView,
@@ -21,38 +24,62 @@ from .views import (
     AddUnavailabilityView,
     DeleteUnavailabilityView,
     ConseillerClientsListView,
+    ClientSearchView,
+    ClientAutocompleteView,
+    ConseillerSensitivityView,
+    ConseillerPortfolioProjectionView,
     ConseillerClientDetailView,
+    ConseillerClientHistoryMoreView,
     ConseillerCreateAppointmentView,
     DeletePredictionView,
     RemoveClientView,
     NotificationListView,
+    NotificationListMoreView,
+    NotificationStreamView,
     MarkNotificationReadView,
     MarkAllNotificationsReadView,
     AcceptAppointmentView,
     RejectAppointmentView,
     AdminDashboardView,
+    AdminStatsView,
+    AdminDriftView,
     AdminUserManagementView,
     AdminChangeUserRoleView,
     AdminToggleUserStatusView,
     AdminDeleteUserView,
     PricingConfigurationView,
+    ExportView,
 )
 
 app_name = 'insurance_web'
 
 urlpatterns = [
-    path('', HomeView.as_view(), name='home'),
-    path('login/', auth_views.LoginView.as_view(template_name='authentification/login.html'), name='login'),
+    path('', cache_anonymous_page(HomeView.as_view()), name='home'),
+    path(
+        'login/',
+        cache_anonymous_page(auth_views.LoginView.as_view(template_name='authentification/login.html')),
+        name='login',
+    ),
     path('logout/', LogoutView.as_view(), name='logout'),
-    path('signup/', SignupView.as_view(), name='signup'),
+    path('signup/', cache_anonymous_page(SignupView.as_view()), name='signup'),
+    path(
+        'account/activate/<uidb64>/<token>/',
+        auth_views.PasswordResetConfirmView.as_view(
+            template_name='authentification/account_activate.html',
+            success_url=reverse_lazy('insurance_web:login'),
+        ),
+        name='account_activate',
+    ),
     
     path('profile/', ProfileView.as_view(), name='profile'),
+    path('profile/predictions/more/', ProfilePredictionsMoreView.as_view(), name='profile_predictions_more'),
     path('profile/edit/', EditProfileView.as_view(), name='edit_profile'),
     path('predict/', PredictView.as_view(), name='predict'),
     path('conseillers/', ConseillersListView.as_view(), name='conseillers_list'),
     path('conseiller/<int:conseiller_id>/availability/', ConseillerAvailabilityView.as_view(), name='conseiller_availability'),
     path('conseiller/<int:conseiller_id>/book/', CreateAppointmentView.as_view(), name='create_appointment'),
     path('appointments/', MyAppointmentsView.as_view(), name='my_appointments'),
+    path('appointments/more/<str:section>/', MyAppointmentsMoreView.as_view(), name='my_appointments_more'),
     path('appointments/<int:appointment_id>/', AppointmentDetailView.as_view(), name='appointment_detail'),
     path('appointments/<int:appointment_id>/cancel/', CancelAppointmentView.as_view(), name='cancel_appointment'),
     path('appointments/<int:appointment_id>/reschedule/', RescheduleAppointmentView.as_view(), name='reschedule_appointment'),
@@ -65,18 +92,28 @@ urlpatterns = [
     path('conseiller/calendar/unavailability/add/', AddUnavailabilityView.as_view(), name='conseiller_add_unavailability'),
     path('conseiller/calendar/unavailability/<int:unavailability_id>/delete/', DeleteUnavailabilityView.as_view(), name='conseiller_delete_unavailability'),
     path('conseiller/clients/', ConseillerClientsListView.as_view(), name='conseiller_clients'),
+    path('conseiller/clients/search/', ClientSearchView.as_view(), name='conseiller_client_search'),
+    path('conseiller/clients/autocomplete/', ClientAutocompleteView.as_view(), name='conseiller_client_autocomplete'),
+    path('conseiller/sensitivity/', ConseillerSensitivityView.as_view(), name='conseiller_sensitivity'),
+    path('conseiller/projections/', ConseillerPortfolioProjectionView.as_view(), name='conseiller_portfolio_projection'),
     path('conseiller/clients/<int:client_id>/', ConseillerClientDetailView.as_view(), name='conseiller_client_detail'),
+    path('conseiller/clients/<int:client_id>/more/<str:kind>/', ConseillerClientHistoryMoreView.as_view(), name='conseiller_client_history_more'),
     path('conseiller/clients/<int:client_id>/book-new/', ConseillerCreateAppointmentView.as_view(), name='conseiller_create_appointment'),
     path('conseiller/predictions/<int:prediction_id>/delete/', DeletePredictionView.as_view(), name='delete_prediction'),
     path('conseiller/clients/<int:client_id>/remove/', RemoveClientView.as_view(), name='remove_client'),
     path('conseiller/appointments/<int:appointment_id>/accept/', AcceptAppointmentView.as_view(), name='accept_appointment'),
     path('conseiller/appointments/<int:appointment_id>/reject/', RejectAppointmentView.as_view(), name='reject_appointment'),
+    path('conseiller/export/<str:kind>/', ExportView.as_view(), name='export'),
     
     path('notifications/', NotificationListView.as_view(), name='notifications'),
+    path('notifications/more/', NotificationListMoreView.as_view(), name='notifications_more'),
+    path('notifications/stream/', NotificationStreamView.as_view(), name='notification_stream'),
     path('notifications/<int:notification_id>/read/', MarkNotificationReadView.as_view(), name='mark_notification_read'),
     path('notifications/read-all/', MarkAllNotificationsReadView.as_view(), name='mark_all_notifications_read'),
     
     path('management/', AdminDashboardView.as_view(), name='admin_dashboard'),
+    path('management/stats/', AdminStatsView.as_view(), name='admin_stats'),
+    path('management/drift/', AdminDriftView.as_view(), name='admin_drift'),
     path('management/users/', AdminUserManagementView.as_view(), name='admin_user_management'),
     path('management/users/<int:user_id>/change-role/', AdminChangeUserRoleView.as_view(), name='admin_change_user_role'),
     path('management/users/<int:user_id>/toggle-status/', AdminToggleUserStatusView.as_view(), name='admin_toggle_user_status'),
@@ -1,5 +1,8 @@
 from .mixins import ConseillerRequiredMixin, AdminRequiredMixin, UserProfileMixin
 from .decorators import conseiller_required, conseiller_or_admin_required
+from .pagination import InvalidCursor, KeysetPage, paginate_keyset, keyset_json_response
+from .queries import QueryRecorder, normalize_sql
+from .profiling import profile_section
 from .logging import (
     get_logger,
     log_info,
@@ -18,6 +21,13 @@ __all__ = [
     'UserProfileMixin',
     'conseiller_required',
     'conseiller_or_admin_required',
+    'InvalidCursor',
+    'KeysetPage',
+    'paginate_keyset',
+    'keyset_json_response',
+    'QueryRecorder',
+    'normalize_sql',
+    'profile_section',
     'get_logger',
     'log_info',
     'log_warning',
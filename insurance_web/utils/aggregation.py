@@ -0,0 +1,95 @@
+"""
+Cumuls en mémoire propres au processus, ajoutés périodiquement en base.
+
+Partagé par les services de suivi du modèle (``drift_service``,
+``shadow_service``) : les compteurs sont cumulés sous un verrou dans chaque
+processus, un thread d'arrière-plan les ajoute aux lignes de la base par
+incréments SQL (``add_to_row``) et un dernier vidage a lieu à la sortie du
+processus. Après un fork, l'état et le thread hérités du parent sont
+abandonnés : le parent écrit lui-même ses cumuls.
+"""
+import atexit
+import os
+import threading
+
+from django.db import IntegrityError, connections, transaction
+
+from .logging import log_error
+
+
+class ProcessAggregator:
+    """
+    Verrou, thread d'arrière-plan et vidage à la sortie d'un état cumulé par processus.
+
+    Args:
+        name: Nom du thread d'arrière-plan
+        run: Boucle du thread d'arrière-plan
+        reset: Remet l'état à vide ; appelée verrou tenu, au premier usage
+            dans le processus (donc aussi après un fork)
+        flush: Écrit les cumuls en base
+        has_pending: Indique s'il reste des cumuls à écrire
+    """
+
+    def __init__(self, name, run, reset, flush, has_pending):
+        self.name = name
+        self.lock = threading.Lock()
+        self._run = run
+        self._reset = reset
+        self._flush = flush
+        self._has_pending = has_pending
+        self._pid = None
+        self._worker = None
+        atexit.register(self._flush_at_exit)
+
+    def ensure_process(self):
+        """Réinitialise l'état s'il a été créé par un autre processus (fork)."""
+        if self._pid != os.getpid():
+            with self.lock:
+                if self._pid != os.getpid():
+                    self._reset()
+                    self._worker = None
+                    self._pid = os.getpid()
+
+    def ensure_worker(self):
+        """Démarre le thread d'arrière-plan du processus s'il ne tourne pas encore."""
+        self.ensure_process()
+        if self._worker is None:
+            with self.lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    self._worker.start()
+
+    def safe_flush(self, error_message):
+        """Vidage depuis le thread d'arrière-plan : les erreurs sont journalisées, pas propagées."""
+        try:
+            self._flush()
+        except Exception as e:
+            log_error(error_message % {'error': e}, exc_info=True)
+        finally:
+            connections.close_all()
+
+    def _flush_at_exit(self):
+        if self._pid == os.getpid() and self._has_pending():
+            try:
+                self._flush()
+            except Exception:
+                pass
+
+
+def add_to_row(model, lookup, changes, defaults):
+    """
+    Applique ``changes`` (expressions ``F``…) à la ligne ``lookup`` de
+    ``model``, ou la crée avec ``defaults`` si elle n'existe pas encore.
+
+    ``lookup`` doit correspondre à une contrainte d'unicité : si un autre
+    processus crée la ligne entre-temps, la mise à jour est rejouée.
+    """
+    rows = model.objects.filter(**lookup)
+    if rows.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **defaults)
+    except IntegrityError:
+        # Ligne créée entre-temps par un autre processus
+        rows.update(**changes)
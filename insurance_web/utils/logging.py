@@ -20,29 +20,34 @@ def get_logger(name: Optional[str] = None) -> logging.Logger:
     return logger
 
 
-def log_info(message: str, extra: Optional[dict] = None) -> None:
-    """Log un message d'information"""
-    logger.info(message, extra=extra or {})
+def log_info(message: str, *args, extra: Optional[dict] = None) -> None:
+    """
+    Log un message d'information.
+    
+    Les ``args`` sont interpolés (``message % args``) seulement si le message
+    est effectivement émis, par le thread du QueueListener.
+    """
+    logger.info(message, *args, extra=extra or {}, stacklevel=2)
 
 
-def log_warning(message: str, extra: Optional[dict] = None) -> None:
+def log_warning(message: str, *args, extra: Optional[dict] = None) -> None:
     """Log un message d'avertissement"""
-    logger.warning(message, extra=extra or {})
+    logger.warning(message, *args, extra=extra or {}, stacklevel=2)
 
 
-def log_error(message: str, exc_info: bool = False, extra: Optional[dict] = None) -> None:
+def log_error(message: str, *args, exc_info: bool = False, extra: Optional[dict] = None) -> None:
     """
     Log un message d'erreur.
     
     Args:
-        message: Message d'erreur
+        message: Message d'erreur (éventuellement avec des ``%s`` interpolés avec ``args``)
         exc_info: Si True, inclut la traceback complète
         extra: Contexte supplémentaire (user_id, request_path, etc.)
     """
-    logger.error(message, exc_info=exc_info, extra=extra or {})
+    logger.error(message, *args, exc_info=exc_info, extra=extra or {}, stacklevel=2)
 
 
-def log_critical(message: str, exc_info: bool = True, extra: Optional[dict] = None) -> None:
+def log_critical(message: str, *args, exc_info: bool = True, extra: Optional[dict] = None) -> None:
     """
     Log un message critique (erreur grave).
     
@@ -51,7 +56,7 @@ def log_critical(message: str, exc_info: bool = True, extra: Optional[dict] = No
         exc_info: Si True, inclut la traceback complète
         extra: Contexte supplémentaire
     """
-    logger.critical(message, exc_info=exc_info, extra=extra or {})
+    logger.critical(message, *args, exc_info=exc_info, extra=extra or {}, stacklevel=2)
 
 
 def log_user_action(user, action: str, details: Optional[dict] = None) -> None:
@@ -70,7 +75,7 @@ def log_user_action(user, action: str, details: Optional[dict] = None) -> None:
     }
     if details:
         extra.update(details)
-    logger.info(f"User action: {action}", extra=extra)
+    logger.info("User action: %s", action, extra=extra)
 
 
 def log_prediction(user, predicted_amount: float, form_data: dict) -> None:
@@ -89,7 +94,7 @@ def log_prediction(user, predicted_amount: float, form_data: dict) -> None:
 def log_appointment(appointment, action: str = 'created') -> None:
     """Log une action sur un rendez-vous"""
     logger.info(
-        f"Appointment {action}",
+        "Appointment %s", action,
         extra={
             'appointment_id': appointment.id,
             'conseiller_id': appointment.conseiller.id,
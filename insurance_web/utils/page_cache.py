@@ -0,0 +1,137 @@
+"""
+Cache de pages entières pour les visiteurs anonymes (accueil, connexion, inscription).
+
+La clé combine le chemin (préfixe de langue compris), les seuls paramètres
+de requête déclarés par la vue (``query_params``), la langue active et une
+génération globale. Les autres paramètres ne changent pas la page : ils
+n'entrent pas dans la clé et ne créent pas de nouvelles entrées.
+``invalidate_page_cache()`` incrémente la génération, ce qui rend toutes les
+pages (et fragments) en cache inaccessibles d'un coup ; les anciennes entrées expirent ensuite d'elles-mêmes.
+
+Le jeton CSRF est différent pour chaque visiteur : il est remplacé par un
+marqueur avant la mise en cache, puis par le jeton du visiteur au moment de
+servir la page (« hole punching »). Les réponses sont marquées
+``Cache-Control: private`` et ``Vary: Cookie, Accept-Language``.
+"""
+import hashlib
+import re
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.translation import get_language
+
+from ..metrics import record_cache_lookup
+
+GENERATION_KEY = 'page_cache:generation'
+CSRF_PLACEHOLDER = '__CSRF_TOKEN_HOLE__'
+_CSRF_INPUT = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+# En-têtes rejoués depuis le cache (Set-Cookie et Vary sont recalculés)
+_CACHED_HEADERS = ('Content-Type', 'Content-Language', 'Cache-Control', 'Expires', 'X-Frame-Options')
+
+
+def _options():
+    return getattr(settings, 'PAGE_CACHE', {})
+
+
+def _cache():
+    return caches[_options().get('CACHE', 'default')]
+
+
+def get_generation():
+    """
+    Génération courante des pages en cache (clé de version).
+
+    Initialisée à l'horodatage courant : si la clé est évincée, la nouvelle
+    génération ne retombe pas sur une ancienne.
+    """
+    return _cache().get_or_set(GENERATION_KEY, lambda: int(time.time()), timeout=None)
+
+
+def fragment_cache_context():
+    """Variables des fragments ``{% cache page_cache_timeout nom … page_cache_generation %}``."""
+    options = _options()
+    return {
+        'page_cache_timeout': options.get('TIMEOUT', 300) if options.get('ENABLED', True) else 0,
+        'page_cache_generation': get_generation(),
+    }
+
+
+def invalidate_page_cache():
+    """Invalide toutes les pages et fragments anonymes/conseillers en cache."""
+    cache = _cache()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, int(time.time()), timeout=None)
+
+
+def _page_key(request, query_params=()):
+    params = sorted((name, value) for name in query_params for value in request.GET.getlist(name))
+    digest = hashlib.sha256(repr((request.path, params)).encode('utf-8')).hexdigest()
+    return f'page_cache:{get_language()}:{digest}'
+
+
+def _is_cacheable_request(request):
+    if request.method not in ('GET', 'HEAD') or request.user.is_authenticated:
+        return False
+    # Un message flash en attente rend la page propre à ce visiteur
+    return not len(get_messages(request))
+
+
+def _store(request, response, generation, query_params):
+    if hasattr(response, 'render') and callable(response.render):
+        response.render()
+    # Seul le cookie CSRF (posé par csrf_protect sur LoginView) est propre au visiteur et reposé à la lecture
+    cookies = set(response.cookies) - {settings.CSRF_COOKIE_NAME}
+    if response.status_code != 200 or response.streaming or cookies:
+        return
+    content = _CSRF_INPUT.sub(rf'\g<1>{CSRF_PLACEHOLDER}\g<2>', response.content.decode(response.charset))
+    headers = {name: response[name] for name in _CACHED_HEADERS if name in response}
+    _cache().set(_page_key(request, query_params), (content, headers), _options().get('TIMEOUT', 300), version=generation)
+
+
+def _finalize(response):
+    patch_vary_headers(response, ('Cookie', 'Accept-Language'))
+    patch_cache_control(response, private=True)
+    return response
+
+
+def cache_anonymous_page(view_func=None, *, query_params=()):
+    """
+    Sert la page depuis le cache aux visiteurs anonymes (GET/HEAD, réponse 200
+    sans cookie posé par la vue) ; les utilisateurs connectés passent toujours
+    par la vue. Désactivé par ``PAGE_CACHE['ENABLED'] = False``.
+
+    ``query_params`` liste les paramètres de requête qui changent le rendu de
+    la page ; les autres sont ignorés dans la clé. Utilisable aussi sous la
+    forme ``cache_anonymous_page(query_params=('page',))(vue)``.
+    """
+    if view_func is None:
+        return lambda func: cache_anonymous_page(func, query_params=query_params)
+
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        if not _options().get('ENABLED', True) or not _is_cacheable_request(request):
+            return view_func(request, *args, **kwargs)
+
+        generation = get_generation()
+        cached = _cache().get(_page_key(request, query_params), version=generation)
+        record_cache_lookup('page', hit=cached is not None)
+        if cached is not None:
+            content, headers = cached
+            response = HttpResponse(content.replace(CSRF_PLACEHOLDER, get_token(request)))
+            for name, value in headers.items():
+                response[name] = value
+            return _finalize(response)
+
+        response = view_func(request, *args, **kwargs)
+        _store(request, response, generation, query_params)
+        return _finalize(response)
+    return _wrapped_view
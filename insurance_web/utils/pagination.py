@@ -0,0 +1,138 @@
+"""
+Pagination par curseur (keyset) sur une clé de tri unique, par ex. ``(created_at, id)``.
+
+Contrairement à OFFSET, chaque page est obtenue par une condition
+``(created_at, id) < (dernière valeur vue)`` qui utilise directement l'index :
+le coût d'une page ne dépend pas de sa profondeur.
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+from django.http import JsonResponse
+
+
+class InvalidCursor(ValueError):
+    """Le curseur fourni ne peut pas être décodé."""
+    pass
+
+
+def _serialize_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(values):
+    """Encode les valeurs de clé de la dernière ligne vue en curseur opaque (URL-safe)."""
+    raw = json.dumps([_serialize_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """Décode un curseur ; lève InvalidCursor s'il est malformé."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursor(str(e))
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor("Cursor does not match the ordering keys")
+    return values
+
+
+def _keyset_condition(keys, values):
+    """Condition « strictement après » pour un tri multi-colonnes : (a, b) > (va, vb)."""
+    clauses = []
+    for i, key in enumerate(keys):
+        field = key.lstrip('-')
+        lookup = 'lt' if key.startswith('-') else 'gt'
+        equal = {k.lstrip('-'): values[j] for j, k in enumerate(keys[:i])}
+        clauses.append(Q(**equal, **{f'{field}__{lookup}': values[i]}))
+    return reduce(or_, clauses)
+
+
+class KeysetPage:
+    """Une page de résultats ; se comporte comme une liste dans les templates."""
+
+    def __init__(self, object_list, next_cursor, cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.cursor = cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def is_first(self):
+        return self.cursor is None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+
+def paginate_keyset(queryset, keys=('-created_at', '-id'), cursor=None, per_page=20):
+    """
+    Retourne une page de ``queryset`` trié selon ``keys``, après ``cursor``.
+
+    Args:
+        queryset: QuerySet à paginer (instances ou ``.values()``)
+        keys: Champs de tri, le dernier doit être unique (``id``) ; préfixe ``-`` pour décroissant
+        cursor: Curseur retourné par la page précédente (None pour la première page)
+        per_page: Taille de page
+
+    Returns:
+        KeysetPage: Page avec ``next_cursor`` (None s'il n'y a plus de résultats)
+
+    Raises:
+        InvalidCursor: Si le curseur est malformé
+    """
+    keys = tuple(keys)
+    queryset = queryset.order_by(*keys)
+    if cursor:
+        queryset = queryset.filter(_keyset_condition(keys, decode_cursor(cursor, len(keys))))
+
+    rows = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        fields = [key.lstrip('-') for key in keys]
+        if isinstance(last, dict):
+            next_cursor = encode_cursor([last[f] for f in fields])
+        else:
+            next_cursor = encode_cursor([getattr(last, f) for f in fields])
+    return KeysetPage(rows, next_cursor, cursor=cursor or None)
+
+
+def keyset_json_response(queryset, request, serialize, keys=('-created_at', '-id'), per_page=20):
+    """
+    Réponse JSON « charger plus » : ``{"items": [...], "next_cursor": ...}``.
+
+    Le curseur est lu dans ``?cursor=`` ; un curseur invalide renvoie une 400.
+    """
+    try:
+        page = paginate_keyset(queryset, keys, request.GET.get('cursor'), per_page)
+    except InvalidCursor:
+        return JsonResponse({'error': 'invalid cursor'}, status=400)
+    return JsonResponse({
+        'items': [serialize(obj) for obj in page],
+        'next_cursor': page.next_cursor,
+    })
@@ -0,0 +1,158 @@
+"""
+Profilage à la demande d'une requête : durées par section, cProfile et piles échantillonnées.
+
+Les sections (``profile_section('ml_predict')``) ne coûtent qu'une lecture de
+ContextVar quand aucune requête n'est profilée.
+"""
+import cProfile
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current_profile = ContextVar('request_profile', default=None)
+
+# cProfile s'appuie sur sys.monitoring (Python 3.12) : un seul profileur actif par processus
+_cprofile_lock = threading.Lock()
+
+
+class RequestProfile:
+    """Durées cumulées (ms) par section pour une requête profilée."""
+
+    def __init__(self):
+        self.timings = Counter()
+        self.counts = Counter()
+
+    def add(self, name, duration_ms):
+        self.timings[name] += duration_ms
+        self.counts[name] += 1
+
+    @contextmanager
+    def section(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - start) * 1000)
+
+
+@contextmanager
+def activate_profile(profile):
+    """Rend ``profile`` courant pour le contexte (thread ou tâche asyncio) en cours."""
+    token = _current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _current_profile.reset(token)
+
+
+def get_current_profile():
+    return _current_profile.get()
+
+
+@contextmanager
+def profile_section(name):
+    """Chronomètre le bloc dans le profil de la requête courante, s'il y en a un."""
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+    with profile.section(name):
+        yield
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Échantillonne la pile d'un thread à intervalle fixe et agrège les piles
+    au format « collapsed » (``a;b;c 12``) attendu par flamegraph.pl / speedscope.
+    """
+
+    def __init__(self, thread_id=None, interval=0.005):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._sample, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+
+class CodeProfiler:
+    """
+    Profileur d'un bloc de code, au format ``cprofile`` (fichier .prof, lisible
+    par pstats / snakeviz / flameprof) ou ``collapsed`` (piles échantillonnées).
+
+    Si un autre cProfile est déjà actif dans le processus, le bloc n'est pas
+    profilé (``active`` vaut False) : seules les durées par section sont relevées.
+    """
+
+    extensions = {'cprofile': 'prof', 'collapsed': 'folded'}
+
+    def __init__(self, output='cprofile', interval=0.005):
+        if output not in self.extensions:
+            raise ValueError(f"Unknown profiling output: {output}")
+        self.output = output
+        self.interval = interval
+        self.active = False
+        self._profiler = None
+
+    def __enter__(self):
+        if self.output == 'cprofile':
+            if _cprofile_lock.acquire(blocking=False):
+                self._profiler = cProfile.Profile()
+                self._profiler.enable()
+                self.active = True
+        else:
+            self._profiler = StackSampler(interval=self.interval)
+            self._profiler.start()
+            self.active = True
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if not self.active:
+            return
+        if self.output == 'cprofile':
+            self._profiler.disable()
+            _cprofile_lock.release()
+        else:
+            self._profiler.stop()
+
+    def dump(self, path_without_extension):
+        """Écrit le profil et retourne le chemin du fichier (None si le bloc n'a pas été profilé)."""
+        if not self.active:
+            return None
+        path = f'{path_without_extension}.{self.extensions[self.output]}'
+        if self.output == 'cprofile':
+            self._profiler.dump_stats(path)
+        else:
+            self._profiler.write(path)
+        return path
@@ -0,0 +1,126 @@
+"""
+Instrumentation des requêtes SQL : comptage, durée et détection des N+1.
+
+Deux requêtes ont la même « forme » si elles ne diffèrent que par leurs
+paramètres ou la longueur d'une liste ``IN (...)``. Une même forme exécutée
+de nombreuses fois dans une requête HTTP signale presque toujours un accès
+à une relation dans une boucle (``appointment.client`` sans ``select_related``).
+"""
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.db import connections
+
+_IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?|\$\d+)\s*,?)+\)', re.IGNORECASE)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?\b')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    """
+    Forme normalisée d'une requête : littéraux remplacés par ``?`` et listes
+    ``IN (...)`` réduites, pour regrouper les requêtes qui ne diffèrent que
+    par leurs valeurs.
+    """
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _WHITESPACE_RE.sub(' ', sql).strip()
+
+
+_active_counters = ContextVar('query_counters', default=())
+
+
+def _count_query(execute, sql, params, many, context):
+    for counter in _active_counters.get():
+        counter.count += 1
+    return execute(sql, params, many, context)
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """
+    Récepteur de ``connection_created`` : ajoute le compteur de ``QueryCounter``
+    à chaque connexion, une fois pour toutes.
+
+    Placé en tête de ``execute_wrappers`` : ``execute_wrapper()`` retire le
+    dernier élément de la liste en sortie de bloc, il ne doit pas être retiré
+    à la place d'un ``QueryRecorder``.
+    """
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _count_query)
+
+
+class QueryCounter:
+    """
+    Compte les requêtes exécutées pendant un bloc ``with``, sans rien
+    conserver d'autre : coût négligeable, utilisable sur chaque requête HTTP.
+
+    Le compteur actif est porté par une ContextVar, que ``sync_to_async``
+    transmet au thread qui exécute le code synchrone : sous ASGI, les
+    requêtes faites sur les connexions de ce thread sont comptées.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._token = None
+
+    def __enter__(self):
+        self._token = _active_counters.set(_active_counters.get() + (self,))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _active_counters.reset(self._token)
+        self._token = None
+
+
+class QueryRecorder:
+    """
+    Enregistre les requêtes exécutées sur toutes les connexions pendant un bloc ``with``.
+
+    Utilise ``connection.execute_wrapper`` : fonctionne aussi avec ``DEBUG=False``
+    et ne conserve que la forme normalisée et la durée de chaque requête.
+    """
+
+    def __init__(self, using=None):
+        self.using = using
+        self.queries = []
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((normalize_sql(sql), (time.perf_counter() - start) * 1000))
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        aliases = [self.using] if self.using else list(connections)
+        for alias in aliases:
+            self._stack.enter_context(connections[alias].execute_wrapper(self))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stack.close()
+        self._stack = None
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def duration_ms(self):
+        return sum(duration for _shape, duration in self.queries)
+
+    def shapes(self):
+        """Counter forme -> nombre d'exécutions."""
+        return Counter(shape for shape, _duration in self.queries)
+
+    def repeated(self, threshold):
+        """Formes exécutées au moins ``threshold`` fois, de la plus fréquente à la moins fréquente."""
+        return [(shape, count) for shape, count in self.shapes().most_common() if count >= threshold]
@@ -1,12 +1,14 @@
 from .base import HomeView, SignupView, LogoutView
 from .user_views import (
     ProfileView,
+    ProfilePredictionsMoreView,
     EditProfileView,
     PredictView,
     ConseillersListView,
     ConseillerAvailabilityView,
     CreateAppointmentView,
     MyAppointmentsView,
+    MyAppointmentsMoreView,
     AppointmentDetailView,
     CancelAppointmentView,
     RescheduleAppointmentView,
@@ -19,11 +21,18 @@ from .conseiller_views import (
     AddUnavailabilityView,
     DeleteUnavailabilityView,
     ConseillerClientsListView,
+    ClientSearchView,
+    ClientAutocompleteView,
+    ConseillerSensitivityView,
+    ConseillerPortfolioProjectionView,
     ConseillerClientDetailView,
+    ConseillerClientHistoryMoreView,
     ConseillerCreateAppointmentView,
     DeletePredictionView,
     RemoveClientView,
     NotificationListView,
+    NotificationListMoreView,
+    NotificationStreamView,
     MarkNotificationReadView,
     MarkAllNotificationsReadView,
     AcceptAppointmentView,
@@ -31,24 +40,30 @@ from .conseiller_views import (
 )
 from .admin_views import (
     AdminDashboardView,
+    AdminStatsView,
+    AdminDriftView,
     AdminUserManagementView,
     AdminChangeUserRoleView,
     AdminToggleUserStatusView,
     AdminDeleteUserView,
     PricingConfigurationView,
 )
+from .export_views import ExportView
+from .metrics_views import MetricsView
 
 __all__ = [
     'HomeView',
     'SignupView',
     'LogoutView',
     'ProfileView',
+    'ProfilePredictionsMoreView',
     'EditProfileView',
     'PredictView',
     'ConseillersListView',
     'ConseillerAvailabilityView',
     'CreateAppointmentView',
     'MyAppointmentsView',
+    'MyAppointmentsMoreView',
     'AppointmentDetailView',
     'CancelAppointmentView',
     'RescheduleAppointmentView',
@@ -59,19 +74,30 @@ __all__ = [
     'AddUnavailabilityView',
     'DeleteUnavailabilityView',
     'ConseillerClientsListView',
+    'ClientSearchView',
+    'ClientAutocompleteView',
+    'ConseillerSensitivityView',
+    'ConseillerPortfolioProjectionView',
     'ConseillerClientDetailView',
+    'ConseillerClientHistoryMoreView',
     'ConseillerCreateAppointmentView',
     'DeletePredictionView',
     'RemoveClientView',
     'NotificationListView',
+    'NotificationListMoreView',
+    'NotificationStreamView',
     'MarkNotificationReadView',
     'MarkAllNotificationsReadView',
     'AcceptAppointmentView',
     'RejectAppointmentView',
     'AdminDashboardView',
+    'AdminStatsView',
+    'AdminDriftView',
     'AdminUserManagementView',
     'AdminChangeUserRoleView',
     'AdminToggleUserStatusView',
     'AdminDeleteUserView',
     'PricingConfigurationView',
+    'ExportView',
+    'MetricsView',
 ]
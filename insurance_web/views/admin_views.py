@@ -1,14 +1,19 @@
+from datetime import timedelta
+
 from django.views.generic import TemplateView, FormView, ListView
 from django.shortcuts import redirect, get_object_or_404
 from django.contrib import messages
 from django.urls import reverse_lazy
 from django.core.exceptions import PermissionDenied
+from django.utils import timezone
 from django.utils.translation import gettext as _
 
 from ..models import User, Appointment, Prediction, PricingConfiguration
 from ..forms import AdminUserManagementForm, AdminUserRoleForm, PricingConfigurationForm
 from ..utils.mixins import AdminRequiredMixin, UserProfileMixin, ConseillerRequiredMixin
 from ..permissions import check_not_self_action
+from ..services.analytics_service import get_snapshot_stats
+from ..services.drift_service import drift_report
 
 
 class AdminDashboardView(AdminRequiredMixin, UserProfileMixin, FormView):
@@ -38,6 +43,35 @@ class AdminDashboardView(AdminRequiredMixin, UserProfileMixin, FormView):
         return context
 
 
+class AdminStatsView(AdminRequiredMixin, UserProfileMixin, TemplateView):
+    """Distribution des primes, lue depuis l'instantané colonnaire (pas de GROUP BY sur la base)."""
+    template_name = 'admin/stats.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['stats'] = get_snapshot_stats()
+        return context
+
+
+class AdminDriftView(AdminRequiredMixin, UserProfileMixin, TemplateView):
+    """Dérive des entrées et des primes prédites (PSI par rapport à la référence)."""
+    template_name = 'admin/drift.html'
+    DAY_CHOICES = (1, 7, 30, 90)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        try:
+            days = int(self.request.GET.get('days', 7))
+        except ValueError:
+            days = 7
+        if days not in self.DAY_CHOICES:
+            days = 7
+        context['days'] = days
+        context['day_choices'] = self.DAY_CHOICES
+        context['drift'] = drift_report(since=timezone.localdate() - timedelta(days=days - 1))
+        return context
+
+
 class AdminUserManagementView(AdminRequiredMixin, UserProfileMixin, ListView):
     template_name = 'admin/user_management.html'
     context_object_name = 'users'
@@ -4,12 +4,12 @@ from django.urls import reverse
 from django.contrib import messages
 from django.utils import timezone
 from django.utils.translation import gettext as _
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from datetime import datetime, timedelta
 from calendar import monthrange
 
 from ..models import User, Appointment, Prediction, ConseillerUnavailability
-from ..forms import PredictionForm, AppointmentForm, UnavailabilityForm
+from ..forms import PredictionForm, AppointmentForm, UnavailabilityForm, ClientSearchForm, SensitivityForm
 from ..services import (
     calculate_insurance_premium,
     create_prediction,
@@ -29,7 +29,21 @@ from ..services.notification_service import (
     mark_notification_as_read,
     mark_all_notifications_as_read
 )
+from ..realtime import notification_event_stream
+from ..services.advisor_client_service import is_advisor_client
+from ..services.projection_service import client_projection, portfolio_projection
+from ..services.sensitivity_service import sensitivity_grid
+from ..services.search_service import (
+    ORDERING,
+    PAGE_SIZE,
+    TYPEAHEAD_LIMIT,
+    client_scope,
+    search_clients,
+    typeahead_clients,
+)
 from ..utils.mixins import ConseillerRequiredMixin, UserProfileMixin
+from ..utils.pagination import paginate_keyset, keyset_json_response, InvalidCursor
+from .serializers import serialize_appointment, serialize_prediction, serialize_notification, serialize_client
 from ..exceptions import (
     PredictionError,
     InvalidPredictionDataError,
@@ -53,11 +67,11 @@ class ConseillerDashboardView(ConseillerRequiredMixin, UserProfileMixin, Templat
             ).exclude(status='cancelled').count()
             next_appointments = Appointment.objects.filter(
                 date_time__gte=timezone.now()
-            ).exclude(status='cancelled').order_by('date_time')[:5]
+            ).exclude(status='cancelled').select_related('client').order_by('date_time')[:5]
             pending_appointments = Appointment.objects.filter(
                 status='pending',
                 date_time__gte=timezone.now()
-            ).order_by('date_time')[:10]
+            ).select_related('client').order_by('date_time')[:10]
         else:
             total_appointments = Appointment.objects.filter(conseiller=conseiller).exclude(status='cancelled').count()
             upcoming_appointments = Appointment.objects.filter(
@@ -67,12 +81,12 @@ class ConseillerDashboardView(ConseillerRequiredMixin, UserProfileMixin, Templat
             next_appointments = Appointment.objects.filter(
                 conseiller=conseiller,
                 date_time__gte=timezone.now()
-            ).exclude(status='cancelled').order_by('date_time')[:5]
+            ).exclude(status='cancelled').select_related('client').order_by('date_time')[:5]
             pending_appointments = Appointment.objects.filter(
                 conseiller=conseiller,
                 status='pending',
                 date_time__gte=timezone.now()
-            ).order_by('date_time')[:10]
+            ).select_related('client').order_by('date_time')[:10]
         
         # Compter les notifications non lues
         unread_notifications_count = get_unread_notifications_count(conseiller)
@@ -99,23 +113,6 @@ class ConseillerPredictView(ConseillerRequiredMixin, UserProfileMixin, FormView)
             self.client = None
         return super().dispatch(request, *args, **kwargs)
     
-    def get_available_clients(self):
-        """Récupère la liste des clients disponibles pour ce conseiller"""
-        conseiller = self.request.user
-        if conseiller.profile.is_admin():
-            # Les admins peuvent prédire pour tous les utilisateurs sauf les conseillers et admins
-            return User.objects.exclude(id=conseiller.id).exclude(
-                profile__role__in=['conseiller', 'admin']
-            ).order_by('first_name', 'last_name', 'email')
-        else:
-            # Les conseillers ne peuvent prédire que pour leurs clients (ceux avec qui ils ont des rendez-vous)
-            # Utiliser values_list pour éviter les doublons, puis récupérer les utilisateurs
-            client_ids = Appointment.objects.filter(
-                conseiller=conseiller
-            ).values_list('client_id', flat=True).distinct()
-            
-            return User.objects.filter(id__in=client_ids).order_by('first_name', 'last_name', 'email')
-    
     def get_initial(self):
         initial = {}
         if self.client and self.client.profile:
@@ -136,9 +133,11 @@ class ConseillerPredictView(ConseillerRequiredMixin, UserProfileMixin, FormView)
             messages.error(self.request, _('Please select a client.'))
             return self.form_invalid(form)
         
-        try:
-            selected_client = User.objects.get(id=client_id)
-        except User.DoesNotExist:
+        selected_client = None
+        if str(client_id).isdigit():
+            # Même périmètre que le sélecteur : on ne prédit que pour ses propres clients
+            selected_client = client_scope(self.request.user, include_admins=False).filter(pk=client_id).first()
+        if selected_client is None:
             messages.error(self.request, _('Selected client does not exist.'))
             return self.form_invalid(form)
         
@@ -196,7 +195,8 @@ class ConseillerPredictView(ConseillerRequiredMixin, UserProfileMixin, FormView)
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['client'] = self.client
-        context['available_clients'] = self.get_available_clients()
+        # Le sélecteur charge les clients à la demande (ClientAutocompleteView)
+        context['has_clients'] = client_scope(self.request.user, include_admins=False).exists()
         
         if self.request.method == 'POST':
             form = self.get_form()
@@ -219,16 +219,6 @@ class ConseillerPredictView(ConseillerRequiredMixin, UserProfileMixin, FormView)
         return context
 
 
-def _get_calendar_clients(conseiller):
-    """Clients avec lesquels le conseiller peut créer un RDV (pour le calendrier)."""
-    if conseiller.profile.is_admin():
-        return User.objects.exclude(id=conseiller.id).exclude(
-            profile__role__in=('conseiller', 'admin')
-        ).order_by('first_name', 'last_name', 'email')
-    client_ids = Appointment.objects.filter(conseiller=conseiller).values_list('client_id', flat=True).distinct()
-    return User.objects.filter(id__in=client_ids).order_by('first_name', 'last_name', 'email')
-
-
 class ConseillerCalendarView(ConseillerRequiredMixin, UserProfileMixin, TemplateView):
     template_name = 'conseiller/calendar.html'
     
@@ -254,7 +244,6 @@ class ConseillerCalendarView(ConseillerRequiredMixin, UserProfileMixin, Template
             'prev_week': week_start - timedelta(days=7),
             'next_week': week_start + timedelta(days=7),
             'today': today,
-            'calendar_clients': _get_calendar_clients(conseiller),
         })
         return context
 
@@ -285,7 +274,7 @@ class ConseillerCalendarCreateAppointmentView(ConseillerRequiredMixin, UserProfi
             messages.error(request, _('You cannot create an appointment with another advisor or admin.'))
             return _calendar_redirect(week_start=week_start)
         if not conseiller.profile.is_admin():
-            if not Appointment.objects.filter(conseiller=conseiller, client=client).exists():
+            if not is_advisor_client(conseiller, client):
                 messages.error(request, _('You can only create appointments with your existing clients.'))
                 return _calendar_redirect(week_start=week_start)
 
@@ -391,37 +380,95 @@ class DeleteUnavailabilityView(ConseillerRequiredMixin, View):
 
 
 class ConseillerClientsListView(ConseillerRequiredMixin, UserProfileMixin, TemplateView):
+    """
+    Clients du conseiller (tous les utilisateurs hors conseillers pour un admin),
+    filtrés par ``ClientSearchForm`` et paginés par curseur.
+    """
     template_name = 'conseiller/clients_list.html'
+    per_page = PAGE_SIZE
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        conseiller = self.request.user
-        
-        if conseiller.profile.is_admin():
-            # Les admins voient tous les clients avec rendez-vous et tous les utilisateurs
-            clients_with_appointments = User.objects.filter(
-                appointments_as_client__isnull=False
-            ).distinct()
-            all_users = User.objects.exclude(id=conseiller.id).exclude(profile__role='conseiller')
-            context.update({
-                'clients': clients_with_appointments,
-                'all_users': all_users,
-            })
-        else:
-            # Les conseillers ne voient que leurs clients (ceux avec qui ils ont des rendez-vous)
-            client_ids = Appointment.objects.filter(
-                conseiller=conseiller
-            ).values_list('client_id', flat=True).distinct()
-            
-            clients_with_appointments = User.objects.filter(id__in=client_ids).order_by('first_name', 'last_name', 'email')
-            context.update({
-                'clients': clients_with_appointments,
-                'all_users': None,  # Pas de liste "tous les utilisateurs" pour les conseillers
-            })
+        form = ClientSearchForm(self.request.GET)
+        queryset = search_clients(self.request.user, **form.search_kwargs())
+        try:
+            clients = paginate_keyset(queryset, ORDERING, self.request.GET.get('cursor'), self.per_page)
+        except InvalidCursor:
+            clients = paginate_keyset(queryset, ORDERING, per_page=self.per_page)
         
+        params = self.request.GET.copy()
+        params.pop('cursor', None)
+        context.update({
+            'clients': clients,
+            'search_form': form,
+            'is_search': any(form.search_kwargs().values()),
+            'search_params': params.urlencode(),
+        })
         return context
 
 
+class ClientSearchView(ConseillerRequiredMixin, View):
+    """Endpoint JSON paginé de la recherche de clients (mêmes critères que la liste)."""
+    
+    def get(self, request):
+        form = ClientSearchForm(request.GET)
+        return keyset_json_response(
+            search_clients(request.user, **form.search_kwargs()), request, serialize_client,
+            keys=ORDERING, per_page=PAGE_SIZE,
+        )
+
+
+class ClientAutocompleteView(ConseillerRequiredMixin, View):
+    """
+    Suggestions du sélecteur de client (``?q=``, ``?limit=``) ; ``?bookable=1``
+    exclut les admins (clients pour lesquels on peut prédire ou réserver).
+    """
+    
+    def get(self, request):
+        try:
+            limit = int(request.GET.get('limit', TYPEAHEAD_LIMIT))
+        except ValueError:
+            limit = TYPEAHEAD_LIMIT
+        items = typeahead_clients(
+            request.user, request.GET.get('q', ''), limit=limit,
+            include_admins=request.GET.get('bookable') != '1',
+        )
+        return JsonResponse({
+            'items': [
+                dict(item, url=reverse('insurance_web:conseiller_client_detail', args=[item['id']]))
+                for item in items
+            ],
+        })
+
+
+class ConseillerSensitivityView(ConseillerRequiredMixin, View):
+    """
+    Analyse « et si… » : primes sur la grille des axes demandés autour d'un
+    profil de base (voir ``SensitivityForm``), en une seule prédiction groupée.
+    """
+
+    def get(self, request):
+        form = SensitivityForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({'errors': form.errors}, status=400)
+        try:
+            return JsonResponse(sensitivity_grid(form.base_profile(), form.axes()))
+        except InvalidPredictionDataError as e:
+            return JsonResponse({'errors': {'__all__': [str(e)]}}, status=400)
+        except (ModelNotFoundError, PredictionError) as e:
+            return JsonResponse({'errors': {'__all__': [str(e)]}}, status=503)
+
+
+class ConseillerPortfolioProjectionView(ConseillerRequiredMixin, View):
+    """Projection agrégée des primes du portefeuille (``?years=``, 10 à 30 ans)."""
+
+    def get(self, request):
+        try:
+            return JsonResponse(portfolio_projection(request.user, request.GET.get('years')))
+        except (ModelNotFoundError, PredictionError) as e:
+            return JsonResponse({'errors': {'__all__': [str(e)]}}, status=503)
+
+
 class ConseillerClientDetailView(ConseillerRequiredMixin, UserProfileMixin, TemplateView):
     """Vue pour afficher les détails d'un client avec ses prédictions"""
     template_name = 'conseiller/client_detail.html'
@@ -432,40 +479,74 @@ class ConseillerClientDetailView(ConseillerRequiredMixin, UserProfileMixin, Temp
         
         # Vérifier que le conseiller a bien des rendez-vous avec ce client
         if not conseiller.profile.is_admin():
-            has_appointment = Appointment.objects.filter(
-                conseiller=conseiller,
-                client=self.client
-            ).exists()
-            if not has_appointment:
+            if not is_advisor_client(conseiller, self.client):
                 messages.error(request, _('You do not have access to this client.'))
                 return redirect('insurance_web:conseiller_clients')
         
         return super().dispatch(request, *args, **kwargs)
     
+    predictions_per_page = 10
+    appointments_per_page = 5
+    
+    def get_predictions_queryset(self):
+        """Prédictions faites par ce conseiller pour ce client."""
+        return Prediction.objects.filter(user=self.client, created_by=self.request.user).select_related('features')
+    
+    def get_appointments_queryset(self):
+        """Rendez-vous du conseiller avec ce client."""
+        return Appointment.objects.filter(
+            conseiller=self.request.user,
+            client=self.client
+        ).select_related('conseiller')
+    
+    def _paginate(self, queryset, keys, param, per_page):
+        try:
+            return paginate_keyset(queryset, keys, self.request.GET.get(param), per_page)
+        except InvalidCursor:
+            return paginate_keyset(queryset, keys, per_page=per_page)
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        conseiller = self.request.user
-        
-        # Récupérer les prédictions faites par ce conseiller pour ce client
-        predictions = Prediction.objects.filter(
-            user=self.client,
-            created_by=conseiller
-        ).order_by('-created_at')
-        
-        # Récupérer les rendez-vous avec ce client
-        appointments = Appointment.objects.filter(
-            conseiller=conseiller,
-            client=self.client
-        ).order_by('-date_time')
-        
         context.update({
             'client': self.client,
-            'predictions': predictions,
-            'appointments': appointments,
+            'predictions': self._paginate(
+                self.get_predictions_queryset(), ('-created_at', '-id'),
+                'predictions_cursor', self.predictions_per_page,
+            ),
+            'appointments': self._paginate(
+                self.get_appointments_queryset(), ('-date_time', '-id'),
+                'appointments_cursor', self.appointments_per_page,
+            ),
         })
+        try:
+            context['projection'] = client_projection(self.client, self.request.GET.get('years'))
+        except (ModelNotFoundError, PredictionError):
+            context['projection'] = None
         return context
 
 
+class ConseillerClientHistoryMoreView(ConseillerClientDetailView):
+    """
+    Endpoint JSON « charger plus » des prédictions ou rendez-vous d'un client.
+    
+    Hérite du contrôle d'accès de ConseillerClientDetailView.
+    """
+    
+    def get(self, request, *args, **kwargs):
+        kind = kwargs['kind']
+        if kind == 'predictions':
+            return keyset_json_response(
+                self.get_predictions_queryset(), request, serialize_prediction,
+                keys=('-created_at', '-id'), per_page=self.predictions_per_page,
+            )
+        if kind == 'appointments':
+            return keyset_json_response(
+                self.get_appointments_queryset(), request, serialize_appointment,
+                keys=('-date_time', '-id'), per_page=self.appointments_per_page,
+            )
+        return JsonResponse({'error': 'unknown list'}, status=404)
+
+
 class ConseillerCreateAppointmentView(ConseillerRequiredMixin, UserProfileMixin, FormView):
     """Permet au conseiller de créer un rendez-vous avec un de ses clients."""
     form_class = AppointmentForm
@@ -479,11 +560,7 @@ class ConseillerCreateAppointmentView(ConseillerRequiredMixin, UserProfileMixin,
             messages.error(request, _('You cannot create an appointment with another advisor or admin.'))
             return redirect('insurance_web:conseiller_clients')
         if not conseiller.profile.is_admin():
-            has_appointment = Appointment.objects.filter(
-                conseiller=conseiller,
-                client=self.client
-            ).exists()
-            if not has_appointment:
+            if not is_advisor_client(conseiller, self.client):
                 messages.error(request, _('You can only create appointments with your existing clients.'))
                 return redirect('insurance_web:conseiller_clients')
         return super().dispatch(request, *args, **kwargs)
@@ -586,16 +663,14 @@ class RemoveClientView(ConseillerRequiredMixin, View):
             
             # Vérifier que le conseiller a bien des rendez-vous avec ce client
             if not conseiller.profile.is_admin():
-                appointments = Appointment.objects.filter(
-                    conseiller=conseiller,
-                    client=client
-                )
-                if not appointments.exists():
+                if not is_advisor_client(conseiller, client):
                     messages.error(request, _('You do not have access to this client.'))
                     return redirect('insurance_web:conseiller_clients')
                 
                 # Annuler tous les rendez-vous futurs
-                future_appointments = appointments.filter(
+                future_appointments = Appointment.objects.filter(
+                    conseiller=conseiller,
+                    client=client,
                     date_time__gte=timezone.now()
                 )
                 count = future_appointments.count()
@@ -623,14 +698,19 @@ class RemoveClientView(ConseillerRequiredMixin, View):
 
 class NotificationListView(UserProfileMixin, TemplateView):
     template_name = 'notifications/list.html'
+    paginate_by = 20
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         user = self.request.user
         
-        # Récupérer toutes les notifications ou seulement les non lues
+        # Récupérer toutes les notifications ou seulement les non lues (pagination par curseur)
         unread_only = self.request.GET.get('unread', 'false').lower() == 'true'
-        notifications = get_user_notifications(user, unread_only=unread_only, limit=50)
+        queryset = get_user_notifications(user, unread_only=unread_only)
+        try:
+            notifications = paginate_keyset(queryset, cursor=self.request.GET.get('cursor'), per_page=self.paginate_by)
+        except InvalidCursor:
+            notifications = paginate_keyset(queryset, per_page=self.paginate_by)
         
         # Compter les notifications non lues
         unread_count = get_unread_notifications_count(user)
@@ -643,32 +723,64 @@ class NotificationListView(UserProfileMixin, TemplateView):
         return context
 
 
+class NotificationListMoreView(UserProfileMixin, View):
+    """Endpoint JSON « charger plus » des notifications (``?cursor=&unread=true``)."""
+    
+    def get(self, request):
+        unread_only = request.GET.get('unread', 'false').lower() == 'true'
+        return keyset_json_response(
+            get_user_notifications(request.user, unread_only=unread_only),
+            request, serialize_notification, per_page=NotificationListView.paginate_by,
+        )
+
+
+class NotificationStreamView(View):
+    """
+    Flux Server-Sent Events des notifications de l'utilisateur connecté.
+    
+    Vue asynchrone : sous un serveur ASGI (uvicorn, daphne) une connexion
+    inactive n'occupe pas de thread, seulement un abonnement au broker.
+    """
+    
+    async def get(self, request):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return HttpResponse(status=401)
+        response = StreamingHttpResponse(
+            notification_event_stream(user),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
 class MarkNotificationReadView(UserProfileMixin, View):
-    """Supprime une notification lorsqu'elle est marquée comme lue (elle ne réapparaît plus)."""
+    """Marque une notification comme lue."""
     
     def post(self, request, notification_id):
         try:
             mark_notification_as_read(notification_id, request.user)
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                 return JsonResponse({'success': True})
-            messages.success(request, _('Notification supprimée.'))
+            messages.success(request, _('Notification marquée comme lue.'))
         except Exception as e:
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                 return JsonResponse({'success': False, 'error': str(e)}, status=400)
-            messages.error(request, _('Impossible de supprimer la notification : %(error)s') % {'error': e})
+            messages.error(request, _('Impossible de marquer la notification comme lue : %(error)s') % {'error': e})
         
         return redirect('insurance_web:notifications')
 
 
 class MarkAllNotificationsReadView(UserProfileMixin, View):
-    """Supprime toutes les notifications non lues (considérées comme lues)."""
+    """Marque toutes les notifications non lues comme lues."""
     
     def post(self, request):
         try:
             count = mark_all_notifications_as_read(request.user)
-            messages.success(request, _('%(count)s notification(s) supprimée(s).') % {'count': count})
+            messages.success(request, _('%(count)s notification(s) marquée(s) comme lue(s).') % {'count': count})
         except Exception as e:
-            messages.error(request, _('Impossible de supprimer les notifications : %(error)s') % {'error': e})
+            messages.error(request, _('Impossible de marquer les notifications comme lues : %(error)s') % {'error': e})
         
         return redirect('insurance_web:notifications')
 
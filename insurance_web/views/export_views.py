@@ -0,0 +1,42 @@
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, StreamingHttpResponse
+from django.views import View
+
+from ..permissions import get_roles
+from ..services.export_service import EXPORTS, FORMATS, async_stream, export_filename, export_stream
+from ..utils.mixins import ConseillerRequiredMixin
+
+
+class ExportView(ConseillerRequiredMixin, View):
+    """
+    Téléchargement en flux de l'historique (``predictions`` ou ``appointments``).
+
+    ``?format=csv|jsonl`` (défaut csv), ``?gzip=1`` pour un fichier compressé.
+    Un conseiller n'exporte que ses propres lignes ; un admin exporte tout, ou
+    les lignes d'un conseiller avec ``?advisor=<id>``. Sous ASGI, le flux est
+    servi par un itérateur asynchrone (``async_stream``).
+    """
+
+    def get(self, request, kind):
+        fmt = request.GET.get('format', 'csv')
+        if kind not in EXPORTS or fmt not in FORMATS:
+            raise Http404
+        compress = request.GET.get('gzip') in ('1', 'true')
+
+        advisor = request.user
+        if get_roles(request.user).is_admin:
+            advisor = request.GET.get('advisor') or None
+            if advisor is not None and not advisor.isdigit():
+                raise Http404
+
+        stream = export_stream(kind, fmt, advisor=advisor, compress=compress)
+        if isinstance(request, ASGIRequest):
+            stream = async_stream(stream)
+        response = StreamingHttpResponse(
+            stream,
+            content_type='application/gzip' if compress else f'{FORMATS[fmt]}; charset=utf-8',
+        )
+        response['Content-Disposition'] = f'attachment; filename="{export_filename(kind, fmt, compress)}"'
+        response['Cache-Control'] = 'no-store'
+        response['X-Accel-Buffering'] = 'no'
+        return response
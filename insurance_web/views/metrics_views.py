@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.views import View
+
+from ..metrics import default_registry
+
+
+class MetricsView(View):
+    """
+    Endpoint interne ``/metrics`` au format d'exposition Prometheus.
+
+    Accessible avec ``Authorization: Bearer <METRICS['TOKEN']>`` si un jeton est
+    configuré, sinon uniquement depuis ``METRICS['ALLOWED_IPS']``.
+    """
+
+    def get(self, request):
+        if not self._is_allowed(request):
+            return HttpResponseForbidden()
+        default_registry.flush()
+        return HttpResponse(
+            default_registry.render(),
+            content_type='text/plain; version=0.0.4; charset=utf-8',
+        )
+
+    @staticmethod
+    def _is_allowed(request):
+        options = getattr(settings, 'METRICS', {})
+        token = options.get('TOKEN')
+        if token:
+            return constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+        return request.META.get('REMOTE_ADDR') in options.get('ALLOWED_IPS', ())
@@ -0,0 +1,53 @@
+"""
+Représentations JSON compactes utilisées par les endpoints « charger plus ».
+"""
+
+
+def serialize_prediction(prediction):
+    features = prediction.features
+    return {
+        'id': prediction.id,
+        'created_at': prediction.created_at.isoformat(),
+        'predicted_amount': str(prediction.predicted_amount),
+        'age': features.age if features else None,
+        'sex': features.sex if features else None,
+        'bmi': str(features.bmi) if features and features.bmi is not None else None,
+        'children': features.children if features else None,
+        'smoker': features.smoker if features else None,
+        'region': features.region if features else None,
+    }
+
+
+def serialize_appointment(appointment):
+    return {
+        'id': appointment.id,
+        'date_time': appointment.date_time.isoformat(),
+        'duration_minutes': appointment.duration_minutes,
+        'status': appointment.status,
+        'status_display': appointment.get_status_display(),
+        'conseiller': appointment.conseiller.get_full_name() or appointment.conseiller.email,
+        'notes': appointment.notes,
+    }
+
+
+def serialize_notification(notification):
+    return {
+        'id': notification.id,
+        'type': notification.type,
+        'message': notification.message,
+        'read': notification.read,
+        'created_at': notification.created_at.isoformat(),
+        'appointment_id': notification.appointment_id,
+    }
+
+
+def serialize_client(user):
+    profile = getattr(user, 'profile', None)
+    return {
+        'id': user.id,
+        'name': user.get_full_name() or user.email,
+        'email': user.email,
+        'age': profile.age if profile else None,
+        'region': profile.region if profile else None,
+        'region_display': profile.get_region_display() if profile and profile.region else '',
+    }
@@ -19,7 +19,11 @@ from ..services import (
     cancel_appointment,
     reschedule_appointment,
 )
+from ..services.projection_service import client_projection
 from ..utils.mixins import UserProfileMixin
+from ..utils.page_cache import fragment_cache_context
+from ..utils.pagination import paginate_keyset, keyset_json_response, InvalidCursor
+from .serializers import serialize_appointment, serialize_prediction
 from ..exceptions import (
     PredictionError,
     InvalidPredictionDataError,
@@ -29,8 +33,17 @@ from ..exceptions import (
 )
 
 
+def _apply_email_preferences(profile, cleaned_data):
+    """Applique le mode d'envoi des emails ; un champ absent du formulaire conserve la valeur actuelle."""
+    for field in ('email_delivery', 'digest_interval_minutes'):
+        value = cleaned_data.get(field)
+        if value:
+            setattr(profile, field, value)
+
+
 class ProfileView(UserProfileMixin, TemplateView):
     template_name = 'authentification/profile.html'
+    paginate_by = 10
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -38,12 +51,20 @@ class ProfileView(UserProfileMixin, TemplateView):
         context['profile'] = self.request.user.profile
         context['edit_mode'] = self.request.GET.get('edit', 'false').lower() == 'true'
         
-        predictions = Prediction.objects.filter(user=self.request.user).order_by('-created_at')
+        # Pagination par curseur (created_at, id) : coût constant quelle que soit la page
+        predictions = Prediction.objects.filter(user=self.request.user).select_related('created_by')
+        try:
+            context['predictions'] = paginate_keyset(
+                predictions, cursor=self.request.GET.get('cursor'), per_page=self.paginate_by
+            )
+        except InvalidCursor:
+            context['predictions'] = paginate_keyset(predictions, per_page=self.paginate_by)
         
-        from django.core.paginator import Paginator
-        paginator = Paginator(predictions, 10)
-        page_number = self.request.GET.get('page', 1)
-        context['predictions'] = paginator.get_page(page_number)
+        if not context['edit_mode']:
+            try:
+                context['projection'] = client_projection(self.request.user, self.request.GET.get('years'))
+            except (ModelNotFoundError, PredictionError):
+                context['projection'] = None
         
         if context['edit_mode']:
             profile = self.request.user.profile
@@ -59,6 +80,8 @@ class ProfileView(UserProfileMixin, TemplateView):
                 'smoker': profile.smoker,
                 'region': profile.region,
                 'additional_info': profile.additional_info,
+                'email_delivery': profile.email_delivery,
+                'digest_interval_minutes': profile.digest_interval_minutes,
             }
             context['form'] = ProfileForm(initial=initial_data, user=self.request.user)
         else:
@@ -82,6 +105,7 @@ class ProfileView(UserProfileMixin, TemplateView):
                 if field in form.cleaned_data:
                     value = form.cleaned_data[field]
                     setattr(profile, field, value)
+            _apply_email_preferences(profile, form.cleaned_data)
             if profile.height and profile.weight and profile.height > 0:
                 from decimal import Decimal
                 profile.bmi = Decimal(str(float(profile.weight) / (float(profile.height) ** 2))).quantize(Decimal('0.01'))
@@ -96,6 +120,16 @@ class ProfileView(UserProfileMixin, TemplateView):
             return self.render_to_response(context)
 
 
+class ProfilePredictionsMoreView(UserProfileMixin, View):
+    """Endpoint JSON « charger plus » de l'historique des prédictions du profil."""
+    
+    def get(self, request):
+        predictions = Prediction.objects.filter(user=request.user).select_related('features')
+        return keyset_json_response(
+            predictions, request, serialize_prediction, per_page=ProfileView.paginate_by
+        )
+
+
 class EditProfileView(UserProfileMixin, FormView):
     form_class = ProfileForm
     template_name = 'authentification/edit_profile.html'
@@ -111,6 +145,8 @@ class EditProfileView(UserProfileMixin, FormView):
             'smoker': profile.smoker,
             'region': profile.region,
             'additional_info': profile.additional_info,
+            'email_delivery': profile.email_delivery,
+            'digest_interval_minutes': profile.digest_interval_minutes,
         }
     
     def form_valid(self, form):
@@ -121,6 +157,7 @@ class EditProfileView(UserProfileMixin, FormView):
         for field in profile_field_names:
             if field in form.cleaned_data:
                 setattr(profile, field, form.cleaned_data[field])
+        _apply_email_preferences(profile, form.cleaned_data)
         if profile.height and profile.weight and profile.height > 0:
             profile.bmi = Decimal(str(float(profile.weight) / (float(profile.height) ** 2))).quantize(Decimal('0.01'))
         profile.save()
@@ -196,6 +233,12 @@ class ConseillersListView(UserProfileMixin, ListView):
     
     def get_queryset(self):
         return User.objects.filter(profile__role='conseiller')
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # La liste est rendue depuis un fragment en cache, invalidé à chaque changement de conseiller
+        context.update(fragment_cache_context())
+        return context
 
 
 class ConseillerAvailabilityView(UserProfileMixin, TemplateView):
@@ -291,22 +334,53 @@ class CreateAppointmentView(UserProfileMixin, FormView):
 
 class MyAppointmentsView(UserProfileMixin, TemplateView):
     template_name = 'my_appointments.html'
+    paginate_by = 20
+    
+    # Section -> clés de tri keyset ; chaque section a son propre curseur (?upcoming_cursor=...)
+    SECTIONS = {
+        'upcoming': ('date_time', 'id'),
+        'past': ('-date_time', '-id'),
+        'cancelled': ('-date_time', '-id'),
+    }
+    
+    @staticmethod
+    def get_section_queryset(user, section):
+        """Retourne le QuerySet (non trié) des rendez-vous d'une section."""
+        appointments = Appointment.objects.filter(client=user).select_related('conseiller')
+        if section == 'cancelled':
+            return appointments.filter(status='cancelled')
+        appointments = appointments.exclude(status='cancelled')
+        if section == 'upcoming':
+            return appointments.filter(date_time__gte=timezone.now())
+        return appointments.filter(date_time__lt=timezone.now())
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        appointments = Appointment.objects.filter(
-            client=self.request.user
-        ).exclude(status='cancelled').order_by('date_time')
-        
-        context['upcoming_appointments'] = appointments.filter(date_time__gte=timezone.now())
-        context['past_appointments'] = appointments.filter(date_time__lt=timezone.now())
-        context['cancelled_appointments'] = Appointment.objects.filter(
-            client=self.request.user,
-            status='cancelled'
-        ).order_by('-date_time')
+        for section, keys in self.SECTIONS.items():
+            queryset = self.get_section_queryset(self.request.user, section)
+            try:
+                page = paginate_keyset(
+                    queryset, keys, self.request.GET.get(f'{section}_cursor'), self.paginate_by
+                )
+            except InvalidCursor:
+                page = paginate_keyset(queryset, keys, per_page=self.paginate_by)
+            context[f'{section}_appointments'] = page
         return context
 
 
+class MyAppointmentsMoreView(UserProfileMixin, View):
+    """Endpoint JSON « charger plus » pour une section de la liste des rendez-vous."""
+    
+    def get(self, request, section):
+        if section not in MyAppointmentsView.SECTIONS:
+            raise Http404()
+        queryset = MyAppointmentsView.get_section_queryset(request.user, section)
+        return keyset_json_response(
+            queryset, request, serialize_appointment,
+            keys=MyAppointmentsView.SECTIONS[section], per_page=MyAppointmentsView.paginate_by,
+        )
+
+
 class AppointmentDetailView(UserProfileMixin, TemplateView):
     """Affiche le détail d'un rendez-vous (client, conseiller ou admin)."""
     template_name = 'appointment_detail.html'